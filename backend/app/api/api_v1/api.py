@@ -4,7 +4,7 @@ API v1 メインルーター
 
 from fastapi import APIRouter
 
-from app.api.api_v1.endpoints import projects, health, schedules, financials, applications, utilities, websocket, google_forms, database_admin
+from app.api.api_v1.endpoints import projects, health, schedules, financials, applications, utilities, websocket, google_forms, database_admin, documents
 
 api_router = APIRouter()
 api_router.include_router(health.router, prefix="/health", tags=["health"])
@@ -15,4 +15,5 @@ api_router.include_router(applications.router, prefix="/applications", tags=["ap
 api_router.include_router(utilities.router, prefix="/utils", tags=["utilities"])
 api_router.include_router(websocket.router, prefix="/realtime", tags=["websocket"])
 api_router.include_router(google_forms.router, prefix="/google-forms", tags=["google-forms"])
-api_router.include_router(database_admin.router, prefix="/admin/database", tags=["database-admin"])
\ No newline at end of file
+api_router.include_router(database_admin.router, prefix="/admin/database", tags=["database-admin"])
+api_router.include_router(documents.router, prefix="/documents", tags=["documents"])
\ No newline at end of file
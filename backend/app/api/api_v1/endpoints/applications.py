@@ -5,16 +5,17 @@
 
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.models.project import Application, ApplicationType, ApplicationStatusEnum
 from app.schemas.application import (
     ApplicationCreate, ApplicationUpdate, ApplicationResponse,
     ApplicationTypeResponse, ApplicationStatusUpdate, ApplicationWorkflowAction,
     ApplicationListResponse, AuditTrailResponse
 )
-from app.services.application_service import ApplicationService
+from app.services.application_service import AsyncApplicationService
 
 router = APIRouter()
 
@@ -25,7 +26,10 @@ async def get_applications(
     limit: int = Query(100, ge=1, le=1000, description="取得する件数"),
     project_id: Optional[int] = Query(None, description="プロジェクトIDでフィルタ"),
     status: Optional[ApplicationStatusEnum] = Query(None, description="ステータスでフィルタ"),
-    db: Session = Depends(get_db)
+    paging: str = Query("offset", regex="^(offset|cursor)$", description="ページング方式"),
+    cursor: Optional[str] = Query(None, description="次ページのカーソル（cursorモード用）"),
+    total_mode: Optional[str] = Query(None, regex="^(exact|cached|none)$", description="総件数の取得方法"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     申請一覧を取得
@@ -34,30 +38,55 @@ async def get_applications(
     - **limit**: 取得する件数（最大1000件）
     - **project_id**: プロジェクトIDでフィルタ（任意）
     - **status**: ステータスでフィルタ（任意）
+    - **paging**: `offset`（既定）または `cursor`。`cursor` では `skip` の代わりに
+      レスポンスの `next_cursor` を次回の `cursor` に渡す
+    - **total_mode**: `exact`（毎回 COUNT）、`cached`（短時間キャッシュ）、`none`（取得しない）。
+      省略時は offset モードで `exact`、cursor モードで `cached`
     """
     try:
-        service = ApplicationService(db)
-        applications = service.get_applications(
-            skip=skip, 
-            limit=limit, 
-            status=status, 
-            project_id=project_id
-        )
-        total = service.get_applications_count(status=status, project_id=project_id)
+        service = AsyncApplicationService(db)
+        
+        if paging == "cursor" or cursor:
+            applications, next_cursor = await service.get_applications_page(
+                limit=limit,
+                status=status,
+                project_id=project_id,
+                cursor=cursor
+            )
+            total_mode = total_mode or "cached"
+        else:
+            applications = await service.get_applications(
+                skip=skip, 
+                limit=limit, 
+                status=status, 
+                project_id=project_id
+            )
+            next_cursor = None
+            total_mode = total_mode or "exact"
+        
+        if total_mode == "exact":
+            total = await service.get_applications_count(status=status, project_id=project_id)
+        elif total_mode == "cached":
+            total = await service.get_applications_count_cached(status=status, project_id=project_id)
+        else:
+            total = None
         
         return ApplicationListResponse(
             applications=applications,
             total=total,
             skip=skip,
-            limit=limit
+            limit=limit,
+            next_cursor=next_cursor
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/summary", summary="申請サマリー取得")
 async def get_applications_summary(
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     申請のサマリー情報を取得
@@ -67,8 +96,8 @@ async def get_applications_summary(
     - 承認待ち件数
     """
     try:
-        service = ApplicationService(db)
-        summary = service.get_applications_summary()
+        service = AsyncApplicationService(db)
+        summary = await service.get_applications_summary()
         return summary
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -77,14 +106,14 @@ async def get_applications_summary(
 @router.get("/{application_id}", response_model=ApplicationResponse, summary="申請詳細取得")
 async def get_application(
     application_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     指定された申請IDの申請詳細を取得
     """
     try:
-        service = ApplicationService(db)
-        application = service.get_application_by_id(application_id)
+        service = AsyncApplicationService(db)
+        application = await service.get_application_by_id(application_id)
         
         if not application:
             raise HTTPException(status_code=404, detail="申請が見つかりません")
@@ -99,14 +128,14 @@ async def get_application(
 @router.post("/", response_model=ApplicationResponse, summary="申請作成")
 async def create_application(
     application_data: ApplicationCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     新しい申請を作成
     """
     try:
-        service = ApplicationService(db)
-        application = service.create_application(application_data)
+        service = AsyncApplicationService(db)
+        application = await service.create_application(application_data)
         return application
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -118,14 +147,14 @@ async def create_application(
 async def update_application(
     application_id: int,
     application_data: ApplicationUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     指定された申請IDの申請を更新
     """
     try:
-        service = ApplicationService(db)
-        application = service.update_application(application_id, application_data)
+        service = AsyncApplicationService(db)
+        application = await service.update_application(application_id, application_data)
         
         if not application:
             raise HTTPException(status_code=404, detail="申請が見つかりません")
@@ -143,15 +172,15 @@ async def update_application(
 async def submit_application(
     application_id: int,
     action_data: ApplicationWorkflowAction,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     申請を提出（下書き → レビュー中）
     """
     try:
         action_data.action = "submit"
-        service = ApplicationService(db)
-        application = service.execute_workflow_action(application_id, action_data)
+        service = AsyncApplicationService(db)
+        application = await service.execute_workflow_action(application_id, action_data)
         return application
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -163,16 +192,17 @@ async def submit_application(
 async def approve_application(
     application_id: int,
     action_data: ApplicationWorkflowAction,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     申請を承認（レビュー中 → 承認済）
-    自動的にドキュメント生成ジョブが開始されます
+    自動的にドキュメント生成ジョブが登録されます
+    進捗は WebSocket の document_job メッセージ、または GET /documents/jobs?application_id= で確認できます
     """
     try:
         action_data.action = "approve"
-        service = ApplicationService(db)
-        application = service.execute_workflow_action(application_id, action_data)
+        service = AsyncApplicationService(db)
+        application = await service.execute_workflow_action(application_id, action_data)
         return application
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -184,15 +214,15 @@ async def approve_application(
 async def reject_application(
     application_id: int,
     action_data: ApplicationWorkflowAction,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     申請を差戻し（レビュー中 → 差戻し）
     """
     try:
         action_data.action = "reject"
-        service = ApplicationService(db)
-        application = service.execute_workflow_action(application_id, action_data)
+        service = AsyncApplicationService(db)
+        application = await service.execute_workflow_action(application_id, action_data)
         return application
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -204,15 +234,15 @@ async def reject_application(
 async def withdraw_application(
     application_id: int,
     action_data: ApplicationWorkflowAction,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     申請を取下げ（任意のステータス → 取下げ）
     """
     try:
         action_data.action = "withdraw"
-        service = ApplicationService(db)
-        application = service.execute_workflow_action(application_id, action_data)
+        service = AsyncApplicationService(db)
+        application = await service.execute_workflow_action(application_id, action_data)
         return application
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -223,20 +253,20 @@ async def withdraw_application(
 @router.get("/{application_id}/audit-trail", response_model=List[AuditTrailResponse], summary="監査証跡取得")
 async def get_application_audit_trail(
     application_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     指定された申請IDの監査証跡を取得
     """
     try:
-        service = ApplicationService(db)
+        service = AsyncApplicationService(db)
         
         # 申請の存在確認
-        application = service.get_application_by_id(application_id)
+        application = await service.get_application_by_id(application_id)
         if not application:
             raise HTTPException(status_code=404, detail="申請が見つかりません")
         
-        audit_trails = service.get_audit_trail("Application", application_id)
+        audit_trails = await service.get_audit_trail("Application", application_id)
         return audit_trails
     except HTTPException:
         raise
@@ -247,14 +277,14 @@ async def get_application_audit_trail(
 @router.delete("/{application_id}", summary="申請削除")
 async def delete_application(
     application_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     指定された申請IDの申請を削除
     """
     try:
-        service = ApplicationService(db)
-        success = service.delete_application(application_id)
+        service = AsyncApplicationService(db)
+        success = await service.delete_application(application_id)
         
         if not success:
             raise HTTPException(status_code=404, detail="申請が見つかりません")
@@ -269,13 +299,16 @@ async def delete_application(
 # 申請種別エンドポイント
 @router.get("/types/", summary="申請種別一覧取得")
 async def get_application_types(
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     申請種別の一覧を取得
     """
     try:
-        types = db.query(ApplicationType).filter(ApplicationType.is_active == True).all()
+        result = await db.execute(
+            select(ApplicationType).where(ApplicationType.is_active == True)
+        )
+        types = result.scalars().all()
         
         return {
             "types": types,
@@ -288,7 +321,7 @@ async def get_application_types(
 @router.post("/types/", response_model=ApplicationTypeResponse, summary="申請種別作成")
 async def create_application_type(
     type_data: dict,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     新しい申請種別を作成
@@ -296,8 +329,8 @@ async def create_application_type(
     try:
         app_type = ApplicationType(**type_data)
         db.add(app_type)
-        db.commit()
-        db.refresh(app_type)
+        await db.commit()
+        await db.refresh(app_type)
         
         return app_type
     except Exception as e:
@@ -4,14 +4,24 @@
 
 from typing import List, Dict, Any, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import text, inspect
+from app.core.cache import ALL_SUMMARIES, count_cache, invalidate_summaries
 from app.core.database import get_db, engine
-import pandas as pd
+from app.services.database_admin_service import (
+    EXPORT_MEDIA_TYPES,
+    TableBrowser,
+    TableExporter,
+    get_cached_database_stats,
+    get_table,
+    is_parquet_available,
+    to_json,
+)
+from app.services.database_backup import BACKUP_FULL, backup_service
 import json
 import os
 import datetime
-from pathlib import Path
 import logging
 
 logger = logging.getLogger(__name__)
@@ -19,118 +29,21 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 @router.get("/stats")
-def get_database_stats(db: Session = Depends(get_db)):
+def get_database_stats(
+    exact: bool = Query(False, description="テーブルを全件走査して正確な行数と最終更新日時を取得"),
+    refresh: bool = Query(False, description="キャッシュを使わずに集計し直す"),
+    sizes: bool = Query(False, description="SQLite でテーブルごとのサイズを取得（ファイル全体を読む）")
+):
     """
     データベース統計情報を取得
+    
+    行数とサイズはシステムカタログの推定値から数回のクエリで集計し、
+    DATABASE_STATS_CACHE_TTL 秒キャッシュします。
+    exact=true の場合はテーブルごとに COUNT(*) を実行します。
+    SQLite のテーブルごとのサイズは dbstat がファイル全体を読むため、sizes=true の場合のみ返します
     """
     try:
-        stats = {}
-        
-        # テーブル情報取得
-        inspector = inspect(engine)
-        table_names = inspector.get_table_names()
-        
-        tables_info = []
-        total_rows = 0
-        
-        for table_name in table_names:
-            try:
-                # テーブルの行数取得
-                result = db.execute(text(f"SELECT COUNT(*) FROM {table_name}"))
-                row_count = result.scalar()
-                total_rows += row_count
-                
-                # テーブルサイズ取得（PostgreSQL用）
-                try:
-                    size_result = db.execute(text(f"SELECT pg_size_pretty(pg_total_relation_size('{table_name}'))"))
-                    table_size = size_result.scalar()
-                except:
-                    table_size = "不明"
-                
-                # 最終更新日時取得（カラムが存在する場合）
-                try:
-                    last_updated_result = db.execute(text(f"SELECT MAX(updated_at) FROM {table_name}"))
-                    last_updated = last_updated_result.scalar()
-                    if last_updated:
-                        last_updated = last_updated.isoformat()
-                    else:
-                        last_updated = "不明"
-                except:
-                    last_updated = "不明"
-                
-                tables_info.append({
-                    "name": table_name,
-                    "rows": row_count,
-                    "size": table_size,
-                    "last_updated": last_updated
-                })
-                
-            except Exception as e:
-                logger.warning(f"テーブル {table_name} の統計取得に失敗: {e}")
-                tables_info.append({
-                    "name": table_name,
-                    "rows": 0,
-                    "size": "不明",
-                    "last_updated": "不明"
-                })
-        
-        # データベース全体サイズ
-        try:
-            db_size_result = db.execute(text("SELECT pg_size_pretty(pg_database_size(current_database()))"))
-            total_size = db_size_result.scalar()
-        except:
-            total_size = "不明"
-        
-        # アクティブ接続数
-        try:
-            connection_result = db.execute(text("SELECT count(*) FROM pg_stat_activity"))
-            connection_count = connection_result.scalar()
-        except:
-            connection_count = 0
-        
-        # パフォーマンス統計
-        try:
-            # 平均クエリ時間
-            avg_time_result = db.execute(text("""
-                SELECT ROUND(AVG(mean_exec_time), 2) 
-                FROM pg_stat_statements 
-                WHERE calls > 0
-            """))
-            avg_query_time = avg_time_result.scalar() or 0
-            
-            # 低速クエリ数
-            slow_queries_result = db.execute(text("""
-                SELECT COUNT(*) 
-                FROM pg_stat_statements 
-                WHERE mean_exec_time > 1000
-            """))
-            slow_queries = slow_queries_result.scalar() or 0
-            
-            # キャッシュヒット率
-            cache_hit_result = db.execute(text("""
-                SELECT ROUND(
-                    100 * sum(blks_hit) / (sum(blks_hit) + sum(blks_read)), 2
-                ) FROM pg_stat_database WHERE datname = current_database()
-            """))
-            cache_hit_ratio = cache_hit_result.scalar() or 0
-            
-        except Exception as e:
-            logger.warning(f"パフォーマンス統計の取得に失敗: {e}")
-            avg_query_time = 0
-            slow_queries = 0
-            cache_hit_ratio = 0
-        
-        return {
-            "tables": tables_info,
-            "total_size": total_size,
-            "connection_count": connection_count,
-            "total_rows": total_rows,
-            "performance_stats": {
-                "avg_query_time": f"{avg_query_time}ms",
-                "slow_queries": slow_queries,
-                "cache_hit_ratio": f"{cache_hit_ratio}%"
-            }
-        }
+        return get_cached_database_stats(exact=exact, refresh=refresh, sizes=sizes)
         
     except Exception as e:
         logger.error(f"データベース統計取得エラー: {e}")
@@ -142,59 +55,46 @@ def get_database_stats(db: Session = Depends(get_db)):
 @router.get("/tables/{table_name}")
 def get_table_data(
     table_name: str,
-    db: Session = Depends(get_db),
     page: int = Query(0, ge=0),
-    limit: int = Query(10, ge=1, le=100)
+    limit: int = Query(10, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="次ページのカーソル（レスポンスの next_cursor）"),
+    columns: Optional[str] = Query(None, description="取得する列（カンマ区切り）"),
+    filters: Optional[List[str]] = Query(None, alias="filter", description="条件（column:op:value、複数指定可）"),
+    total_mode: Optional[str] = Query(None, regex="^(exact|cached|estimate|none)$", description="総件数の取得方法")
 ):
     """
     特定テーブルのデータを取得
+    
+    - **cursor**: 主キー順のキーセットページング。`next_cursor` を次回の `cursor` に渡すと、
+      何ページ目でも主キーのインデックスから取得します（`page` は OFFSET のため深いページほど遅い）
+    - **columns** / **filter**: 取得する列と条件（エクスポートと同じ形式）
+    - **total_mode**: `exact`（毎回 COUNT）、`cached`（短時間キャッシュ）、`estimate`（統計情報の推定値）、
+      `none`。省略時は条件なしで `estimate`、条件ありで `cached`
     """
     try:
-        # テーブル存在確認
-        inspector = inspect(engine)
-        if table_name not in inspector.get_table_names():
+        table = get_table(table_name)
+        if table is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"テーブル '{table_name}' が見つかりません"
             )
         
-        # カラム情報取得
-        columns_info = inspector.get_columns(table_name)
-        column_names = [col['name'] for col in columns_info]
-        
-        # 総レコード数取得
-        count_result = db.execute(text(f"SELECT COUNT(*) FROM {table_name}"))
-        total_count = count_result.scalar()
-        
-        # データ取得（ページング）
-        offset = page * limit
-        data_result = db.execute(text(f"""
-            SELECT * FROM {table_name} 
-            ORDER BY 1 
-            LIMIT {limit} OFFSET {offset}
-        """))
-        
-        rows = []
-        for row in data_result:
-            # 値を適切な型に変換
-            converted_row = []
-            for value in row:
-                if isinstance(value, datetime.datetime):
-                    converted_row.append(value.isoformat())
-                elif isinstance(value, datetime.date):
-                    converted_row.append(value.isoformat())
-                else:
-                    converted_row.append(value)
-            rows.append(converted_row)
-        
-        return {
-            "columns": column_names,
-            "rows": rows,
-            "total_count": total_count,
-            "page": page,
-            "limit": limit,
-            "has_next": (offset + limit) < total_count
-        }
+        column_names = [name.strip() for name in columns.split(",") if name.strip()] if columns else None
+        try:
+            browser = TableBrowser(table, column_names=column_names, filters=filters)
+            result = browser.fetch_page(limit=limit, cursor=cursor, page=page)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        
+        total_mode = total_mode or ("cached" if filters else "estimate")
+        result.update(
+            total_count=browser.count(total_mode),
+            total_mode=total_mode,
+            page=page,
+            limit=limit
+        )
+        # 行は JSON エンコーダーでまとめて変換する（jsonable_encoder のセルごとの変換を通さない）
+        return Response(content=to_json(result), media_type="application/json")
         
     except HTTPException:
         raise
@@ -244,6 +144,10 @@ def delete_table_row(
         
         db.commit()
         
+        # どのテーブルでも件数・サマリーが変わりうるためまとめて無効化
+        count_cache.clear()
+        invalidate_summaries(*ALL_SUMMARIES)
+        
         return {"message": f"レコードを削除しました (ID: {row_id})"}
         
     except HTTPException:
@@ -259,62 +163,47 @@ def delete_table_row(
 @router.get("/export/{table_name}")
 def export_table_data(
     table_name: str,
-    format: str = Query("csv", regex="^(csv|json)$"),
-    db: Session = Depends(get_db)
+    format: str = Query("csv", regex="^(csv|json|ndjson|parquet)$"),
+    columns: Optional[str] = Query(None, description="出力する列（カンマ区切り）"),
+    filters: Optional[List[str]] = Query(None, alias="filter", description="条件（column:op:value、複数指定可）"),
+    limit: Optional[int] = Query(None, ge=1, description="出力する行数の上限")
 ):
     """
     テーブルデータをエクスポート
+    
+    サーバーサイドカーソルで少しずつ読み出し、そのままストリーミングで返します（一時ファイルは作りません）
+    
+    Parameters:
+    - format: csv（UTF-8 BOM 付き）, json, ndjson, parquet
+    - columns: 出力する列（例: id,name,updated_at）
+    - filter: 条件（例: status:eq:承認済, created_at:ge:2024-01-01, id:in:1,2,3）
     """
     try:
-        # テーブル存在確認
-        inspector = inspect(engine)
-        if table_name not in inspector.get_table_names():
+        table = get_table(table_name)
+        if table is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"テーブル '{table_name}' が見つかりません"
             )
+        if format == "parquet" and not is_parquet_available():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Parquet 形式のエクスポートには pyarrow が必要です"
+            )
         
-        # データ取得
-        result = db.execute(text(f"SELECT * FROM {table_name}"))
-        
-        # pandasでデータ処理
-        df = pd.DataFrame(result.fetchall(), columns=result.keys())
-        
-        # datetime型を文字列に変換
-        for col in df.columns:
-            if df[col].dtype == 'datetime64[ns]':
-                df[col] = df[col].dt.strftime('%Y-%m-%d %H:%M:%S')
-        
-        # エクスポートディレクトリ作成
-        export_dir = Path("exports")
-        export_dir.mkdir(exist_ok=True)
+        column_names = [name.strip() for name in columns.split(",") if name.strip()] if columns else None
+        try:
+            exporter = TableExporter(table, column_names=column_names, filters=filters, limit=limit)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
         
         timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        if format == "csv":
-            filename = f"{table_name}_{timestamp}.csv"
-            filepath = export_dir / filename
-            df.to_csv(filepath, index=False, encoding='utf-8-sig')
-            
-            # ファイルレスポンス
-            from fastapi.responses import FileResponse
-            return FileResponse(
-                path=filepath,
-                filename=filename,
-                media_type='text/csv'
-            )
-            
-        elif format == "json":
-            filename = f"{table_name}_{timestamp}.json"
-            filepath = export_dir / filename
-            df.to_json(filepath, orient='records', force_ascii=False, indent=2)
-            
-            from fastapi.responses import FileResponse
-            return FileResponse(
-                path=filepath,
-                filename=filename,
-                media_type='application/json'
-            )
+        filename = f"{table_name}_{timestamp}.{format}"
+        return StreamingResponse(
+            exporter.stream(format),
+            media_type=EXPORT_MEDIA_TYPES[format],
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        )
         
     except HTTPException:
         raise
@@ -325,52 +214,32 @@ def export_table_data(
             detail="エクスポートに失敗しました"
         )
 
-@router.post("/backup")
-def create_database_backup(db: Session = Depends(get_db)):
+@router.post("/backup", status_code=status.HTTP_202_ACCEPTED)
+def create_database_backup(
+    kind: str = Query(BACKUP_FULL, regex="^(full|incremental)$", description="full: フルバックアップ, incremental: 差分（SQLite のみ）")
+):
     """
-    データベースバックアップを作成
+    データベースバックアップを開始
+    
+    バックアップはバックグラウンドで実行されます。進捗は /backup/jobs/{job_id} で確認してください
+    - SQLite: オンラインバックアップ API で稼働中でも整合したスナップショットを作成し、gzip で圧縮
+    - PostgreSQL: pg_dump（カスタム形式）
+    フルバックアップは BACKUP_RETENTION 世代まで保持し、古いものは差分と一緒に削除します
     """
     try:
-        # バックアップディレクトリ作成
-        backup_dir = Path("backups")
-        backup_dir.mkdir(exist_ok=True)
-        
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        # SQLiteの場合
-        if "sqlite" in str(engine.url):
-            import shutil
-            db_path = str(engine.url).replace("sqlite:///", "")
-            backup_filename = f"backup_{timestamp}.db"
-            backup_path = backup_dir / backup_filename
-            shutil.copy2(db_path, backup_path)
-            
-        # PostgreSQLの場合
-        else:
-            import subprocess
-            backup_filename = f"backup_{timestamp}.sql"
-            backup_path = backup_dir / backup_filename
-            
-            # pg_dumpコマンド実行
-            cmd = [
-                "pg_dump",
-                "--no-password",
-                "--format=custom",
-                "--file", str(backup_path),
-                str(engine.url)
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            if result.returncode != 0:
-                raise Exception(f"pg_dump failed: {result.stderr}")
+        try:
+            job = backup_service.start(kind)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
         
         return {
-            "message": "バックアップが完了しました",
-            "filename": backup_filename,
-            "path": str(backup_path),
-            "size": os.path.getsize(backup_path)
+            "message": "バックアップを開始しました",
+            "job_id": job.id,
+            **job.to_dict()
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"バックアップエラー: {e}")
         raise HTTPException(
@@ -378,6 +247,40 @@ def create_database_backup(db: Session = Depends(get_db)):
             detail="バックアップに失敗しました"
         )
 
+@router.get("/backup/jobs")
+def get_backup_jobs():
+    """
+    バックアップジョブの一覧を取得（他のワーカープロセス・再起動前に実行したものを含む）
+    """
+    return [job.to_dict() for job in backup_service.get_jobs()]
+
+@router.get("/backup/jobs/{job_id}")
+def get_backup_job(job_id: str):
+    """
+    バックアップジョブの進捗を取得
+    """
+    job = backup_service.get_job(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="バックアップジョブが見つかりません"
+        )
+    return job.to_dict()
+
+@router.get("/backups")
+def list_database_backups():
+    """
+    保存されているバックアップの一覧を取得
+    """
+    try:
+        return backup_service.list_backups()
+    except Exception as e:
+        logger.error(f"バックアップ一覧取得エラー: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="バックアップ一覧の取得に失敗しました"
+        )
+
 @router.get("/health")
 def check_database_health(db: Session = Depends(get_db)):
     """
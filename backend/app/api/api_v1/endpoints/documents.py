@@ -0,0 +1,138 @@
+"""
+書類生成関連のエンドポイント
+"""
+
+import os
+from datetime import datetime
+from typing import List, Optional
+from urllib.parse import quote
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import get_async_db, get_db
+from app.schemas.document import DocumentBatchRequest, DocumentJobResponse
+from app.services.document_batch import stream_document_zip
+from app.services.document_mapping import get_template_mapping
+from app.services.document_service import DocumentJobService
+from app.services.project_service import AsyncProjectService
+
+router = APIRouter()
+
+
+@router.get("/jobs", response_model=List[DocumentJobResponse], summary="書類生成ジョブ一覧取得")
+def get_document_jobs(
+    application_id: Optional[int] = Query(None, description="申請IDで絞り込み"),
+    job_status: Optional[str] = Query(None, alias="status", description="ステータスで絞り込み"),
+    limit: int = Query(100, ge=1, le=1000, description="取得件数"),
+    db: Session = Depends(get_db)
+):
+    """
+    書類生成ジョブの一覧を新しい順に取得
+    申請の承認時に登録されたジョブの進捗確認に使用します
+    """
+    try:
+        service = DocumentJobService(db)
+        return service.get_jobs(application_id=application_id, status=job_status, limit=limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/jobs/{job_id}", response_model=DocumentJobResponse, summary="書類生成ジョブ取得")
+def get_document_job(
+    job_id: int,
+    db: Session = Depends(get_db)
+):
+    """
+    書類生成ジョブの状況を取得
+    """
+    try:
+        service = DocumentJobService(db)
+        job = service.get_job(job_id)
+        if not job:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="書類生成ジョブが見つかりません")
+        return job
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/jobs/{job_id}/download", summary="生成した書類のダウンロード")
+def download_document(
+    job_id: int,
+    db: Session = Depends(get_db)
+):
+    """
+    完了した書類生成ジョブのファイルをダウンロード
+    """
+    try:
+        service = DocumentJobService(db)
+        job = service.get_job(job_id)
+        if not job:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="書類生成ジョブが見つかりません")
+        if not job.output_path or not os.path.exists(job.output_path):
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="書類はまだ生成されていません")
+
+        return FileResponse(
+            job.output_path,
+            filename=os.path.basename(job.output_path),
+            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/batch", summary="書類の一括作成（ZIP）")
+async def create_document_batch(
+    request: DocumentBatchRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    1つのテンプレートから複数プロジェクトの書類を作成し、ZIP でストリーミング返却
+    
+    書類はプロセスプールで並列に作成し、できあがった順に ZIP に追加して送信します。
+    作成に失敗した書類は ZIP 内の errors.txt に記録されます
+    
+    Parameters:
+    - template_name: テンプレートファイル名（マッピングが定義されているもの）
+    - project_ids / status / search: 対象プロジェクトの条件（組み合わせ可）
+    - limit: 作成する書類の上限（DOCUMENT_BATCH_MAX_PROJECTS まで）
+    """
+    try:
+        try:
+            get_template_mapping(request.template_name)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+        if not os.path.exists(os.path.join(settings.TEMPLATE_DIR, request.template_name)):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="テンプレートファイルが見つかりません")
+        
+        limit = min(request.limit or settings.DOCUMENT_BATCH_MAX_PROJECTS, settings.DOCUMENT_BATCH_MAX_PROJECTS)
+        service = AsyncProjectService(db)
+        project_ids = await service.get_project_ids(
+            status=request.status,
+            search=request.search,
+            project_ids=request.project_ids,
+            limit=limit
+        )
+        if not project_ids:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="対象のプロジェクトがありません")
+        
+        stem = os.path.splitext(request.template_name)[0]
+        filename = f"{stem}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+        return StreamingResponse(
+            stream_document_zip(request.template_name, project_ids),
+            media_type="application/zip",
+            headers={
+                "Content-Disposition": f"attachment; filename*=UTF-8''{quote(filename)}",
+                "X-Document-Count": str(len(project_ids))
+            }
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
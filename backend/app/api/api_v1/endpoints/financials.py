@@ -2,12 +2,13 @@
 財務関連のエンドポイント
 """
 
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
 from app.models.project import Financial
+from app.services.financial_service import FinancialService
 
 router = APIRouter()
 
@@ -46,38 +47,21 @@ async def get_financial_by_project(
 
 
 @router.get("/summary/totals", summary="財務サマリー取得")
-async def get_financial_summary(db: Session = Depends(get_db)):
+async def get_financial_summary(
+    group_by: Optional[str] = Query(
+        None, regex="^(month|status|application_type)$",
+        description="内訳のグループ化（month: 入力月, status: ステータス, application_type: 申請種別）"
+    ),
+    db: Session = Depends(get_db)
+):
     """
     財務データのサマリー情報を取得
+    
+    集計はデータベース側で1クエリで行う。group_by 指定時は groups に内訳を含める
     """
     try:
-        financials = db.query(Financial).all()
-        
-        total_contract = sum(f.contract_price or 0 for f in financials)
-        total_estimate = sum(f.estimate_amount or 0 for f in financials)
-        total_settlement = sum(f.settlement_amount or 0 for f in financials)
-        
-        pending_settlement = total_contract - total_settlement
-        
-        # 書類提出状況
-        document_stats = {
-            'permit_application': sum(1 for f in financials if f.has_permit_application),
-            'inspection_schedule': sum(1 for f in financials if f.has_inspection_schedule),
-            'foundation_plan': sum(1 for f in financials if f.has_foundation_plan),
-            'hardware_plan': sum(1 for f in financials if f.has_hardware_plan),
-            'invoice': sum(1 for f in financials if f.has_invoice),
-            'energy_calculation': sum(1 for f in financials if f.has_energy_calculation),
-            'settlement_data': sum(1 for f in financials if f.has_settlement_data),
-        }
-        
-        return {
-            "total_projects": len(financials),
-            "total_contract_amount": total_contract,
-            "total_estimate_amount": total_estimate,
-            "total_settlement_amount": total_settlement,
-            "pending_settlement_amount": pending_settlement,
-            "document_submission_stats": document_stats
-        }
+        service = FinancialService(db)
+        return service.get_financial_summary_cached(group_by=group_by)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -3,7 +3,7 @@ Googleフォーム連携API エンドポイント
 """
 
 from typing import List, Dict, Any
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.services.google_forms_service import GoogleFormsService
@@ -13,6 +13,7 @@ from app.schemas.google_forms import (
     FormSubmission,
     SendFormRequest,
     SendFormResponse,
+    SendBatchStatus,
     FormTemplateListResponse,
     FormSubmissionListResponse,
     UpdateSubmissionStatusRequest,
@@ -93,19 +94,20 @@ def get_form_templates_by_type(
             detail="フォーム情報の取得に失敗しました"
         )
 
-@router.post("/send-forms", response_model=SendFormResponse)
+@router.post("/send-forms", response_model=SendFormResponse, status_code=status.HTTP_202_ACCEPTED)
 def send_application_forms(
     request: SendFormRequest,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """
     申請書類フォームをメール送信
     
+    メールは送信キューに登録され、バックグラウンドで送信される。
+    進捗は GET /batches/{batch_id} で確認できる
+    
     Parameters:
     - project_id: プロジェクトID
-    - application_type: 申請種別
-    - form_categories: 送信するフォームカテゴリのリスト
+    - form_template_ids: 送信するフォームテンプレートIDのリスト
     - recipient_emails: 送信先メールアドレスのリスト
     - custom_message: カスタムメッセージ（省略可）
     """
@@ -121,27 +123,21 @@ def send_application_forms(
                 detail=f"プロジェクトID {request.project_id} が見つかりません"
             )
         
-        # バリデーション: 対応するフォームテンプレートの存在確認
-        available_templates = service.get_form_templates(
-            application_type=request.application_type
+        # フォーム送信をキューに登録
+        result = service.send_application_forms(
+            project_id=request.project_id,
+            form_template_ids=request.form_template_ids,
+            recipient_emails=request.recipient_emails,
+            custom_message=request.custom_message
         )
-        if not available_templates:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"申請種別 '{request.application_type}' に対応するフォームが見つかりません"
-            )
         
-        available_categories = {t.form_category for t in available_templates}
-        invalid_categories = set(request.form_categories) - available_categories
-        if invalid_categories:
+        # バリデーション: 有効なフォームテンプレートの存在確認
+        if not result["batch_id"]:
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"無効なフォームカテゴリ: {list(invalid_categories)}"
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"有効なフォームテンプレートが見つかりません: {request.form_template_ids}"
             )
         
-        # フォーム送信実行
-        result = service.send_application_forms(request)
-        
         return SendFormResponse(**result)
         
     except HTTPException:
@@ -153,6 +149,38 @@ def send_application_forms(
             detail="フォーム送信処理でエラーが発生しました"
         )
 
+@router.get("/batches/{batch_id}", response_model=SendBatchStatus)
+def get_send_batch_status(
+    batch_id: str,
+    db: Session = Depends(get_db)
+):
+    """
+    フォーム送信バッチの進捗を取得
+    
+    Parameters:
+    - batch_id: send-forms が返したバッチID
+    """
+    try:
+        service = GoogleFormsService(db)
+        batch_status = service.get_batch_status(batch_id)
+        
+        if batch_status is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"送信バッチ {batch_id} が見つかりません"
+            )
+        
+        return SendBatchStatus(**batch_status)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"送信バッチ取得エラー: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="送信バッチの取得に失敗しました"
+        )
+
 @router.get("/submissions/project/{project_id}", response_model=FormStatusSummary)
 def get_project_form_submissions(
     project_id: int,
@@ -336,32 +364,8 @@ def get_forms_stats_summary(
     フォーム送信統計サマリーを取得
     """
     try:
-        from app.models.google_forms import FormSubmission as FormSubmissionModel
-        from sqlalchemy import func
-        
-        # 基本統計
-        total_submissions = db.query(FormSubmissionModel).count()
-        
-        # ステータス別集計
-        status_stats = db.query(
-            FormSubmissionModel.status,
-            func.count(FormSubmissionModel.id).label('count')
-        ).group_by(FormSubmissionModel.status).all()
-        
-        # 申請種別別集計
-        type_stats = db.query(
-            FormSubmissionModel.form_template.has(),
-            func.count(FormSubmissionModel.id).label('count')
-        ).join(FormSubmissionModel.form_template).group_by(
-            'application_type'
-        ).all()
-        
-        return {
-            "total_submissions": total_submissions,
-            "status_breakdown": {stat.status: stat.count for stat in status_stats},
-            "type_breakdown": {stat[0]: stat.count for stat in type_stats} if type_stats else {},
-            "success_rate": len([s for s in status_stats if s.status == 'submitted']) / max(total_submissions, 1) * 100
-        }
+        service = GoogleFormsService(db)
+        return service.get_stats_summary()
         
     except Exception as e:
         logger.error(f"統計取得エラー: {e}")
@@ -4,12 +4,12 @@
 
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.core.websocket_manager import manager
 from app.models.project import Project
-from app.services.project_service import ProjectService
+from app.services.project_service import AsyncProjectService
 from app.schemas.project import (
     ProjectCreate, ProjectUpdate, ProjectResponse, ProjectListResponse,
     FinancialUpdate, ScheduleUpdate
@@ -23,7 +23,10 @@ async def get_projects(
     skip: int = Query(0, ge=0, description="スキップする件数"),
     limit: int = Query(100, ge=1, le=1000, description="取得する件数"),
     status: Optional[str] = Query(None, description="ステータスでフィルタ"),
-    db: Session = Depends(get_db)
+    paging: str = Query("offset", regex="^(offset|cursor)$", description="ページング方式"),
+    cursor: Optional[str] = Query(None, description="次ページのカーソル（cursorモード用）"),
+    total_mode: Optional[str] = Query(None, regex="^(exact|cached|none)$", description="総件数の取得方法"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     プロジェクト一覧を取得
@@ -31,25 +34,45 @@ async def get_projects(
     - **skip**: スキップする件数（ページネーション用）
     - **limit**: 取得する件数（最大1000件）
     - **status**: ステータスでフィルタリング
+    - **paging**: `offset`（既定）または `cursor`。`cursor` では `skip` の代わりに
+      レスポンスの `next_cursor` を次回の `cursor` に渡す
+    - **total_mode**: `exact`（毎回 COUNT）、`cached`（短時間キャッシュ）、`none`（取得しない）。
+      省略時は offset モードで `exact`、cursor モードで `cached`
     """
     try:
-        service = ProjectService(db)
-        projects = service.get_projects(skip=skip, limit=limit, status=status)
-        total = service.get_projects_count(status=status)
+        service = AsyncProjectService(db)
+        
+        if paging == "cursor" or cursor:
+            projects, next_cursor = await service.get_projects_page(limit=limit, status=status, cursor=cursor)
+            total_mode = total_mode or "cached"
+        else:
+            projects = await service.get_projects(skip=skip, limit=limit, status=status)
+            next_cursor = None
+            total_mode = total_mode or "exact"
+        
+        if total_mode == "exact":
+            total = await service.get_projects_count(status=status)
+        elif total_mode == "cached":
+            total = await service.get_projects_count_cached(status=status)
+        else:
+            total = None
         
         return {
             "projects": projects,
             "total": total,
             "skip": skip,
-            "limit": limit
+            "limit": limit,
+            "next_cursor": next_cursor
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/summary", summary="プロジェクトサマリー取得")
 async def get_projects_summary(
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     プロジェクトのサマリー情報を取得
@@ -59,8 +82,8 @@ async def get_projects_summary(
     - 総プロジェクト数
     """
     try:
-        service = ProjectService(db)
-        summary = service.get_projects_summary()
+        service = AsyncProjectService(db)
+        summary = await service.get_projects_summary()
         return summary
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -69,7 +92,7 @@ async def get_projects_summary(
 @router.get("/status/{status}", summary="ステータス別プロジェクト取得")
 async def get_projects_by_status(
     status: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     指定されたステータスのプロジェクト一覧を取得
@@ -86,8 +109,8 @@ async def get_projects_by_status(
     - 失注
     """
     try:
-        service = ProjectService(db)
-        projects = service.get_projects_by_status(status)
+        service = AsyncProjectService(db)
+        projects = await service.get_projects_by_status(status)
         
         return {
             "status": status,
@@ -101,7 +124,7 @@ async def get_projects_by_status(
 @router.post("/", response_model=ProjectResponse, summary="プロジェクト作成")
 async def create_project(
     project_data: ProjectCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     新しいプロジェクトを作成
@@ -112,8 +135,8 @@ async def create_project(
     - **building**: 建物情報（任意）
     """
     try:
-        service = ProjectService(db)
-        project = service.create_project(project_data)
+        service = AsyncProjectService(db)
+        project = await service.create_project(project_data)
         
         # WebSocket通知を送信
         await manager.send_project_update({
@@ -136,14 +159,14 @@ async def create_project(
 async def update_project(
     project_id: int,
     project_data: ProjectUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     指定されたプロジェクトIDのプロジェクトを更新（監査証跡付き）
     """
     try:
-        service = ProjectService(db)
-        project = service.update_project_with_audit(project_id, project_data)
+        service = AsyncProjectService(db)
+        project = await service.update_project_with_audit(project_id, project_data)
         
         if not project:
             raise HTTPException(status_code=404, detail="プロジェクトが見つかりません")
@@ -171,7 +194,7 @@ async def update_project(
 async def patch_project(
     project_id: int,
     field_updates: dict,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     指定されたプロジェクトIDのプロジェクトを部分更新
@@ -184,10 +207,10 @@ async def patch_project(
     }
     """
     try:
-        service = ProjectService(db)
+        service = AsyncProjectService(db)
         
         # 既存プロジェクトの確認
-        existing_project = service.get_project_by_id(project_id)
+        existing_project = await service.get_project_by_id(project_id)
         if not existing_project:
             raise HTTPException(status_code=404, detail="プロジェクトが見つかりません")
         
@@ -195,7 +218,7 @@ async def patch_project(
         project_update = ProjectUpdate(**field_updates)
         
         # 更新実行
-        project = service.update_project_with_audit(project_id, project_update)
+        project = await service.update_project_with_audit(project_id, project_update)
         
         # WebSocket通知を送信
         await manager.send_project_update({
@@ -217,7 +240,7 @@ async def patch_project(
 @router.patch("/", summary="プロジェクト一括更新")
 async def bulk_update_projects(
     updates: dict,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     複数のプロジェクトを一括更新
@@ -237,27 +260,38 @@ async def bulk_update_projects(
         if not project_ids or not field_updates:
             raise HTTPException(status_code=400, detail="project_idsとupdatesは必須です")
         
-        service = ProjectService(db)
-        updated_projects = []
+        # 更新内容は全プロジェクト共通のため検証は1回だけ行う
+        try:
+            project_update = ProjectUpdate(**field_updates)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
-        for project_id in project_ids:
-            try:
-                # ProjectUpdateスキーマを作成
-                project_update = ProjectUpdate(**field_updates)
-                
-                # 更新実行
-                project = service.update_project_with_audit(project_id, project_update)
-                if project:
-                    updated_projects.append(project)
-            except Exception as e:
-                print(f"プロジェクトID {project_id} の更新に失敗: {str(e)}")
-                continue
+        service = AsyncProjectService(db)
+        
+        # 1回のトランザクションでまとめて更新（失敗したIDは failed に入る）
+        result = await service.bulk_update_projects(project_ids, project_update)
+        updated_projects = await service.get_projects_by_ids(result["updated_ids"])
+        
+        # WebSocket通知を送信（短時間の通知は1つの batch フレームにまとめて配信される）
+        changed_ids = set(result["changed_ids"])
+        for project in updated_projects:
+            if project.id in changed_ids:
+                await manager.send_project_update({
+                    "id": project.id,
+                    "project_code": project.project_code,
+                    "project_name": project.project_name,
+                    "status": project.status
+                }, action="update")
+        if changed_ids:
+            await manager.send_dashboard_refresh()
         
         return {
             "message": f"{len(updated_projects)}件のプロジェクトを更新しました",
             "updated_projects": updated_projects,
             "updated_count": len(updated_projects),
-            "requested_count": len(project_ids)
+            "changed_count": len(result["changed_ids"]),
+            "requested_count": len(project_ids),
+            "failed": result["failed"]
         }
     except HTTPException:
         raise
@@ -269,20 +303,20 @@ async def bulk_update_projects(
 async def update_project_financial(
     project_id: int,
     financial_data: FinancialUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     指定されたプロジェクトIDの財務情報を更新
     """
     try:
-        service = ProjectService(db)
+        service = AsyncProjectService(db)
         
         # プロジェクトの存在確認
-        project = service.get_project_by_id(project_id)
+        project = await service.get_project_by_id(project_id)
         if not project:
             raise HTTPException(status_code=404, detail="プロジェクトが見つかりません")
         
-        financial = service.update_financial(project_id, financial_data)
+        financial = await service.update_financial(project_id, financial_data)
         return financial
     except HTTPException:
         raise
@@ -296,20 +330,20 @@ async def update_project_financial(
 async def update_project_schedule(
     project_id: int,
     schedule_data: ScheduleUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     指定されたプロジェクトIDのスケジュール情報を更新
     """
     try:
-        service = ProjectService(db)
+        service = AsyncProjectService(db)
         
         # プロジェクトの存在確認
-        project = service.get_project_by_id(project_id)
+        project = await service.get_project_by_id(project_id)
         if not project:
             raise HTTPException(status_code=404, detail="プロジェクトが見つかりません")
         
-        schedule = service.update_schedule(project_id, schedule_data)
+        schedule = await service.update_schedule(project_id, schedule_data)
         return schedule
     except HTTPException:
         raise
@@ -322,14 +356,14 @@ async def update_project_schedule(
 @router.delete("/{project_id}", summary="プロジェクト削除")
 async def delete_project(
     project_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     指定されたプロジェクトIDのプロジェクトを削除
     """
     try:
-        service = ProjectService(db)
-        success = service.delete_project(project_id)
+        service = AsyncProjectService(db)
+        success = await service.delete_project(project_id)
         
         if not success:
             raise HTTPException(status_code=404, detail="プロジェクトが見つかりません")
@@ -344,16 +378,20 @@ async def delete_project(
 @router.get("/search/{query}", summary="プロジェクト検索")
 async def search_projects(
     query: str,
-    db: Session = Depends(get_db)
+    limit: int = Query(20, ge=1, le=50, description="取得件数の上限"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     プロジェクトを検索
     
-    - **query**: 検索クエリ（プロジェクト名、施主名、プロジェクトコードで検索）
+    - **query**: 検索クエリ（プロジェクト名、施主名、フリガナ、発注者名、プロジェクトコードで検索）
+    - **limit**: 取得件数の上限（最大50件、関連度順）
+    
+    全角/半角・ひらがな/カタカナ・異体字の違いは正規化して照合します。
     """
     try:
-        service = ProjectService(db)
-        projects = service.search_projects(query)
+        service = AsyncProjectService(db)
+        projects = await service.search_projects(query, limit=limit)
         
         return {
             "query": query,
@@ -367,14 +405,14 @@ async def search_projects(
 @router.get("/{project_code}", summary="プロジェクト詳細取得")
 async def get_project(
     project_code: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     指定されたプロジェクトコードのプロジェクト詳細を取得
     """
     try:
-        service = ProjectService(db)
-        project = service.get_project_by_code(project_code)
+        service = AsyncProjectService(db)
+        project = await service.get_project_by_code(project_code)
         
         if not project:
             raise HTTPException(status_code=404, detail="プロジェクトが見つかりません")
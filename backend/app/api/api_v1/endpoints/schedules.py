@@ -54,7 +54,7 @@ async def get_pending_reinforcement_inspections(db: Session = Depends(get_db)):
         schedules = db.query(Schedule).filter(
             Schedule.reinforcement_scheduled.isnot(None),
             Schedule.reinforcement_actual.is_(None)
-        ).all()
+        ).order_by(Schedule.reinforcement_scheduled).all()
         
         return {
             "type": "reinforcement_inspection",
@@ -74,7 +74,7 @@ async def get_pending_interim_inspections(db: Session = Depends(get_db)):
         schedules = db.query(Schedule).filter(
             Schedule.interim_scheduled.isnot(None),
             Schedule.interim_actual.is_(None)
-        ).all()
+        ).order_by(Schedule.interim_scheduled).all()
         
         return {
             "type": "interim_inspection",
@@ -94,7 +94,7 @@ async def get_pending_completion_inspections(db: Session = Depends(get_db)):
         schedules = db.query(Schedule).filter(
             Schedule.completion_scheduled.isnot(None),
             Schedule.completion_actual.is_(None)
-        ).all()
+        ).order_by(Schedule.completion_scheduled).all()
         
         return {
             "type": "completion_inspection",
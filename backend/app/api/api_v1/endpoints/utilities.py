@@ -5,14 +5,63 @@
 
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.core.database import get_db
 from app.services.postal_code_service import PostalCodeService, CustomerSearchService
 
 router = APIRouter()
 
 
+@router.get("/postal-code/search", summary="住所から郵便番号を検索")
+async def search_postal_codes_by_address(
+    address: str = Query(..., min_length=2, description="住所（一部でも可、2文字以上）"),
+    limit: int = Query(10, ge=1, le=50, description="取得件数の上限")
+):
+    """
+    住所から郵便番号を逆引き検索
+    
+    - **address**: 住所（例: "渋谷区神南"、"霞ヶ関3丁目"）
+    - **limit**: 取得件数の上限（最大50件）
+    
+    レスポンス例:
+    ```json
+    {
+        "address": "渋谷区神南",
+        "results": [
+            {
+                "postal_code": "150-0041",
+                "prefecture": "東京都",
+                "city": "渋谷区",
+                "town": "神南",
+                "full_address": "東京都渋谷区神南"
+            }
+        ],
+        "count": 1
+    }
+    ```
+    """
+    try:
+        # 初回は逆引き索引の構築があるためスレッドプールで実行
+        results = await run_in_threadpool(
+            PostalCodeService.search_postal_codes_by_address, address, limit
+        )
+        
+        return {
+            "address": address,
+            "results": results,
+            "count": len(results)
+        }
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail="郵便番号の検索中にエラーが発生しました。"
+        )
+
+
 @router.get("/postal-code/{postal_code}", summary="郵便番号から住所を取得")
 async def get_address_by_postal_code(
     postal_code: str
@@ -41,8 +90,14 @@ async def get_address_by_postal_code(
                 detail="無効な郵便番号です。7桁の数字で入力してください。"
             )
         
-        # 住所情報を取得
-        address_info = PostalCodeService.get_address_by_postal_code(postal_code)
+        # 住所情報を取得（ローカル索引）
+        address_info = PostalCodeService.get_address_from_index(postal_code)
+        
+        # 索引にない場合のみ外部APIを参照（イベントループを塞がないようスレッドで実行）
+        if address_info is None and settings.POSTAL_CODE_REMOTE_FALLBACK:
+            address_info = await run_in_threadpool(
+                PostalCodeService.get_address_by_postal_code, postal_code
+            )
         
         if not address_info:
             raise HTTPException(
@@ -6,9 +6,11 @@ WebSocket endpoints for real-time updates
 import json
 import logging
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query
-from typing import Optional
+from typing import List, Optional
 
-from app.core.websocket_manager import manager
+from app.core.websocket_manager import (
+    SUBSCRIBABLE_TOPIC_KINDS, application_topic, event_topic, manager, project_topic
+)
 
 logger = logging.getLogger(__name__)
 
@@ -25,10 +27,12 @@ async def websocket_endpoint(
     
     リアルタイム更新を受信するためのWebSocket接続を確立します。
     接続後、以下のタイプのメッセージを受信できます：
-    - project_update: プロジェクトの作成/更新/削除
-    - application_update: 申請の作成/更新/削除  
+    - batch: プロジェクト・申請の作成/更新/削除（短時間の変更をまとめ、変更されたフィールドのみ）
     - dashboard_refresh: ダッシュボードの更新要求
     - notification: 通知メッセージ
+    
+    subscribe メッセージを送ると、以降は購読したトピックのイベントだけを受信します：
+    {"type": "subscribe", "events": ["project_update"], "projects": [1], "applications": [2]}
     """
     await manager.connect(websocket, user_id)
     
@@ -73,15 +77,33 @@ async def handle_client_message(websocket: WebSocket, message: dict, user_id: Op
             "timestamp": message.get("timestamp")
         }, websocket)
         
-    elif message_type == "subscribe":
-        # 特定のイベントタイプの購読
-        event_types = message.get("events", [])
-        # 購読処理（将来の機能拡張用）
+    elif message_type in ("subscribe", "unsubscribe"):
+        # イベント種別・プロジェクト・申請単位の購読（解除）
+        payload = message.get("data") or message
+        topics = requested_topics(payload)
+        if message_type == "subscribe":
+            subscribed = manager.subscribe(websocket, topics)
+        else:
+            subscribed = manager.unsubscribe(websocket, topics)
+        
         await manager.send_personal_message({
             "type": "subscription_confirmed",
-            "events": event_types
+            "events": payload.get("events", []),
+            "topics": subscribed
         }, websocket)
         
+    elif message_type == "resync":
+        # 再接続時などに、最後に受け取った batch フレーム以降の変更を要求
+        try:
+            since = int(message.get("since", 0))
+        except (TypeError, ValueError):
+            await manager.send_personal_message({
+                "type": "error",
+                "message": "since must be an integer"
+            }, websocket)
+            return
+        await manager.resync(websocket, since, message.get("epoch"))
+        
     elif message_type == "get_stats":
         # 接続統計の要求
         if user_id:  # 認証されたユーザーのみ
@@ -103,6 +125,24 @@ async def handle_client_message(websocket: WebSocket, message: dict, user_id: Op
         }, websocket)
 
 
+def requested_topics(payload: dict) -> List[str]:
+    """
+    subscribe / unsubscribe メッセージから購読トピックを組み立てる
+    
+    - events: イベント種別（project_update, application_update など）
+    - projects / applications: ID のリスト
+    - topics: "project:1" 形式のトピック（ユーザー宛てトピックは指定不可）
+    """
+    topics = [event_topic(str(event)) for event in payload.get("events") or []]
+    topics.extend(project_topic(project_id) for project_id in payload.get("projects") or [])
+    topics.extend(application_topic(app_id) for app_id in payload.get("applications") or [])
+    topics.extend(
+        topic for topic in payload.get("topics") or []
+        if isinstance(topic, str) and topic.split(":", 1)[0] in SUBSCRIBABLE_TOPIC_KINDS
+    )
+    return topics
+
+
 @router.get("/ws/stats")
 async def get_websocket_stats():
     """WebSocket接続統計を取得"""
@@ -0,0 +1,276 @@
+"""
+プロセス内キャッシュ
+件数やダッシュボード用サマリーなど、短時間であれば古くてもよい値を保持する
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    有効期限付きのシンプルなインメモリキャッシュ
+
+    キャッシュミス時は同じキーの計算を1回にまとめる（single-flight）。
+    - 同期コード: get_or_set（キーごとのロックでスレッド間の同時計算を防ぐ）
+    - 非同期コード: get_or_set_async（計算中の Future を後続の呼び出しで待つ）
+
+    AsyncSession.run_sync 内のコードは同じスレッド上で並行に動くため、
+    非同期サービスからは get_or_set_async を使うこと。
+    """
+
+    def __init__(self, default_ttl: float = 30.0, ttls: Optional[Dict[Hashable, float]] = None):
+        """
+        Args:
+            default_ttl: 既定の有効期限（秒）
+            ttls: キー（タプルの場合は先頭要素）ごとの有効期限（秒）
+        """
+        self.default_ttl = default_ttl
+        self.ttls = ttls or {}
+        self._store: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Hashable, threading.RLock] = {}
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        # 無効化のたびに進める。計算中に無効化された値は格納しない
+        self._generation = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        キャッシュから値を取得
+
+        Args:
+            key: キャッシュキー
+
+        Returns:
+            有効期限内の値、または None
+        """
+        with self._lock:
+            entry = self._store.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._store[key]
+                return None
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """値をキャッシュに格納"""
+        expires_at = time.monotonic() + self._ttl_for(key, ttl)
+        with self._lock:
+            self._store[key] = (expires_at, value)
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """
+        キャッシュにあれば返し、なければ factory で計算して格納
+
+        同じキーへの同時アクセスでは factory は1回だけ実行される
+
+        Args:
+            key: キャッシュキー
+            factory: 値を計算する関数
+            ttl: 有効期限（秒）。省略時はキーごとの設定または default_ttl
+
+        Returns:
+            キャッシュされた値
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self._key_lock(key):
+            value = self.get(key)
+            if value is None:
+                generation = self._generation
+                value = factory()
+                self._set_if_current(key, value, ttl, generation)
+        return value
+
+    async def get_or_set_async(
+        self,
+        key: Hashable,
+        factory: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None
+    ) -> Any:
+        """
+        get_or_set の非同期版
+
+        計算中のキーへの呼び出しは同じ結果を待つため、
+        同時に届いたリクエストでも factory は1回だけ実行される
+
+        Args:
+            key: キャッシュキー
+            factory: 値を計算するコルーチン関数
+            ttl: 有効期限（秒）
+
+        Returns:
+            キャッシュされた値
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        future = self._inflight.get(key)
+        if future is not None:
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # 計算していたリクエストがキャンセルされた場合は計算し直す
+                return await self.get_or_set_async(key, factory, ttl)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        generation = self._generation
+        try:
+            value = await factory()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # 待機者がいない場合の警告を抑止
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        self._set_if_current(key, value, ttl, generation)
+        future.set_result(value)
+        return value
+
+    def invalidate(self, key: Hashable):
+        """指定キーを無効化"""
+        with self._lock:
+            self._generation += 1
+            self._store.pop(key, None)
+
+    def invalidate_prefix(self, *prefix: Hashable):
+        """
+        タプルキーの先頭が prefix に一致するエントリをまとめて無効化
+
+        例: invalidate_prefix("projects") は ("projects", status) をすべて削除する
+        """
+        size = len(prefix)
+        with self._lock:
+            self._generation += 1
+            for key in [k for k in self._store if isinstance(k, tuple) and k[:size] == prefix]:
+                del self._store[key]
+
+    def clear(self):
+        """全エントリを削除"""
+        with self._lock:
+            self._generation += 1
+            self._store.clear()
+
+    def _ttl_for(self, key: Hashable, ttl: Optional[float]) -> float:
+        if ttl is not None:
+            return ttl
+        name = key[0] if isinstance(key, tuple) and key else key
+        return self.ttls.get(name, self.default_ttl)
+
+    def _set_if_current(self, key: Hashable, value: Any, ttl: Optional[float], generation: int):
+        """計算開始後に無効化されていなければ格納"""
+        expires_at = time.monotonic() + self._ttl_for(key, ttl)
+        with self._lock:
+            if self._generation == generation:
+                self._store[key] = (expires_at, value)
+
+    def _key_lock(self, key: Hashable) -> threading.RLock:
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = self._key_locks[key] = threading.RLock()
+            return lock
+
+
+# 一覧APIの総件数キャッシュ（カーソルページング用）
+count_cache = TTLCache(default_ttl=settings.PAGINATION_COUNT_CACHE_TTL)
+
+# データベース管理画面の統計情報のキャッシュ
+stats_cache = TTLCache(default_ttl=settings.DATABASE_STATS_CACHE_TTL)
+
+# ダッシュボード用サマリーのキャッシュキー
+SUMMARY_PROJECTS = "projects_summary"
+SUMMARY_APPLICATIONS = "applications_summary"
+SUMMARY_FINANCIALS = "financials_summary"
+SUMMARY_GOOGLE_FORMS = "google_forms_summary"
+
+ALL_SUMMARIES = (SUMMARY_PROJECTS, SUMMARY_APPLICATIONS, SUMMARY_FINANCIALS, SUMMARY_GOOGLE_FORMS)
+
+
+def _summary_ttl(ttl: float) -> float:
+    """
+    サマリーの有効期限
+
+    プロセス内のイベントバス（memory）では無効化が他のワーカーに届かないため、
+    複数ワーカーで動かす場合は数秒で期限切れにする
+    """
+    if settings.EVENT_BUS_BACKEND == "memory" and settings.WEB_CONCURRENCY > 1:
+        return min(ttl, settings.SUMMARY_CACHE_LOCAL_TTL)
+    return ttl
+
+
+# ダッシュボード用サマリーのキャッシュ
+# 書き込み時に（イベントバス経由で全ワーカーの）キャッシュを無効化するため TTL は長めでよい。
+# フォームの送信状況は外部からも更新されうるため短くする
+summary_cache = TTLCache(
+    default_ttl=_summary_ttl(settings.SUMMARY_CACHE_TTL),
+    ttls={SUMMARY_GOOGLE_FORMS: _summary_ttl(settings.SUMMARY_CACHE_FORMS_TTL)},
+)
+
+# 無効化を他のワーカーに伝える関数（イベントバスの開始時に設定される）
+_invalidation_publisher: Optional[Callable[[Dict[str, Any]], None]] = None
+
+
+def set_invalidation_publisher(publisher: Optional[Callable[[Dict[str, Any]], None]]):
+    """
+    キャッシュの無効化イベントを発行する関数を設定
+
+    Args:
+        publisher: イベント（{"cache_invalidate": [サマリー名]}）を受け取り、
+            イベントバスに発行する関数。任意のスレッドから呼ばれる。None で解除
+    """
+    global _invalidation_publisher
+    _invalidation_publisher = publisher
+
+
+def invalidate_summaries(*names: str):
+    """
+    指定したサマリーのキャッシュを無効化
+
+    このワーカーのキャッシュをすぐに無効化し、イベントバスで他のワーカーにも伝える
+    """
+    if not names:
+        return
+    for name in names:
+        summary_cache.invalidate_prefix(name)
+
+    publisher = _invalidation_publisher
+    if publisher is not None:
+        try:
+            publisher({"cache_invalidate": list(names)})
+        except Exception as e:
+            # 他のワーカーは TTL で期限切れになるまで古い値を返す
+            logger.warning(f"キャッシュ無効化の通知に失敗しました: {e}")
+
+
+def apply_cache_invalidation(event: Dict[str, Any]):
+    """
+    イベントバスから届いた無効化イベントをこのワーカーのキャッシュに反映
+
+    resync（取りこぼしの可能性あり）の場合はサマリーと件数のキャッシュをすべて破棄する
+    """
+    if event.get("resync"):
+        summary_cache.clear()
+        count_cache.clear()
+        return
+    for name in event.get("cache_invalidate") or ():
+        summary_cache.invalidate_prefix(name)
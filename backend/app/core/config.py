@@ -37,10 +37,74 @@ class Settings(BaseSettings):
     
     # SQLite設定（開発用）
     SQLITE_DATABASE_URL: str = "sqlite:///./data/application.db"
+    SQLITE_WAL_MODE: bool = False  # True で WAL にして書き込み1接続＋読み取り専用の接続プールで動かす（既定は単一接続）
+    SQLITE_WRITE_POOL_TIMEOUT: float = 5.0  # WAL で書き込み用の接続が空くのを待つ上限（秒）
+    SQLITE_READ_POOL_SIZE: int = 4  # 読み取り専用の接続数
+    SQLITE_BUSY_TIMEOUT: int = 5000  # ロック待ちの上限（ミリ秒）
+    SQLITE_CACHE_SIZE: int = -65536  # 接続ごとのページキャッシュ（負の値は KiB 単位。-65536 で 64MB）
+    SQLITE_MMAP_SIZE: int = 268435456  # メモリマップ I/O のサイズ（バイト）
     
     # 使用するデータベース
     USE_SQLITE: bool = True  # Trueの場合SQLite、FalseでPostgreSQL
     
+    # ページネーション設定
+    PAGINATION_COUNT_CACHE_TTL: int = 30  # カーソルモードの総件数キャッシュ（秒）
+
+    # データベース管理画面の統計情報のキャッシュ（秒）
+    DATABASE_STATS_CACHE_TTL: int = 30
+
+    # 検索設定
+    SEARCH_RESULT_LIMIT: int = 50  # 検索結果の上限件数
+
+    # ダッシュボード用サマリーのキャッシュ（秒）
+    SUMMARY_CACHE_TTL: int = 300
+    SUMMARY_CACHE_FORMS_TTL: int = 60
+    SUMMARY_CACHE_LOCAL_TTL: int = 5  # EVENT_BUS_BACKEND=memory で複数ワーカーの場合の上限（無効化が他のワーカーに届かないため）
+    WEB_CONCURRENCY: int = 1  # ワーカープロセス数（uvicorn / gunicorn の --workers と同じ環境変数）
+
+    # 郵便番号設定
+    POSTAL_CODE_INDEX_PATH: str = "./data/postal_codes.idx"  # scripts/import_ken_all.py で作成
+    POSTAL_CODE_REMOTE_FALLBACK: bool = True  # 索引にない場合に zipcloud API を参照
+
+    # 監査証跡設定
+    AUDIT_WRITE_MODE: str = "durable"  # durable: 同一トランザクションで書き込み, async: コミット後にまとめて書き込み
+
+    # メール送信キュー設定
+    EMAIL_QUEUE_WORKERS: int = 4  # 送信ワーカーのスレッド数（0 でこのプロセスでは送信しない）
+    EMAIL_QUEUE_POLL_INTERVAL: float = 2.0  # 送信待ちジョブの確認間隔（秒）
+    EMAIL_QUEUE_BATCH_SIZE: int = 10  # ワーカーが一度に取り出すジョブ数
+    EMAIL_MAX_ATTEMPTS: int = 5  # 送信の最大試行回数
+    EMAIL_RETRY_BASE_DELAY: float = 30.0  # 再試行の初回待ち時間（秒）。失敗のたびに倍にする
+    EMAIL_RETRY_MAX_DELAY: float = 3600.0  # 再試行の待ち時間の上限（秒）
+    EMAIL_JOB_LOCK_TIMEOUT: int = 600  # これより長く処理中のジョブはキューに戻す（秒）
+    EMAIL_RATE_LIMITS: Dict[str, float] = {"smtp": 5.0, "sendgrid": 50.0, "aws_ses": 14.0}  # プロバイダーごとの送信数/秒（プロセス単位）
+
+    # 書類生成設定
+    DOCUMENT_WORKERS: int = 2  # 書類生成のプロセス数（0 でこのプロセスでは生成しない）
+    DOCUMENT_OUTPUT_DIR: str = "./data/documents"  # 生成した書類の保存先
+    DOCUMENT_POLL_INTERVAL: float = 5.0  # 生成待ちジョブの確認間隔（秒）
+    DOCUMENT_MAX_ATTEMPTS: int = 3  # 生成の最大試行回数
+    DOCUMENT_JOB_LOCK_TIMEOUT: int = 600  # これより長く処理中のジョブはキューに戻す（秒）
+    DOCUMENT_BATCH_MAX_PROJECTS: int = 1000  # 一括作成で1回に作成する書類の上限
+    DOCUMENT_BATCH_CHUNK_SIZE: int = 10  # 一括作成でプロセスに1回で渡す書類数
+
+    # データベースバックアップ設定
+    BACKUP_DIR: str = "./backups"
+    BACKUP_RETENTION: int = 7  # 保持するフルバックアップの世代数（差分は元のフルバックアップと一緒に削除。0 で無制限）
+    BACKUP_COMPRESSION_LEVEL: int = 6  # gzip / pg_dump の圧縮レベル（0 で無圧縮）
+    BACKUP_PAGES_PER_STEP: int = 1024  # SQLite のオンラインバックアップで1回にコピーするページ数
+    BACKUP_MAX_RESTARTS: int = 5  # 書き込みでやり直しになった回数がこれを超えたら VACUUM INTO で一度に取得する
+    PG_DUMP_PATH: str = "pg_dump"
+
+    # WebSocket設定
+    WEBSOCKET_SEND_QUEUE_SIZE: int = 100  # 接続ごとの送信キュー（溢れたら古いものから破棄）
+    WEBSOCKET_SEND_TIMEOUT: float = 10.0  # 1メッセージの送信にかかる上限（秒）。超えたら切断
+    EVENT_BUS_BACKEND: str = "memory"  # memory: 単一ワーカー, postgres: LISTEN/NOTIFY で全ワーカーに配信
+    EVENT_BUS_CHANNEL: str = "realtime_events"  # LISTEN/NOTIFY のチャンネル名
+    REALTIME_BATCH_WINDOW: float = 0.05  # プロジェクト・申請の変更をまとめる時間窓（秒）
+    REALTIME_HISTORY_SIZE: int = 1000  # 再同期用に保持する batch フレーム数
+    REALTIME_STATE_SIZE: int = 10000  # 差分計算のために状態を保持するエンティティ数
+
     # ファイルアップロード
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB
     UPLOAD_DIR: str = "./data/uploads"
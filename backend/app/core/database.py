@@ -3,18 +3,106 @@
 SQLite と PostgreSQL の両方に対応
 """
 
-from sqlalchemy import create_engine
+import sqlite3
+from pathlib import Path
+
+import aiosqlite
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
+from sqlalchemy.sql.elements import TextClause
 
 from app.core.config import settings
 
+
+def _sqlite_file_path(url: str):
+    """SQLite のファイルパス（メモリ上のデータベースの場合は None）"""
+    database = make_url(url).database
+    if not database or database == ":memory:" or database.startswith("file:"):
+        return None
+    return database
+
+
+def set_sqlite_pragmas(dbapi_connection, read_only: bool = False):
+    """
+    SQLite の接続ごとの設定
+
+    journal_mode=WAL はデータベースファイルに記録されるため書き込み接続でのみ設定する。
+    WAL では synchronous=NORMAL でもコミット済みのデータは壊れない（電源断で直近のコミットが失われうるのみ）
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        if not read_only:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT)}")
+        cursor.execute(f"PRAGMA cache_size={int(settings.SQLITE_CACHE_SIZE)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+    finally:
+        cursor.close()
+
+
 # データベースエンジンの作成
 if settings.USE_SQLITE:
     # SQLite設定（開発用）
     SQLALCHEMY_DATABASE_URL = settings.SQLITE_DATABASE_URL
-    
+    SQLITE_FILE_PATH = _sqlite_file_path(SQLALCHEMY_DATABASE_URL)
+    SQLITE_WAL_ENABLED = settings.SQLITE_WAL_MODE and SQLITE_FILE_PATH is not None
+else:
+    SQLITE_WAL_ENABLED = False
+
+if SQLITE_WAL_ENABLED:
+    # 書き込みは1接続に集約し（SQLite は同時に1つしか書き込めない）、
+    # 読み取りは読み取り専用の接続プールで並行に行う（WAL では書き込み中も読める）。
+    # async def のエンドポイントから同期セッションを使うとイベントループ上で空きを待つため、待ち時間は短く区切る
+    engine = create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        connect_args={
+            "check_same_thread": False,
+            "timeout": settings.SQLITE_BUSY_TIMEOUT / 1000,
+        },
+        poolclass=QueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=settings.SQLITE_WRITE_POOL_TIMEOUT,
+    )
+    # バックグラウンドのワーカー（メール送信・監査証跡・書類生成）は別の書き込み接続を使い、
+    # リクエストと接続の空きを取り合わない（同時の書き込みは SQLite のロック待ちで直列になる）
+    worker_engine = create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        connect_args={
+            "check_same_thread": False,
+            "timeout": settings.SQLITE_BUSY_TIMEOUT / 1000,
+        },
+        poolclass=QueuePool,
+        pool_size=1,
+        max_overflow=0,
+    )
+    read_uri = Path(SQLITE_FILE_PATH).resolve().as_uri() + "?mode=ro"
+    read_engine = create_engine(
+        "sqlite://",
+        creator=lambda: sqlite3.connect(read_uri, uri=True, check_same_thread=False),
+        poolclass=QueuePool,
+        pool_size=max(settings.SQLITE_READ_POOL_SIZE, 1),
+        max_overflow=0,
+    )
+
+    @event.listens_for(engine, "connect")
+    @event.listens_for(worker_engine, "connect")
+    def _configure_sqlite_writer(dbapi_connection, connection_record):
+        set_sqlite_pragmas(dbapi_connection)
+
+    @event.listens_for(read_engine, "connect")
+    def _configure_sqlite_reader(dbapi_connection, connection_record):
+        set_sqlite_pragmas(dbapi_connection, read_only=True)
+elif settings.USE_SQLITE:
+    # メモリ上のデータベース、または SQLITE_WAL_MODE=False の場合は単一接続
     engine = create_engine(
         SQLALCHEMY_DATABASE_URL,
         connect_args={
@@ -22,6 +110,8 @@ if settings.USE_SQLITE:
         },
         poolclass=StaticPool,
     )
+    read_engine = engine
+    worker_engine = engine
 else:
     # PostgreSQL設定（本番用）
     SQLALCHEMY_DATABASE_URL = str(settings.SQLALCHEMY_DATABASE_URI)
@@ -32,9 +122,183 @@ else:
         pool_size=10,
         max_overflow=20,
     )
+    read_engine = engine
+    worker_engine = engine
+
+
+def _is_read_only_statement(clause) -> bool:
+    """読み取り専用の接続で実行できる文か（判断できないものは書き込み扱い）"""
+    if isinstance(clause, TextClause):
+        return clause.text.lstrip().upper().startswith("SELECT")
+    if getattr(clause, "is_select", False):
+        return getattr(clause, "_for_update_arg", None) is None
+    return False
+
+
+class RoutingSession(Session):
+    """
+    読み取りを read_engine、書き込みを engine に振り分けるセッション
+
+    書き込み（flush・DML・SELECT FOR UPDATE）を行ったトランザクションでは、
+    自分の書き込みが見えるようコミットまで読み取りも engine で行う
+    """
+
+    write_bind = engine
+    read_bind = read_engine
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._writing = False
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if mapper is None and clause is None and not self._flushing:
+            # 方言の確認などで呼ばれた場合
+            return self.write_bind
+        if not self._writing and not self._flushing and _is_read_only_statement(clause):
+            return self.read_bind
+        self._writing = True
+        return self.write_bind
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _reset_routing(session, transaction):
+    if transaction.parent is None:
+        session._writing = False
+
+
+class WorkerRoutingSession(RoutingSession):
+    """バックグラウンドのワーカー用の RoutingSession（書き込みは worker_engine で行う）"""
+
+    write_bind = worker_engine
+
 
 # セッションローカルの作成
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# WorkerSessionLocal はバックグラウンドのワーカースレッド用
+if SQLITE_WAL_ENABLED:
+    SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
+    WorkerSessionLocal = sessionmaker(
+        class_=WorkerRoutingSession, autocommit=False, autoflush=False, bind=worker_engine
+    )
+else:
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    WorkerSessionLocal = SessionLocal
+
+
+def to_async_url(url: str) -> str:
+    """
+    同期ドライバのURLを非同期ドライバのURLに変換
+    sqlite → aiosqlite、postgresql → asyncpg
+    """
+    if url.startswith("sqlite:///"):
+        return url.replace("sqlite:///", "sqlite+aiosqlite:///", 1)
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    return url
+
+
+class _SharedSQLiteConnection:
+    """
+    同期・非同期のエンジンで共有する sqlite3 の接続
+
+    aiosqlite は終了時に接続を閉じるため、close だけは同期エンジン側に任せる
+    """
+
+    def __init__(self, connection: sqlite3.Connection):
+        object.__setattr__(self, "_connection", connection)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._connection, name, value)
+
+    def close(self):
+        pass
+
+
+def _shared_sqlite_connection() -> _SharedSQLiteConnection:
+    """同期エンジンの接続を非同期エンジン用に取り出す（StaticPool のため常に同じ接続）"""
+    connection = engine.raw_connection()
+    try:
+        return _SharedSQLiteConnection(connection.dbapi_connection)
+    finally:
+        connection.close()
+
+
+# 非同期エンジンの作成（async def エンドポイント用）
+if SQLITE_WAL_ENABLED:
+    # 同期側と同じく、書き込みは1接続、読み取りは読み取り専用の接続プールで行う
+    async_engine = create_async_engine(
+        to_async_url(SQLALCHEMY_DATABASE_URL),
+        connect_args={"timeout": settings.SQLITE_BUSY_TIMEOUT / 1000},
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+    )
+    async_read_engine = create_async_engine(
+        "sqlite+aiosqlite://",
+        async_creator=lambda: aiosqlite.connect(read_uri, uri=True),
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=max(settings.SQLITE_READ_POOL_SIZE, 1),
+        max_overflow=0,
+    )
+
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def _configure_sqlite_async_writer(dbapi_connection, connection_record):
+        set_sqlite_pragmas(dbapi_connection)
+
+    @event.listens_for(async_read_engine.sync_engine, "connect")
+    def _configure_sqlite_async_reader(dbapi_connection, connection_record):
+        set_sqlite_pragmas(dbapi_connection, read_only=True)
+elif settings.USE_SQLITE and SQLITE_FILE_PATH is None:
+    # メモリ上のデータベースは接続ごとに別のデータベースになるため、
+    # 同期エンジン（StaticPool）の唯一の接続を非同期エンジンからも使う
+    async_engine = create_async_engine(
+        "sqlite+aiosqlite://",
+        async_creator=lambda: aiosqlite.Connection(_shared_sqlite_connection, 64),
+        poolclass=StaticPool,
+    )
+    async_read_engine = async_engine
+elif settings.USE_SQLITE:
+    async_engine = create_async_engine(
+        to_async_url(SQLALCHEMY_DATABASE_URL),
+        connect_args={"timeout": settings.SQLITE_BUSY_TIMEOUT / 1000},
+    )
+    async_read_engine = async_engine
+else:
+    async_engine = create_async_engine(
+        to_async_url(SQLALCHEMY_DATABASE_URL),
+        pool_pre_ping=True,
+        pool_size=10,
+        max_overflow=20,
+    )
+    async_read_engine = async_engine
+
+
+class AsyncRoutingSession(RoutingSession):
+    """AsyncSession の内部で使う RoutingSession（非同期エンジンの読み取り・書き込み用に振り分ける）"""
+
+    write_bind = async_engine.sync_engine
+    read_bind = async_read_engine.sync_engine
+
+
+# 非同期セッションの作成
+# コミット後に属性へアクセスしても遅延ロード（=同期I/O）が発生しないよう expire_on_commit=False
+if SQLITE_WAL_ENABLED:
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        class_=AsyncSession,
+        sync_session_class=AsyncRoutingSession,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+else:
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        class_=AsyncSession,
+        autoflush=False,
+        expire_on_commit=False,
+    )
 
 # ベースクラス
 Base = declarative_base()
@@ -52,6 +316,25 @@ def get_db():
         db.close()
 
 
+async def dispose_async_engines():
+    """
+    非同期エンジンの接続を閉じる
+    aiosqlite の接続はそれぞれスレッドを持つため、アプリの終了時に閉じる
+    """
+    await async_engine.dispose()
+    if async_read_engine is not async_engine:
+        await async_read_engine.dispose()
+
+
+async def get_async_db():
+    """
+    非同期データベースセッションの取得
+    async def のエンドポイントでイベントループをブロックせずにクエリを実行する
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def create_tables():
     """
     テーブルの作成
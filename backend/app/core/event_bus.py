@@ -0,0 +1,182 @@
+"""
+リアルタイム更新用のイベントバス
+複数ワーカー・複数コンテナで動かしたときに、どのワーカーで発生した更新も
+すべてのワーカーの WebSocket 接続に届ける
+"""
+
+import asyncio
+import json
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# イベント（エンベロープ）を受け取るハンドラー。待たずに処理できること
+EventHandler = Callable[[Dict[str, Any]], None]
+
+# PostgreSQL の NOTIFY ペイロードの上限（8000バイト）より少し小さく取る
+NOTIFY_PAYLOAD_LIMIT = 7900
+
+
+class EventBus(ABC):
+    """
+    イベントバスの基底クラス
+
+    publish したイベントは、start 時に登録したハンドラーに（発行元のワーカーも含めて）
+    すべてのワーカーで1回ずつ渡される
+    """
+
+    @abstractmethod
+    async def start(self, handler: EventHandler):
+        """購読を開始"""
+        pass
+
+    @abstractmethod
+    async def publish(self, event: Dict[str, Any]):
+        """イベントを発行"""
+        pass
+
+    @abstractmethod
+    async def stop(self):
+        """購読を停止"""
+        pass
+
+
+class InMemoryEventBus(EventBus):
+    """
+    プロセス内のイベントバス（単一ワーカー・開発・テスト用）
+
+    発行したイベントをそのまま同じプロセスのハンドラーに渡す
+    """
+
+    def __init__(self, handler: Optional[EventHandler] = None):
+        self._handler = handler
+
+    async def start(self, handler: EventHandler):
+        self._handler = handler
+
+    async def publish(self, event: Dict[str, Any]):
+        if self._handler is not None:
+            self._handler(event)
+
+    async def stop(self):
+        self._handler = None
+
+
+class PostgresEventBus(EventBus):
+    """
+    PostgreSQL の LISTEN/NOTIFY によるイベントバス
+
+    ワーカーごとに LISTEN 用の接続を1本持つ。接続が切れた場合は再接続し、
+    その間に取りこぼした可能性があるため resync イベントをハンドラーに渡す
+    """
+
+    RECONNECT_INTERVAL = 1.0
+    MAX_RECONNECT_INTERVAL = 30.0
+
+    def __init__(self, dsn: str, channel: str):
+        """
+        Args:
+            dsn: PostgreSQL の接続文字列（postgresql://...）
+            channel: LISTEN/NOTIFY のチャンネル名
+        """
+        self.dsn = dsn
+        self.channel = channel
+        self._handler: Optional[EventHandler] = None
+        self._listen_connection = None
+        self._pool = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._stopped = False
+
+    async def start(self, handler: EventHandler):
+        import asyncpg
+
+        self._handler = handler
+        self._stopped = False
+        self._pool = await asyncpg.create_pool(self.dsn, min_size=1, max_size=2)
+        await self._listen()
+        logger.info(f"Listening for realtime events on channel '{self.channel}'")
+
+    async def publish(self, event: Dict[str, Any]):
+        payload = json.dumps(event, ensure_ascii=False)
+        if len(payload.encode("utf-8")) > NOTIFY_PAYLOAD_LIMIT:
+            # 大きすぎるイベントは送れないため、各ワーカーに再取得を促す
+            logger.warning(f"Realtime event too large for NOTIFY ({len(payload)} chars). Sending resync instead")
+            payload = json.dumps({"resync": True})
+
+        try:
+            await self._pool.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+        except Exception as e:
+            # 他のワーカーには届かないが、少なくともこのワーカーの接続には届ける
+            logger.error(f"Failed to publish realtime event: {e}")
+            if self._handler is not None:
+                self._handler(event)
+
+    async def stop(self):
+        self._stopped = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+        if self._listen_connection is not None:
+            await self._listen_connection.close()
+            self._listen_connection = None
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    async def _listen(self):
+        import asyncpg
+
+        connection = await asyncpg.connect(self.dsn)
+        await connection.add_listener(self.channel, self._on_notify)
+        connection.add_termination_listener(self._on_terminated)
+        self._listen_connection = connection
+
+    def _on_notify(self, connection, pid: int, channel: str, payload: str):
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.error(f"Invalid realtime event payload: {payload[:100]}")
+            return
+        self._handler(event)
+
+    def _on_terminated(self, connection):
+        self._listen_connection = None
+        if not self._stopped:
+            logger.warning("Realtime event listener disconnected. Reconnecting")
+            self._reconnect_task = asyncio.create_task(self._reconnect())
+
+    async def _reconnect(self):
+        interval = self.RECONNECT_INTERVAL
+        while not self._stopped:
+            try:
+                await self._listen()
+            except Exception as e:
+                logger.error(f"Failed to reconnect realtime event listener: {e}")
+                await asyncio.sleep(interval)
+                interval = min(interval * 2, self.MAX_RECONNECT_INTERVAL)
+                continue
+
+            logger.info("Realtime event listener reconnected")
+            # 切断中のイベントは失われているためクライアントに再取得させる
+            self._handler({"resync": True})
+            return
+
+
+def create_event_bus() -> EventBus:
+    """
+    設定（EVENT_BUS_BACKEND）に応じたイベントバスを作成
+
+    Returns:
+        memory: InMemoryEventBus, postgres: PostgresEventBus
+    """
+    backend = settings.EVENT_BUS_BACKEND
+    if backend == "memory":
+        return InMemoryEventBus()
+    if backend == "postgres":
+        if settings.USE_SQLITE:
+            raise ValueError("EVENT_BUS_BACKEND=postgres は PostgreSQL 使用時（USE_SQLITE=False）のみ利用できます")
+        return PostgresEventBus(settings.SQLALCHEMY_DATABASE_URI, settings.EVENT_BUS_CHANNEL)
+    raise ValueError(f"EVENT_BUS_BACKEND は memory または postgres である必要があります: {backend}")
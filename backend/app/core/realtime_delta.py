@@ -0,0 +1,134 @@
+"""
+リアルタイム更新の差分エンコード
+短い時間窓に発生したエンティティの変更を1フレームにまとめ、
+前回送信時から変わったフィールドだけを送る
+"""
+
+import uuid
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+EntityKey = Tuple[str, Any]  # (エンティティ種別, ID)
+
+
+class DeltaEncoder:
+    """
+    エンティティ変更の差分エンコーダー
+
+    - add: 変更を保留中のバッチに積む（同じエンティティの変更はマージ）
+    - flush: 保留中の変更を1フレームにまとめて連番（seq）を振る
+    - frames_since: 指定した seq より後のフレームを履歴から返す（再同期用）
+
+    各イベントの version は、そのエンティティが最後に変更されたフレームの seq。
+    seq はエンコーダーごとの連番なので、クライアントは epoch が変わったら
+    全体を再取得する必要がある
+    """
+
+    def __init__(self, history_size: int = 1000, state_size: int = 10000):
+        """
+        Args:
+            history_size: 再同期用に保持するフレーム数
+            state_size: 差分計算のために最後の状態を保持するエンティティ数
+        """
+        self.epoch = uuid.uuid4().hex[:12]
+        self.seq = 0
+        self._state_size = state_size
+        # 最後に送信した状態（古いものから追い出す）
+        self._state: "OrderedDict[EntityKey, Dict[str, Any]]" = OrderedDict()
+        self._pending: Dict[EntityKey, Dict[str, Any]] = {}
+        self._history: Deque[Tuple[int, List[Tuple[Dict[str, Any], List[str]]]]] = deque(maxlen=history_size)
+
+    @property
+    def has_pending(self) -> bool:
+        return bool(self._pending)
+
+    def add(self, entity: str, entity_id: Any, action: str, data: Dict[str, Any], topics: Iterable[str]):
+        """
+        変更を保留中のバッチに積む
+
+        Args:
+            entity: エンティティ種別（project, application）
+            entity_id: エンティティのID
+            action: create, update, delete
+            data: 変更後の値（一部のフィールドでもよい）
+            topics: この変更を届けるトピック
+        """
+        key = (entity, entity_id)
+        pending = self._pending.get(key)
+        if pending is None or action == "delete":
+            self._pending[key] = {"action": action, "data": dict(data), "topics": set(topics)}
+            return
+
+        # 作成直後の更新は作成としてまとめる。削除後の再作成は作成として扱う
+        if pending["action"] == "delete":
+            pending["action"] = "create"
+            pending["data"] = {}
+        pending["data"].update(data)
+        pending["topics"].update(topics)
+
+    def flush(self) -> Optional[Tuple[int, List[Tuple[Dict[str, Any], List[str]]]]]:
+        """
+        保留中の変更を差分にして1フレームにまとめる
+
+        Returns:
+            (seq, [(イベント, トピック), ...])。送るものがなければ None
+        """
+        if not self._pending:
+            return None
+
+        seq = self.seq + 1
+        events = []
+        for (entity, entity_id), pending in self._pending.items():
+            key = (entity, entity_id)
+            action = pending["action"]
+            event: Dict[str, Any] = {"entity": entity, "id": entity_id, "action": action, "version": seq}
+
+            if action == "delete":
+                self._state.pop(key, None)
+            else:
+                previous = self._state.get(key)
+                if action == "create" or previous is None:
+                    changes = pending["data"]
+                    self._remember(key, dict(changes))
+                else:
+                    changes = {k: v for k, v in pending["data"].items() if previous.get(k) != v}
+                    if not changes:
+                        continue
+                    previous.update(changes)
+                    self._state.move_to_end(key)
+                event["changes"] = changes
+
+            events.append((event, sorted(pending["topics"])))
+
+        self._pending.clear()
+        if not events:
+            return None
+
+        self.seq = seq
+        self._history.append((seq, events))
+        return seq, events
+
+    def frames_since(self, seq: int, epoch: Optional[str] = None):
+        """
+        指定した seq より後のフレームを返す
+
+        Args:
+            seq: クライアントが最後に受け取ったフレームの seq
+            epoch: クライアントが受け取った epoch
+
+        Returns:
+            フレームのリスト。履歴が足りない・epoch が異なる場合は None（全体の再取得が必要）
+        """
+        if (epoch is not None and epoch != self.epoch) or seq > self.seq:
+            return None
+        if seq == self.seq:
+            return []
+        if not self._history or self._history[0][0] > seq + 1:
+            return None
+        return [(frame_seq, events) for frame_seq, events in self._history if frame_seq > seq]
+
+    def _remember(self, key: EntityKey, data: Dict[str, Any]):
+        self._state[key] = data
+        self._state.move_to_end(key)
+        while len(self._state) > self._state_size:
+            self._state.popitem(last=False)
@@ -3,33 +3,236 @@ WebSocket Connection Manager for Real-time Updates
 リアルタイム更新のためのWebSocket接続管理
 """
 
+import asyncio
 import json
 import logging
-from typing import Dict, List, Any
+from typing import Callable, Dict, List, Any, Optional, Set, Tuple
 from fastapi import WebSocket, WebSocketDisconnect
 from datetime import datetime
 
+from app.core.cache import apply_cache_invalidation, set_invalidation_publisher
+from app.core.config import settings
+from app.core.event_bus import EventBus, InMemoryEventBus
+from app.core.realtime_delta import DeltaEncoder
+
 logger = logging.getLogger(__name__)
 
+# 購読していない（subscribe を送っていない）接続はすべてのイベントを受け取る
+TOPIC_ALL = "*"
+
+# クライアントが subscribe で指定できるトピックの種類
+SUBSCRIBABLE_TOPIC_KINDS = ("event", "project", "application")
+
+# 1接続あたりの購読トピック数の上限
+MAX_TOPICS_PER_CONNECTION = 200
+
+
+def event_topic(event_type: str) -> str:
+    """イベント種別（project_update など）のトピック"""
+    return f"event:{event_type}"
+
+
+def project_topic(project_id: Any) -> str:
+    """プロジェクト単位のトピック"""
+    return f"project:{project_id}"
+
+
+def application_topic(application_id: Any) -> str:
+    """申請単位のトピック"""
+    return f"application:{application_id}"
+
+
+def user_topic(user_id: str) -> str:
+    """ユーザー宛てメッセージのトピック（接続時に自動で購読）"""
+    return f"user:{user_id}"
+
+
+def resync_message(reason: str) -> str:
+    """取りこぼしがあった接続に再取得を促すメッセージ（シリアライズ済み）"""
+    return json.dumps({
+        "type": "dashboard_refresh",
+        "reason": reason,
+        "message": "一部の更新を受信できませんでした。データを再取得してください。",
+        "timestamp": datetime.now().isoformat()
+    }, ensure_ascii=False)
+
+
+class ClientConnection:
+    """
+    送信キューと送信タスクを持つ WebSocket 接続
+    
+    ブロードキャストはキューに積むだけで待たないため、遅いクライアントが
+    他のクライアントへの配信を遅らせることはない。
+    - キューが溢れた場合は古いメッセージから捨て、追いついた時点で
+      dashboard_refresh を1回送ってクライアントに再取得させる
+    - coalesce_key 付きのメッセージは、同じキーが未送信のうちは1件にまとめる
+    - 送信が send_timeout 秒を超えたクライアントは切断する
+    """
+    
+    def __init__(
+        self,
+        websocket: WebSocket,
+        on_close: Callable[[WebSocket], None],
+        queue_size: int,
+        send_timeout: float
+    ):
+        self.websocket = websocket
+        self.dropped_messages = 0
+        self._on_close = on_close
+        self._send_timeout = send_timeout
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._pending_keys: Set[str] = set()
+        self._resync_pending = False
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        """送信タスクを開始"""
+        self._task = asyncio.create_task(self._writer())
+    
+    def enqueue(self, text: str, coalesce_key: Optional[str] = None):
+        """
+        シリアライズ済みのメッセージを送信キューに積む（待たない）
+        
+        Args:
+            text: JSON 文字列
+            coalesce_key: 未送信の同じキーのメッセージがあれば積まない
+        """
+        if coalesce_key is not None:
+            if coalesce_key in self._pending_keys:
+                return
+            self._pending_keys.add(coalesce_key)
+        
+        if self._queue.full():
+            dropped_key, _ = self._queue.get_nowait()
+            self._pending_keys.discard(dropped_key)
+            self.dropped_messages += 1
+            self._resync_pending = True
+        
+        self._queue.put_nowait((coalesce_key, text))
+    
+    def close(self):
+        """送信タスクを停止"""
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
+    
+    async def _writer(self):
+        """キューのメッセージを順に送信"""
+        try:
+            while True:
+                key, text = await self._queue.get()
+                self._pending_keys.discard(key)
+                await self._send(text)
+                
+                if self._resync_pending and self._queue.empty():
+                    # 取りこぼしたメッセージの代わりに全体の再取得を促す
+                    self._resync_pending = False
+                    await self._send(resync_message("messages_dropped"))
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            logger.warning("WebSocket send timed out. Closing slow connection")
+            await self._abort()
+        except WebSocketDisconnect:
+            self._on_close(self.websocket)
+        except Exception as e:
+            logger.error(f"Failed to send message: {e}")
+            await self._abort()
+    
+    async def _send(self, text: str):
+        await asyncio.wait_for(self.websocket.send_text(text), timeout=self._send_timeout)
+    
+    async def _abort(self):
+        """送信できなくなった接続を閉じる"""
+        self._on_close(self.websocket)
+        try:
+            await self.websocket.close()
+        except Exception:
+            pass
+
 
 class ConnectionManager:
-    """WebSocket接続を管理するクラス"""
+    """
+    WebSocket接続を管理するクラス
+    
+    送信するメッセージはイベントバスを経由して全ワーカーに配られ、
+    各ワーカーが自分の持つ接続に deliver する。既定はプロセス内のバスで、
+    複数ワーカー構成では起動時に start_event_bus で差し替える
+    
+    プロジェクト・申請の変更は REALTIME_BATCH_WINDOW 秒ごとに batch フレームに
+    まとめ、変更されたフィールドだけを送る
+    """
     
     def __init__(self):
         # アクティブな接続を格納
         self.active_connections: List[WebSocket] = []
         # 接続ごとの情報を格納（ユーザーID、接続時刻など）
         self.connection_info: Dict[WebSocket, Dict[str, Any]] = {}
+        # 接続ごとの送信キュー
+        self.clients: Dict[WebSocket, ClientConnection] = {}
+        # トピック → 購読している接続
+        self.subscriptions: Dict[str, Set[WebSocket]] = {}
+        # 接続 → 購読しているトピック
+        self.connection_topics: Dict[WebSocket, Set[str]] = {}
+        # 切断済みの接続で取りこぼしたメッセージ数
+        self._dropped_messages = 0
+        self.event_bus: EventBus = InMemoryEventBus(self.deliver)
+        # エンティティ変更の差分・バッチ化
+        self.delta = DeltaEncoder(
+            history_size=settings.REALTIME_HISTORY_SIZE,
+            state_size=settings.REALTIME_STATE_SIZE
+        )
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+    
+    async def start_event_bus(self, event_bus: EventBus):
+        """
+        イベントバスを差し替えて購読を開始
+        
+        キャッシュの無効化もこのバスで全ワーカーに伝える
+        """
+        await self.event_bus.stop()
+        self.event_bus = event_bus
+        await event_bus.start(self.deliver)
+        
+        loop = asyncio.get_running_loop()
+        set_invalidation_publisher(
+            lambda event: loop.call_soon_threadsafe(self._publish_in_background, event)
+        )
+    
+    async def stop_event_bus(self):
+        """イベントバスの購読を停止"""
+        set_invalidation_publisher(None)
+        await self.event_bus.stop()
+    
+    def _publish_in_background(self, event: Dict[str, Any]):
+        """同期コード（スレッド）から発行されたイベントをイベントループ上で発行"""
+        task = asyncio.ensure_future(self.event_bus.publish(event))
+        task.add_done_callback(self._log_publish_error)
+    
+    @staticmethod
+    def _log_publish_error(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Failed to publish event: {task.exception()}")
     
     async def connect(self, websocket: WebSocket, user_id: str = None):
         """新しいWebSocket接続を受け入れる"""
         await websocket.accept()
+        client = ClientConnection(
+            websocket,
+            on_close=self.disconnect,
+            queue_size=settings.WEBSOCKET_SEND_QUEUE_SIZE,
+            send_timeout=settings.WEBSOCKET_SEND_TIMEOUT
+        )
+        client.start()
+        self.clients[websocket] = client
         self.active_connections.append(websocket)
         self.connection_info[websocket] = {
             "user_id": user_id,
             "connected_at": datetime.now(),
             "last_ping": datetime.now()
         }
+        self._add_topics(websocket, [TOPIC_ALL])
+        if user_id:
+            self._add_topics(websocket, [user_topic(user_id)])
         
         logger.info(f"WebSocket connection established. User: {user_id}, Total connections: {len(self.active_connections)}")
         
@@ -38,6 +241,8 @@ class ConnectionManager:
             "type": "connection_status",
             "status": "connected",
             "message": "リアルタイム更新が有効になりました",
+            "epoch": self.delta.epoch,
+            "seq": self.delta.seq,
             "timestamp": datetime.now().isoformat()
         }, websocket)
     
@@ -45,69 +250,299 @@ class ConnectionManager:
         """WebSocket接続を切断する"""
         if websocket in self.active_connections:
             self.active_connections.remove(websocket)
+            client = self.clients.pop(websocket, None)
+            if client is not None:
+                self._dropped_messages += client.dropped_messages
+                client.close()
+            self._remove_topics(websocket, list(self.connection_topics.pop(websocket, ())))
             user_info = self.connection_info.pop(websocket, {})
             logger.info(f"WebSocket connection closed. User: {user_info.get('user_id')}, Remaining connections: {len(self.active_connections)}")
     
+    def subscribe(self, websocket: WebSocket, topics: List[str]) -> List[str]:
+        """
+        接続にトピックを購読させる
+        
+        最初の subscribe で「すべてのイベントを受け取る」状態は解除され、
+        以降は購読したトピックのイベントだけを受け取る
+        
+        Args:
+            websocket: 対象の接続
+            topics: event_topic / project_topic / application_topic で作ったトピック
+            
+        Returns:
+            購読中のトピック（ユーザー宛てトピックを除く）
+        """
+        if websocket not in self.connection_topics:
+            return []
+        
+        self._remove_topics(websocket, [TOPIC_ALL])
+        current = self.connection_topics[websocket]
+        room = MAX_TOPICS_PER_CONNECTION - len(current)
+        self._add_topics(websocket, [t for t in topics if t not in current][:max(room, 0)])
+        return self.get_subscribed_topics(websocket)
+    
+    def unsubscribe(self, websocket: WebSocket, topics: List[str]) -> List[str]:
+        """トピックの購読を解除し、購読中のトピックを返す"""
+        if websocket not in self.connection_topics:
+            return []
+        
+        self._remove_topics(websocket, [t for t in topics if not t.startswith("user:")])
+        return self.get_subscribed_topics(websocket)
+    
+    def get_subscribed_topics(self, websocket: WebSocket) -> List[str]:
+        """購読中のトピック（ユーザー宛てトピックを除く）"""
+        return sorted(
+            topic for topic in self.connection_topics.get(websocket, ())
+            if not topic.startswith("user:")
+        )
+    
+    def _add_topics(self, websocket: WebSocket, topics: List[str]):
+        self.connection_topics.setdefault(websocket, set()).update(topics)
+        for topic in topics:
+            self.subscriptions.setdefault(topic, set()).add(websocket)
+    
+    def _remove_topics(self, websocket: WebSocket, topics: List[str]):
+        connection_topics = self.connection_topics.get(websocket)
+        for topic in topics:
+            if connection_topics is not None:
+                connection_topics.discard(topic)
+            subscribers = self.subscriptions.get(topic)
+            if subscribers is None:
+                continue
+            subscribers.discard(websocket)
+            if not subscribers:
+                del self.subscriptions[topic]
+    
     async def send_personal_message(self, message: Dict[str, Any], websocket: WebSocket):
         """特定の接続にメッセージを送信"""
-        try:
-            await websocket.send_text(json.dumps(message, ensure_ascii=False))
-        except Exception as e:
-            logger.error(f"Failed to send personal message: {e}")
-            # 接続が失効している場合は削除
-            self.disconnect(websocket)
-    
-    async def broadcast(self, message: Dict[str, Any]):
-        """すべての接続にメッセージをブロードキャスト"""
-        if not self.active_connections:
-            logger.debug("No active connections to broadcast to")
+        client = self.clients.get(websocket)
+        if client is None:
+            logger.debug("Skipped message to a closed connection")
             return
         
-        message["timestamp"] = datetime.now().isoformat()
-        disconnected_connections = []
+        client.enqueue(json.dumps(message, ensure_ascii=False))
+    
+    async def broadcast(self, message: Dict[str, Any], coalesce_key: Optional[str] = None):
+        """
+        すべての接続にメッセージをブロードキャスト
+        
+        メッセージのシリアライズは1回だけ行い、各接続の送信キューに積む。
+        実際の送信は接続ごとの送信タスクが並行して行う
         
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(json.dumps(message, ensure_ascii=False))
-            except WebSocketDisconnect:
-                disconnected_connections.append(connection)
-            except Exception as e:
-                logger.error(f"Failed to broadcast message: {e}")
-                disconnected_connections.append(connection)
+        Args:
+            message: 送信するメッセージ
+            coalesce_key: 指定時、未送信の同じキーのメッセージがある接続には積まない
+        """
+        message["timestamp"] = datetime.now().isoformat()
+        await self.event_bus.publish({
+            "text": json.dumps(message, ensure_ascii=False),
+            "topics": None,
+            "coalesce_key": coalesce_key
+        })
+    
+    async def publish(
+        self,
+        message: Dict[str, Any],
+        topics: List[str],
+        coalesce_key: Optional[str] = None
+    ):
+        """
+        トピックを購読している接続にだけメッセージを送信
         
-        # 失効した接続を削除
-        for connection in disconnected_connections:
-            self.disconnect(connection)
+        宛先はトピックごとの購読者の和集合で、全接続を走査しない
         
-        logger.info(f"Broadcasted message to {len(self.active_connections)} connections")
+        Args:
+            message: 送信するメッセージ
+            topics: メッセージに関係するトピック（いずれかを購読していれば届く）
+            coalesce_key: broadcast と同じ
+        """
+        message["timestamp"] = datetime.now().isoformat()
+        await self.event_bus.publish({
+            "text": json.dumps(message, ensure_ascii=False),
+            "topics": topics,
+            "coalesce_key": coalesce_key
+        })
     
     async def broadcast_to_user(self, message: Dict[str, Any], user_id: str):
         """特定のユーザーの全接続にメッセージを送信"""
-        user_connections = [
-            conn for conn, info in self.connection_info.items() 
-            if info.get("user_id") == user_id
-        ]
+        await self.event_bus.publish({
+            "text": json.dumps(message, ensure_ascii=False),
+            "topics": [user_topic(user_id)],
+            "exclusive": True
+        })
+    
+    def deliver(self, event: Dict[str, Any]):
+        """
+        イベントバスから届いたイベントをこのワーカーの接続の送信キューに積む
+        
+        Args:
+            event: text（シリアライズ済みメッセージ）, topics（None なら全接続）,
+                coalesce_key, exclusive（True なら全イベント購読の接続には送らない）。
+                resync が True の場合は全接続に再取得を促す。
+                cache_invalidate はこのワーカーのキャッシュの無効化
+        """
+        if "cache_invalidate" in event:
+            apply_cache_invalidation(event)
+            return
+        
+        if event.get("resync"):
+            # 取りこぼした無効化があるかもしれないため、キャッシュも破棄する
+            apply_cache_invalidation(event)
+            text = resync_message("events_lost")
+            for client in list(self.clients.values()):
+                client.enqueue(text)
+            return
         
-        for connection in user_connections:
-            await self.send_personal_message(message, connection)
+        if "entity" in event:
+            self.delta.add(event["entity"], event["id"], event["action"], event["data"], event["topics"])
+            if self._flush_handle is None:
+                self._flush_handle = asyncio.get_running_loop().call_later(
+                    settings.REALTIME_BATCH_WINDOW, self.flush_batch
+                )
+            return
+        
+        topics = event.get("topics")
+        if topics is None:
+            recipients = list(self.clients)
+        else:
+            recipients: Set[WebSocket] = set()
+            if not event.get("exclusive"):
+                recipients.update(self.subscriptions.get(TOPIC_ALL, ()))
+            for topic in topics:
+                recipients.update(self.subscriptions.get(topic, ()))
+        
+        text = event["text"]
+        coalesce_key = event.get("coalesce_key")
+        for connection in recipients:
+            client = self.clients.get(connection)
+            if client is not None:
+                client.enqueue(text, coalesce_key)
+        
+        logger.debug(f"Delivered message to {len(recipients)} connections")
     
-    async def send_project_update(self, project_data: Dict[str, Any], action: str = "update"):
-        """プロジェクト更新通知を送信"""
+    def flush_batch(self):
+        """
+        保留中のエンティティ変更を batch フレームにして送信
+        
+        接続ごとに購読しているトピックのイベントだけを含める。
+        同じイベントの組み合わせになる接続には同じシリアライズ結果を使う
+        """
+        self._flush_handle = None
+        frame = self.delta.flush()
+        if frame is None:
+            return
+        seq, events = frame
+        
+        # 接続ごとに届けるイベントの番号を集める
+        visible: Dict[WebSocket, List[int]] = {}
+        for index, (_, topics) in enumerate(events):
+            recipients = set(self.subscriptions.get(TOPIC_ALL, ()))
+            for topic in topics:
+                recipients.update(self.subscriptions.get(topic, ()))
+            for connection in recipients:
+                visible.setdefault(connection, []).append(index)
+        
+        groups: Dict[Tuple[int, ...], List[WebSocket]] = {}
+        for connection, indexes in visible.items():
+            groups.setdefault(tuple(indexes), []).append(connection)
+        
+        timestamp = datetime.now().isoformat()
+        for indexes, connections in groups.items():
+            text = self._batch_message(seq, [events[i][0] for i in indexes], timestamp)
+            for connection in connections:
+                client = self.clients.get(connection)
+                if client is not None:
+                    client.enqueue(text)
+        
+        logger.debug(f"Sent batch {seq} ({len(events)} events) to {len(visible)} connections")
+    
+    async def resync(self, websocket: WebSocket, since: int, epoch: Optional[str] = None):
+        """
+        クライアントが最後に受け取った seq 以降の変更を再送
+        
+        履歴が残っていない・epoch が異なる（サーバーの再起動や別ワーカーへの再接続）
+        場合は dashboard_refresh で全体の再取得を促す
+        
+        Args:
+            websocket: 対象の接続
+            since: クライアントが最後に受け取った batch フレームの seq
+            epoch: クライアントが受け取った epoch
+        """
+        client = self.clients.get(websocket)
+        if client is None:
+            return
+        
+        frames = self.delta.frames_since(since, epoch)
+        if frames is None:
+            client.enqueue(resync_message("history_expired"))
+            return
+        
+        topics = self.connection_topics.get(websocket, set())
+        events = [
+            event
+            for _, frame_events in frames
+            for event, event_topics in frame_events
+            if TOPIC_ALL in topics or not topics.isdisjoint(event_topics)
+        ]
+        client.enqueue(self._batch_message(self.delta.seq, events, datetime.now().isoformat(), replay=True))
+    
+    def _batch_message(self, seq: int, events: List[Dict[str, Any]], timestamp: str, replay: bool = False) -> str:
         message = {
-            "type": "project_update",
-            "action": action,  # create, update, delete
-            "data": project_data
+            "type": "batch",
+            "epoch": self.delta.epoch,
+            "seq": seq,
+            "events": events,
+            "timestamp": timestamp
         }
-        await self.broadcast(message)
+        if replay:
+            message["replay"] = True
+        return json.dumps(message, ensure_ascii=False)
+    
+    async def send_project_update(self, project_data: Dict[str, Any], action: str = "update"):
+        """
+        プロジェクト更新通知を送信
+        
+        短時間の変更は batch フレームにまとめられ、変更されたフィールドだけが送られる
+        """
+        await self.publish_entity_change("project", project_data, action, [
+            event_topic("project_update"),
+            project_topic(project_data.get("id"))
+        ])
     
     async def send_application_update(self, application_data: Dict[str, Any], action: str = "update"):
-        """申請更新通知を送信"""
-        message = {
-            "type": "application_update", 
+        """申請更新通知を送信（send_project_update と同様にまとめて送る）"""
+        topics = [
+            event_topic("application_update"),
+            application_topic(application_data.get("id"))
+        ]
+        # プロジェクトを購読している画面にも、そのプロジェクトの申請の更新を届ける
+        if application_data.get("project_id") is not None:
+            topics.append(project_topic(application_data["project_id"]))
+        await self.publish_entity_change("application", application_data, action, topics)
+    
+    async def publish_entity_change(
+        self,
+        entity: str,
+        data: Dict[str, Any],
+        action: str,
+        topics: List[str]
+    ):
+        """
+        エンティティの変更をイベントバスに発行（各ワーカーで batch フレームにまとめる）
+        
+        Args:
+            entity: エンティティ種別（project, application）
+            data: 変更後の値。id を含むこと
+            action: create, update, delete
+            topics: この変更を届けるトピック
+        """
+        await self.event_bus.publish({
+            "entity": entity,
+            "id": data.get("id"),
             "action": action,
-            "data": application_data
-        }
-        await self.broadcast(message)
+            "data": data,
+            "topics": topics
+        })
     
     async def send_dashboard_refresh(self):
         """ダッシュボードリフレッシュ通知を送信"""
@@ -115,7 +550,8 @@ class ConnectionManager:
             "type": "dashboard_refresh",
             "message": "データが更新されました。ダッシュボードを更新してください。"
         }
-        await self.broadcast(message)
+        # 未送信のリフレッシュ通知があればまとめる
+        await self.publish(message, [event_topic("dashboard_refresh")], coalesce_key="dashboard_refresh")
     
     async def send_notification(self, notification_data: Dict[str, Any], user_id: str = None):
         """通知を送信"""
@@ -127,17 +563,21 @@ class ConnectionManager:
         if user_id:
             await self.broadcast_to_user(message, user_id)
         else:
-            await self.broadcast(message)
+            await self.publish(message, [event_topic("notification")])
     
     def get_connection_stats(self) -> Dict[str, Any]:
         """接続統計を取得"""
         return {
             "total_connections": len(self.active_connections),
             "connections_by_user": len(set(
-                info.get("user_id") for info in self.connection_info.values() 
+                info.get("user_id") for info in self.connection_info.values()
                 if info.get("user_id")
             )),
-            "average_connection_time": self._calculate_average_connection_time()
+            "average_connection_time": self._calculate_average_connection_time(),
+            "subscribed_topics": len(self.subscriptions),
+            "dropped_messages": self._dropped_messages + sum(
+                client.dropped_messages for client in self.clients.values()
+            )
         }
     
     def _calculate_average_connection_time(self) -> float:
@@ -155,4 +595,4 @@ class ConnectionManager:
 
 
 # グローバルな接続マネージャーインスタンス
-manager = ConnectionManager()
\ No newline at end of file
+manager = ConnectionManager()
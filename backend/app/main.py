@@ -8,7 +8,17 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 
 from app.core.config import settings
+from app.core.database import dispose_async_engines
 from app.api.api_v1.api import api_router
+from app.core.event_bus import create_event_bus
+from app.core.websocket_manager import manager
+from app.services.audit_service import audit_writer
+from app.services.document_mapping import load_template_mappings
+from app.services.database_backup import backup_service
+from app.services.document_service import document_worker, shutdown_process_pool
+from app.services.email_queue import email_worker
+from app.services.email_service import email_service
+from app.services.postal_code_index import get_address_search_index
 
 # FastAPIアプリケーションの初期化
 app = FastAPI(
@@ -39,6 +49,69 @@ app.add_middleware(
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 
+@app.on_event("startup")
+def load_postal_code_index():
+    """郵便番号索引と住所の逆引き索引を起動時に読み込む"""
+    get_address_search_index()
+
+
+@app.on_event("startup")
+async def start_event_bus():
+    """リアルタイム更新のイベントバスの購読を開始"""
+    await manager.start_event_bus(create_event_bus())
+
+
+@app.on_event("shutdown")
+async def stop_event_bus():
+    """イベントバスの購読を停止"""
+    await manager.stop_event_bus()
+
+
+@app.on_event("shutdown")
+def flush_audit_trails():
+    """未書き込みの監査証跡を書き出してから終了"""
+    audit_writer.shutdown()
+
+
+@app.on_event("startup")
+def start_email_worker():
+    """メール送信キューのワーカーを開始"""
+    email_worker.start()
+
+
+@app.on_event("shutdown")
+def close_email_connections():
+    """メール送信ワーカーを停止し、SMTP接続プールの接続を閉じる"""
+    email_worker.stop()
+    email_service.close()
+
+
+@app.on_event("startup")
+async def start_document_worker():
+    """書類テンプレートのマッピングを検証し、書類生成ワーカーを開始"""
+    load_template_mappings()
+    document_worker.start()
+
+
+@app.on_event("shutdown")
+async def stop_document_worker():
+    """書類生成ワーカーを停止（処理中のジョブはキューに戻す）"""
+    await document_worker.stop()
+    shutdown_process_pool()
+
+
+@app.on_event("shutdown")
+def stop_backup_service():
+    """実行中のデータベースバックアップの完了を待つ"""
+    backup_service.stop()
+
+
+@app.on_event("shutdown")
+async def close_async_connections():
+    """非同期エンジンの接続を閉じる"""
+    await dispose_async_engines()
+
+
 @app.get("/")
 async def root():
     """ヘルスチェック用のルートエンドポイント"""
@@ -14,6 +14,9 @@ from .project import (
     AuditTrail,
     ApplicationStatusEnum,
 )
+from .search import ProjectSearchIndex
+from .email_job import EmailJob
+from .document_job import DocumentJob
 
 __all__ = [
     "Project",
@@ -26,4 +29,7 @@ __all__ = [
     "Schedule",
     "AuditTrail",
     "ApplicationStatusEnum",
+    "ProjectSearchIndex",
+    "EmailJob",
+    "DocumentJob",
 ]
\ No newline at end of file
@@ -0,0 +1,43 @@
+"""
+書類生成ジョブのデータベースモデル
+承認時の書類生成はリクエスト内で行わず、このテーブルをキューとしてワーカーが処理する
+"""
+
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class DocumentJob(Base):
+    """
+    書類生成ジョブ（1ジョブ = 1テンプレートから1ファイル）
+
+    status: queued（生成待ち・再試行待ち）, running（ワーカーが処理中）, completed, failed
+    """
+    __tablename__ = "document_jobs"
+    __table_args__ = (
+        # ワーカーが生成待ちのジョブを登録順に取り出す
+        Index("ix_document_jobs_status_created_at", "status", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    application_id = Column(Integer, nullable=False, index=True)  # 生成のきっかけになった申請
+    project_id = Column(Integer, nullable=False, index=True)  # 書類に流し込む案件
+    template_name = Column(String(200), nullable=False)  # TEMPLATE_DIR 内のテンプレートファイル名
+
+    # 生成状況
+    status = Column(String(20), default="queued", nullable=False)
+    progress = Column(Integer, default=0, nullable=False)  # 0〜100
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=3, nullable=False)
+    locked_by = Column(String(100))  # 処理中のワーカー
+    locked_at = Column(DateTime)
+    error = Column(Text)
+
+    # 生成結果
+    output_path = Column(String(500))
+
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
@@ -0,0 +1,47 @@
+"""
+メール送信ジョブのデータベースモデル
+送信はリクエスト内で行わず、このテーブルをキューとしてワーカーが処理する
+"""
+
+from sqlalchemy import Boolean, Column, DateTime, Index, Integer, String, Text
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class EmailJob(Base):
+    """
+    メール送信ジョブ
+
+    status: queued（送信待ち・再試行待ち）, sending（ワーカーが処理中）, sent, failed
+    """
+    __tablename__ = "email_jobs"
+    __table_args__ = (
+        # ワーカーが送信待ちのジョブを next_attempt_at 順に取り出す
+        Index("ix_email_jobs_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    batch_id = Column(String(36), nullable=False, index=True)  # 同じリクエストで登録したジョブの識別子
+    provider = Column(String(50), nullable=False)  # 送信に使うプロバイダー（レート制限の単位）
+
+    # メール内容
+    to_email = Column(String(255), nullable=False)
+    subject = Column(String(500), nullable=False)
+    body = Column(Text, nullable=False)
+    is_html = Column(Boolean, default=False, nullable=False)
+
+    # 送信状況
+    status = Column(String(20), default="queued", nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=5, nullable=False)
+    next_attempt_at = Column(DateTime, server_default=func.now(), nullable=False)
+    locked_by = Column(String(100))  # 処理中のワーカー
+    locked_at = Column(DateTime)
+    last_error = Column(Text)
+
+    # 送信結果を反映するフォーム送信履歴（form_submissions.id）
+    form_submission_id = Column(Integer, index=True)
+
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    sent_at = Column(DateTime)
@@ -43,7 +43,7 @@ class FormSubmission(Base):
     recipient_email = Column(String(255), nullable=False)  # 送信先メールアドレス
     
     # 送信状況
-    status = Column(String(50), default="sent", nullable=False)  # sent, opened, submitted, failed
+    status = Column(String(50), default="sent", nullable=False)  # queued, sent, opened, submitted, failed
     sent_at = Column(DateTime, server_default=func.now(), nullable=False)
     response_received_at = Column(DateTime)  # フォーム回答受信日時
     
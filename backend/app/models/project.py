@@ -5,7 +5,7 @@
 
 from datetime import datetime, date
 from typing import Optional, List
-from sqlalchemy import Column, Integer, String, Text, Date, DateTime, Numeric, Boolean, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, Date, DateTime, Numeric, Boolean, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -39,6 +39,8 @@ class AuditTrail(Base):
     
     # 複合インデックス用
     __table_args__ = (
+        # 対象ごとの履歴取得（timestamp 降順）
+        Index("ix_audit_trails_target_timestamp", "target_model", "target_id", "timestamp"),
         {"comment": "システム内のデータ変更履歴を記録"}
     )
 
@@ -63,6 +65,15 @@ class Project(Base):
     financial = relationship("Financial", back_populates="project", uselist=False)
     schedule = relationship("Schedule", back_populates="project", uselist=False)
 
+    __table_args__ = (
+        # 一覧（updated_at DESC NULLS LAST, id DESC）とステータス絞り込み
+        # PostgreSQL は並び順どおりの降順で作成し、SQLite は昇順のインデックスを逆順に読む
+        Index("ix_projects_status_updated_at", "status", "updated_at", "id").ddl_if(dialect="sqlite"),
+        Index("ix_projects_status_updated_at", status, updated_at.desc().nullslast(), id.desc()).ddl_if(dialect="postgresql"),
+        Index("ix_projects_updated_at", "updated_at", "id").ddl_if(dialect="sqlite"),
+        Index("ix_projects_updated_at", updated_at.desc().nullslast(), id.desc()).ddl_if(dialect="postgresql"),
+    )
+
 
 class Customer(Base):
     """顧客情報"""
@@ -185,6 +196,17 @@ class Application(Base):
     project = relationship("Project", back_populates="applications")
     application_type = relationship("ApplicationType", back_populates="applications")
 
+    __table_args__ = (
+        # 一覧（updated_at DESC NULLS LAST, id DESC）とステータス・プロジェクト絞り込み
+        # PostgreSQL は並び順どおりの降順で作成し、SQLite は昇順のインデックスを逆順に読む
+        Index("ix_applications_status_updated_at", "status", "updated_at", "id").ddl_if(dialect="sqlite"),
+        Index("ix_applications_status_updated_at", status, updated_at.desc().nullslast(), id.desc()).ddl_if(dialect="postgresql"),
+        Index("ix_applications_project_id", "project_id", "updated_at", "id").ddl_if(dialect="sqlite"),
+        Index("ix_applications_project_id", project_id, updated_at.desc().nullslast(), id.desc()).ddl_if(dialect="postgresql"),
+        Index("ix_applications_updated_at", "updated_at", "id").ddl_if(dialect="sqlite"),
+        Index("ix_applications_updated_at", updated_at.desc().nullslast(), id.desc()).ddl_if(dialect="postgresql"),
+    )
+
 
 class Financial(Base):
     """財務情報"""
@@ -250,4 +272,23 @@ class Schedule(Base):
     change_memo = Column(Text)                # 変更概要
     
     # リレーション
-    project = relationship("Project", back_populates="schedule")
\ No newline at end of file
+    project = relationship("Project", back_populates="schedule")
+
+    __table_args__ = (
+        # /schedules/pending/* 用の部分インデックス（予定日あり・未実施のみ）
+        Index(
+            "ix_schedules_pending_reinforcement", "reinforcement_scheduled",
+            postgresql_where=reinforcement_actual.is_(None),
+            sqlite_where=reinforcement_actual.is_(None),
+        ),
+        Index(
+            "ix_schedules_pending_interim", "interim_scheduled",
+            postgresql_where=interim_actual.is_(None),
+            sqlite_where=interim_actual.is_(None),
+        ),
+        Index(
+            "ix_schedules_pending_completion", "completion_scheduled",
+            postgresql_where=completion_actual.is_(None),
+            sqlite_where=completion_actual.is_(None),
+        ),
+    )
\ No newline at end of file
@@ -0,0 +1,87 @@
+"""
+検索インデックス関連のデータベースモデル
+プロジェクト・顧客のインクリメンタル検索用に正規化済みテキストを保持する
+"""
+
+import sqlite3
+
+from sqlalchemy import DDL, Column, ForeignKey, Integer, Text, event
+
+from app.core.database import Base
+
+
+class ProjectSearchIndex(Base):
+    """
+    プロジェクト検索インデックス
+
+    project_text / customer_text は normalize_search_text で正規化済みの文字列。
+    PostgreSQL では pg_trgm の GIN インデックス、SQLite では FTS5（trigram）で索引化する。
+    """
+    __tablename__ = "project_search_index"
+
+    project_id = Column(Integer, ForeignKey("projects.id"), primary_key=True)
+    customer_id = Column(Integer, ForeignKey("customers.id"), nullable=True, index=True)
+    project_text = Column(Text, nullable=False, default="")   # プロジェクト名・プロジェクトコード
+    customer_text = Column(Text, nullable=False, default="")  # 施主名・フリガナ・発注者名
+
+
+# SQLite の FTS5 テーブル名
+SQLITE_FTS_TABLE = "project_search_fts"
+
+# PostgreSQL: pg_trgm による部分一致インデックス
+POSTGRESQL_SEARCH_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_project_search_index_project_text_trgm "
+    "ON project_search_index USING gin (project_text gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_project_search_index_customer_text_trgm "
+    "ON project_search_index USING gin (customer_text gin_trgm_ops)",
+]
+
+# SQLite: 外部コンテンツ型の FTS5 テーブルとトリガーで同期
+SQLITE_SEARCH_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_FTS_TABLE} USING fts5("
+    "project_text, customer_text, "
+    "content='project_search_index', content_rowid='project_id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS project_search_index_ai AFTER INSERT ON project_search_index BEGIN "
+    f"INSERT INTO {SQLITE_FTS_TABLE}(rowid, project_text, customer_text) "
+    "VALUES (new.project_id, new.project_text, new.customer_text); END",
+    "CREATE TRIGGER IF NOT EXISTS project_search_index_ad AFTER DELETE ON project_search_index BEGIN "
+    f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, project_text, customer_text) "
+    "VALUES ('delete', old.project_id, old.project_text, old.customer_text); END",
+    "CREATE TRIGGER IF NOT EXISTS project_search_index_au AFTER UPDATE ON project_search_index BEGIN "
+    f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, project_text, customer_text) "
+    "VALUES ('delete', old.project_id, old.project_text, old.customer_text); "
+    f"INSERT INTO {SQLITE_FTS_TABLE}(rowid, project_text, customer_text) "
+    "VALUES (new.project_id, new.project_text, new.customer_text); END",
+]
+
+
+def sqlite_supports_trigram() -> bool:
+    """FTS5 の trigram トークナイザは SQLite 3.34 以降で利用可能"""
+    return sqlite3.sqlite_version_info >= (3, 34, 0)
+
+
+def _is_sqlite_with_trigram(ddl, target, bind, **kw) -> bool:
+    return bind.dialect.name == "sqlite" and sqlite_supports_trigram()
+
+
+# create_all 時にデータベース固有のインデックスも作成する
+for _statement in POSTGRESQL_SEARCH_DDL:
+    event.listen(
+        ProjectSearchIndex.__table__,
+        "after_create",
+        DDL(_statement).execute_if(dialect="postgresql"),
+    )
+
+for _statement in SQLITE_SEARCH_DDL:
+    event.listen(
+        ProjectSearchIndex.__table__,
+        "after_create",
+        DDL(_statement).execute_if(callable_=_is_sqlite_with_trigram),
+    )
+
+event.listen(
+    ProjectSearchIndex.__table__,
+    "before_drop",
+    DDL(f"DROP TABLE IF EXISTS {SQLITE_FTS_TABLE}").execute_if(dialect="sqlite"),
+)
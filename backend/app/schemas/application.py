@@ -134,6 +134,7 @@ class AuditTrailResponse(BaseModel):
 class ApplicationListResponse(BaseModel):
     """申請一覧レスポンス"""
     applications: List[ApplicationResponse]
-    total: int
+    total: Optional[int] = None
     skip: int
-    limit: int
\ No newline at end of file
+    limit: int
+    next_cursor: Optional[str] = None
\ No newline at end of file
@@ -0,0 +1,35 @@
+"""
+書類生成関連のスキーマ定義
+"""
+
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+
+class DocumentJobResponse(BaseModel):
+    """書類生成ジョブレスポンススキーマ"""
+    id: int
+    application_id: int = Field(..., description="申請ID")
+    project_id: int = Field(..., description="プロジェクトID")
+    template_name: str = Field(..., description="テンプレートファイル名")
+    status: str = Field(..., description="queued, running, completed, failed")
+    progress: int = Field(..., description="進捗（0〜100）")
+    attempts: int = Field(..., description="試行回数")
+    error: Optional[str] = Field(None, description="最後のエラー")
+    output_path: Optional[str] = Field(None, description="生成した書類のパス")
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class DocumentBatchRequest(BaseModel):
+    """書類一括作成リクエストスキーマ"""
+    template_name: str = Field(..., description="テンプレートファイル名（例: 1-01_案件概要書.xlsx）")
+    project_ids: Optional[List[int]] = Field(None, description="対象のプロジェクトID")
+    status: Optional[str] = Field(None, description="プロジェクトのステータスで絞り込み")
+    search: Optional[str] = Field(None, description="プロジェクト検索（プロジェクト名・コード・施主名）")
+    limit: Optional[int] = Field(None, ge=1, description="作成する書類の上限（DOCUMENT_BATCH_MAX_PROJECTS まで）")
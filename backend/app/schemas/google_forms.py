@@ -83,11 +83,21 @@ class SendFormRequest(BaseModel):
         return v
 
 class SendFormResponse(BaseModel):
-    """フォーム送信レスポンス用スキーマ"""
-    success: List[Dict[str, Any]] = Field(..., description="送信成功リスト")
-    failed: List[Dict[str, Any]] = Field(..., description="送信失敗リスト")
-    total_sent: int = Field(..., description="送信成功数")
-    total_failed: int = Field(..., description="送信失敗数")
+    """フォーム送信レスポンス用スキーマ（送信はバックグラウンドで行う）"""
+    batch_id: Optional[str] = Field(None, description="送信バッチID（進捗確認用）")
+    total_queued: int = Field(..., description="送信キューに登録した件数")
+    queued: List[Dict[str, Any]] = Field(..., description="登録したフォーム送信履歴のリスト")
+
+class SendBatchStatus(BaseModel):
+    """フォーム送信バッチの進捗用スキーマ"""
+    batch_id: str = Field(..., description="送信バッチID")
+    total: int = Field(..., description="総件数")
+    queued: int = Field(..., description="送信待ち・再試行待ちの件数")
+    sending: int = Field(..., description="送信中の件数")
+    sent: int = Field(..., description="送信済みの件数")
+    failed: int = Field(..., description="送信を断念した件数")
+    completed: bool = Field(..., description="すべて送信済みまたは失敗で終わったか")
+    failures: List[Dict[str, Any]] = Field(..., description="失敗したジョブの一覧")
 
 class FormTemplateListResponse(BaseModel):
     """フォームテンプレート一覧レスポンス用スキーマ"""
@@ -106,7 +116,7 @@ class UpdateSubmissionStatusRequest(BaseModel):
 
     @validator('status')
     def validate_status(cls, v):
-        allowed_statuses = ['sent', 'opened', 'submitted', 'failed']
+        allowed_statuses = ['queued', 'sent', 'opened', 'submitted', 'failed']
         if v not in allowed_statuses:
             raise ValueError(f'ステータスは {allowed_statuses} のいずれかである必要があります')
         return v
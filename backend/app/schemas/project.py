@@ -256,9 +256,10 @@ class ProjectResponse(ProjectBase):
 class ProjectListResponse(BaseModel):
     """プロジェクト一覧レスポンス"""
     projects: List[ProjectResponse]
-    total: int
+    total: Optional[int] = None
     skip: int
     limit: int
+    next_cursor: Optional[str] = None
 
 
 class FinancialBase(BaseModel):
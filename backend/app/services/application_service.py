@@ -3,16 +3,24 @@
 ワークフロー管理、監査証跡、ドキュメント生成を含む
 """
 
-from datetime import date, datetime
-from typing import List, Optional, Dict, Any
+from datetime import date
+from typing import List, Optional, Dict, Any, Tuple
 from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import and_, desc, func
 
+from app.core.cache import (
+    SUMMARY_APPLICATIONS, SUMMARY_FINANCIALS,
+    count_cache, invalidate_summaries, summary_cache
+)
 from app.models.project import Application, ApplicationType, ApplicationStatusEnum, AuditTrail, Project
 from app.schemas.application import (
     ApplicationCreate, ApplicationUpdate, ApplicationWorkflowAction,
     ApplicationStatusUpdate, ApplicationListResponse
 )
+from app.services.audit_service import AuditTrailBuffer
+from app.services.document_service import DocumentJobService, document_worker
+from app.utils.pagination import fetch_keyset_page, fetch_keyset_page_with_cursor
 
 
 class ApplicationService:
@@ -20,6 +28,7 @@ class ApplicationService:
     
     def __init__(self, db: Session):
         self.db = db
+        self.audit = AuditTrailBuffer(db)
     
     def get_applications(
         self, 
@@ -39,7 +48,29 @@ class ApplicationService:
         if project_id:
             query = query.filter(Application.project_id == project_id)
             
-        return query.order_by(desc(Application.updated_at)).offset(skip).limit(limit).all()
+        return fetch_keyset_page(query, Application.updated_at, Application.id, limit, skip=skip)
+    
+    def get_applications_page(
+        self,
+        limit: int = 100,
+        status: Optional[ApplicationStatusEnum] = None,
+        project_id: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Application], Optional[str]]:
+        """申請一覧をカーソル（キーセット）方式で取得"""
+        query = self.db.query(Application).options(
+            joinedload(Application.application_type),
+            joinedload(Application.project)
+        )
+        
+        if status:
+            query = query.filter(Application.status == status)
+        if project_id:
+            query = query.filter(Application.project_id == project_id)
+        
+        return fetch_keyset_page_with_cursor(
+            query, Application.updated_at, Application.id, limit, cursor=cursor
+        )
     
     def get_applications_count(
         self, 
@@ -56,6 +87,17 @@ class ApplicationService:
             
         return query.scalar()
     
+    def get_applications_count_cached(
+        self, 
+        status: Optional[ApplicationStatusEnum] = None,
+        project_id: Optional[int] = None
+    ) -> int:
+        """申請総数を取得（短時間キャッシュ付き）"""
+        return count_cache.get_or_set(
+            ("applications", status, project_id),
+            lambda: self.get_applications_count(status=status, project_id=project_id)
+        )
+    
     def get_application_by_id(self, application_id: int) -> Optional[Application]:
         """IDで申請を取得"""
         return self.db.query(Application).options(
@@ -80,8 +122,7 @@ class ApplicationService:
         # 申請作成
         db_application = Application(**application_data.dict())
         self.db.add(db_application)
-        self.db.commit()
-        self.db.refresh(db_application)
+        self.db.flush()  # IDを取得するためにflush
         
         # 監査証跡記録
         self._record_audit_trail(
@@ -92,6 +133,10 @@ class ApplicationService:
             new_value=db_application.status.value
         )
         
+        self.audit.commit()
+        self._invalidate_caches()
+        self.db.refresh(db_application)
+        
         return db_application
     
     def update_application(self, application_id: int, application_data: ApplicationUpdate) -> Optional[Application]:
@@ -110,9 +155,6 @@ class ApplicationService:
                     setattr(db_application, field, value)
         
         if old_values:
-            self.db.commit()
-            self.db.refresh(db_application)
-            
             # 監査証跡記録
             for field, (old_val, new_val) in old_values.items():
                 self._record_audit_trail(
@@ -123,6 +165,10 @@ class ApplicationService:
                     old_value=str(old_val) if old_val is not None else "",
                     new_value=str(new_val)
                 )
+            
+            self.audit.commit()
+            self._invalidate_caches()
+            self.db.refresh(db_application)
         
         return db_application
     
@@ -164,9 +210,6 @@ class ApplicationService:
         elif action == "withdraw":
             db_application.workflow_step = 0
         
-        self.db.commit()
-        self.db.refresh(db_application)
-        
         # 監査証跡記録
         self._record_audit_trail(
             target_model="Application",
@@ -177,9 +220,16 @@ class ApplicationService:
             new_value=new_status.value
         )
         
-        # ドキュメント生成（承認時）
+        # 承認時は書類生成ジョブを同じトランザクションで登録（生成はワーカーが非同期に行う）
+        if action == "approve":
+            DocumentJobService(self.db).enqueue_for_application(db_application)
+        
+        self.audit.commit()
+        self._invalidate_caches()
+        self.db.refresh(db_application)
+        
         if action == "approve":
-            self._generate_documents(db_application)
+            document_worker.wake()
         
         return db_application
     
@@ -199,7 +249,8 @@ class ApplicationService:
         )
         
         self.db.delete(db_application)
-        self.db.commit()
+        self.audit.commit()
+        self._invalidate_caches()
         return True
     
     def get_applications_by_status(self, status: ApplicationStatusEnum) -> List[Application]:
@@ -249,42 +300,30 @@ class ApplicationService:
         new_value: str = ""
     ):
         """監査証跡を記録"""
-        audit_trail = AuditTrail(
+        self.audit.add(
             target_model=target_model,
             target_id=target_id,
+            action=action,
             field_name=field_name,
             old_value=old_value,
-            new_value=new_value,
-            action=action
+            new_value=new_value
         )
-        
-        self.db.add(audit_trail)
-        # コミットは呼び出し元で行う
-    
-    def _generate_documents(self, application: Application):
-        """ドキュメント生成（承認時）"""
-        # TODO: 非同期ドキュメント生成ジョブを実装
-        # 現在はダミー実装
-        try:
-            # python-docx, openpyxlを使用したテンプレート処理をここに実装
-            document_path = f"documents/application_{application.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.docx"
-            application.generated_document_path = document_path
-            # 実際のファイル生成処理はここに追加
-            print(f"ドキュメント生成: {document_path}")
-        except Exception as e:
-            print(f"ドキュメント生成エラー: {str(e)}")
+        # 書き込みは self.audit.commit() でまとめて行う
+    
+    def _invalidate_caches(self):
+        """申請の変更で古くなる件数・サマリーのキャッシュを破棄"""
+        count_cache.invalidate_prefix("applications")
+        invalidate_summaries(SUMMARY_APPLICATIONS, SUMMARY_FINANCIALS)
     
     def get_applications_summary(self) -> Dict[str, Any]:
         """申請サマリーを取得"""
-        total_count = self.db.query(func.count(Application.id)).scalar()
-        
-        # ステータス別件数
-        status_counts = {}
-        for status in ApplicationStatusEnum:
-            count = self.db.query(func.count(Application.id)).filter(
-                Application.status == status
-            ).scalar()
-            status_counts[status.value] = count
+        # ステータス別件数（1回の GROUP BY で集計）
+        rows = self.db.query(
+            Application.status, func.count(Application.id)
+        ).group_by(Application.status).all()
+        counts = {status: count for status, count in rows}
+        status_counts = {status.value: counts.get(status, 0) for status in ApplicationStatusEnum}
+        total_count = sum(status_counts.values())
         
         # 今月の新規申請数
         today = date.today()
@@ -298,4 +337,116 @@ class ApplicationService:
             "status_counts": status_counts,
             "new_this_month": new_this_month,
             "pending_approvals": status_counts.get(ApplicationStatusEnum.IN_REVIEW.value, 0)
-        }
\ No newline at end of file
+        }
+
+class AsyncApplicationService:
+    """
+    申請管理の非同期サービス
+    
+    AsyncSession.run_sync 上で ApplicationService の実装をそのまま実行する。
+    レスポンス生成時に遅延ロードが起きないよう、更新系は関連込みで再取得して返す。
+    """
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def _run(self, func):
+        """同期サービスを受け取る関数を非同期セッション上で実行"""
+        return await self.db.run_sync(lambda session: func(ApplicationService(session)))
+    
+    async def get_applications(
+        self, 
+        skip: int = 0, 
+        limit: int = 100,
+        status: Optional[ApplicationStatusEnum] = None,
+        project_id: Optional[int] = None
+    ) -> List[Application]:
+        """申請一覧を取得"""
+        return await self._run(lambda s: s.get_applications(
+            skip=skip, limit=limit, status=status, project_id=project_id
+        ))
+    
+    async def get_applications_page(
+        self,
+        limit: int = 100,
+        status: Optional[ApplicationStatusEnum] = None,
+        project_id: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Application], Optional[str]]:
+        """申請一覧をカーソル方式で取得"""
+        return await self._run(lambda s: s.get_applications_page(
+            limit=limit, status=status, project_id=project_id, cursor=cursor
+        ))
+    
+    async def get_applications_count(
+        self, 
+        status: Optional[ApplicationStatusEnum] = None,
+        project_id: Optional[int] = None
+    ) -> int:
+        """申請総数を取得"""
+        return await self._run(lambda s: s.get_applications_count(status=status, project_id=project_id))
+    
+    async def get_applications_count_cached(
+        self, 
+        status: Optional[ApplicationStatusEnum] = None,
+        project_id: Optional[int] = None
+    ) -> int:
+        """申請総数を取得（短時間キャッシュ付き）"""
+        return await count_cache.get_or_set_async(
+            ("applications", status, project_id),
+            lambda: self.get_applications_count(status=status, project_id=project_id)
+        )
+    
+    async def get_application_by_id(self, application_id: int) -> Optional[Application]:
+        """IDで申請を取得"""
+        return await self._run(lambda s: s.get_application_by_id(application_id))
+    
+    async def create_application(self, application_data: ApplicationCreate) -> Application:
+        """申請を作成"""
+        def _create(service: ApplicationService) -> Application:
+            application = service.create_application(application_data)
+            return service.get_application_by_id(application.id)
+        return await self._run(_create)
+    
+    async def update_application(self, application_id: int, application_data: ApplicationUpdate) -> Optional[Application]:
+        """申請を更新"""
+        def _update(service: ApplicationService) -> Optional[Application]:
+            if not service.update_application(application_id, application_data):
+                return None
+            return service.get_application_by_id(application_id)
+        return await self._run(_update)
+    
+    async def execute_workflow_action(
+        self, 
+        application_id: int, 
+        action_data: ApplicationWorkflowAction
+    ) -> Application:
+        """ワークフローアクションを実行"""
+        def _execute(service: ApplicationService) -> Application:
+            service.execute_workflow_action(application_id, action_data)
+            return service.get_application_by_id(application_id)
+        return await self._run(_execute)
+    
+    async def delete_application(self, application_id: int) -> bool:
+        """申請を削除"""
+        return await self._run(lambda s: s.delete_application(application_id))
+    
+    async def get_applications_by_status(self, status: ApplicationStatusEnum) -> List[Application]:
+        """ステータス別申請取得"""
+        return await self._run(lambda s: s.get_applications_by_status(status))
+    
+    async def get_audit_trail(self, target_model: str, target_id: int) -> List[AuditTrail]:
+        """監査証跡を取得"""
+        return await self._run(lambda s: s.get_audit_trail(target_model, target_id))
+    
+    async def get_applications_summary(self) -> Dict[str, Any]:
+        """
+        申請サマリーを取得
+        
+        ダッシュボードの一斉更新でも集計は1回で済むようキャッシュする。
+        申請の作成・更新・削除・ワークフロー操作時に無効化される
+        """
+        return await summary_cache.get_or_set_async(
+            (SUMMARY_APPLICATIONS,),
+            lambda: self._run(lambda s: s.get_applications_summary())
+        )
@@ -0,0 +1,225 @@
+"""
+監査証跡の書き込みサービス
+1つの論理的な変更で発生した監査証跡をまとめて書き込む
+"""
+
+import csv
+import io
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import worker_engine
+from app.models.project import AuditTrail
+
+logger = logging.getLogger(__name__)
+
+# 書き込みモード
+AUDIT_MODE_DURABLE = "durable"  # 業務データと同じトランザクションで書き込む
+AUDIT_MODE_ASYNC = "async"      # コミット後にバックグラウンドでまとめて書き込む
+
+# COPY で書き込むカラム（PostgreSQL）
+_COPY_COLUMNS = ["user_id", "target_model", "target_id", "field_name", "old_value", "new_value", "action", "timestamp"]
+
+
+class AuditTrailWriter:
+    """
+    監査証跡のバックグラウンド書き込み
+
+    単一のワーカースレッドが FIFO のキューから取り出して書き込むため、
+    同じ (target_model, target_id) の証跡はコミットされた順に保存される。
+    キューに溜まった複数の変更は1回の executemany（PostgreSQL では COPY）にまとめる。
+    """
+
+    def __init__(self, max_batch_rows: int = 1000, max_retries: int = 3):
+        self.max_batch_rows = max_batch_rows
+        self.max_retries = max_retries
+        self._queue: "queue.Queue[Optional[List[dict]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def enqueue(self, rows: List[dict]):
+        """1つの変更分の監査証跡をキューに追加"""
+        if not rows:
+            return
+        self._ensure_started()
+        self._queue.put(rows)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        キューに溜まっている監査証跡をすべて書き込むまで待機
+
+        Returns:
+            タイムアウトまでに書き込みが完了したかどうか
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def shutdown(self, timeout: float = 10.0):
+        """残りを書き込んでからワーカーを停止"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is None:
+            return
+        self._queue.put(None)
+        thread.join(timeout)
+        if thread.is_alive():
+            logger.warning(f"監査証跡の書き込みが完了しませんでした（未処理: {self._queue.qsize()}件）")
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="audit-trail-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+
+            # 溜まっている変更をまとめて1回で書き込む
+            batch = [item]
+            rows = list(item)
+            stop = False
+            while len(rows) < self.max_batch_rows:
+                try:
+                    next_item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(next_item)
+                if next_item is None:
+                    stop = True
+                    break
+                rows.extend(next_item)
+
+            self._write_with_retry(rows)
+
+            for _ in batch:
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _write_with_retry(self, rows: List[dict]):
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                self._write(rows)
+                return
+            except Exception as e:
+                logger.warning(f"監査証跡の書き込みに失敗しました（{attempt}/{self.max_retries}回目）: {e}")
+                time.sleep(0.5 * attempt)
+        logger.error(f"監査証跡 {len(rows)}件を書き込めませんでした: {rows}")
+
+    def _write(self, rows: List[dict]):
+        with worker_engine.begin() as connection:
+            if connection.dialect.name == "postgresql":
+                self._copy_postgresql(connection, rows)
+            else:
+                connection.execute(insert(AuditTrail.__table__), rows)
+
+    def _copy_postgresql(self, connection, rows: List[dict]):
+        """PostgreSQL では COPY で一括投入"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([
+                r"\N" if row.get(column) is None else row[column]
+                for column in _COPY_COLUMNS
+            ])
+        buffer.seek(0)
+
+        cursor = connection.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {AuditTrail.__tablename__} ({', '.join(_COPY_COLUMNS)}) "
+                "FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                buffer,
+            )
+        finally:
+            cursor.close()
+
+
+# グローバルな書き込みワーカー
+audit_writer = AuditTrailWriter()
+
+
+class AuditTrailBuffer:
+    """
+    1つの論理的な変更の監査証跡を溜めておくバッファ
+
+    サービスは add() で証跡を積み、commit() で業務データと一緒に確定させる。
+    - durable モード: コミット前に executemany で同じトランザクションに書き込む
+    - async モード: コミット成功後にバックグラウンドの書き込みワーカーへ渡す
+    """
+
+    def __init__(self, db: Session, mode: Optional[str] = None):
+        self.db = db
+        self.mode = mode or settings.AUDIT_WRITE_MODE
+        self.rows: List[dict] = []
+
+    def add(
+        self,
+        target_model: str,
+        target_id: int,
+        action: str,
+        field_name: str,
+        old_value: str = "",
+        new_value: str = ""
+    ):
+        """監査証跡を追加（書き込みは commit 時）"""
+        self.rows.append({
+            "user_id": None,
+            "target_model": target_model,
+            "target_id": target_id,
+            "field_name": field_name,
+            "old_value": old_value,
+            "new_value": new_value,
+            "action": action,
+            # 書き込みが遅れても変更時刻で並ぶよう、記録時点の時刻を入れる
+            "timestamp": datetime.now(timezone.utc),
+        })
+
+    def extend(self, rows: List[dict]):
+        """add() と同じ形式の辞書をまとめて追加"""
+        for row in rows:
+            self.add(
+                target_model=row["target_model"],
+                target_id=row["target_id"],
+                action=row["action"],
+                field_name=row["field_name"],
+                old_value=row.get("old_value", ""),
+                new_value=row.get("new_value", ""),
+            )
+
+    def commit(self):
+        """監査証跡を書き出してセッションをコミット"""
+        rows, self.rows = self.rows, []
+
+        if self.mode == AUDIT_MODE_ASYNC:
+            self.db.commit()
+            audit_writer.enqueue(rows)
+            return
+
+        if rows:
+            self.db.execute(insert(AuditTrail), rows)
+        self.db.commit()
+
+    def rollback(self):
+        """溜めている監査証跡を破棄してセッションをロールバック"""
+        self.rows = []
+        self.db.rollback()
@@ -0,0 +1,736 @@
+"""
+データベース管理のビジネスロジック
+テーブルの閲覧・エクスポートや統計情報など、管理画面から任意のテーブルを扱う処理
+いずれも読み取りのみのため read_engine（SQLite では読み取り専用の接続プール）で実行する
+"""
+
+import csv
+import io
+import json
+import logging
+import threading
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from sqlalchemy import (
+    Boolean, Date, DateTime, Float, Integer, MetaData, Numeric, Table, Time, func, inspect, select, text, tuple_
+)
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.core.cache import count_cache, stats_cache
+from app.core.database import read_engine
+from app.utils.pagination import decode_key_cursor, encode_key_cursor
+
+logger = logging.getLogger(__name__)
+
+# WHERE 条件に使える演算子（column:op:value の op）
+FILTER_OPERATORS: Dict[str, Callable[[Any, Any], ColumnElement]] = {
+    "eq": lambda column, value: column == value,
+    "ne": lambda column, value: column != value,
+    "lt": lambda column, value: column < value,
+    "le": lambda column, value: column <= value,
+    "gt": lambda column, value: column > value,
+    "ge": lambda column, value: column >= value,
+    "like": lambda column, value: column.like(value),
+    "in": lambda column, value: column.in_(value),
+    "isnull": lambda column, value: column.is_(None) if value else column.is_not(None),
+}
+
+EXPORT_FORMATS = ("csv", "json", "ndjson", "parquet")
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",  # charset=utf-8 は StreamingResponse が付ける
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+EXPORT_CHUNK_SIZE = 1000  # サーバーサイドカーソルから1回に取り出す行数
+
+_tables: Dict[str, Table] = {}
+_tables_lock = threading.Lock()
+
+
+def get_table(table_name: str, bind: Engine = read_engine) -> Optional[Table]:
+    """
+    テーブル定義をデータベースから読み込む（読み込んだ定義はプロセス内で保持）
+
+    Returns:
+        テーブル。存在しない場合は None
+    """
+    with _tables_lock:
+        table = _tables.get(table_name)
+    if table is not None:
+        return table
+
+    if table_name not in inspect(bind).get_table_names():
+        return None
+    table = Table(table_name, MetaData(), autoload_with=bind)
+    with _tables_lock:
+        _tables[table_name] = table
+    return table
+
+
+def select_columns(table: Table, column_names: Optional[Sequence[str]] = None) -> List:
+    """
+    取得する列を選ぶ
+
+    Raises:
+        ValueError: 存在しない列が指定された場合
+    """
+    if not column_names:
+        return list(table.columns)
+    unknown = [name for name in column_names if name not in table.columns]
+    if unknown:
+        raise ValueError(f"列が見つかりません: {', '.join(unknown)}")
+    return [table.columns[name] for name in column_names]
+
+
+def _convert_filter_value(column, value: str) -> Any:
+    """文字列の条件値を列の型に合わせて変換"""
+    column_type = column.type
+    if isinstance(column_type, Boolean):
+        return value.lower() in ("1", "true", "yes")
+    if isinstance(column_type, Integer):
+        return int(value)
+    if isinstance(column_type, (Float, Numeric)):
+        return Decimal(value)
+    if isinstance(column_type, DateTime):
+        return datetime.fromisoformat(value)
+    if isinstance(column_type, Date):
+        return date.fromisoformat(value)
+    if isinstance(column_type, Time):
+        return time.fromisoformat(value)
+    return value
+
+
+def parse_filters(table: Table, filters: Optional[Sequence[str]] = None) -> List[ColumnElement]:
+    """
+    "column:op:value" 形式の条件を WHERE 句に変換（値はバインドパラメータ）
+
+    op は eq, ne, lt, le, gt, ge, like, in（値はカンマ区切り）, isnull（値は true/false）
+
+    Raises:
+        ValueError: 形式・列・演算子・値が不正な場合
+    """
+    conditions = []
+    for spec in filters or []:
+        name, _, rest = spec.partition(":")
+        operator, _, value = rest.partition(":")
+        if not name or not operator:
+            raise ValueError(f"条件は column:op:value の形式で指定してください: {spec}")
+        if name not in table.columns:
+            raise ValueError(f"列が見つかりません: {name}")
+        if operator not in FILTER_OPERATORS:
+            raise ValueError(f"使用できない演算子です: {operator}（{', '.join(FILTER_OPERATORS)}）")
+
+        column = table.columns[name]
+        try:
+            if operator == "in":
+                converted = [_convert_filter_value(column, item) for item in value.split(",")]
+            elif operator == "isnull":
+                converted = value.lower() in ("", "1", "true", "yes")
+            elif operator == "like":
+                converted = value
+            else:
+                converted = _convert_filter_value(column, value)
+        except (ValueError, ArithmeticError):
+            raise ValueError(f"{name} の値が不正です: {value}")
+        conditions.append(FILTER_OPERATORS[operator](column, converted))
+    return conditions
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, bytes):
+        return value.hex()
+    return str(value)
+
+
+def to_json(payload: Any) -> str:
+    """
+    行を含むレスポンスを JSON にエンコード
+
+    標準の JSON エンコーダーで行（タプル）をまとめて変換し、日時など JSON にない型の値だけを
+    _json_default で変換する（セルごとの変換ループを Python で回さない）
+    """
+    return json.dumps(payload, ensure_ascii=False, default=_json_default)
+
+
+def _format_datetimes(row: Sequence[Any], indexes: Sequence[int]) -> List[Any]:
+    values = list(row)
+    for index in indexes:
+        if isinstance(values[index], datetime):
+            values[index] = values[index].strftime("%Y-%m-%d %H:%M:%S")
+    return values
+
+
+class _BufferedSink:
+    """書き込まれたバイト列を溜め、drain で取り出す出力先（Parquet の書き込み用）"""
+
+    def __init__(self):
+        self._buffer = io.BytesIO()
+        self.closed = False
+
+    def write(self, data) -> int:
+        return self._buffer.write(data)
+
+    def tell(self) -> int:
+        return self._buffer.tell()
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+
+class TableExporter:
+    """
+    テーブルのストリーミングエクスポート
+
+    サーバーサイドカーソル（stream_results）から EXPORT_CHUNK_SIZE 行ずつ取り出し、
+    チャンクごとにエンコードして返す。全行をメモリに載せず、一時ファイルも作らない
+    """
+
+    def __init__(
+        self,
+        table: Table,
+        column_names: Optional[Sequence[str]] = None,
+        filters: Optional[Sequence[str]] = None,
+        limit: Optional[int] = None,
+        bind: Engine = read_engine
+    ):
+        """
+        Raises:
+            ValueError: 列・条件が不正な場合
+        """
+        self.table = table
+        self.columns = select_columns(table, column_names)
+        self.conditions = parse_filters(table, filters)
+        self.limit = limit
+        self.bind = bind
+
+    def iter_chunks(self) -> Iterator[List[tuple]]:
+        """行をチャンクごとに取り出す"""
+        statement = select(*self.columns).where(*self.conditions)
+        primary_key = list(self.table.primary_key.columns)
+        if primary_key:
+            statement = statement.order_by(*primary_key)
+        if self.limit is not None:
+            statement = statement.limit(self.limit)
+
+        with self.bind.connect() as connection:
+            result = connection.execution_options(
+                stream_results=True, yield_per=EXPORT_CHUNK_SIZE
+            ).execute(statement)
+            for partition in result.partitions():
+                yield partition
+
+    def stream(self, export_format: str) -> Iterator[bytes]:
+        """
+        指定形式でエンコードしたバイト列を順に返す
+
+        Args:
+            export_format: csv（UTF-8 BOM 付き）, json（配列）, ndjson, parquet
+        """
+        encoders = {
+            "csv": self._stream_csv,
+            "json": self._stream_json,
+            "ndjson": self._stream_ndjson,
+            "parquet": self._stream_parquet,
+        }
+        return encoders[export_format]()
+
+    @property
+    def column_names(self) -> List[str]:
+        return [column.name for column in self.columns]
+
+    def _stream_csv(self) -> Iterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        # Excel で文字化けしないよう BOM を付ける
+        buffer.write("﻿")
+        writer.writerow(self.column_names)
+        # 日時は従来どおり秒までの形式で出力する
+        datetime_indexes = [
+            index for index, column in enumerate(self.columns) if isinstance(column.type, DateTime)
+        ]
+        for rows in self.iter_chunks():
+            if datetime_indexes:
+                rows = [_format_datetimes(row, datetime_indexes) for row in rows]
+            writer.writerows(rows)
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+
+    def _stream_ndjson(self) -> Iterator[bytes]:
+        names = self.column_names
+        for rows in self.iter_chunks():
+            yield "".join(
+                json.dumps(dict(zip(names, row)), ensure_ascii=False, default=_json_default) + "\n"
+                for row in rows
+            ).encode("utf-8")
+
+    def _stream_json(self) -> Iterator[bytes]:
+        names = self.column_names
+        separator = "[\n"
+        for rows in self.iter_chunks():
+            parts = []
+            for row in rows:
+                parts.append(separator)
+                parts.append(json.dumps(dict(zip(names, row)), ensure_ascii=False, default=_json_default))
+                separator = ",\n"
+            yield "".join(parts).encode("utf-8")
+        yield ("[]\n" if separator == "[\n" else "\n]\n").encode("utf-8")
+
+    def _stream_parquet(self) -> Iterator[bytes]:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([(column.name, _arrow_type(pa, column.type)) for column in self.columns])
+        sink = _BufferedSink()
+        # チャンクごとに行グループとして書き出す
+        with pq.ParquetWriter(sink, schema) as writer:
+            for rows in self.iter_chunks():
+                arrays = [
+                    pa.array([_arrow_value(row[index]) for row in rows], type=field.type)
+                    for index, field in enumerate(schema)
+                ]
+                writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+                data = sink.drain()
+                if data:
+                    yield data
+        yield sink.drain()
+
+
+def _arrow_type(pa, column_type):
+    """列の型に対応する Arrow の型（不明な型は文字列）"""
+    if isinstance(column_type, Boolean):
+        return pa.bool_()
+    if isinstance(column_type, Integer):
+        return pa.int64()
+    if isinstance(column_type, (Float, Numeric)):
+        return pa.float64()
+    if isinstance(column_type, DateTime):
+        return pa.timestamp("us")
+    if isinstance(column_type, Date):
+        return pa.date32()
+    return pa.string()
+
+
+def _arrow_value(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (time, bytes)):
+        return _json_default(value)
+    return value
+
+
+def is_parquet_available() -> bool:
+    """Parquet 形式のエクスポートに必要な pyarrow がインストールされているか"""
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _column_type_name(column) -> str:
+    try:
+        return str(column.type)
+    except Exception:
+        return column.type.__class__.__name__
+
+
+class TableBrowser:
+    """
+    管理画面のテーブルブラウザ
+
+    主キー順のキーセットページング（cursor）で、何ページ目でも主キーのインデックスを
+    たどるだけで取得できる。主キーのないテーブルは OFFSET で取得する
+    """
+
+    def __init__(
+        self,
+        table: Table,
+        column_names: Optional[Sequence[str]] = None,
+        filters: Optional[Sequence[str]] = None,
+        bind: Engine = read_engine
+    ):
+        """
+        Raises:
+            ValueError: 列・条件が不正な場合
+        """
+        self.table = table
+        self.columns = select_columns(table, column_names)
+        self.filters = list(filters or [])
+        self.conditions = parse_filters(table, self.filters)
+        self.primary_key = list(table.primary_key.columns)
+        self.bind = bind
+
+    def fetch_page(self, limit: int, cursor: Optional[str] = None, page: int = 0) -> Dict[str, Any]:
+        """
+        1ページ分の行を取得
+
+        Args:
+            limit: 取得件数
+            cursor: 直前ページの next_cursor（指定時は page を使わない）
+            page: ページ番号（cursor を使わない場合。深いページほど遅くなる）
+
+        Returns:
+            columns, column_types, rows（列順の配列）, has_next, next_cursor
+
+        Raises:
+            ValueError: カーソルが不正な場合
+        """
+        # 表示しない主キー列も、次のカーソルを作るために末尾に追加して取得する
+        extra_keys = [column for column in self.primary_key if column not in self.columns]
+        statement = select(*self.columns, *extra_keys).where(*self.conditions)
+
+        if self.primary_key:
+            statement = statement.order_by(*self.primary_key)
+            if cursor:
+                statement = statement.where(self._after(cursor))
+        elif cursor:
+            raise ValueError("主キーのないテーブルではカーソルを使用できません")
+        if not cursor and page:
+            statement = statement.offset(page * limit)
+
+        # 次ページの有無を判定するため1件多く取得する
+        with self.bind.connect() as connection:
+            rows = connection.execute(statement.limit(limit + 1)).all()
+        has_next = len(rows) > limit
+        rows = rows[:limit]
+
+        next_cursor = None
+        if has_next and self.primary_key:
+            selected = list(self.columns) + extra_keys
+            last = rows[-1]
+            next_cursor = encode_key_cursor([last[selected.index(column)] for column in self.primary_key])
+
+        width = len(self.columns)
+        return {
+            "columns": [column.name for column in self.columns],
+            "column_types": [_column_type_name(column) for column in self.columns],
+            "rows": [tuple(row)[:width] for row in rows],
+            "has_next": has_next,
+            "next_cursor": next_cursor,
+        }
+
+    def count(self, total_mode: str) -> Optional[int]:
+        """
+        総件数を取得
+
+        Args:
+            total_mode: exact（毎回 COUNT）, cached（COUNT を短時間キャッシュ）,
+                estimate（統計情報の推定値。条件なしの場合のみ）, none
+
+        Returns:
+            総件数。取得しない・できない場合は None
+        """
+        if total_mode == "estimate":
+            if self.conditions:
+                return None
+            return DatabaseStatsService(self.bind).estimate_rows(self.table.name)
+        if total_mode == "exact":
+            return self._count_exact()
+        if total_mode == "cached":
+            key = ("admin_table_rows", self.table.name, tuple(sorted(self.filters)))
+            return count_cache.get_or_set(key, self._count_exact)
+        return None
+
+    def _count_exact(self) -> int:
+        statement = select(func.count()).select_from(self.table).where(*self.conditions)
+        with self.bind.connect() as connection:
+            return connection.execute(statement).scalar()
+
+    def _after(self, cursor: str) -> ColumnElement:
+        """主キーがカーソルより後ろの行を表す条件式"""
+        values = decode_key_cursor(cursor, len(self.primary_key))
+        try:
+            values = [
+                _convert_filter_value(column, value) if isinstance(value, str) else value
+                for column, value in zip(self.primary_key, values)
+            ]
+        except (ValueError, ArithmeticError):
+            raise ValueError("無効なカーソルです")
+        if len(self.primary_key) == 1:
+            return self.primary_key[0] > values[0]
+        return tuple_(*self.primary_key) > tuple_(*values)
+
+
+# PostgreSQL: テーブルごとの推定行数とサイズを1回のクエリで取得
+_POSTGRES_TABLE_STATS = text("""
+    SELECT c.relname AS name,
+           COALESCE(s.n_live_tup, GREATEST(c.reltuples, 0))::bigint AS rows,
+           pg_total_relation_size(c.oid) AS size_bytes
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+    WHERE c.relkind IN ('r', 'p') AND n.nspname = current_schema()
+""")
+
+_POSTGRES_TABLE_ROWS = text("""
+    SELECT COALESCE(s.n_live_tup, GREATEST(c.reltuples, 0))::bigint AS rows
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+    WHERE c.relkind IN ('r', 'p') AND n.nspname = current_schema() AND c.relname = :name
+""")
+
+_POSTGRES_DATABASE_STATS = text("""
+    SELECT pg_database_size(current_database()) AS size_bytes,
+           (SELECT count(*) FROM pg_stat_activity WHERE datname = current_database()) AS connection_count,
+           (SELECT ROUND(100 * sum(blks_hit) / NULLIF(sum(blks_hit) + sum(blks_read), 0), 2)
+            FROM pg_stat_database WHERE datname = current_database()) AS cache_hit_ratio
+""")
+
+_POSTGRES_QUERY_STATS = text("""
+    SELECT ROUND(AVG(mean_exec_time)::numeric, 2) AS avg_query_time,
+           COUNT(*) FILTER (WHERE mean_exec_time > 1000) AS slow_queries
+    FROM pg_stat_statements
+    WHERE calls > 0
+""")
+
+
+def format_size(size_bytes: Optional[int]) -> str:
+    """バイト数を pg_size_pretty と同じ形式の文字列に変換"""
+    if size_bytes is None:
+        return "不明"
+    size = float(size_bytes)
+    if size < 10 * 1024:
+        return f"{int(size)} bytes"
+    for unit in ("kB", "MB", "GB", "TB"):
+        size /= 1024
+        if size < 10 * 1024 or unit == "TB":
+            return f"{round(size)} {unit}"
+
+
+class DatabaseStatsService:
+    """
+    データベース統計情報
+
+    通常はシステムカタログの推定値を使い、テーブル数によらず数回のクエリで集計する
+    - PostgreSQL: pg_class / pg_stat_user_tables（推定行数とサイズ）
+    - SQLite: sqlite_stat1（ANALYZE 済みの行数）、未分析のテーブルは MAX(rowid)、
+      全体のサイズは page_count * page_size
+    exact=True の場合のみテーブルごとに COUNT(*) と MAX(updated_at) を実行する。
+    SQLite のテーブルごとのサイズは dbstat がファイル全体を読むため sizes=True の場合のみ取得する
+    """
+
+    def __init__(self, bind: Engine = read_engine):
+        self.bind = bind
+
+    def collect(self, exact: bool = False, sizes: bool = False) -> Dict[str, Any]:
+        """
+        統計情報を集計
+
+        Args:
+            exact: テーブルを全件走査して正確な行数と最終更新日時を取得するか
+            sizes: SQLite で dbstat を走査してテーブルごとのサイズを取得するか
+                （データベースファイルの大きさに比例して時間がかかる）
+
+        Returns:
+            テーブルごとの行数・サイズと、データベース全体の統計
+        """
+        # 失敗したクエリで後続のクエリが巻き込まれないよう、自動コミットで実行する
+        with self.bind.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            if connection.dialect.name == "sqlite":
+                tables, database = self._collect_sqlite(connection, sizes)
+            else:
+                tables, database = self._collect_postgres(connection)
+
+            if exact:
+                for info in tables:
+                    info.update(self._count_exact(connection, info["name"]))
+
+        for info in tables:
+            info["size"] = format_size(info.get("size_bytes"))
+            info.setdefault("last_updated", "不明")
+
+        return {
+            "tables": tables,
+            "total_size": format_size(database["size_bytes"]),
+            "connection_count": database["connection_count"],
+            "total_rows": sum(info["rows"] for info in tables),
+            "performance_stats": {
+                "avg_query_time": f"{database['avg_query_time']}ms",
+                "slow_queries": database["slow_queries"],
+                "cache_hit_ratio": f"{database['cache_hit_ratio']}%"
+            },
+            "exact": exact,
+            "generated_at": datetime.now().isoformat()
+        }
+
+    def estimate_rows(self, table_name: str) -> Optional[int]:
+        """
+        1つのテーブルの推定行数を取得（他のテーブルの統計は集計しない）
+
+        Args:
+            table_name: テーブル名
+
+        Returns:
+            推定行数。テーブルがない・取得できない場合は None
+        """
+        with self.bind.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            try:
+                if connection.dialect.name != "sqlite":
+                    row = connection.execute(_POSTGRES_TABLE_ROWS, {"name": table_name}).first()
+                    return int(row.rows) if row else None
+
+                definition = connection.execute(
+                    text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": table_name}
+                ).first()
+                if definition is None:
+                    return None
+                rows = self._sqlite_analyzed_rows(connection, table_name)
+                if table_name in rows:
+                    return rows[table_name]
+                statement = self._sqlite_estimate_statement(connection, {table_name: definition[0]})
+                return int(connection.execute(text(statement)).one()[1] or 0)
+            except Exception as e:
+                logger.warning(f"行数の推定に失敗: {e}")
+                return None
+
+    def _collect_postgres(self, connection) -> tuple:
+        tables = [
+            {"name": row.name, "rows": int(row.rows), "size_bytes": int(row.size_bytes)}
+            for row in connection.execute(_POSTGRES_TABLE_STATS)
+        ]
+        tables.sort(key=lambda info: info["name"])
+
+        database = {
+            "size_bytes": None, "connection_count": 0,
+            "avg_query_time": 0, "slow_queries": 0, "cache_hit_ratio": 0
+        }
+        try:
+            row = connection.execute(_POSTGRES_DATABASE_STATS).one()
+            database.update(
+                size_bytes=row.size_bytes,
+                connection_count=row.connection_count,
+                cache_hit_ratio=row.cache_hit_ratio or 0
+            )
+        except Exception as e:
+            logger.warning(f"データベース統計の取得に失敗: {e}")
+        try:
+            # pg_stat_statements 拡張がない場合は取得できない
+            row = connection.execute(_POSTGRES_QUERY_STATS).one()
+            database.update(avg_query_time=row.avg_query_time or 0, slow_queries=row.slow_queries or 0)
+        except Exception as e:
+            logger.warning(f"パフォーマンス統計の取得に失敗: {e}")
+        return tables, database
+
+    def _collect_sqlite(self, connection, sizes: bool) -> tuple:
+        definitions = dict(connection.execute(text(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        )).all())
+        names = list(definitions)
+        rows = self._sqlite_analyzed_rows(connection)
+        unanalyzed = [name for name in names if name not in rows]
+        if unanalyzed:
+            statement = self._sqlite_estimate_statement(connection, {name: definitions[name] for name in unanalyzed})
+            try:
+                rows.update((name, count or 0) for name, count in connection.execute(text(statement)))
+            except Exception as e:
+                logger.warning(f"行数の推定に失敗: {e}")
+
+        table_sizes = self._sqlite_sizes(connection) if sizes else {}
+        tables = [
+            {"name": name, "rows": int(rows.get(name, 0)), "size_bytes": table_sizes.get(name)}
+            for name in names
+        ]
+
+        page_count = connection.execute(text("PRAGMA page_count")).scalar()
+        page_size = connection.execute(text("PRAGMA page_size")).scalar()
+        database = {
+            "size_bytes": page_count * page_size, "connection_count": 0,
+            "avg_query_time": 0, "slow_queries": 0, "cache_hit_ratio": 0
+        }
+        return tables, database
+
+    def _sqlite_estimate_statement(self, connection, definitions: Dict[str, Optional[str]]) -> str:
+        """
+        未分析のテーブルの (テーブル名, 推定行数) を返す SQL
+
+        rowid の最大値で近似する（B-tree の末尾を読むだけで済む）。
+        rowid を持たないテーブル（全文検索の内部テーブルなど）は件数を数える
+        """
+        quote = connection.dialect.identifier_preparer.quote
+        return " UNION ALL ".join(
+            "SELECT '{}', {} FROM {}".format(
+                name.replace("'", "''"),
+                "COUNT(*)" if "WITHOUT ROWID" in (definition or "").upper() else "MAX(rowid)",
+                quote(name)
+            )
+            for name, definition in definitions.items()
+        )
+
+    def _sqlite_analyzed_rows(self, connection, table_name: Optional[str] = None) -> Dict[str, int]:
+        """sqlite_stat1 の行数（stat の先頭の数値）を取得。ANALYZE していなければ空"""
+        try:
+            if table_name is None:
+                result = connection.execute(text("SELECT tbl, stat FROM sqlite_stat1"))
+            else:
+                result = connection.execute(
+                    text("SELECT tbl, stat FROM sqlite_stat1 WHERE tbl = :name"), {"name": table_name}
+                )
+        except Exception:
+            return {}
+        rows: Dict[str, int] = {}
+        for table_name, stat in result:
+            count = int(stat.split()[0]) if stat else 0
+            rows[table_name] = max(rows.get(table_name, 0), count)
+        return rows
+
+    def _sqlite_sizes(self, connection) -> Dict[str, int]:
+        """dbstat からテーブルごとのサイズ（インデックスを含む）を取得。使えない場合は空"""
+        try:
+            result = connection.execute(text("""
+                SELECT m.tbl_name, SUM(d.pgsize)
+                FROM dbstat d JOIN sqlite_master m ON m.name = d.name
+                GROUP BY m.tbl_name
+            """))
+            return {name: int(size) for name, size in result}
+        except Exception as e:
+            logger.warning(f"テーブルサイズの取得に失敗: {e}")
+            return {}
+
+    def _count_exact(self, connection, table_name: str) -> Dict[str, Any]:
+        """COUNT(*) と MAX(updated_at) を1回のクエリで取得"""
+        table = get_table(table_name, self.bind)
+        columns = [func.count()]
+        if "updated_at" in table.columns:
+            columns.append(func.max(table.columns["updated_at"]))
+        row = connection.execute(select(*columns).select_from(table)).one()
+
+        result = {"rows": int(row[0])}
+        if len(row) > 1 and row[1]:
+            result["last_updated"] = row[1].isoformat() if hasattr(row[1], "isoformat") else str(row[1])
+        return result
+
+
+def get_cached_database_stats(exact: bool = False, refresh: bool = False, sizes: bool = False) -> Dict[str, Any]:
+    """
+    データベース統計情報を取得（DATABASE_STATS_CACHE_TTL 秒キャッシュ）
+
+    Args:
+        exact: 正確な行数と最終更新日時を取得するか（テーブルを全件走査する）
+        refresh: キャッシュを使わずに集計し直すか
+        sizes: SQLite でテーブルごとのサイズを取得するか（dbstat でファイル全体を読む）
+    """
+    key = ("database_stats", exact, sizes)
+    if refresh:
+        stats_cache.invalidate(key)
+    return stats_cache.get_or_set(key, lambda: DatabaseStatsService().collect(exact, sizes))
@@ -0,0 +1,566 @@
+"""
+データベースのバックアップ
+バックアップはバックグラウンドのスレッドで1件ずつ実行し、進捗はジョブとして参照できる。
+ジョブの状態は BACKUP_DIR/jobs にファイルで保存するため、他のワーカープロセスや再起動後も参照できる
+（バックアップ対象のデータベースに進捗を書き込むと SQLite のオンラインバックアップがやり直しになるため、
+email_jobs のようなテーブルには保存しない）
+
+- SQLite: オンラインバックアップ API で BACKUP_PAGES_PER_STEP ページずつコピーする
+  （ステップの合間に書き込みを受け付けるため、稼働中でも整合したスナップショットになる）。
+  書き込みが続いてコピーが BACKUP_MAX_RESTARTS 回を超えてやり直しになった場合は、
+  1つの読み取りトランザクションで完結する VACUUM INTO に切り替える。
+  差分バックアップは直近のフルバックアップから変更されたページだけを保存する
+- PostgreSQL: pg_dump（カスタム形式）を実行し、出力したテーブル数から進捗を求める
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import socket
+import sqlite3
+import struct
+import subprocess
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import engine
+
+logger = logging.getLogger(__name__)
+
+BACKUP_FULL = "full"
+BACKUP_INCREMENTAL = "incremental"
+BACKUP_KINDS = (BACKUP_FULL, BACKUP_INCREMENTAL)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+_INCREMENTAL_MAGIC = b"SQLITE-INCREMENTAL-1\n"
+_PAGE_HASH_SIZE = 16
+_MAX_TRACKED_JOBS = 50
+_JOB_ID = re.compile(r"[0-9a-f]{32}")
+# メタデータ（.json）を保存する前の形式のバックアップ（backup_YYYYmmdd_HHMMSS.db / .sql）
+_LEGACY_BACKUP = re.compile(r"(backup_(\d{8}_\d{6})(?:_\d+)?)\.(?:db|sql)")
+
+
+class _BackupRestarted(Exception):
+    """オンラインバックアップが書き込みで繰り返しやり直しになった"""
+
+
+@dataclass
+class BackupJob:
+    """バックアップジョブ（実行中のプロセスが BACKUP_DIR/jobs/<id>.json に保存する）"""
+    id: str
+    kind: str
+    name: str
+    status: str = JOB_QUEUED
+    progress: int = 0
+    filename: Optional[str] = None
+    size: Optional[int] = None
+    base: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    worker: Optional[str] = None  # 実行しているプロセス（ホスト名:PID）
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BackupJob":
+        """保存した状態から復元"""
+        values = {key: value for key, value in data.items() if key in cls.__dataclass_fields__}
+        for key in ("created_at", "started_at", "finished_at"):
+            if values.get(key):
+                values[key] = datetime.fromisoformat(values[key])
+        return cls(**values)
+
+
+def _process_exists(pid: int) -> bool:
+    """このホストでプロセスが動いているか"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _hash_pages(path: str, page_size: int) -> List[bytes]:
+    """ファイルをページ単位でハッシュ化"""
+    hashes = []
+    with open(path, "rb") as f:
+        while True:
+            page = f.read(page_size)
+            if not page:
+                break
+            hashes.append(hashlib.blake2b(page, digest_size=_PAGE_HASH_SIZE).digest())
+    return hashes
+
+
+def _read_page_size(path: str) -> int:
+    """SQLite ファイルのヘッダーからページサイズを読む（1 は 65536 を表す）"""
+    with open(path, "rb") as f:
+        header = f.read(18)
+    page_size = struct.unpack(">H", header[16:18])[0]
+    return 65536 if page_size == 1 else page_size
+
+
+class DatabaseBackupService:
+    """
+    バックアップの実行と一覧
+
+    バックアップごとに本体（.db.gz / .inc.gz / .dump）とメタデータ（.json）を
+    BACKUP_DIR に保存する。フルバックアップには差分計算用のページハッシュ（.pages）も保存する
+    """
+
+    def __init__(self, backup_dir: Optional[str] = None):
+        self.backup_dir = backup_dir or settings.BACKUP_DIR
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._jobs: Dict[str, BackupJob] = {}
+        self._lock = threading.Lock()
+        self._worker = f"{socket.gethostname()}:{os.getpid()}"
+
+    def start(self, kind: str = BACKUP_FULL) -> BackupJob:
+        """
+        バックアップジョブを登録してバックグラウンドで実行
+
+        Args:
+            kind: full または incremental（SQLite のみ）
+
+        Returns:
+            登録したジョブ
+
+        Raises:
+            ValueError: 種類が不正な場合、差分バックアップができない場合
+        """
+        if kind not in BACKUP_KINDS:
+            raise ValueError(f"バックアップの種類が不正です: {kind}")
+        if kind == BACKUP_INCREMENTAL:
+            if engine.dialect.name != "sqlite":
+                raise ValueError("差分バックアップは SQLite のみ対応しています")
+            if self._latest_full_backup() is None:
+                raise ValueError("差分バックアップの元になるフルバックアップがありません")
+
+        os.makedirs(self._jobs_dir, exist_ok=True)
+        with self._lock:
+            job = BackupJob(id=uuid.uuid4().hex, kind=kind, name=self._new_name(), worker=self._worker)
+            self._jobs[job.id] = job
+            self._save_job(job)
+            # 古いジョブの記録を捨てる（実行中のものは残す）
+            finished = [
+                j for j in self._jobs.values() if j.status in (JOB_COMPLETED, JOB_FAILED)
+            ]
+            for old in finished[:max(len(self._jobs) - _MAX_TRACKED_JOBS, 0)]:
+                del self._jobs[old.id]
+            self._prune_job_files()
+            if self._executor is None:
+                # バックアップ同士が競合しないよう1件ずつ実行する
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="database-backup")
+            self._executor.submit(self._run, job)
+        return job
+
+    def get_job(self, job_id: str) -> Optional[BackupJob]:
+        """
+        ジョブを取得（このプロセスのジョブでなければ保存された状態を読む）
+
+        Returns:
+            ジョブ。見つからない場合は None
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job if job is not None else self._load_job(job_id)
+
+    def get_jobs(self) -> List[BackupJob]:
+        """ジョブ（他のプロセス・再起動前のものを含む）を新しい順に取得"""
+        jobs = {job.id: job for job in self._load_jobs()}
+        with self._lock:
+            jobs.update(self._jobs)
+        return sorted(jobs.values(), key=lambda job: job.created_at, reverse=True)[:_MAX_TRACKED_JOBS]
+
+    def stop(self):
+        """実行中のバックアップの完了を待って終了"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _new_name(self) -> str:
+        name = f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        # 他のプロセスが登録したばかりのジョブとも重ならないようにする
+        taken = {job.name for job in self._jobs.values()} | {job.name for job in self._load_jobs()}
+        candidate, suffix = name, 1
+        while candidate in taken or self._read_metadata(candidate) is not None:
+            suffix += 1
+            candidate = f"{name}_{suffix}"
+        return candidate
+
+    def _run(self, job: BackupJob):
+        job.status = JOB_RUNNING
+        job.started_at = datetime.now()
+        self._save_job(job)
+
+        def report(progress: float):
+            progress = min(int(progress), 99)
+            if progress != job.progress:
+                job.progress = progress
+                self._save_job(job)
+
+        try:
+            if engine.dialect.name == "sqlite":
+                if job.kind == BACKUP_INCREMENTAL:
+                    details = self._backup_sqlite_incremental(job, report)
+                else:
+                    details = self._backup_sqlite_full(job, report)
+            else:
+                details = self._backup_postgres(job, report)
+
+            job.size = os.path.getsize(self._path(job.filename))
+            self._write_metadata(job, details)
+            if job.kind == BACKUP_FULL:
+                self._apply_retention()
+            job.progress = 100
+            job.status = JOB_COMPLETED
+            logger.info(f"バックアップが完了しました: {job.filename}")
+        except Exception as e:
+            job.status = JOB_FAILED
+            job.error = str(e) or e.__class__.__name__
+            logger.error(f"バックアップに失敗しました ({job.name}): {job.error}")
+            self._remove_files(job.name)
+        finally:
+            job.finished_at = datetime.now()
+            self._save_job(job)
+
+    def _snapshot_sqlite(self, destination: str, report: Callable[[float], None], weight: float):
+        """オンラインバックアップ API でスナップショットを作成（進捗は 0〜weight）"""
+        database = engine.url.database
+        if not database or database == ":memory:":
+            raise ValueError("メモリ上のデータベースはバックアップできません")
+
+        restarts = 0
+        last_remaining = None
+
+        def on_progress(status, remaining, total):
+            nonlocal restarts, last_remaining
+            # 他の接続の書き込みでコピーが先頭からやり直しになると残りページ数が減らない
+            if last_remaining is not None and remaining >= last_remaining:
+                restarts += 1
+                if restarts > settings.BACKUP_MAX_RESTARTS:
+                    raise _BackupRestarted()
+            last_remaining = remaining
+            if total:
+                report(weight * (total - remaining) / total)
+
+        source = sqlite3.connect(database)
+        try:
+            target = sqlite3.connect(destination)
+            try:
+                source.backup(target, pages=max(settings.BACKUP_PAGES_PER_STEP, 1), progress=on_progress)
+                return
+            except _BackupRestarted:
+                logger.warning(
+                    f"書き込みによりオンラインバックアップが {restarts} 回やり直しになったため VACUUM INTO で取得します"
+                )
+            finally:
+                target.close()
+
+            # 1つの読み取りトランザクションでコピーするため、書き込みが続いても完了する
+            os.remove(destination)
+            source.execute("VACUUM INTO ?", (destination,))
+            report(weight)
+        finally:
+            source.close()
+
+    def _open_output(self, path: str):
+        level = settings.BACKUP_COMPRESSION_LEVEL
+        return gzip.open(path, "wb", compresslevel=level) if level > 0 else open(path, "wb")
+
+    def _backup_sqlite_full(self, job: BackupJob, report: Callable[[float], None]) -> Dict[str, Any]:
+        snapshot = self._path(f"{job.name}.tmp")
+        try:
+            self._snapshot_sqlite(snapshot, report, 80)
+            page_size = _read_page_size(snapshot)
+            hashes = _hash_pages(snapshot, page_size)
+            with open(self._path(f"{job.name}.pages"), "wb") as f:
+                f.write(b"".join(hashes))
+            report(85)
+
+            job.filename = f"{job.name}.db.gz" if settings.BACKUP_COMPRESSION_LEVEL > 0 else f"{job.name}.db"
+            with open(snapshot, "rb") as source, self._open_output(self._path(job.filename)) as target:
+                shutil.copyfileobj(source, target, 1024 * 1024)
+            return {"page_size": page_size, "page_count": len(hashes)}
+        finally:
+            if os.path.exists(snapshot):
+                os.remove(snapshot)
+
+    def _backup_sqlite_incremental(self, job: BackupJob, report: Callable[[float], None]) -> Dict[str, Any]:
+        base = self._latest_full_backup()
+        if base is None:
+            raise ValueError("差分バックアップの元になるフルバックアップがありません")
+        job.base = base["name"]
+        with open(self._path(f"{base['name']}.pages"), "rb") as f:
+            data = f.read()
+        base_hashes = [data[i:i + _PAGE_HASH_SIZE] for i in range(0, len(data), _PAGE_HASH_SIZE)]
+
+        snapshot = self._path(f"{job.name}.tmp")
+        try:
+            self._snapshot_sqlite(snapshot, report, 70)
+            page_size = _read_page_size(snapshot)
+            if page_size != base.get("page_size", page_size):
+                raise ValueError("ページサイズが変わったため差分バックアップできません。フルバックアップを作成してください")
+            page_count = os.path.getsize(snapshot) // page_size
+
+            job.filename = f"{job.name}.inc.gz"
+            changed = 0
+            with open(snapshot, "rb") as source, gzip.open(
+                self._path(job.filename), "wb", compresslevel=max(settings.BACKUP_COMPRESSION_LEVEL, 1)
+            ) as target:
+                header = {"base": base["name"], "page_size": page_size, "page_count": page_count}
+                target.write(_INCREMENTAL_MAGIC + json.dumps(header).encode("utf-8") + b"\n")
+                for number in range(page_count):
+                    page = source.read(page_size)
+                    digest = hashlib.blake2b(page, digest_size=_PAGE_HASH_SIZE).digest()
+                    if number >= len(base_hashes) or base_hashes[number] != digest:
+                        target.write(struct.pack(">I", number) + page)
+                        changed += 1
+                    if number % 1024 == 0:
+                        report(70 + 30 * number / max(page_count, 1))
+            logger.info(f"差分バックアップ: {changed}/{page_count} ページ（元: {base['name']}）")
+            return {"page_size": page_size, "page_count": page_count, "changed_pages": changed}
+        finally:
+            if os.path.exists(snapshot):
+                os.remove(snapshot)
+
+    def restore_sqlite(self, name: str, destination: str) -> str:
+        """
+        SQLite のバックアップをデータベースファイルとして書き出す
+        差分バックアップの場合は元のフルバックアップに変更ページを適用する
+
+        Args:
+            name: バックアップ名
+            destination: 書き出し先のパス（稼働中のデータベースは指定しないこと）
+
+        Returns:
+            書き出し先のパス
+        """
+        metadata = self._read_metadata(name)
+        if metadata is None:
+            raise ValueError(f"バックアップが見つかりません: {name}")
+        base = self._read_metadata(metadata["base"]) if metadata["kind"] == BACKUP_INCREMENTAL else metadata
+        if base is None:
+            raise ValueError(f"元のフルバックアップが見つかりません: {metadata['base']}")
+
+        opener = gzip.open if base["filename"].endswith(".gz") else open
+        with opener(self._path(base["filename"]), "rb") as source, open(destination, "wb") as target:
+            shutil.copyfileobj(source, target, 1024 * 1024)
+
+        if metadata["kind"] == BACKUP_INCREMENTAL:
+            with gzip.open(self._path(metadata["filename"]), "rb") as source, open(destination, "r+b") as target:
+                if source.readline() != _INCREMENTAL_MAGIC:
+                    raise ValueError(f"差分バックアップの形式が不正です: {name}")
+                header = json.loads(source.readline())
+                page_size = header["page_size"]
+                target.truncate(header["page_count"] * page_size)
+                while True:
+                    number = source.read(4)
+                    if not number:
+                        break
+                    target.seek(struct.unpack(">I", number)[0] * page_size)
+                    target.write(source.read(page_size))
+        return destination
+
+    def _backup_postgres(self, job: BackupJob, report: Callable[[float], None]) -> Dict[str, Any]:
+        with engine.connect() as connection:
+            table_count = connection.execute(text(
+                "SELECT count(*) FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+                "WHERE c.relkind IN ('r', 'p') AND n.nspname NOT IN ('pg_catalog', 'information_schema')"
+            )).scalar() or 1
+
+        url = engine.url
+        job.filename = f"{job.name}.dump"
+        cmd = [
+            settings.PG_DUMP_PATH,
+            "--no-password",
+            "--format=custom",
+            f"--compress={settings.BACKUP_COMPRESSION_LEVEL}",
+            "--verbose",
+            "--file", self._path(job.filename),
+            url.set(drivername="postgresql", password=None).render_as_string(hide_password=False),
+        ]
+        env = dict(os.environ)
+        if url.password:
+            env["PGPASSWORD"] = str(url.password)
+
+        process = subprocess.Popen(cmd, stderr=subprocess.PIPE, stdout=subprocess.DEVNULL, text=True, env=env)
+        dumped = 0
+        messages: List[str] = []
+        for line in process.stderr:
+            if "dumping contents of table" in line:
+                dumped += 1
+                report(95 * dumped / table_count)
+            messages = (messages + [line.strip()])[-20:]
+        if process.wait() != 0:
+            raise RuntimeError(f"pg_dump failed: {' '.join(messages[-5:])}")
+        return {"tables": dumped}
+
+    def list_backups(self) -> List[Dict[str, Any]]:
+        """保存されているバックアップ（メタデータがない以前の形式を含む）を新しい順に取得"""
+        if not os.path.isdir(self.backup_dir):
+            return []
+        filenames = set(os.listdir(self.backup_dir))
+        # 無圧縮のバックアップは .json を書く前に同じ形式の .db ができるため、実行中のものは除く
+        running = {job.name for job in self.get_jobs() if job.status in (JOB_QUEUED, JOB_RUNNING)}
+        backups = []
+        for filename in filenames:
+            if filename.endswith(".json"):
+                metadata = self._read_metadata(filename[:-len(".json")])
+            else:
+                match = _LEGACY_BACKUP.fullmatch(filename)
+                if match is None or f"{match.group(1)}.json" in filenames or match.group(1) in running:
+                    continue
+                metadata = self._legacy_metadata(match.group(1))
+            if metadata is not None:
+                backups.append(metadata)
+        return sorted(backups, key=lambda backup: backup["created_at"], reverse=True)
+
+    def _latest_full_backup(self) -> Optional[Dict[str, Any]]:
+        for backup in self.list_backups():
+            if backup["kind"] == BACKUP_FULL and os.path.exists(self._path(f"{backup['name']}.pages")):
+                return backup
+        return None
+
+    def _apply_retention(self):
+        """BACKUP_RETENTION 世代より古いフルバックアップを、その差分バックアップと一緒に削除"""
+        if settings.BACKUP_RETENTION <= 0:
+            return
+        backups = self.list_backups()
+        full = [backup for backup in backups if backup["kind"] == BACKUP_FULL]
+        for expired in full[settings.BACKUP_RETENTION:]:
+            for backup in backups:
+                if backup["name"] == expired["name"] or backup.get("base") == expired["name"]:
+                    self._remove_files(backup["name"])
+                    logger.info(f"古いバックアップを削除しました: {backup['name']}")
+
+    def _write_metadata(self, job: BackupJob, details: Dict[str, Any]):
+        metadata = {
+            "name": job.name,
+            "kind": job.kind,
+            "filename": job.filename,
+            "size": job.size,
+            "base": job.base,
+            "database": engine.dialect.name,
+            "created_at": job.created_at.isoformat(),
+            **details,
+        }
+        with open(self._path(f"{job.name}.json"), "w", encoding="utf-8") as f:
+            json.dump(metadata, f, ensure_ascii=False, indent=2)
+
+    def _read_metadata(self, name: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(f"{name}.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return self._legacy_metadata(name)
+
+    def _legacy_metadata(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        メタデータを保存する前の形式のバックアップのメタデータをファイル名から作る
+
+        SQLite はデータベースファイルのコピー（.db）、PostgreSQL は pg_dump のカスタム形式（.sql）
+        """
+        for extension, database in (("db", "sqlite"), ("sql", "postgresql")):
+            filename = f"{name}.{extension}"
+            match = _LEGACY_BACKUP.fullmatch(filename)
+            if match is None or not os.path.isfile(self._path(filename)):
+                continue
+            return {
+                "name": name,
+                "kind": BACKUP_FULL,
+                "filename": filename,
+                "size": os.path.getsize(self._path(filename)),
+                "base": None,
+                "database": database,
+                "created_at": datetime.strptime(match.group(2), "%Y%m%d_%H%M%S").isoformat(),
+                "legacy": True,
+            }
+        return None
+
+    @property
+    def _jobs_dir(self) -> str:
+        return os.path.join(self.backup_dir, "jobs")
+
+    def _save_job(self, job: BackupJob):
+        """ジョブの状態を保存（読み込み途中のファイルを参照されないよう置き換えで書く）"""
+        try:
+            path = os.path.join(self._jobs_dir, f"{job.id}.json")
+            with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+                json.dump(job.to_dict(), f, ensure_ascii=False, default=str)
+            os.replace(f"{path}.tmp", path)
+        except OSError as e:
+            logger.warning(f"バックアップジョブの状態を保存できませんでした ({job.id}): {e}")
+
+    def _load_job(self, job_id: str) -> Optional[BackupJob]:
+        """
+        保存されたジョブの状態を読む
+
+        実行していたプロセスがこのホストで既に終了している未完了のジョブは、中断されたものとして返す
+        """
+        if not _JOB_ID.fullmatch(job_id):
+            return None
+        try:
+            with open(os.path.join(self._jobs_dir, f"{job_id}.json"), encoding="utf-8") as f:
+                job = BackupJob.from_dict(json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+
+        if job.status in (JOB_QUEUED, JOB_RUNNING) and job.worker:
+            host, _, pid = job.worker.rpartition(":")
+            interrupted = job.worker == self._worker or (pid.isdigit() and not _process_exists(int(pid)))
+            if host == socket.gethostname() and interrupted:
+                job.status = JOB_FAILED
+                job.error = "バックアップを実行していたプロセスが終了したため中断されました"
+        return job
+
+    def _load_jobs(self) -> List[BackupJob]:
+        """保存されたジョブをすべて読む（新しい順）"""
+        if not os.path.isdir(self._jobs_dir):
+            return []
+        jobs = [
+            self._load_job(filename[:-len(".json")])
+            for filename in os.listdir(self._jobs_dir) if filename.endswith(".json")
+        ]
+        return sorted((job for job in jobs if job is not None), key=lambda job: job.created_at, reverse=True)
+
+    def _prune_job_files(self):
+        """完了したジョブの状態ファイルを新しい _MAX_TRACKED_JOBS 件だけ残して削除"""
+        finished = [job for job in self._load_jobs() if job.status in (JOB_COMPLETED, JOB_FAILED)]
+        for job in finished[_MAX_TRACKED_JOBS:]:
+            try:
+                os.remove(os.path.join(self._jobs_dir, f"{job.id}.json"))
+            except OSError:
+                pass
+
+    def _remove_files(self, name: str):
+        for filename in os.listdir(self.backup_dir):
+            if filename.startswith(f"{name}.") and os.path.isfile(self._path(filename)):
+                os.remove(self._path(filename))
+
+    def _path(self, filename: str) -> str:
+        return os.path.join(self.backup_dir, filename)
+
+
+backup_service = DatabaseBackupService()
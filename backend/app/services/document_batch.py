@@ -0,0 +1,131 @@
+"""
+書類の一括作成
+1つのテンプレートから複数案件の書類をプロセスプールで作成し、できあがった順に
+ZIP に追加してストリーミングで返す（件数によらずメモリ使用量が一定）
+"""
+
+import asyncio
+import logging
+import os
+import zipfile
+from concurrent.futures.process import BrokenProcessPool
+from typing import AsyncIterator, List
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.services.document_mapping import get_template_mapping
+from app.services.document_renderer import render_workbook_contents
+from app.services.document_service import get_process_pool, reset_process_pool
+
+logger = logging.getLogger(__name__)
+
+
+class _ZipStream:
+    """
+    ZipFile の書き込み先
+
+    書き込まれたバイト列を溜めておき、drain で取り出す。seek を持たないため
+    ZipFile はシークしない書き込み方式（データディスクリプタ付き）になる
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def stream_document_zip(template_name: str, project_ids: List[int]) -> AsyncIterator[bytes]:
+    """
+    案件ごとの書類を ZIP にまとめてストリーミング
+
+    DOCUMENT_BATCH_CHUNK_SIZE 件ずつ案件情報を取得してプロセスプールに渡し、
+    同時に処理するのはプロセス数の2倍のチャンクまでに抑える。
+    作成に失敗した書類は errors.txt に記録する（送信を始めた後はステータスを変えられないため）
+
+    Args:
+        template_name: テンプレートファイル名（マッピングが定義されていること）
+        project_ids: 対象のプロジェクトID（この順に処理を始める）
+
+    Yields:
+        ZIP のバイト列
+    """
+    mapping = get_template_mapping(template_name)
+    template_path = os.path.join(settings.TEMPLATE_DIR, template_name)
+    stem = os.path.splitext(template_name)[0]
+    chunk_size = max(settings.DOCUMENT_BATCH_CHUNK_SIZE, 1)
+    max_pending = max(settings.DOCUMENT_WORKERS, 1) * 2
+
+    loop = asyncio.get_running_loop()
+    stream = _ZipStream()
+    # .xlsx は圧縮済みのため無圧縮で格納する
+    archive = zipfile.ZipFile(stream, "w", zipfile.ZIP_STORED)
+    pending = {}
+    errors: List[str] = []
+
+    def add_results(done) -> None:
+        for future in done:
+            rows, executor = pending.pop(future)
+            try:
+                contents = future.result()
+            except BrokenProcessPool as e:
+                reset_process_pool(executor)
+                contents, error = None, f"Document worker process terminated: {e}"
+            except Exception as e:
+                contents, error = None, str(e) or e.__class__.__name__
+
+            if contents is None:
+                logger.error(f"書類の一括作成に失敗しました ({template_name}): {error}")
+                errors.extend(f"{row.project_code}: {error}" for row in rows)
+                continue
+            for row, content in zip(rows, contents):
+                archive.writestr(f"{stem}_{row.project_code}.xlsx", content)
+
+    try:
+        for start in range(0, len(project_ids), chunk_size):
+            chunk = project_ids[start:start + chunk_size]
+            # 送信中に接続を保持し続けないよう、チャンクごとにセッションを開く
+            async with AsyncSessionLocal() as session:
+                rows = await session.run_sync(lambda s: mapping.fetch(s, chunk))
+            if rows:
+                executor = get_process_pool()
+                future = loop.run_in_executor(
+                    executor, render_workbook_contents, template_path, [row.values for row in rows]
+                )
+                pending[future] = (rows, executor)
+
+            if len(pending) >= max_pending:
+                done, _ = await asyncio.wait(list(pending), return_when=asyncio.FIRST_COMPLETED)
+            else:
+                done = [future for future in pending if future.done()]
+            if done:
+                add_results(done)
+                yield stream.drain()
+
+        while pending:
+            done, _ = await asyncio.wait(list(pending), return_when=asyncio.FIRST_COMPLETED)
+            add_results(done)
+            yield stream.drain()
+
+        if errors:
+            archive.writestr("errors.txt", "\n".join(errors) + "\n")
+        archive.close()
+        yield stream.drain()
+    finally:
+        # クライアントが切断した場合は、まだ始まっていない作成を取り消す
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,191 @@
+"""
+書類テンプレートのフィールドマッピング
+テンプレートごとの JSON（app/document_mappings/*.json）でセルと書き込む値の対応を定義し、
+参照している列だけを取得する1本のクエリに変換する
+
+JSON の形式:
+    {
+      "template": "1-01_案件概要書.xlsx",
+      "fields": {
+        "C6": "project.project_name",          # モデルの属性
+        "D6": "{customer.owner_name}　様",      # 書式（{} 内が属性）
+        "G3": "today",                          # 生成日
+        "シート名!B2": "site.address"           # 先頭以外のシート
+      }
+    }
+"""
+
+import json
+import re
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy.orm import Query, Session
+
+from app.models.project import Building, Customer, Project, Site
+
+MAPPING_DIR = Path(__file__).resolve().parent.parent / "document_mappings"
+
+# 参照できるエンティティと、Project からの結合
+ENTITIES = {
+    "project": Project,
+    "customer": Customer,
+    "site": Site,
+    "building": Building,
+}
+JOINS = {
+    "customer": Project.customer,
+    "site": Project.site,
+    "building": Project.building,
+}
+
+# 属性以外に使える値
+BUILTINS = {
+    "today": lambda: date.today(),
+}
+
+_PLACEHOLDER = re.compile(r"\{([\w.]+)\}")
+
+
+@dataclass(frozen=True)
+class DocumentRow:
+    """1案件分の書き込み内容"""
+    project_id: int
+    project_code: str
+    values: Dict[str, Any]  # セル番地と値（値が空のセルは含まない）
+
+
+class TemplateMapping:
+    """
+    コンパイル済みのマッピング
+
+    読み込み時に参照している属性がモデルに存在するかを検証するため、
+    スキーマの変更で壊れたマッピングは書類生成の前に検出できる
+    """
+
+    def __init__(self, template_name: str, fields: Dict[str, str]):
+        self.template_name = template_name
+        self.fields = dict(fields)
+        # セルごとの (書式, 参照する属性パス)。書式が None なら属性の値をそのまま書き込む
+        self._cells: Dict[str, Any] = {}
+        paths: List[str] = []
+
+        for cell, spec in self.fields.items():
+            if not isinstance(spec, str) or not spec:
+                raise ValueError(f"{template_name}: {cell} の定義が不正です: {spec!r}")
+            if "{" in spec:
+                references = _PLACEHOLDER.findall(spec)
+                self._cells[cell] = (spec, references)
+            else:
+                references = [spec]
+                self._cells[cell] = (None, references)
+            for path in references:
+                if path not in BUILTINS and path not in paths:
+                    self._validate(path)
+                    paths.append(path)
+
+        self.paths = paths
+        self.entities = sorted({path.split(".", 1)[0] for path in paths} - {"project"})
+
+    @classmethod
+    def load(cls, path: Path) -> "TemplateMapping":
+        """JSON ファイルから読み込む"""
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["template"], data["fields"])
+
+    def _validate(self, path: str):
+        entity, _, attribute = path.partition(".")
+        model = ENTITIES.get(entity)
+        if model is None or not attribute or "." in attribute:
+            raise ValueError(f"{self.template_name}: 参照 '{path}' は entity.column の形式で指定してください")
+        if attribute not in model.__table__.columns:
+            raise ValueError(f"{self.template_name}: {model.__name__} に列 '{attribute}' がありません")
+
+    def query(self, db: Session) -> Query:
+        """
+        参照している列だけを選択するクエリ（必要なテーブルだけを外部結合）
+
+        結果の各行は project_id, project_code と属性パスをキーに持つ
+        """
+        columns = [Project.id.label("project_id"), Project.project_code.label("project_code")]
+        for path in self.paths:
+            entity, attribute = path.split(".")
+            columns.append(getattr(ENTITIES[entity], attribute).label(path))
+
+        query = db.query(*columns).select_from(Project)
+        for entity in self.entities:
+            query = query.outerjoin(JOINS[entity])
+        return query
+
+    def fetch(self, db: Session, project_ids: Optional[Iterable[int]] = None, query: Optional[Query] = None) -> List[DocumentRow]:
+        """
+        案件ごとの書き込み内容を1回のクエリで取得
+
+        Args:
+            db: データベースセッション
+            project_ids: 対象のプロジェクトID（省略時は query の条件に従う）
+            query: 追加の条件を付けたクエリ（self.query(db) に filter したもの）
+
+        Returns:
+            プロジェクトID順の DocumentRow のリスト
+        """
+        query = query if query is not None else self.query(db)
+        if project_ids is not None:
+            query = query.filter(Project.id.in_(list(project_ids)))
+
+        builtins = {name: factory() for name, factory in BUILTINS.items()}
+        return [
+            DocumentRow(row.project_id, row.project_code, self.values(row._mapping, builtins))
+            for row in query.order_by(Project.id).all()
+        ]
+
+    def values(self, record: Dict[str, Any], builtins: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """取得した1行をセル番地と値の辞書にする"""
+        if builtins is None:
+            builtins = {name: factory() for name, factory in BUILTINS.items()}
+
+        def lookup(path: str) -> Any:
+            return builtins[path] if path in builtins else record.get(path)
+
+        values = {}
+        for cell, (template, references) in self._cells.items():
+            if template is None:
+                value = lookup(references[0])
+            else:
+                value = _PLACEHOLDER.sub(lambda m: str(lookup(m.group(1)) or ""), template)
+            if value is not None:
+                values[cell] = value
+        return values
+
+
+_mappings: Optional[Dict[str, TemplateMapping]] = None
+
+
+def load_template_mappings(directory: Path = MAPPING_DIR) -> Dict[str, TemplateMapping]:
+    """
+    マッピングをすべて読み込んで検証（テンプレートファイル名をキーにした辞書）
+    """
+    global _mappings
+    mappings = {}
+    for path in sorted(directory.glob("*.json")):
+        mapping = TemplateMapping.load(path)
+        mappings[mapping.template_name] = mapping
+    _mappings = mappings
+    return mappings
+
+
+def get_template_mapping(template_name: str) -> TemplateMapping:
+    """
+    テンプレートのマッピングを取得
+
+    Raises:
+        ValueError: マッピングが定義されていない場合
+    """
+    mappings = _mappings if _mappings is not None else load_template_mappings()
+    mapping = mappings.get(template_name)
+    if mapping is None:
+        raise ValueError(f"テンプレート '{template_name}' のマッピングが定義されていません")
+    return mapping
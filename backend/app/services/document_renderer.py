@@ -0,0 +1,53 @@
+"""
+Excel テンプレートへの書き込み
+書類生成ワーカーのプロセスプールで実行するため、データベースやアプリの設定には依存しない
+"""
+
+from typing import Any, Dict, List, Sequence, Tuple
+
+from app.services.excel_template import template_cache
+
+
+def render_workbooks(template_path: str, documents: Sequence[Tuple[Dict[str, Any], str]]) -> List[str]:
+    """
+    1つのテンプレートから複数の書類をまとめて作成
+
+    テンプレートはプロセスごとに1回だけ読み込み、以降はパース済みのものを使う。
+    プロセスプールに渡す場合は、複数件をまとめて渡すとプロセス間のやり取りが減る
+
+    Args:
+        template_path: テンプレート（.xlsx）のパス
+        documents: (セル番地と値の辞書, 保存先のパス) のリスト。
+            セル番地は "C6"（先頭シート）または "シート名!C6"
+
+    Returns:
+        保存先のパスのリスト
+    """
+    return [
+        template_cache.render_to_file(template_path, values, output_path)
+        for values, output_path in documents
+    ]
+
+
+def render_workbook_contents(template_path: str, values_list: Sequence[Dict[str, Any]]) -> List[bytes]:
+    """
+    1つのテンプレートから複数の書類をまとめて作成し、ファイルに保存せず内容を返す（一括作成用）
+
+    Args:
+        template_path: テンプレート（.xlsx）のパス
+        values_list: 書類ごとのセル番地と値の辞書
+
+    Returns:
+        書類ごとの .xlsx の内容
+    """
+    return [template_cache.render(template_path, values) for values in values_list]
+
+
+def render_workbook(template_path: str, values: Dict[str, Any], output_path: str) -> str:
+    """
+    テンプレートのセルに値を書き込んで保存（1件分の render_workbooks）
+
+    Returns:
+        保存先のパス
+    """
+    return render_workbooks(template_path, [(values, output_path)])[0]
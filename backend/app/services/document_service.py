@@ -0,0 +1,460 @@
+"""
+書類生成サービス
+申請の承認時に document_jobs テーブルへ生成ジョブを登録し、バックグラウンドのワーカーが
+プロセスプールで Excel テンプレートに案件情報を書き込む。進捗は WebSocket で通知する
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import socket
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.cache import SUMMARY_APPLICATIONS, invalidate_summaries
+from app.core.config import settings
+from app.core.database import WorkerSessionLocal
+from app.core.websocket_manager import application_topic, event_topic, manager, project_topic
+from app.models.document_job import DocumentJob
+from app.models.project import Application
+from app.services.document_mapping import DocumentRow, get_template_mapping
+from app.services.document_renderer import render_workbook
+
+logger = logging.getLogger(__name__)
+
+# ジョブのステータス
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+# 申請種別コードごとに承認時に生成するテンプレート（TEMPLATE_DIR 内のファイル名）
+DOCUMENT_TEMPLATES: Dict[str, List[str]] = {}
+# 各テンプレートのセルに書き込む値は app/document_mappings/*.json で定義する
+DEFAULT_DOCUMENT_TEMPLATES = ["1-01_案件概要書.xlsx", "2-01_重要事項説明書.xlsx"]
+
+
+def _utcnow() -> datetime:
+    """DateTime カラムに保存する現在時刻（タイムゾーンなしのUTC）"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def collect_document_values(db: Session, project_id: int, template_name: str) -> DocumentRow:
+    """
+    テンプレートに書き込むセルの値を案件情報から作成（マッピングが参照する列だけを取得）
+
+    Args:
+        db: データベースセッション
+        project_id: プロジェクトID
+        template_name: テンプレートファイル名
+
+    Returns:
+        DocumentRow（セル番地と値の辞書を含む）
+    """
+    rows = get_template_mapping(template_name).fetch(db, [project_id])
+    if not rows:
+        raise ValueError(f"プロジェクトID {project_id} が見つかりません")
+    return rows[0]
+
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    書類生成用のプロセスプール（書類生成ワーカーと一括作成で共有）
+
+    プロセス数は DOCUMENT_WORKERS（0 の場合も一括作成用に1プロセス）
+    """
+    global _process_pool
+    if _process_pool is None:
+        # fork だと起動済みのスレッド（メール送信ワーカーなど）が持つロックを引き継いでしまうため spawn で起動する
+        _process_pool = ProcessPoolExecutor(
+            max_workers=max(settings.DOCUMENT_WORKERS, 1),
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _process_pool
+
+
+def reset_process_pool(broken: ProcessPoolExecutor):
+    """子プロセスの異常終了で使えなくなったプールを破棄（次の get_process_pool で作り直す）"""
+    global _process_pool
+    if _process_pool is broken:
+        _process_pool = None
+        broken.shutdown(wait=False)
+
+
+def shutdown_process_pool():
+    """プロセスプールを停止"""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+
+def document_output_dir(application_id: int) -> str:
+    """申請ごとの書類の保存先ディレクトリ"""
+    return os.path.join(settings.DOCUMENT_OUTPUT_DIR, f"application_{application_id}")
+
+
+class DocumentJobService:
+    """書類生成ジョブの登録・状況確認"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def enqueue_for_application(self, application: Application) -> List[DocumentJob]:
+        """
+        申請の書類生成ジョブを登録（コミットは呼び出し側で行う）
+
+        Args:
+            application: 承認された申請
+
+        Returns:
+            登録したジョブ
+        """
+        code = application.application_type.code if application.application_type else None
+        templates = DOCUMENT_TEMPLATES.get(code, DEFAULT_DOCUMENT_TEMPLATES)
+        jobs = [
+            DocumentJob(
+                application_id=application.id,
+                project_id=application.project_id,
+                template_name=template_name,
+                status=JOB_QUEUED,
+                progress=0,
+                attempts=0,
+                max_attempts=settings.DOCUMENT_MAX_ATTEMPTS,
+            )
+            for template_name in templates
+        ]
+        self.db.add_all(jobs)
+        return jobs
+
+    def get_job(self, job_id: int) -> Optional[DocumentJob]:
+        """ジョブを取得"""
+        return self.db.query(DocumentJob).filter(DocumentJob.id == job_id).first()
+
+    def get_jobs(
+        self,
+        application_id: Optional[int] = None,
+        status: Optional[str] = None,
+        limit: int = 100
+    ) -> List[DocumentJob]:
+        """
+        ジョブ一覧を取得（新しい順）
+
+        Args:
+            application_id: 申請IDで絞り込み
+            status: ステータスで絞り込み
+            limit: 取得件数
+        """
+        query = self.db.query(DocumentJob)
+        if application_id is not None:
+            query = query.filter(DocumentJob.application_id == application_id)
+        if status is not None:
+            query = query.filter(DocumentJob.status == status)
+        return query.order_by(DocumentJob.id.desc()).limit(limit).all()
+
+
+class DocumentJobWorker:
+    """
+    document_jobs を処理するバックグラウンドワーカー
+
+    - イベントループ上のディスパッチャーが空きプロセス数だけジョブを取り出し、
+      テンプレートへの書き込みをプロセスプールで並列に実行する（CPU コア数に応じて拡張できる）
+    - 取り出しは PostgreSQL では SKIP LOCKED、SQLite では条件付き UPDATE で二重取得を防ぐため、
+      複数のアプリプロセスでワーカーを動かしてもよい
+    - 進捗は document_job メッセージとして WebSocket で通知する
+    - 失敗したジョブは DOCUMENT_MAX_ATTEMPTS 回まで再試行する
+    - 処理中のままロックが DOCUMENT_JOB_LOCK_TIMEOUT 秒を超えたジョブ（プロセス停止など）は再度キューに戻す
+    """
+
+    def __init__(self, session_factory=WorkerSessionLocal):
+        self._session_factory = session_factory
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._running: Dict[asyncio.Task, int] = {}  # 処理中のタスクとジョブID
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._workers = 0
+        self._name = f"{socket.gethostname()}:{os.getpid()}"
+
+    def start(self, workers: Optional[int] = None):
+        """ワーカーを開始（イベントループ上で呼ぶ）"""
+        workers = settings.DOCUMENT_WORKERS if workers is None else workers
+        if self._dispatcher is not None or workers <= 0:
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._workers = workers
+        self._dispatcher = asyncio.create_task(self._dispatch())
+        logger.info(f"書類生成ワーカーを開始しました（{workers}プロセス）")
+
+    async def stop(self):
+        """ワーカーを停止（処理中のジョブはキューに戻す）"""
+        if self._dispatcher is None:
+            return
+
+        job_ids = list(self._running.values())
+        tasks = [self._dispatcher, *self._running]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._dispatcher = None
+        self._running.clear()
+
+        try:
+            self._release(job_ids)
+        except Exception as e:
+            logger.error(f"処理中の書類生成ジョブをキューに戻せませんでした: {e}")
+
+    def wake(self):
+        """新しいジョブが登録されたことを通知（どのスレッドから呼んでもよい）"""
+        if self._loop is not None and self._wakeup is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._wakeup.clear()
+            free = self._workers - len(self._running)
+            jobs: List[Dict[str, Any]] = []
+            if free > 0:
+                try:
+                    await loop.run_in_executor(None, self._release_stale_jobs)
+                    jobs = await loop.run_in_executor(None, self._claim, free)
+                except Exception as e:
+                    logger.error(f"書類生成ジョブの取得に失敗しました: {e}")
+
+            for job in jobs:
+                task = asyncio.create_task(self._process(job))
+                self._running[task] = job["id"]
+                task.add_done_callback(self._on_done)
+
+            # 空きがあり、まだジョブが残っている可能性がある場合はすぐに取り出す
+            if jobs and len(jobs) == free:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), settings.DOCUMENT_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    def _on_done(self, task: asyncio.Task):
+        self._running.pop(task, None)
+        # 空いたプロセスで次のジョブを処理する
+        self._wakeup.set()
+
+    async def _process(self, job: Dict[str, Any]):
+        """1件生成して結果を記録"""
+        loop = asyncio.get_running_loop()
+        await self._notify(job, JOB_RUNNING, 10)
+
+        output_path, error = None, None
+        executor = get_process_pool()
+        try:
+            document = await loop.run_in_executor(None, self._collect, job)
+            await self._notify(job, JOB_RUNNING, 40)
+
+            stem = os.path.splitext(job["template_name"])[0]
+            output_path = os.path.join(
+                document_output_dir(job["application_id"]),
+                f"{stem}_{document.project_code}_{job['id']}.xlsx"
+            )
+            await loop.run_in_executor(
+                executor,
+                render_workbook,
+                os.path.join(settings.TEMPLATE_DIR, job["template_name"]),
+                document.values,
+                output_path
+            )
+        except BrokenProcessPool as e:
+            # 子プロセスが異常終了するとプールが使えなくなるため作り直す
+            logger.error(f"書類生成プロセスが異常終了しました: {e}")
+            reset_process_pool(executor)
+            output_path, error = None, "Document worker process terminated"
+        except Exception as e:
+            output_path, error = None, str(e) or e.__class__.__name__
+
+        try:
+            status = await loop.run_in_executor(None, self._finish, job, output_path, error)
+        except Exception as e:
+            # 記録できなかったジョブはロックのタイムアウト後に再実行される
+            logger.error(f"書類生成結果の記録に失敗しました (job {job['id']}): {e}")
+            return
+
+        if status == JOB_COMPLETED:
+            await self._notify(job, status, 100, output_path=output_path)
+            try:
+                await manager.send_application_update({
+                    "id": job["application_id"],
+                    "project_id": job["project_id"],
+                    "generated_document_path": document_output_dir(job["application_id"])
+                })
+            except Exception as e:
+                logger.warning(f"申請の更新通知に失敗しました: {e}")
+        else:
+            await self._notify(job, status, 0, error=error)
+
+    async def _notify(self, job: Dict[str, Any], status: str, progress: int, **extra: Any):
+        """進捗を WebSocket で通知（申請・プロジェクトを購読している画面にも届ける）"""
+        message = {
+            "type": "document_job",
+            "data": {
+                "job_id": job["id"],
+                "application_id": job["application_id"],
+                "project_id": job["project_id"],
+                "template_name": job["template_name"],
+                "status": status,
+                "progress": progress,
+                **extra
+            }
+        }
+        try:
+            await manager.publish(message, [
+                event_topic("document_job"),
+                application_topic(job["application_id"]),
+                project_topic(job["project_id"])
+            ])
+        except Exception as e:
+            logger.warning(f"書類生成の進捗通知に失敗しました: {e}")
+
+    def _collect(self, job: Dict[str, Any]) -> DocumentRow:
+        """テンプレートに書き込む値と案件コードを取得"""
+        db = self._session_factory()
+        try:
+            return collect_document_values(db, job["project_id"], job["template_name"])
+        finally:
+            db.close()
+
+    def _claim(self, limit: int) -> List[Dict[str, Any]]:
+        """生成待ちのジョブを取り出して running にする"""
+        db = self._session_factory()
+        try:
+            now = _utcnow()
+            ids = [
+                row.id for row in db.query(DocumentJob.id).filter(
+                    DocumentJob.status == JOB_QUEUED
+                ).order_by(DocumentJob.created_at, DocumentJob.id)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+                .all()
+            ]
+            if not ids:
+                db.rollback()
+                return []
+
+            # 他のワーカーが先に取得した行は status の条件で除外される
+            db.query(DocumentJob).filter(
+                DocumentJob.id.in_(ids), DocumentJob.status == JOB_QUEUED
+            ).update({
+                DocumentJob.status: JOB_RUNNING,
+                DocumentJob.progress: 10,
+                DocumentJob.locked_by: self._name,
+                DocumentJob.locked_at: now,
+                DocumentJob.started_at: now,
+                DocumentJob.attempts: DocumentJob.attempts + 1,
+            }, synchronize_session=False)
+            db.commit()
+
+            jobs = db.query(DocumentJob).filter(
+                DocumentJob.id.in_(ids),
+                DocumentJob.status == JOB_RUNNING,
+                DocumentJob.locked_by == self._name
+            ).order_by(DocumentJob.created_at, DocumentJob.id).all()
+            return [
+                {
+                    "id": job.id,
+                    "application_id": job.application_id,
+                    "project_id": job.project_id,
+                    "template_name": job.template_name,
+                    "attempts": job.attempts,
+                    "max_attempts": job.max_attempts,
+                }
+                for job in jobs
+            ]
+        finally:
+            db.close()
+
+    def _finish(self, job: Dict[str, Any], output_path: Optional[str], error: Optional[str]) -> str:
+        now = _utcnow()
+        if output_path is not None:
+            status = JOB_COMPLETED
+            values = {
+                DocumentJob.status: status,
+                DocumentJob.progress: 100,
+                DocumentJob.output_path: output_path,
+                DocumentJob.error: None,
+                DocumentJob.finished_at: now,
+            }
+        elif job["attempts"] >= job["max_attempts"]:
+            status = JOB_FAILED
+            values = {DocumentJob.status: status, DocumentJob.error: error, DocumentJob.finished_at: now}
+            logger.error(f"書類生成を断念しました: {job['template_name']} (job {job['id']}, {job['attempts']}回失敗): {error}")
+        else:
+            status = JOB_QUEUED
+            values = {DocumentJob.status: status, DocumentJob.progress: 0, DocumentJob.error: error}
+            logger.warning(f"書類生成に失敗したため再試行します: {job['template_name']} (job {job['id']}): {error}")
+
+        values.update({DocumentJob.locked_by: None, DocumentJob.locked_at: None})
+
+        db = self._session_factory()
+        try:
+            db.query(DocumentJob).filter(DocumentJob.id == job["id"]).update(values, synchronize_session=False)
+            if status == JOB_COMPLETED:
+                # 申請には生成した書類をまとめたディレクトリを記録する
+                db.query(Application).filter(Application.id == job["application_id"]).update({
+                    Application.generated_document_path: document_output_dir(job["application_id"])
+                }, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+        if status == JOB_COMPLETED:
+            invalidate_summaries(SUMMARY_APPLICATIONS)
+        return status
+
+    def _release(self, job_ids: List[int]):
+        """取り出したが生成を終えていないジョブをキューに戻す"""
+        if not job_ids:
+            return
+        db = self._session_factory()
+        try:
+            db.query(DocumentJob).filter(
+                DocumentJob.id.in_(job_ids), DocumentJob.status == JOB_RUNNING
+            ).update({
+                DocumentJob.status: JOB_QUEUED,
+                DocumentJob.progress: 0,
+                DocumentJob.locked_by: None,
+                DocumentJob.locked_at: None,
+                DocumentJob.attempts: DocumentJob.attempts - 1,
+            }, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def _release_stale_jobs(self):
+        """ロックが古い処理中のジョブをキューに戻す"""
+        expired = _utcnow() - timedelta(seconds=settings.DOCUMENT_JOB_LOCK_TIMEOUT)
+        db = self._session_factory()
+        try:
+            count = db.query(DocumentJob).filter(
+                DocumentJob.status == JOB_RUNNING, DocumentJob.locked_at < expired
+            ).update({
+                DocumentJob.status: JOB_QUEUED,
+                DocumentJob.progress: 0,
+                DocumentJob.locked_by: None,
+                DocumentJob.locked_at: None,
+            }, synchronize_session=False)
+            db.commit()
+            if count:
+                logger.warning(f"処理が中断された書類生成ジョブ {count}件をキューに戻しました")
+        finally:
+            db.close()
+
+
+# グローバルなワーカー（アプリ起動時に開始）
+document_worker = DocumentJobWorker()
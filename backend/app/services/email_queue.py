@@ -0,0 +1,417 @@
+"""
+メール送信キュー
+送信するメールを email_jobs テーブルに登録し、バックグラウンドのワーカーが
+プロバイダーごとのレート制限と指数バックオフ付きの再試行で送信する
+"""
+
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.cache import SUMMARY_GOOGLE_FORMS, invalidate_summaries
+from app.core.config import settings
+from app.core.database import WorkerSessionLocal
+from app.models.email_job import EmailJob
+from app.models.google_forms import FormSubmission
+from app.services.email_service import get_email_service
+
+logger = logging.getLogger(__name__)
+
+# ジョブのステータス
+JOB_QUEUED = "queued"
+JOB_SENDING = "sending"
+JOB_SENT = "sent"
+JOB_FAILED = "failed"
+
+
+def _utcnow() -> datetime:
+    """DateTime カラムに保存する現在時刻（タイムゾーンなしのUTC）"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class TokenBucket:
+    """
+    トークンバケットによるレート制限（スレッドセーフ）
+
+    rate 件/秒で補充し、最大 burst 件まで連続で送信できる
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, stop_event: Optional[threading.Event] = None) -> bool:
+        """
+        トークンを1つ取得（取得できるまで待つ）
+
+        Returns:
+            取得できた場合 True。待機中に stop_event がセットされた場合 False
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+
+            if stop_event is None:
+                time.sleep(wait)
+            elif stop_event.wait(wait):
+                return False
+
+
+class EmailQueue:
+    """メール送信ジョブの登録・状況確認"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def enqueue(self, messages: Iterable[Dict[str, Any]], batch_id: Optional[str] = None) -> str:
+        """
+        メールを送信キューに登録（コミットは呼び出し側で行う）
+
+        Args:
+            messages: to_email, subject, body, is_html, form_submission_id（任意）の辞書
+            batch_id: バッチID（省略時は新規に発行）
+
+        Returns:
+            バッチID
+        """
+        batch_id = batch_id or str(uuid.uuid4())
+        provider = get_email_service().provider_name
+        now = _utcnow()
+
+        self.db.add_all([
+            EmailJob(
+                batch_id=batch_id,
+                provider=provider,
+                to_email=message["to_email"],
+                subject=message["subject"],
+                body=message["body"],
+                is_html=message.get("is_html", False),
+                form_submission_id=message.get("form_submission_id"),
+                status=JOB_QUEUED,
+                attempts=0,
+                max_attempts=settings.EMAIL_MAX_ATTEMPTS,
+                next_attempt_at=now,
+            )
+            for message in messages
+        ])
+        return batch_id
+
+    def get_batch_status(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """
+        バッチの送信状況を取得
+
+        Args:
+            batch_id: バッチID
+
+        Returns:
+            ステータス別件数と失敗したジョブの一覧。バッチがない場合は None
+        """
+        counts = dict(
+            self.db.query(EmailJob.status, func.count(EmailJob.id))
+            .filter(EmailJob.batch_id == batch_id)
+            .group_by(EmailJob.status)
+            .all()
+        )
+        if not counts:
+            return None
+
+        failed = self.db.query(EmailJob).filter(
+            EmailJob.batch_id == batch_id, EmailJob.status == JOB_FAILED
+        ).order_by(EmailJob.id).all()
+
+        total = sum(counts.values())
+        done = counts.get(JOB_SENT, 0) + counts.get(JOB_FAILED, 0)
+        return {
+            "batch_id": batch_id,
+            "total": total,
+            "queued": counts.get(JOB_QUEUED, 0),
+            "sending": counts.get(JOB_SENDING, 0),
+            "sent": counts.get(JOB_SENT, 0),
+            "failed": counts.get(JOB_FAILED, 0),
+            "completed": done == total,
+            "failures": [
+                {
+                    "job_id": job.id,
+                    "email": job.to_email,
+                    "form_submission_id": job.form_submission_id,
+                    "attempts": job.attempts,
+                    "error": job.last_error,
+                }
+                for job in failed
+            ],
+        }
+
+
+class EmailQueueWorker:
+    """
+    email_jobs を処理するバックグラウンドワーカー
+
+    - 複数のスレッドが並行してジョブを取り出す（PostgreSQL では SKIP LOCKED、
+      SQLite では条件付き UPDATE で二重取得を防ぐ）
+    - プロバイダーごとのトークンバケットで送信レートを制限（プロセス単位）
+    - 失敗したジョブは指数バックオフで再試行し、上限に達したら failed にする
+    - 送信結果は FormSubmission.status に反映する
+    - 処理中のままロックが EMAIL_JOB_LOCK_TIMEOUT 秒を超えたジョブ（ワーカー停止など）は再度キューに戻す
+    """
+
+    def __init__(self, session_factory=WorkerSessionLocal):
+        self._session_factory = session_factory
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._buckets_lock = threading.Lock()
+        self._name = f"{socket.gethostname()}:{os.getpid()}"
+
+    def start(self, workers: Optional[int] = None):
+        """ワーカースレッドを開始"""
+        workers = settings.EMAIL_QUEUE_WORKERS if workers is None else workers
+        if self._threads or workers <= 0:
+            return
+
+        self._stop.clear()
+        for index in range(workers):
+            thread = threading.Thread(
+                target=self._run, args=(f"{self._name}:{index}",), name=f"email-queue-{index}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"メール送信ワーカーを開始しました（{workers}スレッド）")
+
+    def stop(self, timeout: float = 10.0):
+        """ワーカースレッドを停止（処理中でないジョブはキューに戻す）"""
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def wake(self):
+        """新しいジョブが登録されたことを通知（ポーリング間隔を待たずに処理する）"""
+        self._wakeup.set()
+
+    def _run(self, worker_name: str):
+        while not self._stop.is_set():
+            try:
+                self._release_stale_jobs()
+                jobs = self._claim(worker_name)
+            except Exception as e:
+                logger.error(f"メール送信ジョブの取得に失敗しました: {e}")
+                jobs = []
+
+            if not jobs:
+                self._wakeup.wait(settings.EMAIL_QUEUE_POLL_INTERVAL)
+                self._wakeup.clear()
+                continue
+
+            for index, job in enumerate(jobs):
+                if self._stop.is_set() or not self._bucket(job["provider"]).acquire(self._stop):
+                    self._release([j["id"] for j in jobs[index:]])
+                    return
+                self._process(job)
+
+    def _claim(self, worker_name: str) -> List[Dict[str, Any]]:
+        """送信時刻を過ぎたジョブを取り出して sending にする"""
+        db = self._session_factory()
+        try:
+            now = _utcnow()
+            ids = [
+                row.id for row in db.query(EmailJob.id).filter(
+                    EmailJob.status == JOB_QUEUED,
+                    EmailJob.next_attempt_at <= now
+                ).order_by(EmailJob.next_attempt_at, EmailJob.id)
+                .limit(settings.EMAIL_QUEUE_BATCH_SIZE)
+                .with_for_update(skip_locked=True)
+                .all()
+            ]
+            if not ids:
+                db.rollback()
+                return []
+
+            # 他のワーカーが先に取得した行は status の条件で除外される
+            db.query(EmailJob).filter(
+                EmailJob.id.in_(ids), EmailJob.status == JOB_QUEUED
+            ).update({
+                EmailJob.status: JOB_SENDING,
+                EmailJob.locked_by: worker_name,
+                EmailJob.locked_at: now,
+                EmailJob.attempts: EmailJob.attempts + 1,
+            }, synchronize_session=False)
+            db.commit()
+
+            jobs = db.query(EmailJob).filter(
+                EmailJob.id.in_(ids),
+                EmailJob.status == JOB_SENDING,
+                EmailJob.locked_by == worker_name
+            ).order_by(EmailJob.next_attempt_at, EmailJob.id).all()
+            return [
+                {
+                    "id": job.id,
+                    "provider": job.provider,
+                    "to_email": job.to_email,
+                    "subject": job.subject,
+                    "body": job.body,
+                    "is_html": job.is_html,
+                    "attempts": job.attempts,
+                    "max_attempts": job.max_attempts,
+                    "form_submission_id": job.form_submission_id,
+                }
+                for job in jobs
+            ]
+        finally:
+            db.close()
+
+    def _process(self, job: Dict[str, Any]):
+        """1件送信して結果を記録"""
+        try:
+            success = get_email_service().send_email(
+                to_email=job["to_email"],
+                subject=job["subject"],
+                body=job["body"],
+                is_html=job["is_html"]
+            )
+            error = None if success else "Email delivery failed"
+        except Exception as e:
+            success, error = False, str(e)
+
+        try:
+            self._finish(job, success, error)
+        except Exception as e:
+            # 記録できなかったジョブはロックのタイムアウト後に再送される
+            logger.error(f"メール送信結果の記録に失敗しました (job {job['id']}): {e}")
+
+    def _finish(self, job: Dict[str, Any], success: bool, error: Optional[str]):
+        now = _utcnow()
+        if success:
+            values = {EmailJob.status: JOB_SENT, EmailJob.sent_at: now, EmailJob.last_error: None}
+            submission_status = "sent"
+        elif job["attempts"] >= job["max_attempts"]:
+            values = {EmailJob.status: JOB_FAILED, EmailJob.last_error: error}
+            submission_status = "failed"
+            logger.error(f"メール送信を断念しました: {job['to_email']} ({job['attempts']}回失敗)")
+        else:
+            values = {
+                EmailJob.status: JOB_QUEUED,
+                EmailJob.last_error: error,
+                EmailJob.next_attempt_at: now + timedelta(seconds=self._backoff(job["attempts"])),
+            }
+            submission_status = None
+            logger.warning(f"メール送信に失敗したため再試行します: {job['to_email']} ({job['attempts']}回目)")
+
+        values.update({EmailJob.locked_by: None, EmailJob.locked_at: None})
+
+        db = self._session_factory()
+        try:
+            db.query(EmailJob).filter(EmailJob.id == job["id"]).update(values, synchronize_session=False)
+            if submission_status and job["form_submission_id"]:
+                submission_values = {FormSubmission.status: submission_status}
+                if success:
+                    submission_values[FormSubmission.sent_at] = now
+                db.query(FormSubmission).filter(
+                    FormSubmission.id == job["form_submission_id"]
+                ).update(submission_values, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+        if submission_status and job["form_submission_id"]:
+            invalidate_summaries(SUMMARY_GOOGLE_FORMS)
+
+    def _release(self, job_ids: List[int]):
+        """取り出したが送信していないジョブをキューに戻す"""
+        if not job_ids:
+            return
+        db = self._session_factory()
+        try:
+            db.query(EmailJob).filter(
+                EmailJob.id.in_(job_ids), EmailJob.status == JOB_SENDING
+            ).update({
+                EmailJob.status: JOB_QUEUED,
+                EmailJob.locked_by: None,
+                EmailJob.locked_at: None,
+                EmailJob.attempts: EmailJob.attempts - 1,
+            }, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def _release_stale_jobs(self):
+        """
+        ロックが古い処理中のジョブをキューに戻す
+
+        取得時に試行回数を数えているため、上限に達したジョブは _finish と同じく失敗にする
+        （送信中にワーカーが落ちるメールを際限なく再送しないため）
+        """
+        expired = _utcnow() - timedelta(seconds=settings.EMAIL_JOB_LOCK_TIMEOUT)
+        db = self._session_factory()
+        try:
+            stale = db.query(EmailJob).filter(EmailJob.status == JOB_SENDING, EmailJob.locked_at < expired)
+            exhausted = stale.filter(EmailJob.attempts >= EmailJob.max_attempts)
+
+            submission_ids = [
+                submission_id for (submission_id,) in
+                exhausted.filter(EmailJob.form_submission_id.isnot(None)).with_entities(EmailJob.form_submission_id)
+            ]
+            failed = exhausted.update({
+                EmailJob.status: JOB_FAILED,
+                EmailJob.last_error: "送信処理が中断されたまま再試行の上限に達しました",
+                EmailJob.locked_by: None,
+                EmailJob.locked_at: None,
+            }, synchronize_session=False)
+            if submission_ids:
+                db.query(FormSubmission).filter(FormSubmission.id.in_(submission_ids)).update(
+                    {FormSubmission.status: "failed"}, synchronize_session=False
+                )
+
+            count = stale.update({
+                EmailJob.status: JOB_QUEUED,
+                EmailJob.locked_by: None,
+                EmailJob.locked_at: None,
+            }, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+        if count:
+            logger.warning(f"処理が中断されたメール送信ジョブ {count}件をキューに戻しました")
+        if failed:
+            logger.error(f"処理が中断されたメール送信ジョブ {failed}件を再試行の上限に達したため失敗にしました")
+        if submission_ids:
+            invalidate_summaries(SUMMARY_GOOGLE_FORMS)
+
+    def _bucket(self, provider: str) -> TokenBucket:
+        with self._buckets_lock:
+            bucket = self._buckets.get(provider)
+            if bucket is None:
+                rate = settings.EMAIL_RATE_LIMITS.get(provider, settings.EMAIL_RATE_LIMITS.get("default", 5.0))
+                bucket = self._buckets[provider] = TokenBucket(rate)
+            return bucket
+
+    @staticmethod
+    def _backoff(attempts: int) -> float:
+        """attempts 回目の失敗後の待ち時間（秒）"""
+        delay = min(settings.EMAIL_RETRY_BASE_DELAY * 2 ** (attempts - 1), settings.EMAIL_RETRY_MAX_DELAY)
+        # 同時に失敗したジョブの再試行が重ならないよう揺らす
+        return delay * random.uniform(1.0, 1.2)
+
+
+# グローバルなワーカー（アプリ起動時に開始）
+email_worker = EmailQueueWorker()
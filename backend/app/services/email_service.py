@@ -5,6 +5,9 @@ SendGrid、AWS SES、SMTPに対応した統一メール送信インターフェ
 
 import smtplib
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional, Dict, Any
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -33,6 +36,11 @@ logger = logging.getLogger(__name__)
 class EmailProvider(ABC):
     """メール送信プロバイダーの抽象基底クラス"""
     
+    # プロバイダー名（送信キューのレート制限の単位）
+    name: str = ""
+    # 一括送信で同時に送信する数（スレッドセーフなプロバイダーのみ 2 以上にする）
+    max_concurrency: int = 1
+    
     @abstractmethod
     def send_email(
         self,
@@ -44,9 +52,122 @@ class EmailProvider(ABC):
         attachments: Optional[List[Dict[str, Any]]] = None
     ) -> bool:
         pass
+    
+    def close(self):
+        """保持している接続などを解放"""
+        pass
+
+class SMTPConnectionPool:
+    """
+    認証済みSMTPセッションのプール
+    
+    STARTTLS・ログイン済みの接続を使い回し、同時接続数を pool_size までに抑える。
+    - 一定時間使われなかった接続、max_messages 通送った接続は作り直す
+    - 送信中に切断された場合は新しい接続で1回だけ再送する
+    """
+    
+    # 切断とみなして接続を作り直す SMTP の例外（ソケットの OSError も同様に扱う）
+    CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)
+    
+    def __init__(
+        self,
+        connect,
+        pool_size: int = 4,
+        max_messages: int = 100,
+        idle_timeout: float = 60.0
+    ):
+        """
+        Args:
+            connect: 認証済みの smtplib.SMTP を返す関数
+            pool_size: 最大同時接続数
+            max_messages: 1接続で送るメッセージ数の上限
+            idle_timeout: この秒数より長く使われていない接続は作り直す
+        """
+        self._connect = connect
+        self.pool_size = pool_size
+        self.max_messages = max_messages
+        self.idle_timeout = idle_timeout
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._lock = threading.Lock()
+        # (接続, 最終使用時刻, 送信数)
+        self._idle: List[List[Any]] = []
+    
+    def sendmail(self, from_addr: str, to_addrs: str, message: str):
+        """
+        プールの接続でメッセージを送信
+        
+        Raises:
+            smtplib.SMTPException: 送信に失敗した場合
+        """
+        with self._slots:
+            for attempt in range(2):
+                entry = self._checkout()
+                try:
+                    entry[0].sendmail(from_addr, to_addrs, message)
+                except OSError as e:
+                    # SMTPException も OSError のサブクラスのため、切断以外の SMTP エラー
+                    # （宛先の拒否など）は再送せず、セッションをリセットして接続を再利用する
+                    if isinstance(e, smtplib.SMTPException) and not isinstance(e, self.CONNECTION_ERRORS):
+                        self._reset_or_discard(entry)
+                        raise
+                    self._discard(entry)
+                    if attempt:
+                        raise
+                    logger.info("SMTP接続が切断されたため再接続して再送します")
+                    continue
+                
+                entry[1] = time.monotonic()
+                entry[2] += 1
+                self._checkin(entry)
+                return
+    
+    def close(self):
+        """待機中の接続をすべて閉じる"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for entry in idle:
+            self._discard(entry)
+    
+    def _checkout(self) -> List[Any]:
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                entry = self._idle.pop() if self._idle else None
+            if entry is None:
+                return [self._connect(), now, 0]
+            if now - entry[1] <= self.idle_timeout:
+                return entry
+            self._discard(entry)
+    
+    def _checkin(self, entry: List[Any]):
+        if entry[2] >= self.max_messages:
+            self._discard(entry)
+            return
+        with self._lock:
+            self._idle.append(entry)
+    
+    def _reset_or_discard(self, entry: List[Any]):
+        try:
+            entry[0].rset()
+        except Exception:
+            self._discard(entry)
+        else:
+            self._checkin(entry)
+    
+    @staticmethod
+    def _discard(entry: List[Any]):
+        try:
+            entry[0].quit()
+        except Exception:
+            try:
+                entry[0].close()
+            except Exception:
+                pass
 
 class SMTPProvider(EmailProvider):
-    """SMTP経由でのメール送信"""
+    """SMTP経由でのメール送信（接続プール付き）"""
+    
+    name = "smtp"
     
     def __init__(self, config: Dict[str, Any]):
         self.smtp_server = config.get('smtp_server', 'localhost')
@@ -54,7 +175,31 @@ class SMTPProvider(EmailProvider):
         self.username = config.get('username')
         self.password = config.get('password')
         self.use_tls = config.get('use_tls', True)
+        self.timeout = config.get('timeout', 30)
         self.default_from_email = config.get('from_email', 'noreply@example.com')
+        self.pool = SMTPConnectionPool(
+            self._connect,
+            pool_size=config.get('pool_size', 4),
+            max_messages=config.get('max_messages_per_connection', 100),
+            idle_timeout=config.get('idle_timeout', 60.0)
+        )
+        self.max_concurrency = self.pool.pool_size
+    
+    def _connect(self) -> smtplib.SMTP:
+        """SMTPサーバーに接続して認証する"""
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()
+            if self.username and self.password:
+                server.login(self.username, self.password)
+        except Exception:
+            server.close()
+            raise
+        return server
+    
+    def close(self):
+        self.pool.close()
     
     def send_email(
         self,
@@ -88,15 +233,8 @@ class SMTPProvider(EmailProvider):
                     )
                     msg.attach(part)
             
-            # SMTP送信
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                if self.use_tls:
-                    server.starttls()
-                if self.username and self.password:
-                    server.login(self.username, self.password)
-                
-                text = msg.as_string()
-                server.sendmail(msg['From'], msg['To'], text)
+            # SMTP送信（プールの認証済み接続を使用）
+            self.pool.sendmail(msg['From'], msg['To'], msg.as_string())
             
             logger.info(f"SMTP経由でメール送信成功: {to_email}")
             return True
@@ -108,12 +246,15 @@ class SMTPProvider(EmailProvider):
 class SendGridProvider(EmailProvider):
     """SendGrid経由でのメール送信"""
     
+    name = "sendgrid"
+    
     def __init__(self, api_key: str, default_from_email: str):
         if not SENDGRID_AVAILABLE:
             raise ImportError("SendGridライブラリがインストールされていません")
         
         self.sg = sendgrid.SendGridAPIClient(api_key=api_key)
         self.default_from_email = default_from_email
+        self.max_concurrency = int(os.getenv('EMAIL_BULK_CONCURRENCY', '4'))
     
     def send_email(
         self,
@@ -150,12 +291,15 @@ class SendGridProvider(EmailProvider):
 class AWSEmailProvider(EmailProvider):
     """AWS SES経由でのメール送信"""
     
+    name = "aws_ses"
+    
     def __init__(self, region: str, default_from_email: str):
         if not AWS_SES_AVAILABLE:
             raise ImportError("boto3ライブラリがインストールされていません")
         
         self.ses_client = boto3.client('ses', region_name=region)
         self.default_from_email = default_from_email
+        self.max_concurrency = int(os.getenv('EMAIL_BULK_CONCURRENCY', '4'))
     
     def send_email(
         self,
@@ -204,6 +348,11 @@ class EmailService:
     def __init__(self):
         self.provider = self._initialize_provider()
     
+    @property
+    def provider_name(self) -> str:
+        """使用中のプロバイダー名"""
+        return self.provider.name
+    
     def _initialize_provider(self) -> EmailProvider:
         """設定に基づいてメールプロバイダーを初期化"""
         email_provider = os.getenv('EMAIL_PROVIDER', 'smtp').lower()
@@ -228,7 +377,10 @@ class EmailService:
             'username': os.getenv('SMTP_USERNAME'),
             'password': os.getenv('SMTP_PASSWORD'),
             'use_tls': os.getenv('SMTP_USE_TLS', 'true').lower() == 'true',
-            'from_email': os.getenv('SMTP_FROM_EMAIL', 'noreply@example.com')
+            'from_email': os.getenv('SMTP_FROM_EMAIL', 'noreply@example.com'),
+            'pool_size': int(os.getenv('SMTP_POOL_SIZE', '4')),
+            'max_messages_per_connection': int(os.getenv('SMTP_MAX_MESSAGES_PER_CONNECTION', '100')),
+            'idle_timeout': float(os.getenv('SMTP_IDLE_TIMEOUT', '60'))
         }
         
         logger.info("SMTPプロバイダーを初期化")
@@ -281,6 +433,9 @@ class EmailService:
         """
         一括メール送信
         
+        プロバイダーの max_concurrency 件ずつ並行して送信する
+        （SMTPの場合はプールの接続を使い回すため、ハンドシェイクは接続数分のみ）
+        
         Args:
             to_emails: 送信先メールアドレスリスト
             subject: 件名
@@ -291,27 +446,28 @@ class EmailService:
         Returns:
             成功・失敗したメールアドレスのリスト
         """
-        successful_emails = []
-        failed_emails = []
-        
-        for email in to_emails:
+        def send(email: str) -> bool:
             try:
-                success = self.send_email(
+                return self.send_email(
                     to_email=email,
                     subject=subject,
                     body=body,
                     from_email=from_email,
                     is_html=is_html
                 )
-                
-                if success:
-                    successful_emails.append(email)
-                else:
-                    failed_emails.append(email)
-                    
             except Exception as e:
                 logger.error(f"一括送信中にエラー ({email}): {e}")
-                failed_emails.append(email)
+                return False
+        
+        workers = max(1, min(self.provider.max_concurrency, len(to_emails)))
+        if workers == 1:
+            results = [send(email) for email in to_emails]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(send, to_emails))
+        
+        successful_emails = [email for email, success in zip(to_emails, results) if success]
+        failed_emails = [email for email, success in zip(to_emails, results) if not success]
         
         return {
             'successful': successful_emails,
@@ -342,6 +498,10 @@ class EmailService:
         # この機能は今後の実装で詳細化
         logger.info(f"テンプレートメール送信: {template_name} -> {to_email}")
         return True
+    
+    def close(self):
+        """プロバイダーの接続を閉じる"""
+        self.provider.close()
 
 # グローバルインスタンス（シングルトン的な使用）
 email_service = EmailService()
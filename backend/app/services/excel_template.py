@@ -0,0 +1,162 @@
+"""
+Excel テンプレートエンジン
+テンプレートは最初の1回だけ読み込んで（パースして）メモリに保持し、以降の書類生成では
+再読み込みしない。テンプレートファイルが更新された場合（mtime・サイズの変化）は読み込み直す
+"""
+
+import io
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from openpyxl import load_workbook
+from openpyxl.utils.cell import coordinate_to_tuple
+from openpyxl.workbook.workbook import Workbook
+
+
+class ParsedTemplate:
+    """
+    パース済みのテンプレート
+
+    書類ごとにブックを複製する代わりに、書き込んだセルだけを記録しておき、
+    保存後に元の値・表示形式へ戻す（セルの数に比例するコストで済む）。
+    同じテンプレートへの書き込みはロックで直列化する
+    """
+
+    def __init__(self, path: str, mtime: float, size: int):
+        self.path = path
+        self.mtime = mtime
+        self.size = size
+        self.workbook: Workbook = load_workbook(path)
+        self.lock = threading.Lock()
+
+    def render(self, values: Dict[str, Any], destination) -> None:
+        """
+        セルに値を書き込んで destination（パスまたはファイルオブジェクト）に保存
+
+        Args:
+            values: セル番地と値の辞書。"C6" は先頭シート、"シート名!C6" は指定シートのセル
+            destination: 保存先
+        """
+        with self.lock:
+            saved: List[Tuple[Any, Tuple[int, int], bool, Any, str]] = []
+            try:
+                for address, value in values.items():
+                    sheet_name, _, coordinate = address.rpartition("!")
+                    worksheet = self.workbook[sheet_name] if sheet_name else self.workbook.worksheets[0]
+                    key = coordinate_to_tuple(coordinate)
+                    existed = key in worksheet._cells
+                    cell = worksheet.cell(*key)
+                    original = (cell.value, cell.number_format)
+                    try:
+                        cell.value = value
+                    except Exception:
+                        if not existed:
+                            worksheet._cells.pop(key, None)
+                        raise
+                    saved.append((worksheet, key, existed, *original))
+
+                self.workbook.save(destination)
+            finally:
+                # 後から書き込んだものから戻す（同じセルが複数回指定されても元の状態になる）
+                for worksheet, key, existed, value, number_format in reversed(saved):
+                    if existed:
+                        cell = worksheet._cells[key]
+                        cell.value = value
+                        cell.number_format = number_format
+                    else:
+                        worksheet._cells.pop(key, None)
+
+
+class TemplateCache:
+    """
+    パース済みテンプレートのキャッシュ（スレッドセーフ）
+
+    プロセスごとに保持するため、書類生成ワーカーの各プロセスは担当するテンプレートを
+    1回ずつ読み込むだけになる
+    """
+
+    def __init__(self, max_templates: int = 32):
+        """
+        Args:
+            max_templates: 保持するテンプレート数（超えたら最も古く使ったものから破棄）
+        """
+        self.max_templates = max_templates
+        self._templates: "OrderedDict[str, ParsedTemplate]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+
+    def get(self, path: str) -> ParsedTemplate:
+        """
+        パース済みテンプレートを取得（未読み込み・更新されている場合は読み込む）
+
+        Args:
+            path: テンプレート（.xlsx）のパス
+        """
+        key = os.path.abspath(path)
+        stat = os.stat(key)
+        with self._lock:
+            template = self._templates.get(key)
+            if template is not None and template.mtime == stat.st_mtime and template.size == stat.st_size:
+                self._templates.move_to_end(key)
+                self.hits += 1
+                return template
+
+        # 読み込みは時間がかかるためキャッシュのロック外で行う
+        template = ParsedTemplate(key, stat.st_mtime, stat.st_size)
+        with self._lock:
+            self.loads += 1
+            self._templates[key] = template
+            self._templates.move_to_end(key)
+            while len(self._templates) > self.max_templates:
+                self._templates.popitem(last=False)
+        return template
+
+    def render(self, path: str, values: Dict[str, Any]) -> bytes:
+        """テンプレートに値を書き込んだ .xlsx をバイト列で返す"""
+        buffer = io.BytesIO()
+        self.get(path).render(values, buffer)
+        return buffer.getvalue()
+
+    def render_to_file(self, path: str, values: Dict[str, Any], output_path: str) -> str:
+        """
+        テンプレートに値を書き込んでファイルに保存
+
+        Args:
+            path: テンプレートのパス
+            values: セル番地と値の辞書
+            output_path: 保存先のパス
+
+        Returns:
+            保存先のパス
+        """
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        # 書きかけのファイルを参照されないよう、一時ファイルに保存してから置き換える
+        temp_path = f"{output_path}.tmp"
+        self.get(path).render(values, temp_path)
+        os.replace(temp_path, output_path)
+        return output_path
+
+    def invalidate(self, path: Optional[str] = None):
+        """キャッシュを破棄（path 省略時はすべて）"""
+        with self._lock:
+            if path is None:
+                self._templates.clear()
+            else:
+                self._templates.pop(os.path.abspath(path), None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """キャッシュの状況"""
+        with self._lock:
+            return {
+                "templates": len(self._templates),
+                "max_templates": self.max_templates,
+                "hits": self.hits,
+                "loads": self.loads,
+            }
+
+
+# プロセス内で共有するキャッシュ
+template_cache = TemplateCache()
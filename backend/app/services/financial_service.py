@@ -0,0 +1,129 @@
+"""
+財務関連のビジネスロジック
+"""
+
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.cache import SUMMARY_FINANCIALS, summary_cache
+from app.models.project import Application, ApplicationType, Financial, Project
+
+# 書類提出状況として集計するフラグ
+DOCUMENT_FLAGS = {
+    'permit_application': Financial.has_permit_application,
+    'inspection_schedule': Financial.has_inspection_schedule,
+    'foundation_plan': Financial.has_foundation_plan,
+    'hardware_plan': Financial.has_hardware_plan,
+    'invoice': Financial.has_invoice,
+    'energy_calculation': Financial.has_energy_calculation,
+    'settlement_data': Financial.has_settlement_data,
+}
+
+# サマリーのグループ化キー
+SUMMARY_GROUP_BY = ("month", "status", "application_type")
+
+
+class FinancialService:
+    """財務関連のサービスクラス"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_financial_summary(self, group_by: Optional[str] = None) -> Dict[str, Any]:
+        """
+        財務データのサマリー情報を集計クエリで取得
+
+        Args:
+            group_by: グループ化キー（month: 案件の入力月, status: 案件ステータス,
+                application_type: 申請種別）。指定時は groups に内訳を含める
+
+        Returns:
+            合計金額・書類提出状況などのサマリー
+        """
+        row = self.db.query(*self._aggregate_columns()).select_from(Financial).one()
+        summary = self._to_summary(row)
+
+        if group_by:
+            summary["group_by"] = group_by
+            summary["groups"] = self._get_grouped_summary(group_by)
+
+        return summary
+
+    def get_financial_summary_cached(self, group_by: Optional[str] = None) -> Dict[str, Any]:
+        """
+        財務サマリーを取得（キャッシュ付き）
+
+        財務情報・プロジェクト・申請の更新時に無効化される
+        """
+        return summary_cache.get_or_set(
+            (SUMMARY_FINANCIALS, group_by),
+            lambda: self.get_financial_summary(group_by=group_by)
+        )
+
+    def _aggregate_columns(self) -> list:
+        """SUM と COUNT(*) FILTER による集計カラム"""
+        columns = [
+            func.count(Financial.id).label("total_projects"),
+            func.coalesce(func.sum(Financial.contract_price), 0).label("total_contract"),
+            func.coalesce(func.sum(Financial.estimate_amount), 0).label("total_estimate"),
+            func.coalesce(func.sum(Financial.settlement_amount), 0).label("total_settlement"),
+        ]
+        columns.extend(
+            func.count().filter(flag.is_(True)).label(name)
+            for name, flag in DOCUMENT_FLAGS.items()
+        )
+        return columns
+
+    def _get_grouped_summary(self, group_by: str) -> List[Dict[str, Any]]:
+        """グループ別のサマリーを取得"""
+        if group_by not in SUMMARY_GROUP_BY:
+            raise ValueError(f"group_by は {', '.join(SUMMARY_GROUP_BY)} のいずれかである必要があります")
+
+        query = self.db.query(Financial)
+        if group_by == "month":
+            key = self._month_expression(Project.input_date)
+            query = query.join(Project, Project.id == Financial.project_id)
+        elif group_by == "status":
+            key = Project.status
+            query = query.join(Project, Project.id == Financial.project_id)
+        else:
+            # 同じ種別の申請が複数あっても金額を二重に数えないよう (プロジェクト, 種別) で重複除去
+            project_types = self.db.query(
+                Application.project_id, Application.application_type_id
+            ).distinct().subquery()
+            key = ApplicationType.name
+            query = query.join(
+                project_types, project_types.c.project_id == Financial.project_id
+            ).join(ApplicationType, ApplicationType.id == project_types.c.application_type_id)
+
+        rows = query.with_entities(
+            key.label("key"), *self._aggregate_columns()
+        ).group_by(key).order_by(key).all()
+
+        return [{"key": row.key, **self._to_summary(row)} for row in rows]
+
+    def _month_expression(self, column):
+        """日付カラムを YYYY-MM 形式の文字列にする式"""
+        if self.db.get_bind().dialect.name == "postgresql":
+            return func.to_char(column, "YYYY-MM")
+        return func.strftime("%Y-%m", column)
+
+    @staticmethod
+    def _to_summary(row) -> Dict[str, Any]:
+        """集計結果の行をレスポンス形式に変換"""
+        total_contract = Decimal(row.total_contract or 0)
+        total_settlement = Decimal(row.total_settlement or 0)
+
+        return {
+            "total_projects": row.total_projects,
+            "total_contract_amount": total_contract,
+            "total_estimate_amount": Decimal(row.total_estimate or 0),
+            "total_settlement_amount": total_settlement,
+            "pending_settlement_amount": total_contract - total_settlement,
+            "document_submission_stats": {
+                name: getattr(row, name) or 0 for name in DOCUMENT_FLAGS
+            },
+        }
@@ -4,9 +4,12 @@ Google Forms 連携サービス
 """
 
 from typing import List, Optional, Dict, Any
+from sqlalchemy import func
 from sqlalchemy.orm import Session
+from app.core.cache import SUMMARY_GOOGLE_FORMS, invalidate_summaries, summary_cache
 from app.models.google_forms import ApplicationFormTemplate, FormSubmission
-from app.services.email_service import EmailService
+from app.services.email_queue import EmailQueue, email_worker
+from app.services.email_service import get_email_service
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,7 +17,8 @@ logger = logging.getLogger(__name__)
 class GoogleFormsService:
     def __init__(self, db: Session):
         self.db = db
-        self.email_service = EmailService()
+        # SMTP接続プールを共有するためグローバルインスタンスを使う
+        self.email_service = get_email_service()
     
     def get_form_templates(
         self, 
@@ -76,7 +80,10 @@ class GoogleFormsService:
         custom_message: Optional[str] = None
     ) -> Dict[str, Any]:
         """
-        申請フォームをメールで送信
+        申請フォームのメールを送信キューに登録
+        
+        送信はバックグラウンドのワーカーが行い、結果は FormSubmission.status
+        （queued → sent / failed）に反映される。進捗は get_batch_status で確認できる
         
         Args:
             project_id: プロジェクトID
@@ -85,15 +92,8 @@ class GoogleFormsService:
             custom_message: カスタムメッセージ（任意）
             
         Returns:
-            送信結果の詳細
+            バッチIDと登録したフォーム送信履歴
         """
-        results = {
-            "success": [],
-            "failed": [],
-            "total_sent": 0,
-            "total_failed": 0
-        }
-        
         # フォームテンプレートを取得
         templates = self.db.query(ApplicationFormTemplate).filter(
             ApplicationFormTemplate.id.in_(form_template_ids),
@@ -102,68 +102,73 @@ class GoogleFormsService:
         
         if not templates:
             logger.warning(f"No active form templates found for IDs: {form_template_ids}")
-            return results
+            return {"batch_id": None, "total_queued": 0, "queued": []}
         
+        submissions = []
         for template in templates:
+            # 本文はテンプレートごとに同じなので1回だけ組み立てる
+            subject = f"【申請書類】{template.form_name} - プロジェクト#{project_id}"
+            body = self._build_email_body(template, project_id, custom_message)
+            
             for email in recipient_emails:
-                try:
-                    # メール内容を構築
-                    subject = f"【申請書類】{template.form_name} - プロジェクト#{project_id}"
-                    
-                    body = self._build_email_body(template, project_id, custom_message)
-                    
-                    # メール送信
-                    success = self.email_service.send_email(
-                        to_email=email,
-                        subject=subject,
-                        body=body,
-                        is_html=True
-                    )
-                    
-                    # 送信履歴を記録
-                    submission = FormSubmission(
-                        project_id=project_id,
-                        form_template_id=template.id,
-                        recipient_email=email,
-                        status="sent" if success else "failed",
-                        email_subject=subject,
-                        email_body=body
-                    )
-                    
-                    self.db.add(submission)
-                    
-                    if success:
-                        results["success"].append({
-                            "template_id": template.id,
-                            "template_name": template.form_name,
-                            "email": email
-                        })
-                        results["total_sent"] += 1
-                        logger.info(f"Form sent successfully: {template.form_name} to {email}")
-                    else:
-                        results["failed"].append({
-                            "template_id": template.id,
-                            "template_name": template.form_name,
-                            "email": email,
-                            "error": "Email delivery failed"
-                        })
-                        results["total_failed"] += 1
-                        logger.error(f"Failed to send form: {template.form_name} to {email}")
-                        
-                except Exception as e:
-                    logger.error(f"Error sending form {template.form_name} to {email}: {str(e)}")
-                    results["failed"].append({
-                        "template_id": template.id,
-                        "template_name": template.form_name,
-                        "email": email,
-                        "error": str(e)
-                    })
-                    results["total_failed"] += 1
+                submission = FormSubmission(
+                    project_id=project_id,
+                    form_template_id=template.id,
+                    recipient_email=email,
+                    status="queued",
+                    email_subject=subject,
+                    email_body=body
+                )
+                self.db.add(submission)
+                submissions.append((template, submission))
         
-        # データベースに変更をコミット
-        self.db.commit()
+        try:
+            # 送信履歴のIDをジョブに紐付けてから、履歴とジョブを同じトランザクションで登録
+            self.db.flush()
+            batch_id = EmailQueue(self.db).enqueue(
+                {
+                    "to_email": submission.recipient_email,
+                    "subject": submission.email_subject,
+                    "body": submission.email_body,
+                    "is_html": True,
+                    "form_submission_id": submission.id
+                }
+                for _, submission in submissions
+            )
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
         
-        return results
+        invalidate_summaries(SUMMARY_GOOGLE_FORMS)
+        email_worker.wake()
+        logger.info(f"Queued {len(submissions)} form emails (batch {batch_id})")
+        
+        return {
+            "batch_id": batch_id,
+            "total_queued": len(submissions),
+            "queued": [
+                {
+                    "submission_id": submission.id,
+                    "template_id": template.id,
+                    "template_name": template.form_name,
+                    "email": submission.recipient_email
+                }
+                for template, submission in submissions
+            ]
+        }
+    
+    def get_batch_status(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """
+        フォーム送信バッチの進捗を取得
+        
+        Args:
+            batch_id: send_application_forms が返したバッチID
+            
+        Returns:
+            ステータス別件数と失敗の一覧。バッチがない場合は None
+        """
+        return EmailQueue(self.db).get_batch_status(batch_id)
     
     def _build_email_body(
         self, 
@@ -285,6 +290,7 @@ class GoogleFormsService:
                 submission.response_received_at = submission.sent_at  # 現在時刻を設定
             
             self.db.commit()
+            invalidate_summaries(SUMMARY_GOOGLE_FORMS)
             logger.info(f"Submission status updated: {submission_id} -> {status}")
             return True
             
@@ -293,6 +299,43 @@ class GoogleFormsService:
             self.db.rollback()
             return False
     
+    def get_stats_summary(self) -> Dict[str, Any]:
+        """
+        フォーム送信統計サマリーを取得（キャッシュ付き）
+        
+        送信・ステータス更新時に無効化される
+        
+        Returns:
+            総送信数、ステータス別・申請種別別の件数、回答率
+        """
+        return summary_cache.get_or_set((SUMMARY_GOOGLE_FORMS,), self._compute_stats_summary)
+    
+    def _compute_stats_summary(self) -> Dict[str, Any]:
+        """フォーム送信統計を集計"""
+        # ステータス別集計
+        status_stats = self.db.query(
+            FormSubmission.status,
+            func.count(FormSubmission.id)
+        ).group_by(FormSubmission.status).all()
+        
+        # 申請種別別集計
+        type_stats = self.db.query(
+            ApplicationFormTemplate.application_type,
+            func.count(FormSubmission.id)
+        ).join(FormSubmission.form_template).group_by(
+            ApplicationFormTemplate.application_type
+        ).all()
+        
+        status_breakdown = {status: count for status, count in status_stats}
+        total_submissions = sum(status_breakdown.values())
+        
+        return {
+            "total_submissions": total_submissions,
+            "status_breakdown": status_breakdown,
+            "type_breakdown": {application_type: count for application_type, count in type_stats},
+            "success_rate": status_breakdown.get("submitted", 0) / max(total_submissions, 1) * 100
+        }
+    
     def create_form_template(
         self,
         application_type: str,
@@ -0,0 +1,438 @@
+"""
+郵便番号のローカル辞書
+日本郵便の KEN_ALL.CSV から作成したコンパクトな索引ファイルを読み込み、
+ネットワークを使わずに郵便番号から住所を引く
+"""
+
+import array
+import csv
+import io
+import logging
+import os
+import re
+import struct
+import sys
+import threading
+import zipfile
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+from app.utils.text_normalizer import normalize_address_text
+
+logger = logging.getLogger(__name__)
+
+# 索引ファイルの形式
+# ヘッダ: マジック, レコード数, 文字列数
+# 本体: 郵便番号（昇順, uint32）, レコードごとの (都道府県, 市区町村, 町域) 文字列ID（uint32 × 3）,
+#       文字列の開始位置（uint32 × 文字列数+1）, UTF-8 文字列の連結
+_MAGIC = b"PCIDX\x01"
+_HEADER = struct.Struct("<6sII")
+
+# KEN_ALL.CSV の列
+_COL_POSTAL_CODE = 2
+_COL_PREFECTURE = 6
+_COL_CITY = 7
+_COL_TOWN = 8
+
+# 町域として扱わない表記
+_NO_TOWN = ("以下に掲載がない場合",)
+_NO_TOWN_SUFFIX = ("の次に番地がくる場合",)
+_PARENTHESES = re.compile(r"（.*）")
+
+AddressRecord = Tuple[str, str, str, str]  # (郵便番号, 都道府県, 市区町村, 町域)
+
+
+def _to_little_endian(values: array.array) -> bytes:
+    if sys.byteorder == "big":
+        values = array.array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_little_endian(data: bytes) -> array.array:
+    values = array.array("I")
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def _clean_town(town: str) -> str:
+    """町域名から括弧書きや「以下に掲載がない場合」などの注記を除く"""
+    if town in _NO_TOWN or town.endswith(_NO_TOWN_SUFFIX):
+        return ""
+    if town.endswith("一円") and town != "一円":
+        return ""
+    return _PARENTHESES.sub("", town)
+
+
+def parse_ken_all(lines: Iterable[str]) -> Iterator[AddressRecord]:
+    """
+    KEN_ALL.CSV の行を (郵便番号, 都道府県, 市区町村, 町域) に変換
+
+    複数行に分割された町域（括弧が閉じていない行）は結合し、
+    注記を除いた結果が重複するレコードは1件にまとめる
+    """
+    pending: Optional[List[str]] = None
+    seen = set()
+
+    def emit(code: str, prefecture: str, city: str, town: str) -> Optional[AddressRecord]:
+        record = (code, prefecture, city, _clean_town(town))
+        if record in seen:
+            return None
+        seen.add(record)
+        return record
+
+    for row in csv.reader(lines):
+        if len(row) <= _COL_TOWN:
+            continue
+        code, prefecture, city, town = (
+            row[_COL_POSTAL_CODE], row[_COL_PREFECTURE], row[_COL_CITY], row[_COL_TOWN]
+        )
+
+        if pending is not None:
+            if code == pending[0]:
+                pending[3] += town
+                if "）" not in town:
+                    continue
+                record = emit(*pending)
+                pending = None
+                if record:
+                    yield record
+                continue
+            # 括弧が閉じないまま次の郵便番号に進んだ場合はそのまま出力
+            record = emit(*pending)
+            pending = None
+            if record:
+                yield record
+
+        if "（" in town and "）" not in town:
+            pending = [code, prefecture, city, town]
+            continue
+
+        record = emit(code, prefecture, city, town)
+        if record:
+            yield record
+
+    if pending is not None:
+        record = emit(*pending)
+        if record:
+            yield record
+
+
+def read_ken_all(path: str) -> Iterator[AddressRecord]:
+    """KEN_ALL.CSV（Shift_JIS）または ken_all.zip を読み込む"""
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            name = next(n for n in archive.namelist() if n.upper().endswith(".CSV"))
+            with archive.open(name) as raw:
+                yield from parse_ken_all(io.TextIOWrapper(raw, encoding="cp932", newline=""))
+    else:
+        with open(path, encoding="cp932", newline="") as f:
+            yield from parse_ken_all(f)
+
+
+def write_index(records: Iterable[AddressRecord], path: str) -> int:
+    """
+    住所レコードから索引ファイルを作成
+
+    Args:
+        records: (郵便番号, 都道府県, 市区町村, 町域) のイテラブル
+        path: 出力先
+
+    Returns:
+        書き込んだレコード数
+    """
+    strings: Dict[str, int] = {}
+
+    def string_id(value: str) -> int:
+        if value not in strings:
+            strings[value] = len(strings)
+        return strings[value]
+
+    # 同じ郵便番号の中では元の並び順を保つ
+    rows = sorted(
+        (
+            (int(code), string_id(prefecture), string_id(city), string_id(town))
+            for code, prefecture, city, town in records
+            if code.isdigit()
+        ),
+        key=lambda row: row[0]
+    )
+
+    codes = array.array("I", (row[0] for row in rows))
+    fields = array.array("I")
+    for _, prefecture, city, town in rows:
+        fields.extend((prefecture, city, town))
+
+    blob = bytearray()
+    offsets = array.array("I", [0])
+    for value in strings:  # 挿入順 = ID順
+        blob.extend(value.encode("utf-8"))
+        offsets.append(len(blob))
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, len(codes), len(strings)))
+        f.write(_to_little_endian(codes))
+        f.write(_to_little_endian(fields))
+        f.write(_to_little_endian(offsets))
+        f.write(bytes(blob))
+    os.replace(temp_path, path)
+    return len(codes)
+
+
+class PostalCodeIndex:
+    """
+    郵便番号 → 住所の配列ベースの索引
+
+    郵便番号を昇順の uint32 配列で持ち、二分探索で引く。
+    住所文字列は重複を除いた文字列表に1つずつ持つ
+    """
+
+    def __init__(self, codes: array.array, fields: array.array, offsets: array.array, blob: bytes):
+        self._codes = codes
+        self._fields = fields
+        self._offsets = offsets
+        self._blob = blob
+
+    @classmethod
+    def load(cls, path: str) -> "PostalCodeIndex":
+        """索引ファイルを読み込む"""
+        with open(path, "rb") as f:
+            data = f.read()
+
+        magic, count, string_count = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError(f"郵便番号索引ファイルの形式が不正です: {path}")
+
+        position = _HEADER.size
+        sections = []
+        for length in (count, count * 3, string_count + 1):
+            end = position + length * 4
+            sections.append(_from_little_endian(data[position:end]))
+            position = end
+
+        return cls(*sections, blob=data[position:])
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def string(self, string_id: int) -> str:
+        """文字列IDから文字列を取得"""
+        return self._blob[self._offsets[string_id]:self._offsets[string_id + 1]].decode("utf-8")
+
+    def record(self, position: int) -> AddressRecord:
+        """位置からレコードを取得"""
+        base = position * 3
+        return (
+            f"{self._codes[position]:07d}",
+            self.string(self._fields[base]),
+            self.string(self._fields[base + 1]),
+            self.string(self._fields[base + 2]),
+        )
+
+    def records(self) -> Iterator[AddressRecord]:
+        """全レコードを郵便番号順に返す"""
+        for position in range(len(self._codes)):
+            yield self.record(position)
+
+    def lookup_all(self, postal_code: str) -> List[AddressRecord]:
+        """郵便番号（ハイフンなし7桁）に該当するレコードをすべて返す"""
+        if len(postal_code) != 7 or not postal_code.isdigit():
+            return []
+
+        code = int(postal_code)
+        position = bisect_left(self._codes, code)
+        results = []
+        while position < len(self._codes) and self._codes[position] == code:
+            results.append(self.record(position))
+            position += 1
+        return results
+
+    def lookup(self, postal_code: str) -> Optional[AddressRecord]:
+        """郵便番号に該当する最初のレコードを返す"""
+        if len(postal_code) != 7 or not postal_code.isdigit():
+            return None
+
+        code = int(postal_code)
+        position = bisect_left(self._codes, code)
+        if position < len(self._codes) and self._codes[position] == code:
+            return self.record(position)
+        return None
+
+
+class AddressSearchIndex:
+    """
+    住所 → 郵便番号の逆引き索引
+
+    都道府県＋市区町村＋町域を normalize_address_text で正規化した文字列について、
+    文字バイグラムの転置索引を持つ。
+    - 完全一致: クエリのバイグラムをすべて含む候補を絞り込み、部分文字列として照合
+    - あいまい一致: 共通するバイグラムの割合が FUZZY_THRESHOLD 以上のもの
+    """
+
+    # あいまい一致とみなす共通バイグラムの割合
+    FUZZY_THRESHOLD = 0.6
+
+    def __init__(self, index: PostalCodeIndex):
+        self._index = index
+        self._documents: List[str] = []
+        self._postings: Dict[str, array.array] = {}
+
+        normalized_cache: Dict[int, str] = {}
+
+        def normalized(string_id: int) -> str:
+            if string_id not in normalized_cache:
+                normalized_cache[string_id] = normalize_address_text(index.string(string_id))
+            return normalized_cache[string_id]
+
+        postings: Dict[str, List[int]] = {}
+        for position in range(len(index)):
+            base = position * 3
+            document = "".join(normalized(index._fields[base + offset]) for offset in range(3))
+            self._documents.append(document)
+            for gram in set(self._bigrams(document)):
+                postings.setdefault(gram, []).append(position)
+
+        # 位置のリストは昇順なので配列に詰めてメモリを節約する
+        self._postings = {gram: array.array("I", positions) for gram, positions in postings.items()}
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    @staticmethod
+    def _bigrams(text: str) -> List[str]:
+        return [text[i:i + 2] for i in range(len(text) - 1)]
+
+    def search(self, address: str, limit: int = 10) -> List[AddressRecord]:
+        """
+        住所（部分・表記ゆれを含む）から郵便番号を検索
+
+        Args:
+            address: 住所の一部（例: "渋谷区神南", "霞が関3丁目"）
+            limit: 取得件数の上限
+
+        Returns:
+            (郵便番号, 都道府県, 市区町村, 町域) のリスト（一致度順）
+        """
+        query = normalize_address_text(address)
+        grams = list(dict.fromkeys(self._bigrams(query)))
+        if not grams:
+            return []
+
+        postings = [self._postings.get(gram) for gram in grams]
+        candidates: List[Tuple[tuple, int]] = []
+
+        # 完全一致（すべてのバイグラムを含み、部分文字列として一致）
+        if all(p is not None for p in postings):
+            rarest, *others = sorted(postings, key=len)
+            matched = set(rarest)
+            for positions in others:
+                matched.intersection_update(positions)
+                if not matched:
+                    break
+            for position in matched:
+                document = self._documents[position]
+                offset = document.find(query)
+                if offset >= 0:
+                    # 町域まで一致する短い住所・後方一致を優先
+                    rank = (0, len(document) - offset - len(query), len(document), position)
+                    candidates.append((rank, position))
+
+        # 足りなければあいまい一致で補う
+        if len(candidates) < limit:
+            exact = {position for _, position in candidates}
+            counts = Counter()
+            for positions in postings:
+                if positions is not None:
+                    counts.update(positions)
+
+            required = max(1, int(len(grams) * self.FUZZY_THRESHOLD + 0.5))
+            for position, count in counts.items():
+                if count >= required and position not in exact:
+                    rank = (1, -count / len(grams), len(self._documents[position]), position)
+                    candidates.append((rank, position))
+
+        candidates.sort()
+        results = []
+        seen = set()
+        for _, position in candidates:
+            record = self._index.record(position)
+            if record in seen:
+                continue
+            seen.add(record)
+            results.append(record)
+            if len(results) >= limit:
+                break
+        return results
+
+
+_index: Optional[PostalCodeIndex] = None
+_index_loaded = False
+_index_lock = threading.Lock()
+_address_index: Optional[AddressSearchIndex] = None
+
+
+def get_postal_code_index() -> Optional[PostalCodeIndex]:
+    """
+    ローカル索引を取得（初回のみファイルから読み込む）
+
+    Returns:
+        索引。ファイルがない場合は None
+    """
+    global _index, _index_loaded
+    if _index_loaded:
+        return _index
+
+    with _index_lock:
+        if not _index_loaded:
+            path = settings.POSTAL_CODE_INDEX_PATH
+            if os.path.exists(path):
+                try:
+                    _index = PostalCodeIndex.load(path)
+                    logger.info(f"郵便番号索引を読み込みました: {len(_index)}件")
+                except Exception as e:
+                    logger.error(f"郵便番号索引の読み込みに失敗しました: {e}")
+            else:
+                logger.warning(
+                    f"郵便番号索引がありません（{path}）。scripts/import_ken_all.py で作成してください"
+                )
+            _index_loaded = True
+    return _index
+
+
+def get_address_search_index() -> Optional[AddressSearchIndex]:
+    """
+    逆引き索引を取得（初回のみ郵便番号索引から構築する）
+
+    Returns:
+        逆引き索引。郵便番号索引がない場合は None
+    """
+    global _address_index
+    if _address_index is not None:
+        return _address_index
+
+    index = get_postal_code_index()
+    if index is None:
+        return None
+
+    with _index_lock:
+        if _address_index is None:
+            _address_index = AddressSearchIndex(index)
+            logger.info(f"住所の逆引き索引を構築しました: {len(_address_index)}件")
+    return _address_index
+
+
+def reload_postal_code_index() -> Optional[PostalCodeIndex]:
+    """索引ファイルを読み込み直す（インポート後に使用）"""
+    global _index, _index_loaded, _address_index
+    with _index_lock:
+        # ファイルがなくなった場合に古い索引を返し続けないよう破棄する
+        _index = None
+        _index_loaded = False
+        _address_index = None
+    return get_postal_code_index()
@@ -8,6 +8,9 @@ from typing import Optional, Dict, Any
 import re
 from functools import lru_cache
 
+from app.core.config import settings
+from app.services.postal_code_index import get_address_search_index, get_postal_code_index
+
 
 class PostalCodeService:
     """郵便番号から住所を取得するサービス"""
@@ -49,11 +52,45 @@ class PostalCodeService:
         return len(normalized) == 7 and normalized.isdigit()
     
     @staticmethod
-    @lru_cache(maxsize=1000)
+    def get_address_from_index(postal_code: str) -> Optional[Dict[str, str]]:
+        """
+        ローカルの郵便番号索引から住所情報を取得（ネットワークを使わない）
+        
+        Args:
+            postal_code: 郵便番号（7桁）
+            
+        Returns:
+            住所情報のディクショナリ。索引がない・該当なしの場合は None
+        """
+        normalized_code = PostalCodeService.normalize_postal_code(postal_code)
+        if not PostalCodeService.validate_postal_code(normalized_code):
+            return None
+        
+        index = get_postal_code_index()
+        if index is None:
+            return None
+        
+        record = index.lookup(normalized_code)
+        if record is None:
+            return None
+        
+        _, prefecture, city, town = record
+        return {
+            "prefecture": prefecture,
+            "city": city,
+            "town": town,
+            "full_address": f"{prefecture}{city}{town}"
+        }
+    
+    @staticmethod
     def get_address_by_postal_code(postal_code: str) -> Optional[Dict[str, str]]:
         """
         郵便番号から住所情報を取得
         
+        ローカル索引を優先し、見つからない場合のみ（POSTAL_CODE_REMOTE_FALLBACK 有効時）
+        zipcloud API を参照する。API 呼び出しはブロッキングのため、
+        非同期エンドポイントからはスレッドプールで呼び出すこと
+        
         Args:
             postal_code: 郵便番号（7桁）
             
@@ -71,6 +108,16 @@ class PostalCodeService:
         if not PostalCodeService.validate_postal_code(normalized_code):
             return None
         
+        address = PostalCodeService.get_address_from_index(normalized_code)
+        if address is not None or not settings.POSTAL_CODE_REMOTE_FALLBACK:
+            return address
+        
+        return PostalCodeService._fetch_from_zipcloud(normalized_code)
+    
+    @staticmethod
+    @lru_cache(maxsize=1000)
+    def _fetch_from_zipcloud(normalized_code: str) -> Optional[Dict[str, str]]:
+        """zipcloud API から住所情報を取得（ローカル索引にない場合のフォールバック）"""
         try:
             # zipcloud APIにリクエスト
             response = requests.get(
@@ -130,22 +177,30 @@ class PostalCodeService:
         """
         住所から郵便番号を検索（逆引き）
         
-        注意: この機能は実装コストが高いため、必要に応じて後で実装
-        現在はプレースホルダー
+        ローカル索引から構築した逆引き索引を使う。部分一致・あいまい一致に対応し、
+        「ヶ/ケ/が」などの表記ゆれや丁目以降の番地は正規化してから照合する
         
         Args:
-            address: 住所
+            address: 住所（一部でも可）
             limit: 取得件数の上限
             
         Returns:
-            郵便番号のリスト
+            郵便番号と住所のリスト（一致度順）。索引がない場合は空リスト
         """
-        # TODO: 逆引き検索の実装
-        # 実装例：
-        # - 住所データベースの構築
-        # - 部分一致検索の実装
-        # - あいまい検索の実装
-        return []
+        index = get_address_search_index()
+        if index is None:
+            return []
+        
+        return [
+            {
+                "postal_code": PostalCodeService.format_postal_code(code),
+                "prefecture": prefecture,
+                "city": city,
+                "town": town,
+                "full_address": f"{prefecture}{city}{town}"
+            }
+            for code, prefecture, city, town in index.search(address, limit)
+        ]
 
 
 class CustomerSearchService:
@@ -166,17 +221,20 @@ class CustomerSearchService:
             マッチした顧客のリスト
         """
         from app.models.project import Customer
+        from app.services.search_service import ProjectSearchService, order_by_ids
         
         if not query or len(query) < 2:
             return []
         
-        search_pattern = f"%{query}%"
+        # 正規化済み検索インデックスから関連度順に顧客IDを取得
+        customer_ids = ProjectSearchService(self.db).search_customer_ids(query, limit)
+        if not customer_ids:
+            return []
         
-        customers = self.db.query(Customer).filter(
-            (Customer.owner_name.ilike(search_pattern)) |
-            (Customer.owner_kana.ilike(search_pattern)) |
-            (Customer.client_name.ilike(search_pattern))
-        ).limit(limit).all()
+        customers = order_by_ids(
+            self.db.query(Customer).filter(Customer.id.in_(customer_ids)).all(),
+            customer_ids
+        )
         
         return [
             {
@@ -2,12 +2,20 @@
 プロジェクト関連のビジネスロジック
 """
 
-from typing import List, Optional
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, insert, update
 from datetime import datetime, date
 import uuid
 
+from app.core.cache import (
+    SUMMARY_APPLICATIONS, SUMMARY_FINANCIALS, SUMMARY_PROJECTS,
+    count_cache, invalidate_summaries, summary_cache
+)
+from app.core.config import settings
+
 from app.models.project import (
     Project, Customer, Site, Building, 
     Application, Financial, Schedule, AuditTrail
@@ -17,6 +25,9 @@ from app.schemas.project import (
     SiteUpdate, BuildingUpdate, FinancialCreate, 
     FinancialUpdate, ScheduleCreate, ScheduleUpdate
 )
+from app.services.audit_service import AuditTrailBuffer
+from app.services.search_service import ProjectSearchService, order_by_ids
+from app.utils.pagination import fetch_keyset_page, fetch_keyset_page_with_cursor
 
 
 class ProjectService:
@@ -24,6 +35,7 @@ class ProjectService:
     
     def __init__(self, db: Session):
         self.db = db
+        self.audit = AuditTrailBuffer(db)
 
     def get_projects(
         self, 
@@ -51,7 +63,40 @@ class ProjectService:
         if status:
             query = query.filter(Project.status == status)
             
-        return query.order_by(Project.updated_at.desc()).offset(skip).limit(limit).all()
+        return fetch_keyset_page(query, Project.updated_at, Project.id, limit, skip=skip)
+
+    def get_projects_page(
+        self,
+        limit: int = 100,
+        status: Optional[str] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Project], Optional[str]]:
+        """
+        プロジェクト一覧をカーソル（キーセット）方式で取得
+        
+        OFFSET を使わないため、深いページでも1ページ目と同じコストで取得できる
+        
+        Args:
+            limit: 取得する件数
+            status: フィルタ用ステータス
+            cursor: 直前ページの next_cursor（先頭ページは None）
+            
+        Returns:
+            (プロジェクトのリスト, 次ページのカーソル or None)
+            
+        Raises:
+            ValueError: カーソルの形式が不正な場合
+        """
+        query = self.db.query(Project).options(
+            joinedload(Project.customer),
+            joinedload(Project.site),
+            joinedload(Project.building),
+        )
+        
+        if status:
+            query = query.filter(Project.status == status)
+        
+        return fetch_keyset_page_with_cursor(query, Project.updated_at, Project.id, limit, cursor=cursor)
 
     def get_projects_count(self, status: Optional[str] = None) -> int:
         """
@@ -70,6 +115,23 @@ class ProjectService:
             
         return query.scalar()
 
+    def get_projects_count_cached(self, status: Optional[str] = None) -> int:
+        """
+        プロジェクトの総数を取得（短時間キャッシュ付き）
+        
+        カーソルモードではページごとの COUNT(*) を避けるためこちらを使用する
+        
+        Args:
+            status: フィルタ用ステータス
+            
+        Returns:
+            プロジェクトの総数（最大 PAGINATION_COUNT_CACHE_TTL 秒古い値）
+        """
+        return count_cache.get_or_set(
+            ("projects", status),
+            lambda: self.get_projects_count(status=status)
+        )
+
     def get_project_by_code(self, project_code: str) -> Optional[Project]:
         """
         プロジェクトコードでプロジェクトを取得
@@ -108,6 +170,63 @@ class ProjectService:
             joinedload(Project.schedule),
         ).filter(Project.id == project_id).first()
 
+    def get_projects_by_ids(self, project_ids: List[int]) -> List[Project]:
+        """
+        複数のプロジェクトを1クエリで取得
+        
+        Args:
+            project_ids: プロジェクトIDのリスト
+            
+        Returns:
+            プロジェクトのリスト（project_ids の順）
+        """
+        if not project_ids:
+            return []
+        
+        projects = self.db.query(Project).options(
+            joinedload(Project.customer),
+            joinedload(Project.site),
+            joinedload(Project.building),
+        ).filter(Project.id.in_(project_ids)).all()
+        return order_by_ids(projects, project_ids)
+
+    def get_project_ids(
+        self,
+        status: Optional[str] = None,
+        search: Optional[str] = None,
+        project_ids: Optional[List[int]] = None,
+        limit: Optional[int] = None
+    ) -> List[int]:
+        """
+        条件に合うプロジェクトIDだけを取得（書類の一括作成など、行全体が不要な処理用）
+        
+        Args:
+            status: フィルタ用ステータス
+            search: 検索クエリ（search_projects と同じ検索。SEARCH_RESULT_LIMIT 件まで）
+            project_ids: 対象を限定するプロジェクトID
+            limit: 取得する件数
+            
+        Returns:
+            プロジェクトIDのリスト（検索時は関連度順、それ以外は一覧と同じ更新日時の新しい順）
+        """
+        query = self.db.query(Project.id)
+        if status:
+            query = query.filter(Project.status == status)
+        if project_ids is not None:
+            query = query.filter(Project.id.in_(project_ids))
+        
+        if search:
+            matched_ids = ProjectSearchService(self.db).search_project_ids(search, limit)
+            if not matched_ids:
+                return []
+            found = {row.id for row in query.filter(Project.id.in_(matched_ids)).all()}
+            return [project_id for project_id in matched_ids if project_id in found][:limit]
+        
+        query = query.order_by(Project.updated_at.desc().nullslast(), Project.id.desc())
+        if limit is not None:
+            query = query.limit(limit)
+        return [row.id for row in query.all()]
+
     def get_projects_by_status(self, status: str) -> List[Project]:
         """
         指定されたステータスのプロジェクト一覧を取得
@@ -149,26 +268,28 @@ class ProjectService:
             "total_projects": sum(count for _, count in status_counts),
         }
 
-    def search_projects(self, query: str) -> List[Project]:
+    def search_projects(self, query: str, limit: Optional[int] = None) -> List[Project]:
         """
         プロジェクトを検索
         
         Args:
             query: 検索クエリ（プロジェクト名、施主名、プロジェクトコード）
+            limit: 取得件数の上限（SEARCH_RESULT_LIMIT を超えない）
             
         Returns:
-            マッチしたプロジェクトのリスト
+            マッチしたプロジェクトのリスト（関連度順）
         """
-        search_pattern = f"%{query}%"
+        limit = min(limit or settings.SEARCH_RESULT_LIMIT, settings.SEARCH_RESULT_LIMIT)
+        project_ids = ProjectSearchService(self.db).search_project_ids(query, limit)
+        if not project_ids:
+            return []
         
-        return self.db.query(Project).options(
+        projects = self.db.query(Project).options(
             joinedload(Project.customer),
             joinedload(Project.site),
-        ).join(Customer).filter(
-            (Project.project_name.ilike(search_pattern)) |
-            (Project.project_code.ilike(search_pattern)) |
-            (Customer.owner_name.ilike(search_pattern))
-        ).order_by(Project.updated_at.desc()).all()
+        ).filter(Project.id.in_(project_ids)).all()
+        
+        return order_by_ids(projects, project_ids)
 
     def generate_project_code(self) -> str:
         """
@@ -247,9 +368,10 @@ class ProjectService:
             self.db.add(db_financial)
             self.db.add(db_schedule)
 
-            self.db.commit()
-            self.db.refresh(db_project)
-            
+            # 検索インデックスを作成（顧客IDを確定させるためflush）
+            self.db.flush()
+            ProjectSearchService(self.db).index_project(db_project, db_customer)
+
             # 監査証跡記録
             self._record_audit_trail(
                 target_model="Project",
@@ -258,11 +380,15 @@ class ProjectService:
                 field_name="project_name",
                 new_value=db_project.project_name
             )
+
+            self.audit.commit()
+            self._invalidate_caches()
+            self.db.refresh(db_project)
             
             return self.get_project_by_id(db_project.id)
             
         except Exception as e:
-            self.db.rollback()
+            self.audit.rollback()
             raise e
 
     def update_project(self, project_id: int, project_data: ProjectUpdate) -> Optional[Project]:
@@ -313,7 +439,10 @@ class ProjectService:
                     )
                     self.db.add(db_building)
 
+            ProjectSearchService(self.db).index_project(db_project)
+
             self.db.commit()
+            self._invalidate_caches()
             self.db.refresh(db_project)
             
             return self.get_project_by_id(project_id)
@@ -352,6 +481,7 @@ class ProjectService:
                     setattr(db_financial, field, value)
 
             self.db.commit()
+            invalidate_summaries(SUMMARY_FINANCIALS)
             self.db.refresh(db_financial)
             
             return db_financial
@@ -422,14 +552,17 @@ class ProjectService:
                 old_value=db_project.project_name
             )
 
+            ProjectSearchService(self.db).remove_project(project_id)
+
             # 関連データも一緒に削除される（CASCADE設定による）
             self.db.delete(db_project)
-            self.db.commit()
+            self.audit.commit()
+            self._invalidate_caches()
             
             return True
             
         except Exception as e:
-            self.db.rollback()
+            self.audit.rollback()
             raise e
     
     def _record_audit_trail(
@@ -442,17 +575,21 @@ class ProjectService:
         new_value: str = ""
     ):
         """監査証跡を記録"""
-        audit_trail = AuditTrail(
+        self.audit.add(
             target_model=target_model,
             target_id=target_id,
+            action=action,
             field_name=field_name,
             old_value=old_value,
-            new_value=new_value,
-            action=action
+            new_value=new_value
         )
-        
-        self.db.add(audit_trail)
-        # コミットは呼び出し元で行う
+        # 書き込みは self.audit.commit() でまとめて行う
+
+    def _invalidate_caches(self):
+        """プロジェクトの変更で古くなる件数・サマリーのキャッシュを破棄"""
+        count_cache.invalidate_prefix("projects")
+        count_cache.invalidate_prefix("applications")
+        invalidate_summaries(SUMMARY_PROJECTS, SUMMARY_APPLICATIONS, SUMMARY_FINANCIALS)
     
     def update_project_with_audit(self, project_id: int, project_data: ProjectUpdate) -> Optional[Project]:
         """
@@ -494,13 +631,16 @@ class ProjectService:
             if project_data.building:
                 self._update_building_with_audit(project_id, project_data.building)
 
-            self.db.commit()
+            ProjectSearchService(self.db).index_project(db_project)
+
+            self.audit.commit()
+            self._invalidate_caches()
             self.db.refresh(db_project)
             
             return self.get_project_by_id(db_project.id)
             
         except Exception as e:
-            self.db.rollback()
+            self.audit.rollback()
             raise e
     
     def _update_customer_with_audit(self, project_id: int, customer_data: CustomerUpdate):
@@ -577,4 +717,335 @@ class ProjectService:
                         old_value=str(old_value) if old_value is not None else "",
                         new_value=str(value)
                     )
-                    setattr(db_building, field, value)
\ No newline at end of file
+                    setattr(db_building, field, value)
+
+    def bulk_update_projects(self, project_ids: List[int], project_data: ProjectUpdate) -> Dict[str, Any]:
+        """
+        複数プロジェクトを一括更新（監査証跡付き・セットベース）
+        
+        対象行を1クエリで取得してメモリ上で差分を取り、変更カラムの組み合わせごとに
+        UPDATE ... WHERE id IN (...) を1回だけ発行する。監査証跡はまとめて挿入し、
+        コミットは最後に1回だけ行う。
+        
+        更新全体を1つのセーブポイント内で実行し、いずれかの UPDATE が失敗した場合は
+        セーブポイントごと取り消して、失敗したグループのプロジェクトを failed に入れ、
+        残りのプロジェクトだけで更新をやり直す。failed のプロジェクトは
+        顧客・敷地・建物のどの変更も監査証跡も残らない。
+        
+        Args:
+            project_ids: 更新対象のプロジェクトIDのリスト
+            project_data: 全プロジェクトに適用する更新データ
+            
+        Returns:
+            {
+                "updated_ids": 更新に成功した（または変更不要だった）プロジェクトID,
+                "changed_ids": 実際に値が変更されたプロジェクトID,
+                "failed": [{"project_id": ID, "error": エラー内容}]
+            }
+        """
+        project_ids = list(dict.fromkeys(project_ids))
+        failed: Dict[int, str] = {}
+        changed_ids = set()
+
+        try:
+            existing_ids = {
+                project_id for (project_id,) in
+                self.db.query(Project.id).filter(Project.id.in_(project_ids))
+            }
+            for project_id in project_ids:
+                if project_id not in existing_ids:
+                    failed[project_id] = "プロジェクトが見つかりません"
+            target_ids = [project_id for project_id in project_ids if project_id in existing_ids]
+
+            targets = [
+                (Project, "Project", project_data.dict(
+                    exclude_unset=True, exclude={'customer', 'site', 'building'}
+                )),
+                (Customer, "Customer", project_data.customer.dict(exclude_unset=True) if project_data.customer else {}),
+                (Site, "Site", project_data.site.dict(exclude_unset=True) if project_data.site else {}),
+                (Building, "Building", project_data.building.dict(exclude_unset=True) if project_data.building else {}),
+            ]
+
+            remaining_ids = target_ids
+            while remaining_ids:
+                changed_ids, audit_rows = set(), []
+                try:
+                    with self.db.begin_nested():
+                        self._apply_bulk_targets(targets, remaining_ids, changed_ids, audit_rows)
+                except _BulkGroupError as e:
+                    for project_id in e.project_ids:
+                        failed.setdefault(project_id, e.error)
+                    remaining_ids = [project_id for project_id in remaining_ids if project_id not in failed]
+                    continue
+                self.audit.extend(audit_rows)
+                break
+
+            # 検索対象のフィールドが変わったプロジェクトのみ再索引
+            reindex_ids = [
+                project_id for project_id in target_ids
+                if project_id in changed_ids and project_id not in failed
+            ]
+            if reindex_ids and (project_data.project_name or project_data.customer):
+                ProjectSearchService(self.db).reindex_projects(reindex_ids)
+
+            # 監査証跡はまとめて書き込み、コミットは1回だけ
+            self.audit.commit()
+            self._invalidate_caches()
+
+        except Exception as e:
+            self.audit.rollback()
+            raise e
+
+        return {
+            "updated_ids": [project_id for project_id in target_ids if project_id not in failed],
+            "changed_ids": [project_id for project_id in target_ids if project_id in changed_ids and project_id not in failed],
+            "failed": [{"project_id": project_id, "error": error} for project_id, error in failed.items()],
+        }
+
+    def _diff_rows(self, model, values: dict, project_ids: List[int]) -> Dict[frozenset, List[tuple]]:
+        """
+        対象行を1クエリで取得し、変更されるカラムの組み合わせごとに分類
+        
+        Returns:
+            {変更カラムの集合: [(行ID, プロジェクトID, 変更前の値の辞書)]}
+        """
+        fields = list(values)
+        project_key = model.id if model is Project else model.project_id
+
+        rows = self.db.query(
+            model.id, project_key.label("project_key"), *[getattr(model, field) for field in fields]
+        ).filter(project_key.in_(project_ids))
+
+        groups = defaultdict(list)
+        for row_id, project_id, *old in rows:
+            old_values = dict(zip(fields, old))
+            changed = frozenset(field for field in fields if old_values[field] != values[field])
+            if changed:
+                groups[changed].append((row_id, project_id, old_values))
+        return groups
+
+    def _apply_bulk_targets(
+        self,
+        targets: List[tuple],
+        project_ids: List[int],
+        changed_ids: set,
+        audit_rows: List[dict]
+    ):
+        """
+        bulk_update_projects の各モデルの更新を実行
+        
+        Raises:
+            _BulkGroupError: いずれかの UPDATE / INSERT が失敗した場合
+        """
+        for model, target_model, data in targets:
+            # None は「変更なし」として扱う（update_project_with_audit と同じ）
+            values = {
+                field: value for field, value in data.items()
+                if value is not None and hasattr(model, field)
+            }
+            if not values:
+                continue
+
+            groups = self._diff_rows(model, values, project_ids)
+            for fields, rows in groups.items():
+                self._apply_group(model, target_model, values, fields, rows, changed_ids, audit_rows)
+
+            if model is Building:
+                # 建物情報が存在しないプロジェクトは新規作成
+                self._create_missing_buildings(project_ids, values, changed_ids, audit_rows)
+
+    def _apply_group(
+        self,
+        model,
+        target_model: str,
+        values: dict,
+        fields: frozenset,
+        rows: List[tuple],
+        changed_ids: set,
+        audit_rows: List[dict]
+    ):
+        """同じカラムが変わる行をまとめて1回の UPDATE で更新し、監査証跡を積む"""
+        row_ids = [row_id for row_id, _, _ in rows]
+        try:
+            self.db.execute(
+                update(model)
+                .where(model.id.in_(row_ids))
+                .values({field: values[field] for field in fields})
+                .execution_options(synchronize_session=False)
+            )
+        except Exception as e:
+            raise _BulkGroupError([project_id for _, project_id, _ in rows], str(e)) from e
+
+        for row_id, project_id, old_values in rows:
+            changed_ids.add(project_id)
+            for field in sorted(fields):
+                old_value = old_values[field]
+                audit_rows.append({
+                    "target_model": target_model,
+                    "target_id": row_id,
+                    "action": "UPDATE",
+                    "field_name": field,
+                    "old_value": str(old_value) if old_value is not None else "",
+                    "new_value": str(values[field]),
+                })
+
+    def _create_missing_buildings(
+        self,
+        project_ids: List[int],
+        values: dict,
+        changed_ids: set,
+        audit_rows: List[dict]
+    ):
+        """建物情報が未登録のプロジェクトにまとめて建物情報を作成"""
+        existing = {
+            project_id for (project_id,) in
+            self.db.query(Building.project_id).filter(Building.project_id.in_(project_ids))
+        }
+        missing_ids = [project_id for project_id in project_ids if project_id not in existing]
+        if not missing_ids:
+            return
+
+        try:
+            self.db.execute(
+                insert(Building),
+                [{"project_id": project_id, **values} for project_id in missing_ids]
+            )
+        except Exception as e:
+            raise _BulkGroupError(missing_ids, str(e)) from e
+
+        for project_id in missing_ids:
+            changed_ids.add(project_id)
+            audit_rows.append({
+                "target_model": "Building",
+                "target_id": project_id,
+                "action": "CREATE",
+                "field_name": "building_info",
+                "new_value": "建物情報作成",
+            })
+
+
+class _BulkGroupError(Exception):
+    """一括更新で1つのグループの UPDATE / INSERT が失敗したことを表す（対象のプロジェクトIDを持つ）"""
+
+    def __init__(self, project_ids: List[int], error: str):
+        super().__init__(error)
+        self.project_ids = project_ids
+        self.error = error
+
+
+class AsyncProjectService:
+    """
+    プロジェクト関連の非同期サービスクラス
+    
+    AsyncSession.run_sync 上で ProjectService の実装をそのまま実行する。
+    I/O は非同期ドライバ（asyncpg / aiosqlite）で待機されるため、
+    クエリ中もイベントループ（WebSocket配信など）はブロックされない。
+    """
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def _run(self, func):
+        """同期サービスを受け取る関数を非同期セッション上で実行"""
+        return await self.db.run_sync(lambda session: func(ProjectService(session)))
+
+    async def get_projects(
+        self, 
+        skip: int = 0, 
+        limit: int = 100, 
+        status: Optional[str] = None
+    ) -> List[Project]:
+        """プロジェクト一覧を取得"""
+        return await self._run(lambda s: s.get_projects(skip=skip, limit=limit, status=status))
+
+    async def get_projects_page(
+        self,
+        limit: int = 100,
+        status: Optional[str] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Project], Optional[str]]:
+        """プロジェクト一覧をカーソル方式で取得"""
+        return await self._run(lambda s: s.get_projects_page(limit=limit, status=status, cursor=cursor))
+
+    async def get_projects_count(self, status: Optional[str] = None) -> int:
+        """プロジェクトの総数を取得"""
+        return await self._run(lambda s: s.get_projects_count(status=status))
+
+    async def get_projects_count_cached(self, status: Optional[str] = None) -> int:
+        """プロジェクトの総数を取得（短時間キャッシュ付き）"""
+        return await count_cache.get_or_set_async(
+            ("projects", status),
+            lambda: self.get_projects_count(status=status)
+        )
+
+    async def get_project_by_code(self, project_code: str) -> Optional[Project]:
+        """プロジェクトコードでプロジェクトを取得"""
+        return await self._run(lambda s: s.get_project_by_code(project_code))
+
+    async def get_project_by_id(self, project_id: int) -> Optional[Project]:
+        """プロジェクトIDでプロジェクトを取得"""
+        return await self._run(lambda s: s.get_project_by_id(project_id))
+
+    async def get_projects_by_ids(self, project_ids: List[int]) -> List[Project]:
+        """複数のプロジェクトを1クエリで取得"""
+        return await self._run(lambda s: s.get_projects_by_ids(project_ids))
+
+    async def get_project_ids(
+        self,
+        status: Optional[str] = None,
+        search: Optional[str] = None,
+        project_ids: Optional[List[int]] = None,
+        limit: Optional[int] = None
+    ) -> List[int]:
+        """条件に合うプロジェクトIDだけを取得"""
+        return await self._run(lambda s: s.get_project_ids(
+            status=status, search=search, project_ids=project_ids, limit=limit
+        ))
+
+    async def get_projects_by_status(self, status: str) -> List[Project]:
+        """指定されたステータスのプロジェクト一覧を取得"""
+        return await self._run(lambda s: s.get_projects_by_status(status))
+
+    async def get_projects_summary(self) -> dict:
+        """
+        プロジェクトのサマリー情報を取得
+        
+        ダッシュボードの一斉更新でも集計は1回で済むようキャッシュする。
+        プロジェクトの作成・更新・削除時に無効化される
+        """
+        return await summary_cache.get_or_set_async(
+            (SUMMARY_PROJECTS,),
+            lambda: self._run(lambda s: s.get_projects_summary())
+        )
+
+    async def search_projects(self, query: str, limit: Optional[int] = None) -> List[Project]:
+        """プロジェクトを検索"""
+        return await self._run(lambda s: s.search_projects(query, limit=limit))
+
+    async def create_project(self, project_data: ProjectCreate) -> Project:
+        """新しいプロジェクトを作成"""
+        return await self._run(lambda s: s.create_project(project_data))
+
+    async def update_project(self, project_id: int, project_data: ProjectUpdate) -> Optional[Project]:
+        """プロジェクトを更新"""
+        return await self._run(lambda s: s.update_project(project_id, project_data))
+
+    async def update_project_with_audit(self, project_id: int, project_data: ProjectUpdate) -> Optional[Project]:
+        """プロジェクトを更新（監査証跡付き）"""
+        return await self._run(lambda s: s.update_project_with_audit(project_id, project_data))
+
+    async def bulk_update_projects(self, project_ids: List[int], project_data: ProjectUpdate) -> Dict[str, Any]:
+        """複数プロジェクトを一括更新（監査証跡付き・セットベース）"""
+        return await self._run(lambda s: s.bulk_update_projects(project_ids, project_data))
+
+    async def update_financial(self, project_id: int, financial_data: FinancialUpdate) -> Optional[Financial]:
+        """財務情報を更新"""
+        return await self._run(lambda s: s.update_financial(project_id, financial_data))
+
+    async def update_schedule(self, project_id: int, schedule_data: ScheduleUpdate) -> Optional[Schedule]:
+        """スケジュール情報を更新"""
+        return await self._run(lambda s: s.update_schedule(project_id, schedule_data))
+
+    async def delete_project(self, project_id: int) -> bool:
+        """プロジェクトを削除"""
+        return await self._run(lambda s: s.delete_project(project_id))
@@ -0,0 +1,224 @@
+"""
+プロジェクト・顧客検索サービス
+正規化済みテキストの検索インデックスを使ったランキング付き部分一致検索
+"""
+
+import logging
+from typing import List, Optional, Tuple
+
+from sqlalchemy import case, func, or_, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.project import Customer, Project
+from app.models.search import SQLITE_FTS_TABLE, ProjectSearchIndex, sqlite_supports_trigram
+from app.utils.text_normalizer import build_search_document, normalize_search_text
+
+logger = logging.getLogger(__name__)
+
+# trigram インデックスが効く最小文字数
+TRIGRAM_MIN_LENGTH = 3
+
+
+def _escape_like(term: str) -> str:
+    """LIKE のワイルドカード文字をエスケープ"""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class ProjectSearchService:
+    """プロジェクト検索インデックスの管理と検索"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    @property
+    def dialect_name(self) -> str:
+        return self.db.get_bind().dialect.name
+
+    def index_project(self, project: Project, customer: Optional[Customer] = None):
+        """
+        プロジェクトの検索インデックスを作成・更新
+
+        コミットは呼び出し元で行う
+
+        Args:
+            project: 対象プロジェクト（ID確定済み）
+            customer: 顧客情報（省略時は project.customer）
+        """
+        if customer is None:
+            customer = project.customer
+
+        entry = ProjectSearchIndex(
+            project_id=project.id,
+            customer_id=customer.id if customer else None,
+            project_text=build_search_document([project.project_name, project.project_code]),
+            customer_text=build_search_document([
+                customer.owner_name, customer.owner_kana, customer.client_name
+            ]) if customer else "",
+        )
+        self.db.merge(entry)
+
+    def remove_project(self, project_id: int):
+        """プロジェクトの検索インデックスを削除（コミットは呼び出し元で行う）"""
+        self.db.query(ProjectSearchIndex).filter(
+            ProjectSearchIndex.project_id == project_id
+        ).delete(synchronize_session=False)
+
+    def reindex_projects(self, project_ids: List[int]):
+        """
+        指定したプロジェクトの検索インデックスをまとめて作り直す
+
+        一括更新用。対象の行を1クエリで読み出し、削除と挿入をそれぞれ1回で行う。
+        コミットは呼び出し元で行う
+        """
+        if not project_ids:
+            return
+
+        rows = self.db.query(
+            Project.id, Project.project_name, Project.project_code,
+            Customer.id, Customer.owner_name, Customer.owner_kana, Customer.client_name
+        ).outerjoin(Customer, Customer.project_id == Project.id).filter(
+            Project.id.in_(project_ids)
+        ).all()
+
+        self.db.query(ProjectSearchIndex).filter(
+            ProjectSearchIndex.project_id.in_(project_ids)
+        ).delete(synchronize_session=False)
+
+        self.db.bulk_insert_mappings(ProjectSearchIndex, [
+            {
+                "project_id": project_id,
+                "customer_id": customer_id,
+                "project_text": build_search_document([name, code]),
+                "customer_text": build_search_document([owner_name, owner_kana, client_name]),
+            }
+            for project_id, name, code, customer_id, owner_name, owner_kana, client_name in rows
+        ])
+
+    def rebuild_index(self, batch_size: int = 1000) -> int:
+        """
+        検索インデックスを全件再構築
+
+        Args:
+            batch_size: 一度に書き込む件数
+
+        Returns:
+            索引化したプロジェクト数
+        """
+        self.db.query(ProjectSearchIndex).delete(synchronize_session=False)
+
+        rows = self.db.query(
+            Project.id, Project.project_name, Project.project_code,
+            Customer.id, Customer.owner_name, Customer.owner_kana, Customer.client_name
+        ).outerjoin(Customer, Customer.project_id == Project.id).yield_per(batch_size)
+
+        batch = []
+        total = 0
+        for project_id, name, code, customer_id, owner_name, owner_kana, client_name in rows:
+            batch.append({
+                "project_id": project_id,
+                "customer_id": customer_id,
+                "project_text": build_search_document([name, code]),
+                "customer_text": build_search_document([owner_name, owner_kana, client_name]),
+            })
+            if len(batch) >= batch_size:
+                self.db.bulk_insert_mappings(ProjectSearchIndex, batch)
+                total += len(batch)
+                batch = []
+
+        if batch:
+            self.db.bulk_insert_mappings(ProjectSearchIndex, batch)
+            total += len(batch)
+
+        self.db.commit()
+        logger.info(f"検索インデックスを再構築しました: {total}件")
+        return total
+
+    def search_project_ids(self, query: str, limit: Optional[int] = None) -> List[int]:
+        """
+        プロジェクト名・コード・施主名・フリガナ・発注者名で検索
+
+        Returns:
+            関連度順のプロジェクトIDのリスト
+        """
+        columns = [ProjectSearchIndex.project_text, ProjectSearchIndex.customer_text]
+        return [project_id for project_id, _ in self._search(query, limit, columns)]
+
+    def search_customer_ids(self, query: str, limit: Optional[int] = None) -> List[int]:
+        """
+        施主名・フリガナ・発注者名で検索
+
+        Returns:
+            関連度順の顧客IDのリスト
+        """
+        columns = [ProjectSearchIndex.customer_text]
+        return [customer_id for _, customer_id in self._search(query, limit, columns) if customer_id]
+
+    def _search(self, query: str, limit: Optional[int], columns) -> List[Tuple[int, Optional[int]]]:
+        """正規化したクエリで検索し (project_id, customer_id) を関連度順に返す"""
+        term = normalize_search_text(query)
+        if not term:
+            return []
+
+        limit = min(limit or settings.SEARCH_RESULT_LIMIT, settings.SEARCH_RESULT_LIMIT)
+
+        if self.dialect_name == "postgresql":
+            return self._search_postgresql(term, limit, columns)
+        if (
+            self.dialect_name == "sqlite"
+            and len(term) >= TRIGRAM_MIN_LENGTH
+            and sqlite_supports_trigram()
+        ):
+            return self._search_sqlite_fts(term, limit, columns)
+        return self._search_like(term, limit, columns)
+
+    def _search_postgresql(self, term: str, limit: int, columns) -> List[Tuple[int, Optional[int]]]:
+        """pg_trgm の GIN インデックスを使った部分一致検索（類似度順）"""
+        pattern = f"%{_escape_like(term)}%"
+        conditions = [column.like(pattern, escape="\\") for column in columns]
+        scores = [func.similarity(column, term) for column in columns]
+        score = func.greatest(*scores) if len(scores) > 1 else scores[0]
+
+        return self.db.query(
+            ProjectSearchIndex.project_id, ProjectSearchIndex.customer_id
+        ).filter(or_(*conditions)).order_by(
+            score.desc(), ProjectSearchIndex.project_id.desc()
+        ).limit(limit).all()
+
+    def _search_sqlite_fts(self, term: str, limit: int, columns) -> List[Tuple[int, Optional[int]]]:
+        """FTS5（trigram）を使った部分一致検索（bm25順）"""
+        column_names = " ".join(column.key for column in columns)
+        phrase = term.replace('"', '""')
+        match = f'{{{column_names}}} : "{phrase}"'
+
+        result = self.db.execute(text(f"""
+            SELECT i.project_id, i.customer_id
+            FROM {SQLITE_FTS_TABLE} f
+            JOIN project_search_index i ON i.project_id = f.rowid
+            WHERE {SQLITE_FTS_TABLE} MATCH :match
+            ORDER BY f.rank
+            LIMIT :limit
+        """), {"match": match, "limit": limit})
+        return [(row[0], row[1]) for row in result]
+
+    def _search_like(self, term: str, limit: int, columns) -> List[Tuple[int, Optional[int]]]:
+        """
+        短いクエリ用の LIKE 検索
+
+        正規化済みの狭いインデックステーブルのみを走査する。前方一致を優先して並べる
+        """
+        escaped = _escape_like(term)
+        conditions = [column.like(f"%{escaped}%", escape="\\") for column in columns]
+        prefix_match = or_(*[column.like(f"{escaped}%", escape="\\") for column in columns])
+
+        return self.db.query(
+            ProjectSearchIndex.project_id, ProjectSearchIndex.customer_id
+        ).filter(or_(*conditions)).order_by(
+            case((prefix_match, 0), else_=1), ProjectSearchIndex.project_id.desc()
+        ).limit(limit).all()
+
+
+def order_by_ids(items: list, ids: List[int]) -> list:
+    """ID のリスト順（関連度順）に並べ替える"""
+    position = {item_id: index for index, item_id in enumerate(ids)}
+    return sorted(items, key=lambda item: position.get(item.id, len(position)))
@@ -5,6 +5,7 @@
 from datetime import date, datetime, timedelta
 from sqlalchemy.orm import Session
 from app.core.database import get_db, engine
+from app.services.search_service import ProjectSearchService
 from app.models.project import (
     Project, Customer, Site, Building, Application, ApplicationType,
     Financial, Schedule
@@ -359,6 +360,9 @@ def create_sample_data():
             db.add(application)
         
         db.commit()
+        
+        # 直接追加した行は検索インデックスに載らないためまとめて索引化
+        ProjectSearchService(db).rebuild_index()
         print("サンプルデータの作成が完了しました")
         
     except Exception as e:
@@ -0,0 +1,214 @@
+"""
+カーソル（キーセット）ページング用のユーティリティ
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple, Union
+
+from sqlalchemy import String, func, tuple_, type_coerce
+
+
+def encode_cursor(updated_at: Union[datetime, str, None], row_id: int) -> str:
+    """
+    (updated_at, id) から不透明なカーソル文字列を生成
+
+    Args:
+        updated_at: 最後の行の更新日時（未更新の行は None）。SQLite では保存されている文字列そのもの
+            （datetime の場合は SQLAlchemy が SQLite に保存する形式の文字列にする）
+        row_id: 最後の行のID
+
+    Returns:
+        URLセーフなカーソル文字列
+    """
+    if isinstance(updated_at, datetime):
+        updated_at = updated_at.isoformat(sep=" ", timespec="microseconds")
+    payload = [updated_at, row_id]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[str], int]:
+    """
+    カーソル文字列を (updated_at, id) に復元
+
+    Args:
+        cursor: encode_cursor で生成したカーソル
+
+    Returns:
+        (updated_at の文字列, id) のタプル
+
+    Raises:
+        ValueError: カーソルの形式が不正な場合
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        updated_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if updated_at is not None:
+            datetime.fromisoformat(updated_at)
+        return (updated_at, int(row_id))
+    except Exception:
+        raise ValueError("無効なカーソルです")
+
+
+def _keyset_sort_key(query, updated_at_column):
+    """
+    カーソルの比較に使う updated_at の式
+
+    SQLite の日時は文字列で保存され、CURRENT_TIMESTAMP（onupdate=func.now()）は秒まで、
+    Python から書き込んだ値はマイクロ秒まで持つ。比較する値を datetime から作ると
+    「2026-10-17 12:00:00」と「2026-10-17 12:00:00.000000」の文字列比較になって並び順と食い違うため、
+    SQLite では保存されている文字列どうしで比較する（type_coerce は CAST を出さないのでインデックスを使える）
+    """
+    if query.session.get_bind().dialect.name == "sqlite":
+        return type_coerce(updated_at_column, String)
+    return updated_at_column
+
+
+def fetch_keyset_page(
+    query,
+    updated_at_column,
+    id_column,
+    limit: int,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+) -> List[Any]:
+    """
+    `updated_at DESC NULLS LAST, id DESC` 順で1ページ分の行を取得
+
+    OR で NULL 行を混ぜた条件はインデックスの範囲検索にならないため、
+    updated_at が非NULLの行と NULL の行を別々のクエリで取得して連結する。
+      - 非NULL: `(updated_at, id) < (u, i)` の行値比較で (updated_at, id) インデックスを範囲検索
+      - NULL: `updated_at IS NULL AND id < i` で同じインデックスの NULL 区間を検索
+    どちらもインデックス順に読むだけなので、ソートも全件走査も発生しない
+
+    Args:
+        query: 絞り込み条件とロードオプションだけを設定したクエリ（order_by は付けない）
+        updated_at_column: 並び替えに使う更新日時カラム
+        id_column: タイブレーク用のIDカラム
+        limit: 取得する件数
+        skip: スキップする件数（cursor 指定時は無視）
+        cursor: 直前ページの next_cursor（先頭ページは None）
+
+    Returns:
+        取得した行のリスト
+
+    Raises:
+        ValueError: カーソルの形式が不正な場合
+    """
+    return [row for row, _ in _fetch_keyed_rows(query, updated_at_column, id_column, limit, skip, cursor)]
+
+
+def fetch_keyset_page_with_cursor(
+    query,
+    updated_at_column,
+    id_column,
+    limit: int,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    fetch_keyset_page と同じ順序で1ページ分の行と次ページのカーソルを取得
+
+    カーソルにはデータベースに保存されている updated_at の値をそのまま入れるため、
+    保存形式（秒まで・マイクロ秒まで）が行ごとに異なっても次のページの比較がずれない
+
+    Args:
+        query: 絞り込み条件とロードオプションだけを設定したクエリ（order_by は付けない）
+        updated_at_column: 並び替えに使う更新日時カラム
+        id_column: タイブレーク用のIDカラム
+        limit: 取得する件数
+        cursor: 直前ページの next_cursor（先頭ページは None）
+
+    Returns:
+        (行のリスト, 次ページのカーソル or None)
+
+    Raises:
+        ValueError: カーソルの形式が不正な場合
+    """
+    # 次ページの有無を判定するため1件多く取得
+    keyed = _fetch_keyed_rows(query, updated_at_column, id_column, limit + 1, 0, cursor)
+    if len(keyed) <= limit:
+        return [row for row, _ in keyed], None
+
+    keyed = keyed[:limit]
+    last, last_key = keyed[-1]
+    return [row for row, _ in keyed], encode_cursor(last_key, getattr(last, id_column.key))
+
+
+def _fetch_keyed_rows(
+    query,
+    updated_at_column,
+    id_column,
+    limit: int,
+    skip: int,
+    cursor: Optional[str],
+) -> List[Tuple[Any, Any]]:
+    """fetch_keyset_page の本体。各行と、その行の updated_at の比較用の値の組を返す"""
+    last_updated_at, last_id = None, None
+    if cursor:
+        last_updated_at, last_id = decode_cursor(cursor)
+        skip = 0
+
+    rows: List[Tuple[Any, Any]] = []
+    if last_id is None or last_updated_at is not None:
+        sort_key = _keyset_sort_key(query, updated_at_column)
+        dated = query.filter(updated_at_column.isnot(None))
+        if last_id is not None:
+            if sort_key is updated_at_column:
+                last_updated_at = datetime.fromisoformat(last_updated_at)
+            dated = dated.filter(tuple_(sort_key, id_column) < tuple_(last_updated_at, last_id))
+        rows = [
+            tuple(row) for row in dated.add_columns(sort_key.label("keyset_updated_at")).order_by(
+                updated_at_column.desc().nullslast(),
+                id_column.desc()
+            ).offset(skip).limit(limit).all()
+        ]
+
+        if len(rows) >= limit:
+            return rows
+        if rows or not skip:
+            skip = 0
+        else:
+            # 非NULLの行をすべて読み飛ばした場合だけ件数を数えて NULL 区間のオフセットに換算する
+            dated_count = dated.order_by(None).with_entities(func.count(id_column)).scalar() or 0
+            skip = max(skip - dated_count, 0)
+
+    # 未更新（NULL）の行は末尾にまとまっているため ID の降順で続ける
+    undated = query.filter(updated_at_column.is_(None))
+    if last_id is not None and last_updated_at is None:
+        undated = undated.filter(id_column < last_id)
+    rows += [(row, None) for row in undated.order_by(id_column.desc()).offset(skip).limit(limit - len(rows)).all()]
+    return rows
+
+
+def encode_key_cursor(values: Sequence[Any]) -> str:
+    """
+    主キーの値（複合キーの場合は複数）から不透明なカーソル文字列を生成
+
+    日時などの JSON にできない値は文字列にする（decode 側で列の型に戻す）
+    """
+    payload = [value.isoformat() if hasattr(value, "isoformat") else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_key_cursor(cursor: str, size: int) -> List[Any]:
+    """
+    encode_key_cursor で生成したカーソルを主キーの値のリストに復元
+
+    Args:
+        cursor: カーソル文字列
+        size: 主キーの列数
+
+    Raises:
+        ValueError: カーソルの形式が不正な場合
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise ValueError("無効なカーソルです")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("無効なカーソルです")
+    return values
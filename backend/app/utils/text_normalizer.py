@@ -0,0 +1,107 @@
+"""
+検索用の文字列正規化ユーティリティ
+索引作成時と検索時で同じ正規化を行い、表記ゆれを吸収する
+"""
+
+import re
+import unicodedata
+from typing import Iterable, Optional
+
+# ひらがな → カタカナ
+_HIRAGANA_TO_KATAKANA = {code: code + 0x60 for code in range(ord("ぁ"), ord("ゖ") + 1)}
+
+# 人名・地名でよく使われる異体字を代表字にそろえる
+_KANJI_VARIANTS = str.maketrans({
+    "髙": "高", "﨑": "崎", "嵜": "崎", "邉": "辺", "邊": "辺", "濵": "浜", "濱": "浜",
+    "齋": "斎", "齊": "斉", "德": "徳", "冨": "富", "廣": "広", "國": "国",
+    "澤": "沢", "櫻": "桜", "眞": "真", "條": "条", "藏": "蔵", "龍": "竜", "瀨": "瀬",
+    "槇": "槙", "栁": "柳", "曻": "昇",
+})
+
+# 空白・区切り記号（NFKC 適用後）
+_SEPARATORS = re.compile(r"[\s・\-‐‑–―]+")
+
+
+def normalize_search_text(text: Optional[str]) -> str:
+    """
+    検索用に文字列を正規化
+
+    - NFKC 正規化（全角英数→半角、半角カナ→全角カナ）
+    - ひらがな→カタカナ
+    - 異体字を代表字に統一
+    - 英字の小文字化、空白・区切り記号の除去
+
+    Args:
+        text: 元の文字列
+
+    Returns:
+        正規化された文字列
+    """
+    if not text:
+        return ""
+
+    normalized = unicodedata.normalize("NFKC", text)
+    normalized = normalized.translate(_HIRAGANA_TO_KATAKANA)
+    normalized = normalized.translate(_KANJI_VARIANTS)
+    normalized = normalized.lower()
+    return _SEPARATORS.sub("", normalized)
+
+
+def build_search_document(values: Iterable[Optional[str]]) -> str:
+    """
+    複数フィールドを正規化して1つの検索文書にまとめる
+
+    フィールドをまたいだ誤一致を避けるため、区切りに空白を入れる
+    """
+    return " ".join(v for v in (normalize_search_text(value) for value in values) if v)
+
+
+# 地名の表記ゆれ（ヶ/ケ/ヵ/が、ノ/の）
+_PLACE_NAME_VARIANTS = str.maketrans({"ヶ": "ケ", "ヵ": "ケ", "が": "ケ", "ノ": "の"})
+
+_KANJI_DIGITS = {"〇": 0, "一": 1, "二": 2, "三": 3, "四": 4, "五": 5, "六": 6, "七": 7, "八": 8, "九": 9}
+
+# 「三丁目」「二十一丁目」などの漢数字
+_KANJI_CHOME = re.compile(r"([〇一二三四五六七八九十]+)丁目")
+
+# 番地の区切りに使われるダッシュ類（数字に挟まれたもののみ）
+_NUMBER_DASH = re.compile(r"(?<=\d)[−ー‐](?=\d)")
+
+# 丁目・番地以降（住所の番地部分は町域の索引に含まれない）
+_BLOCK_NUMBER = re.compile(r"(\d+丁目|\d+番地?|\d+号|\d+(-\d+)+|\d+$).*$")
+
+
+def _kanji_to_number(text: str) -> str:
+    """99 までの漢数字を算用数字の文字列に変換"""
+    if "十" not in text:
+        return "".join(str(_KANJI_DIGITS[c]) for c in text)
+    tens, _, ones = text.partition("十")
+    value = (_KANJI_DIGITS.get(tens, 1) if tens else 1) * 10
+    if ones:
+        value += _KANJI_DIGITS.get(ones, 0)
+    return str(value)
+
+
+def normalize_address_text(text: Optional[str]) -> str:
+    """
+    住所の照合用に文字列を正規化
+
+    - NFKC 正規化、空白の除去
+    - ヶ/ケ/ヵ/が、ノ/の の表記ゆれを統一
+    - 漢数字の丁目を算用数字にそろえ、丁目・番地以降を除去
+
+    Args:
+        text: 元の住所文字列
+
+    Returns:
+        正規化された住所文字列
+    """
+    if not text:
+        return ""
+
+    normalized = unicodedata.normalize("NFKC", text)
+    normalized = re.sub(r"\s+", "", normalized)
+    normalized = normalized.translate(_PLACE_NAME_VARIANTS)
+    normalized = _KANJI_CHOME.sub(lambda m: f"{_kanji_to_number(m.group(1))}丁目", normalized)
+    normalized = _NUMBER_DASH.sub("-", normalized)
+    return _BLOCK_NUMBER.sub("", normalized)
@@ -0,0 +1,106 @@
+"""Add project search index
+
+Revision ID: 38080fcf8cfd
+Revises: d4b21938cb6e
+Create Date: 2026-10-17 10:12:31.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.text_normalizer import build_search_document
+
+
+# revision identifiers, used by Alembic.
+revision = '38080fcf8cfd'
+down_revision = 'd4b21938cb6e'
+branch_labels = None
+depends_on = None
+
+
+POSTGRESQL_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_project_search_index_project_text_trgm "
+    "ON project_search_index USING gin (project_text gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_project_search_index_customer_text_trgm "
+    "ON project_search_index USING gin (customer_text gin_trgm_ops)",
+]
+
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS project_search_fts USING fts5("
+    "project_text, customer_text, "
+    "content='project_search_index', content_rowid='project_id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS project_search_index_ai AFTER INSERT ON project_search_index BEGIN "
+    "INSERT INTO project_search_fts(rowid, project_text, customer_text) "
+    "VALUES (new.project_id, new.project_text, new.customer_text); END",
+    "CREATE TRIGGER IF NOT EXISTS project_search_index_ad AFTER DELETE ON project_search_index BEGIN "
+    "INSERT INTO project_search_fts(project_search_fts, rowid, project_text, customer_text) "
+    "VALUES ('delete', old.project_id, old.project_text, old.customer_text); END",
+    "CREATE TRIGGER IF NOT EXISTS project_search_index_au AFTER UPDATE ON project_search_index BEGIN "
+    "INSERT INTO project_search_fts(project_search_fts, rowid, project_text, customer_text) "
+    "VALUES ('delete', old.project_id, old.project_text, old.customer_text); "
+    "INSERT INTO project_search_fts(rowid, project_text, customer_text) "
+    "VALUES (new.project_id, new.project_text, new.customer_text); END",
+]
+
+
+def upgrade() -> None:
+    op.create_table('project_search_index',
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('customer_id', sa.Integer(), nullable=True),
+    sa.Column('project_text', sa.Text(), nullable=False),
+    sa.Column('customer_text', sa.Text(), nullable=False),
+    sa.ForeignKeyConstraint(['customer_id'], ['customers.id'], ),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+    sa.PrimaryKeyConstraint('project_id')
+    )
+    op.create_index(op.f('ix_project_search_index_customer_id'), 'project_search_index', ['customer_id'], unique=False)
+
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        for statement in POSTGRESQL_DDL:
+            op.execute(statement)
+    elif dialect == 'sqlite':
+        for statement in SQLITE_DDL:
+            op.execute(statement)
+
+    _backfill()
+
+
+def _backfill(batch_size: int = 1000) -> None:
+    """
+    既存のプロジェクトを索引化
+
+    正規化は Python 側で行うため、scripts/rebuild_search_index.py と同じ内容を
+    モデルに依存しない形で書き込む（SQLite では挿入トリガーで FTS にも反映される）
+    """
+    index_table = sa.table(
+        'project_search_index',
+        sa.column('project_id', sa.Integer),
+        sa.column('customer_id', sa.Integer),
+        sa.column('project_text', sa.Text),
+        sa.column('customer_text', sa.Text),
+    )
+    rows = op.get_bind().execute(sa.text(
+        "SELECT p.id, p.project_name, p.project_code, c.id, c.owner_name, c.owner_kana, c.client_name "
+        "FROM projects p LEFT OUTER JOIN customers c ON c.project_id = p.id"
+    )).fetchall()
+
+    for start in range(0, len(rows), batch_size):
+        op.bulk_insert(index_table, [
+            {
+                'project_id': project_id,
+                'customer_id': customer_id,
+                'project_text': build_search_document([name, code]),
+                'customer_text': build_search_document([owner_name, owner_kana, client_name]),
+            }
+            for project_id, name, code, customer_id, owner_name, owner_kana, client_name
+            in rows[start:start + batch_size]
+        ])
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS project_search_fts")
+    op.drop_index(op.f('ix_project_search_index_customer_id'), table_name='project_search_index')
+    op.drop_table('project_search_index')
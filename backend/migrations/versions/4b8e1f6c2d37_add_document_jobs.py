@@ -0,0 +1,53 @@
+"""Add document jobs
+
+Revision ID: 4b8e1f6c2d37
+Revises: 7c3e5d2a9f14
+Create Date: 2026-10-17 15:02:44.781236
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b8e1f6c2d37'
+down_revision = '7c3e5d2a9f14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # create_all で作成済みの環境では何もしない
+    if 'document_jobs' in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table('document_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('application_id', sa.Integer(), nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('template_name', sa.String(length=200), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('progress', sa.Integer(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('max_attempts', sa.Integer(), nullable=False),
+    sa.Column('locked_by', sa.String(length=100), nullable=True),
+    sa.Column('locked_at', sa.DateTime(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('output_path', sa.String(length=500), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_document_jobs_id'), 'document_jobs', ['id'], unique=False)
+    op.create_index(op.f('ix_document_jobs_application_id'), 'document_jobs', ['application_id'], unique=False)
+    op.create_index(op.f('ix_document_jobs_project_id'), 'document_jobs', ['project_id'], unique=False)
+    op.create_index('ix_document_jobs_status_created_at', 'document_jobs', ['status', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_document_jobs_status_created_at', table_name='document_jobs')
+    op.drop_index(op.f('ix_document_jobs_project_id'), table_name='document_jobs')
+    op.drop_index(op.f('ix_document_jobs_application_id'), table_name='document_jobs')
+    op.drop_index(op.f('ix_document_jobs_id'), table_name='document_jobs')
+    op.drop_table('document_jobs')
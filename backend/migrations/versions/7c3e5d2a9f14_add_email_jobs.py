@@ -0,0 +1,55 @@
+"""Add email jobs
+
+Revision ID: 7c3e5d2a9f14
+Revises: b50b2f690845
+Create Date: 2026-10-17 14:21:05.318402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c3e5d2a9f14'
+down_revision = 'b50b2f690845'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # create_all で作成済みの環境では何もしない
+    if 'email_jobs' in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table('email_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('batch_id', sa.String(length=36), nullable=False),
+    sa.Column('provider', sa.String(length=50), nullable=False),
+    sa.Column('to_email', sa.String(length=255), nullable=False),
+    sa.Column('subject', sa.String(length=500), nullable=False),
+    sa.Column('body', sa.Text(), nullable=False),
+    sa.Column('is_html', sa.Boolean(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('max_attempts', sa.Integer(), nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('locked_by', sa.String(length=100), nullable=True),
+    sa.Column('locked_at', sa.DateTime(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('form_submission_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('sent_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_email_jobs_id'), 'email_jobs', ['id'], unique=False)
+    op.create_index(op.f('ix_email_jobs_batch_id'), 'email_jobs', ['batch_id'], unique=False)
+    op.create_index(op.f('ix_email_jobs_form_submission_id'), 'email_jobs', ['form_submission_id'], unique=False)
+    op.create_index('ix_email_jobs_status_next_attempt_at', 'email_jobs', ['status', 'next_attempt_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_email_jobs_status_next_attempt_at', table_name='email_jobs')
+    op.drop_index(op.f('ix_email_jobs_form_submission_id'), table_name='email_jobs')
+    op.drop_index(op.f('ix_email_jobs_batch_id'), table_name='email_jobs')
+    op.drop_index(op.f('ix_email_jobs_id'), table_name='email_jobs')
+    op.drop_table('email_jobs')
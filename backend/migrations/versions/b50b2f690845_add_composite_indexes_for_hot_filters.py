@@ -0,0 +1,66 @@
+"""Add composite indexes for hot filters
+
+Revision ID: b50b2f690845
+Revises: 38080fcf8cfd
+Create Date: 2026-10-17 11:02:47.583120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b50b2f690845'
+down_revision = '38080fcf8cfd'
+branch_labels = None
+depends_on = None
+
+
+# (インデックス名, テーブル名, カラム, 部分インデックスの条件)
+INDEXES = [
+    ('ix_projects_status_updated_at', 'projects', ['status', 'updated_at', 'id'], None),
+    ('ix_projects_updated_at', 'projects', ['updated_at', 'id'], None),
+    ('ix_applications_status_updated_at', 'applications', ['status', 'updated_at', 'id'], None),
+    ('ix_applications_project_id', 'applications', ['project_id', 'updated_at', 'id'], None),
+    ('ix_audit_trails_target_timestamp', 'audit_trails', ['target_model', 'target_id', 'timestamp'], None),
+    ('ix_schedules_pending_reinforcement', 'schedules', ['reinforcement_scheduled'], 'reinforcement_actual IS NULL'),
+    ('ix_schedules_pending_interim', 'schedules', ['interim_scheduled'], 'interim_actual IS NULL'),
+    ('ix_schedules_pending_completion', 'schedules', ['completion_scheduled'], 'completion_actual IS NULL'),
+]
+
+
+def _existing_indexes(inspector):
+    """テーブル名 -> (カラム名の集合, インデックス名の集合)"""
+    result = {}
+    for table in inspector.get_table_names():
+        columns = {column['name'] for column in inspector.get_columns(table)}
+        indexes = {index['name'] for index in inspector.get_indexes(table)}
+        result[table] = (columns, indexes)
+    return result
+
+
+def upgrade() -> None:
+    # 初期マイグレーションと create_all で作られたスキーマが混在しているため、
+    # テーブル・カラムが揃っていて未作成のものだけを作成する
+    existing = _existing_indexes(sa.inspect(op.get_bind()))
+
+    for name, table, columns, where in INDEXES:
+        if table not in existing:
+            continue
+        table_columns, table_indexes = existing[table]
+        if name in table_indexes or not set(columns) <= table_columns:
+            continue
+
+        kwargs = {}
+        if where is not None:
+            kwargs['postgresql_where'] = sa.text(where)
+            kwargs['sqlite_where'] = sa.text(where)
+        op.create_index(name, table, columns, unique=False, **kwargs)
+
+
+def downgrade() -> None:
+    existing = _existing_indexes(sa.inspect(op.get_bind()))
+
+    for name, table, _, _ in reversed(INDEXES):
+        if table in existing and name in existing[table][1]:
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,84 @@
+"""Add descending list indexes
+
+Revision ID: e7a94c1d3b52
+Revises: 4b8e1f6c2d37
+Create Date: 2026-10-18 10:12:31.405718
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a94c1d3b52'
+down_revision = '4b8e1f6c2d37'
+branch_labels = None
+depends_on = None
+
+
+# 一覧用のインデックス（インデックス名, テーブル名, カラム）
+LIST_INDEXES = [
+    ('ix_projects_status_updated_at', 'projects', ['status', 'updated_at', 'id']),
+    ('ix_projects_updated_at', 'projects', ['updated_at', 'id']),
+    ('ix_applications_status_updated_at', 'applications', ['status', 'updated_at', 'id']),
+    ('ix_applications_project_id', 'applications', ['project_id', 'updated_at', 'id']),
+    ('ix_applications_updated_at', 'applications', ['updated_at', 'id']),
+]
+
+POSTGRESQL_DESCENDING = {
+    'updated_at': 'updated_at DESC NULLS LAST',
+    'id': 'id DESC',
+}
+
+# このリビジョンで新規に作成するインデックス（それ以外は b50b2f690845 で作成済み）
+CREATED_INDEXES = {'ix_applications_updated_at'}
+
+
+def upgrade() -> None:
+    # - 未作成の ix_applications_updated_at を作成する
+    # - PostgreSQL では b50b2f690845 が昇順で作成した一覧用インデックスを降順で作り直す
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+
+    for name, table, columns in LIST_INDEXES:
+        if table not in tables:
+            continue
+        indexes = {index['name']: index for index in inspector.get_indexes(table)}
+
+        if bind.dialect.name == 'postgresql':
+            if name in indexes:
+                definition = bind.execute(
+                    sa.text("SELECT indexdef FROM pg_indexes WHERE indexname = :name"),
+                    {'name': name},
+                ).scalar()
+                if definition and 'DESC' in definition:
+                    continue
+                op.drop_index(name, table_name=table)
+            op.create_index(name, table, [
+                sa.text(POSTGRESQL_DESCENDING[column]) if column in POSTGRESQL_DESCENDING else column
+                for column in columns
+            ], unique=False)
+        elif name not in indexes:
+            op.create_index(name, table, columns, unique=False)
+
+
+def downgrade() -> None:
+    # このリビジョンで作成したインデックスを削除し、
+    # PostgreSQL では降順にしたインデックスを b50b2f690845 と同じ昇順に戻す
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+
+    for name, table, columns in reversed(LIST_INDEXES):
+        if table not in tables:
+            continue
+        indexes = {index['name'] for index in inspector.get_indexes(table)}
+        if name not in indexes:
+            continue
+
+        if name in CREATED_INDEXES:
+            op.drop_index(name, table_name=table)
+        elif bind.dialect.name == 'postgresql':
+            op.drop_index(name, table_name=table)
+            op.create_index(name, table, columns, unique=False)
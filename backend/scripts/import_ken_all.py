@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+郵便番号データ取り込みスクリプト
+日本郵便の KEN_ALL（読み仮名データの促音・拗音を小書きで表記しないもの）から
+郵便番号索引ファイルを作成する
+
+使い方:
+    python scripts/import_ken_all.py path/to/ken_all.zip
+    python scripts/import_ken_all.py path/to/KEN_ALL.CSV --output ./data/postal_codes.idx
+    python scripts/import_ken_all.py --download
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+import requests
+
+# プロジェクトルートをパスに追加
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.services.postal_code_index import PostalCodeIndex, read_ken_all, write_index
+
+KEN_ALL_URL = "https://www.post.japanpost.jp/zipcode/dl/kogaki/zip/ken_all.zip"
+
+
+def download_ken_all(directory: str) -> str:
+    """日本郵便のサイトから ken_all.zip をダウンロード"""
+    path = os.path.join(directory, "ken_all.zip")
+    print(f"ダウンロード中: {KEN_ALL_URL}")
+    with requests.get(KEN_ALL_URL, stream=True, timeout=60) as response:
+        response.raise_for_status()
+        with open(path, "wb") as f:
+            for chunk in response.iter_content(chunk_size=1024 * 1024):
+                f.write(chunk)
+    return path
+
+
+def import_ken_all(source: str, output: str):
+    """KEN_ALL から索引ファイルを作成"""
+    count = write_index(read_ken_all(source), output)
+    index = PostalCodeIndex.load(output)
+    size = os.path.getsize(output)
+    print(f"郵便番号索引を作成しました: {output}（{count}件, {size / 1024 / 1024:.1f}MB）")
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="KEN_ALL から郵便番号索引を作成")
+    parser.add_argument("source", nargs="?", help="KEN_ALL.CSV または ken_all.zip のパス")
+    parser.add_argument("--download", action="store_true", help="日本郵便のサイトから最新版を取得")
+    parser.add_argument("--output", default=settings.POSTAL_CODE_INDEX_PATH, help="索引ファイルの出力先")
+    args = parser.parse_args()
+
+    if not args.source and not args.download:
+        parser.error("source か --download のどちらかを指定してください")
+
+    try:
+        if args.download:
+            with tempfile.TemporaryDirectory() as directory:
+                import_ken_all(download_ken_all(directory), args.output)
+        else:
+            import_ken_all(args.source, args.output)
+    except Exception as e:
+        print(f"郵便番号データの取り込み中にエラーが発生しました: {e}")
+        sys.exit(1)
+
+    print("稼働中のサーバーに反映するには再起動してください。")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+検索インデックス再構築スクリプト
+マイグレーション適用後や正規化ルール変更後に実行する
+"""
+
+import sys
+import os
+
+# プロジェクトルートをパスに追加
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from app.core.database import SessionLocal
+from app.models import *  # Import all models
+from app.services.search_service import ProjectSearchService
+
+
+def rebuild_search_index():
+    """検索インデックスを全件再構築"""
+    db = SessionLocal()
+    try:
+        total = ProjectSearchService(db).rebuild_index()
+        print(f"検索インデックスを {total} 件再構築しました。")
+    except Exception as e:
+        print(f"検索インデックスの再構築中にエラーが発生しました: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    rebuild_search_index()
@@ -0,0 +1,93 @@
+"""
+テスト共通の設定
+
+アプリのモジュールは import 時に settings からエンジンやワーカーを作るため、
+環境変数は app を import する前に設定する
+"""
+
+import asyncio
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import pytest
+
+TEST_ROOT = Path(tempfile.mkdtemp(prefix="shinsei-test-"))
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+os.environ.setdefault("USE_SQLITE", "true")
+os.environ.setdefault("SQLITE_DATABASE_URL", f"sqlite:///{TEST_ROOT / 'test.db'}")
+os.environ.setdefault("SQLITE_WAL_MODE", "true")
+os.environ.setdefault("EMAIL_QUEUE_WORKERS", "0")
+os.environ.setdefault("DOCUMENT_WORKERS", "0")
+os.environ.setdefault("EVENT_BUS_BACKEND", "memory")
+os.environ.setdefault("BACKUP_DIR", str(TEST_ROOT / "backups"))
+os.environ.setdefault("DOCUMENT_OUTPUT_DIR", str(TEST_ROOT / "documents"))
+os.environ.setdefault("UPLOAD_DIR", str(TEST_ROOT / "uploads"))
+os.environ.setdefault("TEMPLATE_DIR", str(REPO_ROOT / "data" / "提出書類テンプレート"))
+
+from sqlalchemy import text  # noqa: E402
+
+import app.models  # noqa: E402,F401
+import app.models.google_forms  # noqa: E402,F401
+from app.core.cache import count_cache, stats_cache, summary_cache  # noqa: E402
+from app.core.database import Base, SessionLocal, dispose_async_engines, engine, worker_engine  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    """テスト用の SQLite データベースを作成し、終了時に削除"""
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    asyncio.run(dispose_async_engines())
+    engine.dispose()
+    worker_engine.dispose()
+    shutil.rmtree(TEST_ROOT, ignore_errors=True)
+
+
+@pytest.fixture
+def db(database):
+    """テストごとのセッション（終了時に全テーブルとキャッシュを空にする）"""
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+        with engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(table.delete())
+            # 削除後の統計が残るとプランの比較がぶれるため消しておく
+            conn.execute(text("DROP TABLE IF EXISTS sqlite_stat1"))
+        for cache in (count_cache, summary_cache, stats_cache):
+            cache.clear()
+
+
+@pytest.fixture
+def create_project(db):
+    """ProjectService 経由でプロジェクト（顧客・敷地付き）を作成する関数"""
+    from app.schemas.project import CustomerCreate, ProjectCreate, SiteCreate
+    from app.services.project_service import ProjectService
+
+    def factory(project_name="テスト案件", owner_name="山田太郎", owner_kana="ヤマダタロウ",
+                client_name=None, status="事前相談", address="東京都千代田区千代田1-1"):
+        return ProjectService(db).create_project(ProjectCreate(
+            project_name=project_name,
+            status=status,
+            customer=CustomerCreate(owner_name=owner_name, owner_kana=owner_kana, client_name=client_name),
+            site=SiteCreate(address=address),
+        ))
+
+    return factory
+
+
+@pytest.fixture
+async def client(db):
+    """API を呼び出す HTTP クライアント（起動・終了イベントは実行しない）"""
+    import httpx
+
+    from app.main import app
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://localhost") as client:
+        yield client
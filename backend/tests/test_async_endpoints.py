@@ -0,0 +1,147 @@
+"""
+非同期セッション（get_async_db）を使うプロジェクト・申請エンドポイントのテスト
+"""
+
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+from app.models import Application, ApplicationType, Project
+
+
+@pytest.fixture
+def projects(db, create_project):
+    return [create_project(project_name=f"非同期{i}", status="受注" if i % 2 else "事前相談") for i in range(5)]
+
+
+@pytest.fixture
+def applications(db, projects):
+    application_type = ApplicationType(code="KAKUNIN", name="確認申請")
+    db.add(application_type)
+    db.flush()
+    applications = [
+        Application(project_id=project.id, application_type_id=application_type.id, notes=f"申請{i}")
+        for i, project in enumerate(projects)
+    ]
+    db.add_all(applications)
+    db.commit()
+    return applications
+
+
+async def test_project_list_offset_and_cursor(client, projects):
+    response = await client.get("/api/v1/projects/", params={"limit": 2})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == len(projects)
+    assert len(body["projects"]) == 2
+    assert body["next_cursor"] is None
+
+    seen, cursor = [], None
+    for _ in range(len(projects)):
+        params = {"limit": 2, "paging": "cursor"}
+        if cursor:
+            params["cursor"] = cursor
+        body = (await client.get("/api/v1/projects/", params=params)).json()
+        seen.extend(project["id"] for project in body["projects"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert sorted(seen) == sorted(project.id for project in projects)
+    assert len(seen) == len(projects)
+
+    filtered = (await client.get("/api/v1/projects/", params={"status": "受注"})).json()
+    assert filtered["total"] == 2
+    assert {project["status"] for project in filtered["projects"]} == {"受注"}
+
+    assert (await client.get("/api/v1/projects/", params={"paging": "cursor", "cursor": "broken"})).status_code == 400
+
+
+async def test_project_detail_and_update(client, db, projects):
+    project = projects[0]
+
+    response = await client.get(f"/api/v1/projects/{project.project_code}")
+    assert response.status_code == 200
+    assert response.json()["project_name"] == "非同期0"
+
+    response = await client.put(f"/api/v1/projects/{project.id}", json={"project_name": "更新後", "status": "申請作業"})
+    assert response.status_code == 200
+    assert (response.json()["project_name"], response.json()["status"]) == ("更新後", "申請作業")
+
+    # 非同期セッションの書き込みが同期セッションから見える
+    db.expire_all()
+    assert db.get(Project, project.id).project_name == "更新後"
+    assert (await client.get(f"/api/v1/projects/{project.project_code}")).json()["project_name"] == "更新後"
+
+    assert (await client.put("/api/v1/projects/999999", json={"project_name": "なし"})).status_code == 404
+    assert (await client.get("/api/v1/projects/NO-SUCH-CODE")).status_code == 404
+
+
+async def test_application_list_detail_and_update(client, db, projects, applications):
+    response = await client.get("/api/v1/applications/", params={"project_id": projects[1].id})
+    assert response.status_code == 200
+    assert [a["id"] for a in response.json()["applications"]] == [applications[1].id]
+    assert response.json()["total"] == 1
+
+    body = (await client.get("/api/v1/applications/", params={"paging": "cursor", "limit": 3})).json()
+    assert len(body["applications"]) == 3
+    assert body["next_cursor"] is not None
+
+    application = applications[0]
+    response = await client.get(f"/api/v1/applications/{application.id}")
+    assert response.status_code == 200
+    assert response.json()["notes"] == "申請0"
+
+    response = await client.put(f"/api/v1/applications/{application.id}", json={"notes": "更新後の備考"})
+    assert response.status_code == 200
+    assert response.json()["notes"] == "更新後の備考"
+    db.expire_all()
+    assert db.get(Application, application.id).notes == "更新後の備考"
+
+    assert (await client.get("/api/v1/applications/999999")).status_code == 404
+    assert (await client.put("/api/v1/applications/999999", json={"notes": "なし"})).status_code == 404
+
+
+@pytest.mark.parametrize("url", ["sqlite:///:memory:", "sqlite:///file:async_shared?mode=memory&uri=true"])
+def test_memory_database_is_shared_with_async_engine(url):
+    """メモリ上のデータベースでも同期・非同期のエンジンが同じデータベースを使う"""
+    script = textwrap.dedent("""
+        import asyncio
+
+        from sqlalchemy import select
+
+        from app.core.database import AsyncSessionLocal, SessionLocal, create_tables, dispose_async_engines
+        from app.models import Project
+
+        create_tables()
+        db = SessionLocal()
+        db.add(Project(project_code="M001", project_name="同期", status="事前相談"))
+        db.commit()
+
+        async def main():
+            async with AsyncSessionLocal() as session:
+                codes = (await session.execute(select(Project.project_code))).scalars().all()
+                session.add(Project(project_code="M002", project_name="非同期", status="事前相談"))
+                await session.commit()
+            await dispose_async_engines()
+            return codes
+
+        assert asyncio.run(main()) == ["M001"]
+        assert [p.project_code for p in db.query(Project).order_by(Project.id)] == ["M001", "M002"]
+        db.close()
+        print("ok")
+    """)
+    env = dict(os.environ, SQLITE_DATABASE_URL=url)
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=Path(__file__).resolve().parents[1],
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().endswith("ok")
@@ -0,0 +1,105 @@
+"""
+監査証跡のバッファリング書き込みのテスト
+"""
+
+from app.models import AuditTrail, Project
+from app.services.audit_service import (
+    AUDIT_MODE_ASYNC,
+    AUDIT_MODE_DURABLE,
+    AuditTrailBuffer,
+    AuditTrailWriter,
+)
+
+
+def add_project(db, code):
+    project = Project(project_code=code, project_name=f"案件{code}", status="事前相談")
+    db.add(project)
+    db.flush()
+    return project
+
+
+def test_durable_mode_writes_with_business_data(db):
+    buffer = AuditTrailBuffer(db, mode=AUDIT_MODE_DURABLE)
+    project = add_project(db, "A001")
+    buffer.add("Project", project.id, "CREATE", "project_name", new_value=project.project_name)
+    buffer.add("Project", project.id, "UPDATE", "status", "事前相談", "受注")
+
+    # コミットまでは書き込まない
+    assert db.query(AuditTrail).count() == 0
+    buffer.commit()
+
+    trails = db.query(AuditTrail).order_by(AuditTrail.id).all()
+    assert [(t.action, t.field_name) for t in trails] == [("CREATE", "project_name"), ("UPDATE", "status")]
+    assert buffer.rows == []
+
+
+def test_rollback_discards_buffered_rows(db):
+    buffer = AuditTrailBuffer(db, mode=AUDIT_MODE_DURABLE)
+    project = add_project(db, "A002")
+    buffer.add("Project", project.id, "CREATE", "project_name")
+
+    buffer.rollback()
+    buffer.commit()
+
+    assert db.query(Project).count() == 0
+    assert db.query(AuditTrail).count() == 0
+
+
+def test_async_mode_writes_after_commit_in_order(db, monkeypatch):
+    writer = AuditTrailWriter()
+    monkeypatch.setattr("app.services.audit_service.audit_writer", writer)
+    project = add_project(db, "A003")
+    for i in range(20):
+        buffer = AuditTrailBuffer(db, mode=AUDIT_MODE_ASYNC)
+        buffer.add("Project", project.id, "UPDATE", "status", str(i), str(i + 1))
+        buffer.commit()
+
+    assert writer.flush(timeout=10)
+    writer.shutdown()
+
+    trails = db.query(AuditTrail).filter(AuditTrail.target_id == project.id).order_by(AuditTrail.id).all()
+    assert [t.new_value for t in trails] == [str(i + 1) for i in range(20)]
+
+
+def test_writer_batches_queued_changes(db, monkeypatch):
+    writer = AuditTrailWriter(max_batch_rows=1000)
+    batches = []
+    write = writer._write
+    monkeypatch.setattr(writer, "_write", lambda rows: (batches.append(len(rows)), write(rows)))
+
+    # ワーカーが起動する前に溜まった変更は1回で書き込まれる
+    rows = [
+        [{"user_id": None, "target_model": "Project", "target_id": 1, "field_name": "status",
+          "old_value": "", "new_value": str(i), "action": "UPDATE", "timestamp": None}]
+        for i in range(10)
+    ]
+    for item in rows:
+        writer._queue.put(item)
+    writer._ensure_started()
+    assert writer.flush(timeout=10)
+    writer.shutdown()
+
+    assert batches == [10]
+    assert db.query(AuditTrail).count() == 10
+
+
+def test_writer_retries_failed_writes(db, monkeypatch):
+    writer = AuditTrailWriter(max_retries=3)
+    attempts = []
+    write = writer._write
+
+    def flaky(rows):
+        attempts.append(len(rows))
+        if len(attempts) == 1:
+            raise RuntimeError("database is locked")
+        write(rows)
+
+    monkeypatch.setattr(writer, "_write", flaky)
+    monkeypatch.setattr("app.services.audit_service.time.sleep", lambda seconds: None)
+    writer.enqueue([{"user_id": None, "target_model": "Project", "target_id": 1, "field_name": "status",
+                     "old_value": "", "new_value": "受注", "action": "UPDATE", "timestamp": None}])
+    assert writer.flush(timeout=10)
+    writer.shutdown()
+
+    assert attempts == [1, 1]
+    assert db.query(AuditTrail).count() == 1
@@ -0,0 +1,136 @@
+"""
+プロジェクト一括更新（セットベース）のテスト
+"""
+
+from sqlalchemy import event, text
+
+from app.core.database import engine
+from app.models import AuditTrail, Building, Customer, Project
+from app.schemas.project import BuildingUpdate, CustomerUpdate, ProjectUpdate
+from app.services.project_service import ProjectService
+
+
+def capture_updates(func):
+    """func の実行中に発行された UPDATE 文を記録"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("UPDATE"):
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        result = func()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return result, statements
+
+
+def test_bulk_update_diffs_rows_and_groups_updates(db, create_project):
+    unchanged = create_project(project_name="案件A", status="受注", owner_name="山田太郎")
+    changed = [
+        create_project(project_name="案件B", status="事前相談", owner_name="山田太郎"),
+        create_project(project_name="案件C", status="事前相談", owner_name="佐藤花子"),
+    ]
+    ids = [unchanged.id] + [p.id for p in changed]
+    db.query(AuditTrail).delete()
+    db.commit()
+
+    result, updates = capture_updates(lambda: ProjectService(db).bulk_update_projects(
+        ids + [ids[0], 999999],
+        ProjectUpdate(status="受注", customer=CustomerUpdate(owner_name="山田太郎")),
+    ))
+
+    assert result["updated_ids"] == ids
+    assert result["changed_ids"] == [p.id for p in changed]
+    assert result["failed"] == [{"project_id": 999999, "error": "プロジェクトが見つかりません"}]
+
+    # 変更カラムの組み合わせごとに1回（projects.status と customers.owner_name）
+    assert len([s for s in updates if s.startswith("UPDATE projects")]) == 1
+    assert len([s for s in updates if s.startswith("UPDATE customers")]) == 1
+
+    db.expire_all()
+    assert {p.status for p in db.query(Project).filter(Project.id.in_(ids))} == {"受注"}
+    assert {c.owner_name for c in db.query(Customer).filter(Customer.project_id.in_(ids))} == {"山田太郎"}
+
+    # 監査証跡は実際に変わった値だけ
+    trails = db.query(AuditTrail).all()
+    assert sorted((t.target_model, t.field_name, t.old_value, t.new_value) for t in trails) == [
+        ("Customer", "owner_name", "佐藤花子", "山田太郎"),
+        ("Project", "status", "事前相談", "受注"),
+        ("Project", "status", "事前相談", "受注"),
+    ]
+
+
+def test_bulk_update_creates_missing_buildings(db, create_project):
+    projects = [create_project(project_name=f"案件{i}") for i in range(3)]
+    ids = [p.id for p in projects]
+
+    result = ProjectService(db).bulk_update_projects(ids, ProjectUpdate(building=BuildingUpdate(structure="木造")))
+
+    assert result["changed_ids"] == ids
+    buildings = db.query(Building).filter(Building.project_id.in_(ids)).all()
+    assert sorted(b.project_id for b in buildings) == ids
+    assert {b.structure for b in buildings} == {"木造"}
+
+    # 2回目は変更なし
+    again = ProjectService(db).bulk_update_projects(ids, ProjectUpdate(building=BuildingUpdate(structure="木造")))
+    assert again["updated_ids"] == ids
+    assert again["changed_ids"] == []
+
+
+def test_bulk_update_reindexes_renamed_projects(db, create_project):
+    project = create_project(project_name="旧名称の案件", owner_name="田中次郎")
+    service = ProjectService(db)
+
+    service.bulk_update_projects([project.id], ProjectUpdate(customer=CustomerUpdate(owner_name="鈴木三郎")))
+
+    assert service.search_projects("田中次郎") == []
+    assert [p.id for p in service.search_projects("鈴木三郎")] == [project.id]
+
+
+def test_failed_project_keeps_none_of_its_changes(db, create_project):
+    failing, succeeding = [create_project(project_name=f"案件{i}", owner_name="山田太郎") for i in range(2)]
+    # 建物の変更カラムの組み合わせを分けて、失敗するグループを failing だけにする
+    db.add_all([
+        Building(project_id=failing.id, structure="RC造", floors="2"),
+        Building(project_id=succeeding.id, structure="RC造", floors="1"),
+    ])
+    db.query(AuditTrail).delete()
+    db.commit()
+    db.execute(text(
+        "CREATE TRIGGER fail_building_update BEFORE UPDATE ON buildings "
+        f"WHEN NEW.project_id = {failing.id} BEGIN SELECT RAISE(ABORT, '建物の制約違反'); END"
+    ))
+    db.commit()
+
+    try:
+        result = ProjectService(db).bulk_update_projects(
+            [failing.id, succeeding.id],
+            ProjectUpdate(
+                status="受注",
+                customer=CustomerUpdate(owner_name="佐藤花子"),
+                building=BuildingUpdate(structure="木造", floors="2"),
+            ),
+        )
+    finally:
+        db.execute(text("DROP TRIGGER fail_building_update"))
+        db.commit()
+
+    assert [f["project_id"] for f in result["failed"]] == [failing.id]
+    assert "建物の制約違反" in result["failed"][0]["error"]
+    assert result["updated_ids"] == result["changed_ids"] == [succeeding.id]
+
+    db.expire_all()
+    # 失敗したプロジェクトはプロジェクト・顧客・建物のどれも変わらず、監査証跡もない
+    assert db.get(Project, failing.id).status == "事前相談"
+    assert db.query(Customer).filter_by(project_id=failing.id).one().owner_name == "山田太郎"
+    assert db.query(Building).filter_by(project_id=failing.id).one().structure == "RC造"
+    assert db.get(Project, succeeding.id).status == "受注"
+    assert db.query(Customer).filter_by(project_id=succeeding.id).one().owner_name == "佐藤花子"
+    assert db.query(Building).filter_by(project_id=succeeding.id).one().structure == "木造"
+
+    trails = db.query(AuditTrail).all()
+    assert {t.target_model for t in trails} == {"Project", "Customer", "Building"}
+    assert {t.target_id for t in trails if t.target_model == "Project"} == {succeeding.id}
+    assert len(trails) == 4
@@ -0,0 +1,172 @@
+"""
+サマリーキャッシュ（single-flight・無効化・ワーカー間の無効化）のテスト
+"""
+
+import asyncio
+import threading
+import time
+
+
+from app.api.api_v1.endpoints.database_admin import delete_table_row
+from app.core import cache
+from app.core.cache import (
+    SUMMARY_APPLICATIONS, SUMMARY_FINANCIALS, SUMMARY_PROJECTS, TTLCache,
+    count_cache, invalidate_summaries, summary_cache,
+)
+from app.core.event_bus import InMemoryEventBus
+from app.core.websocket_manager import ConnectionManager
+from app.models import Application, DocumentJob, Project
+from app.services.document_service import JOB_COMPLETED, DocumentJobWorker
+
+
+def test_get_or_set_computes_once_for_concurrent_callers():
+    ttl_cache = TTLCache(default_ttl=60)
+    calls = []
+    started = threading.Barrier(8)
+
+    def factory():
+        calls.append(1)
+        time.sleep(0.05)
+        return "value"
+
+    def worker(results):
+        started.wait()
+        results.append(ttl_cache.get_or_set("key", factory))
+
+    results = []
+    threads = [threading.Thread(target=worker, args=(results,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["value"] * 8
+    assert len(calls) == 1
+
+
+async def test_get_or_set_async_computes_once_for_concurrent_callers():
+    ttl_cache = TTLCache(default_ttl=60)
+    calls = []
+
+    async def factory():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "value"
+
+    results = await asyncio.gather(*[ttl_cache.get_or_set_async("key", factory) for _ in range(8)])
+
+    assert results == ["value"] * 8
+    assert len(calls) == 1
+
+
+def test_value_computed_across_invalidation_is_not_stored():
+    ttl_cache = TTLCache(default_ttl=60)
+
+    def factory():
+        # 計算中に書き込みがあった
+        ttl_cache.invalidate_prefix("summary")
+        return "stale"
+
+    assert ttl_cache.get_or_set(("summary", None), factory) == "stale"
+    assert ttl_cache.get(("summary", None)) is None
+
+
+def test_expired_entries_are_recomputed():
+    ttl_cache = TTLCache(default_ttl=0.01)
+    ttl_cache.set("key", 1)
+    time.sleep(0.02)
+    assert ttl_cache.get("key") is None
+
+
+def test_ttl_is_capped_for_multiple_workers_without_shared_bus(monkeypatch):
+    monkeypatch.setattr(cache.settings, "EVENT_BUS_BACKEND", "memory")
+    monkeypatch.setattr(cache.settings, "WEB_CONCURRENCY", 4)
+    assert cache._summary_ttl(300) == cache.settings.SUMMARY_CACHE_LOCAL_TTL
+
+    monkeypatch.setattr(cache.settings, "EVENT_BUS_BACKEND", "postgres")
+    assert cache._summary_ttl(300) == 300
+
+
+class RecordingBus(InMemoryEventBus):
+    """発行したイベントを記録するバス（他のワーカーには届けない）"""
+
+    def __init__(self):
+        super().__init__()
+        self.published = []
+
+    async def publish(self, event):
+        self.published.append(event)
+
+
+async def test_invalidation_is_published_to_other_workers():
+    manager = ConnectionManager()
+    bus = RecordingBus()
+    await manager.start_event_bus(bus)
+    try:
+        summary_cache.set((SUMMARY_PROJECTS,), "cached")
+
+        # 同期サービスはスレッドプールから呼ばれる
+        await asyncio.get_running_loop().run_in_executor(None, invalidate_summaries, SUMMARY_PROJECTS)
+        for _ in range(10):
+            await asyncio.sleep(0)
+
+        assert summary_cache.get((SUMMARY_PROJECTS,)) is None
+        assert bus.published == [{"cache_invalidate": [SUMMARY_PROJECTS]}]
+    finally:
+        await manager.stop_event_bus()
+        summary_cache.clear()
+
+
+def test_invalidation_from_another_worker_is_applied():
+    manager = ConnectionManager()
+    summary_cache.set((SUMMARY_APPLICATIONS,), "cached")
+    summary_cache.set((SUMMARY_FINANCIALS, "status"), "cached")
+    summary_cache.set((SUMMARY_PROJECTS,), "cached")
+
+    manager.deliver({"cache_invalidate": [SUMMARY_APPLICATIONS, SUMMARY_FINANCIALS]})
+
+    assert summary_cache.get((SUMMARY_APPLICATIONS,)) is None
+    assert summary_cache.get((SUMMARY_FINANCIALS, "status")) is None
+    assert summary_cache.get((SUMMARY_PROJECTS,)) == "cached"
+
+    # 取りこぼしの可能性がある場合はすべて破棄
+    count_cache.set(("projects", None), 10)
+    manager.deliver({"resync": True})
+    assert summary_cache.get((SUMMARY_PROJECTS,)) is None
+    assert count_cache.get(("projects", None)) is None
+
+
+def test_delete_table_row_invalidates_caches(db):
+    project = Project(project_code="C001", project_name="案件", status="事前相談")
+    db.add(project)
+    db.commit()
+    summary_cache.set((SUMMARY_PROJECTS,), "cached")
+    count_cache.set(("projects", None), 1)
+
+    delete_table_row("projects", project.id, db)
+
+    assert summary_cache.get((SUMMARY_PROJECTS,)) is None
+    assert count_cache.get(("projects", None)) is None
+
+
+def test_document_completion_invalidates_application_summary(db):
+    project = Project(project_code="C002", project_name="案件", status="事前相談")
+    db.add(project)
+    db.flush()
+    application = Application(project_id=project.id)
+    db.add(application)
+    db.flush()
+    job = DocumentJob(application_id=application.id, project_id=project.id, template_name="確認申請書.xlsx",
+                      status="running", attempts=1)
+    db.add(job)
+    db.commit()
+    summary_cache.set((SUMMARY_APPLICATIONS,), "cached")
+
+    status = DocumentJobWorker()._finish(
+        {"id": job.id, "application_id": application.id, "attempts": 1, "max_attempts": 3,
+         "template_name": job.template_name},
+        "/tmp/output.xlsx", None,
+    )
+
+    assert status == JOB_COMPLETED
+    assert summary_cache.get((SUMMARY_APPLICATIONS,)) is None
@@ -0,0 +1,187 @@
+"""
+データベースバックアップ（フル・差分と復元、ジョブの状態）のテスト
+"""
+
+import json
+import socket
+import sqlite3
+import uuid
+from pathlib import Path
+
+import pytest
+
+from app.core.config import settings
+from app.core.database import engine
+from app.services.database_backup import (
+    BACKUP_FULL,
+    BACKUP_INCREMENTAL,
+    JOB_COMPLETED,
+    JOB_FAILED,
+    JOB_RUNNING,
+    BackupJob,
+    DatabaseBackupService,
+)
+
+
+@pytest.fixture
+def service(tmp_path):
+    service = DatabaseBackupService(str(tmp_path / "backups"))
+    yield service
+    service.stop()
+
+
+def run_backup(service, kind=BACKUP_FULL):
+    job = service.start(kind)
+    # 1件ずつ実行するため、停止すると完了まで待つ
+    service.stop()
+    return job
+
+
+def project_names(path):
+    connection = sqlite3.connect(path)
+    try:
+        return [row[0] for row in connection.execute("SELECT project_name FROM projects ORDER BY id")]
+    finally:
+        connection.close()
+
+
+def test_incremental_backup_restores_latest_state(db, service, create_project, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "BACKUP_PAGES_PER_STEP", 4)
+    for i in range(3):
+        create_project(project_name=f"フル{i}")
+    full = run_backup(service)
+    assert full.status == JOB_COMPLETED, full.error
+
+    for i in range(2):
+        create_project(project_name=f"差分{i}")
+    incremental = run_backup(service, BACKUP_INCREMENTAL)
+    assert incremental.status == JOB_COMPLETED, incremental.error
+    assert incremental.base == full.name
+
+    backups = {backup["name"]: backup for backup in service.list_backups()}
+    # 変更されたページだけを保存する
+    assert 0 < backups[incremental.name]["changed_pages"] < backups[incremental.name]["page_count"]
+
+    restored = service.restore_sqlite(incremental.name, str(tmp_path / "incremental.db"))
+    assert project_names(restored) == ["フル0", "フル1", "フル2", "差分0", "差分1"]
+    connection = sqlite3.connect(restored)
+    assert connection.execute("PRAGMA integrity_check").fetchone() == ("ok",)
+    connection.close()
+
+    restored = service.restore_sqlite(full.name, str(tmp_path / "full.db"))
+    assert project_names(restored) == ["フル0", "フル1", "フル2"]
+
+
+def test_backup_falls_back_to_vacuum_into_when_writes_keep_restarting_it(
+    db, service, create_project, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(settings, "BACKUP_PAGES_PER_STEP", 1)
+    monkeypatch.setattr(settings, "BACKUP_MAX_RESTARTS", 2)
+    create_project(project_name="既存")
+
+    writer = sqlite3.connect(engine.url.database)
+    progress = []
+
+    def report(value):
+        # 1ステップごとに別の接続から書き込み、オンラインバックアップを先頭からやり直させる
+        progress.append(value)
+        writer.execute("UPDATE projects SET project_name = ?", (f"書き込み{len(progress)}",))
+        writer.commit()
+
+    destination = str(tmp_path / "snapshot.db")
+    try:
+        service._snapshot_sqlite(destination, report, 100)
+    finally:
+        writer.close()
+
+    assert progress[-1] == 100
+    assert len(progress) <= settings.BACKUP_MAX_RESTARTS + 2
+    # VACUUM INTO の時点までの書き込みを含む整合したコピーになる
+    assert project_names(destination) == [f"書き込み{len(progress) - 1}"]
+    connection = sqlite3.connect(destination)
+    assert connection.execute("PRAGMA integrity_check").fetchone() == ("ok",)
+    connection.close()
+
+
+def test_backups_without_metadata_are_listed_and_restorable(db, service, create_project, tmp_path):
+    create_project(project_name="以前の形式")
+    Path(service.backup_dir).mkdir(parents=True)
+    source = sqlite3.connect(engine.url.database)
+    target = sqlite3.connect(str(Path(service.backup_dir) / "backup_20240101_120000.db"))
+    source.backup(target)
+    target.close()
+    source.close()
+    (Path(service.backup_dir) / "backup_20240102_090000.sql").write_bytes(b"PGDMP")
+    (Path(service.backup_dir) / "notes.db").write_bytes(b"")
+
+    backups = {backup["name"]: backup for backup in service.list_backups()}
+    assert set(backups) == {"backup_20240101_120000", "backup_20240102_090000"}
+    legacy = backups["backup_20240101_120000"]
+    assert (legacy["kind"], legacy["database"], legacy["legacy"]) == (BACKUP_FULL, "sqlite", True)
+    assert legacy["created_at"] == "2024-01-01T12:00:00"
+    assert backups["backup_20240102_090000"]["database"] == "postgresql"
+
+    restored = service.restore_sqlite("backup_20240101_120000", str(tmp_path / "legacy.db"))
+    assert project_names(restored) == ["以前の形式"]
+
+    # 新しいバックアップと名前が重ならない
+    job = run_backup(service)
+    assert job.status == JOB_COMPLETED, job.error
+    assert job.name not in backups
+
+
+def test_incremental_requires_full_backup(service):
+    with pytest.raises(ValueError, match="フルバックアップがありません"):
+        service.start(BACKUP_INCREMENTAL)
+
+
+def test_restore_unknown_backup(service, tmp_path):
+    with pytest.raises(ValueError, match="バックアップが見つかりません"):
+        service.restore_sqlite("backup_missing", str(tmp_path / "restored.db"))
+
+
+def test_jobs_are_visible_to_other_processes(db, service):
+    job = run_backup(service)
+
+    # 別のワーカープロセス・再起動後のサービスからも参照できる
+    other = DatabaseBackupService(service.backup_dir)
+    loaded = other.get_job(job.id)
+    assert loaded is not None
+    assert (loaded.status, loaded.progress, loaded.filename) == (JOB_COMPLETED, 100, job.filename)
+    assert loaded.created_at == job.created_at
+    assert [j.id for j in other.get_jobs()] == [job.id]
+    assert other.get_job(uuid.uuid4().hex) is None
+    assert other.get_job("../backup") is None
+
+
+def test_jobs_of_terminated_process_are_reported_as_interrupted(service):
+    job = BackupJob(
+        id=uuid.uuid4().hex, kind=BACKUP_FULL, name="backup_interrupted", status=JOB_RUNNING,
+        worker=f"{socket.gethostname()}:999999999"
+    )
+    jobs_dir = Path(service._jobs_dir)
+    jobs_dir.mkdir(parents=True)
+    (jobs_dir / f"{job.id}.json").write_text(json.dumps(job.to_dict(), default=str), encoding="utf-8")
+
+    loaded = service.get_job(job.id)
+    assert loaded.status == JOB_FAILED
+    assert "中断" in loaded.error
+
+
+async def test_backup_job_endpoints(client, db, monkeypatch, tmp_path):
+    service = DatabaseBackupService(str(tmp_path / "api-backups"))
+    monkeypatch.setattr("app.api.api_v1.endpoints.database_admin.backup_service", service)
+    response = await client.post("/api/v1/admin/database/backup")
+    service.stop()
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    # このプロセスが保持していないジョブもファイルから返す
+    monkeypatch.setattr(
+        "app.api.api_v1.endpoints.database_admin.backup_service", DatabaseBackupService(service.backup_dir)
+    )
+    response = await client.get(f"/api/v1/admin/database/backup/jobs/{job_id}")
+    assert response.status_code == 200
+    assert response.json()["status"] == JOB_COMPLETED
+    assert [job["id"] for job in (await client.get("/api/v1/admin/database/backup/jobs")).json()] == [job_id]
+    assert (await client.get(f"/api/v1/admin/database/backup/jobs/{uuid.uuid4().hex}")).status_code == 404
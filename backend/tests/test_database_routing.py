@@ -0,0 +1,150 @@
+"""
+SQLite（WAL）の読み取り・書き込みの振り分けのテスト
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from sqlalchemy import func, select, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.core.config import settings
+from app.core.database import (
+    AsyncSessionLocal,
+    SessionLocal,
+    WorkerSessionLocal,
+    async_engine,
+    async_read_engine,
+    engine,
+    read_engine,
+    worker_engine,
+)
+from app.models import Project
+from app.services.document_service import DocumentJobWorker
+from app.services.email_queue import EmailQueueWorker
+
+
+def test_sync_session_routes_reads_until_first_write(db):
+    assert db.get_bind(clause=select(Project)) is read_engine
+    assert db.get_bind(clause=text("SELECT 1")) is read_engine
+    assert db.get_bind(clause=select(Project).with_for_update()) is engine
+
+    db.add(Project(project_code="R001", project_name="振り分け", status="事前相談"))
+    db.flush()
+    # 自分の書き込みが見えるようコミットまでは書き込み用の接続で読む
+    assert db.get_bind(clause=select(Project)) is engine
+    db.commit()
+    assert db.get_bind(clause=select(Project)) is read_engine
+
+
+async def test_async_session_routes_reads_until_first_write(db):
+    async with AsyncSessionLocal() as session:
+        sync_session = session.sync_session
+        assert sync_session.get_bind(clause=select(Project)) is async_read_engine.sync_engine
+
+        session.add(Project(project_code="R002", project_name="振り分け", status="事前相談"))
+        await session.flush()
+        assert sync_session.get_bind(clause=select(Project)) is async_engine.sync_engine
+        assert (await session.execute(select(Project.project_code))).scalars().all() == ["R002"]
+        await session.commit()
+
+        assert sync_session.get_bind(clause=select(Project)) is async_read_engine.sync_engine
+        assert (await session.execute(select(Project.project_code))).scalars().all() == ["R002"]
+
+
+async def test_reads_run_concurrently_while_write_transaction_is_open(db):
+    db.add(Project(project_code="R003", project_name="コミット済み", status="事前相談"))
+    db.commit()
+
+    started = 0
+    both_started = asyncio.Event()
+
+    async def read():
+        nonlocal started
+        async with AsyncSessionLocal() as session:
+            count = (await session.execute(select(func.count(Project.id)))).scalar()
+            assert (await session.execute(text("SELECT 1"))).scalar() == 1
+            # 2つの読み取りが同時に接続を保持している状態を作る
+            started += 1
+            if started == 2:
+                both_started.set()
+            await both_started.wait()
+            return count
+
+    async with AsyncSessionLocal() as writer:
+        writer.add(Project(project_code="R004", project_name="未コミット", status="事前相談"))
+        await writer.flush()
+        # 書き込み用の唯一の接続はこのトランザクションが保持している
+        assert async_engine.pool.checkedout() == 1
+
+        counts = await asyncio.wait_for(asyncio.gather(read(), read()), timeout=10)
+
+        # 未コミットの行は見えない
+        assert counts == [1, 1]
+        await writer.rollback()
+
+
+async def test_read_connections_are_read_only(db):
+    async with async_read_engine.connect() as connection:
+        assert (await connection.execute(text("PRAGMA query_only"))).scalar() == 1
+        try:
+            await connection.execute(text("DELETE FROM projects"))
+        except Exception as e:
+            assert "readonly" in str(e).replace(" ", "").lower()
+        else:
+            raise AssertionError("読み取り専用の接続で書き込めてしまいました")
+
+
+def test_request_writes_while_worker_holds_its_connection(db):
+    assert EmailQueueWorker()._session_factory is WorkerSessionLocal
+    assert DocumentJobWorker()._session_factory is WorkerSessionLocal
+
+    holding = threading.Event()
+    release = threading.Event()
+
+    def worker():
+        session = WorkerSessionLocal()
+        try:
+            # ワーカーが書き込み用の接続を取り出したまま次の処理を待っている状態
+            session.connection()
+            holding.set()
+            release.wait(10)
+        finally:
+            session.close()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    try:
+        assert holding.wait(10)
+        assert worker_engine.pool.checkedout() == 1
+
+        started = time.monotonic()
+        db.add(Project(project_code="R005", project_name="リクエスト", status="事前相談"))
+        db.commit()
+        # リクエストはワーカーの接続が空くのを待たない
+        assert time.monotonic() - started < 2
+    finally:
+        release.set()
+        thread.join(10)
+
+
+def test_request_gives_up_waiting_for_the_write_connection(db, monkeypatch):
+    assert engine.pool.timeout() == settings.SQLITE_WRITE_POOL_TIMEOUT
+    # テストでは待ち時間を短くする
+    monkeypatch.setattr(engine.pool, "_timeout", 0.2)
+
+    with engine.connect():
+        started = time.monotonic()
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+        assert time.monotonic() - started < 2
+
+
+def test_sync_session_factory_uses_routing_session():
+    session = SessionLocal()
+    try:
+        assert session.get_bind() is engine
+    finally:
+        session.close()
@@ -0,0 +1,118 @@
+"""
+データベース統計情報のテスト
+"""
+
+import pytest
+from sqlalchemy import event, text
+
+from app.core.database import Base, engine, read_engine
+from app.models import Project
+from app.services.database_admin_service import DatabaseStatsService, format_size, get_cached_database_stats
+
+
+@pytest.fixture
+def projects(db, create_project):
+    return [create_project(project_name=f"統計{i}") for i in range(5)]
+
+
+def table_stats(stats, name):
+    return next(info for info in stats["tables"] if info["name"] == name)
+
+
+def count_statements(func):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(read_engine, "before_cursor_execute", record)
+    try:
+        return func(), statements
+    finally:
+        event.remove(read_engine, "before_cursor_execute", record)
+
+
+def test_estimates_use_a_fixed_number_of_queries(projects):
+    stats, statements = count_statements(lambda: DatabaseStatsService().collect())
+
+    # テーブル数によらず数回のクエリで集計する
+    assert len(Base.metadata.tables) > len(statements)
+    assert len(statements) <= 6
+    assert stats["exact"] is False
+    assert {info["name"] for info in stats["tables"]} >= set(Base.metadata.tables)
+    # 未分析のテーブルは MAX(rowid) で近似する
+    assert table_stats(stats, "projects")["rows"] == 5
+    assert table_stats(stats, "projects")["last_updated"] == "不明"
+    assert stats["total_rows"] == sum(info["rows"] for info in stats["tables"])
+
+
+def test_estimates_use_analyzed_row_counts(db, projects):
+    # 最大の rowid と件数が異なる状態にする
+    db.query(Project).filter(Project.id.in_([p.id for p in projects[:2]])).delete(synchronize_session=False)
+    db.commit()
+    assert table_stats(DatabaseStatsService().collect(), "projects")["rows"] == 5
+
+    with engine.begin() as connection:
+        connection.execute(text("ANALYZE"))
+
+    assert table_stats(DatabaseStatsService().collect(), "projects")["rows"] == 3
+
+
+def test_exact_counts_rows_and_last_update(db, projects):
+    projects[0].project_name = "更新"
+    db.commit()
+
+    stats = DatabaseStatsService().collect(exact=True)
+
+    info = table_stats(stats, "projects")
+    assert stats["exact"] is True
+    assert info["rows"] == 5
+    assert info["last_updated"] != "不明"
+    assert table_stats(stats, "email_jobs")["rows"] == 0
+
+
+def test_table_sizes_are_opt_in(projects):
+    stats, statements = count_statements(lambda: DatabaseStatsService().collect())
+
+    # 既定では dbstat（ファイル全体の走査）を使わず、全体のサイズだけ page_count * page_size で返す
+    assert not any("dbstat" in statement for statement in statements)
+    assert stats["total_size"].endswith(("bytes", "kB", "MB"))
+    assert table_stats(stats, "projects")["size_bytes"] is None
+    assert table_stats(stats, "projects")["size"] == "不明"
+    assert stats["performance_stats"] == {"avg_query_time": "0ms", "slow_queries": 0, "cache_hit_ratio": "0%"}
+
+    sized = DatabaseStatsService().collect(sizes=True)
+    assert table_stats(sized, "projects")["size_bytes"] > 0
+    assert table_stats(sized, "projects")["size"].endswith(("bytes", "kB", "MB"))
+
+
+@pytest.mark.parametrize("size, expected", [
+    (None, "不明"),
+    (0, "0 bytes"),
+    (10 * 1024 - 1, "10239 bytes"),
+    (10 * 1024, "10 kB"),
+    (10 * 1024 * 1024, "10 MB"),
+    (3 * 1024 ** 5, "3072 TB"),
+])
+def test_format_size(size, expected):
+    assert format_size(size) == expected
+
+
+def test_stats_are_cached_until_refresh(db, projects, create_project):
+    first = get_cached_database_stats()
+    create_project(project_name="追加")
+
+    assert get_cached_database_stats() is first
+    refreshed = get_cached_database_stats(refresh=True)
+    assert table_stats(refreshed, "projects")["rows"] == 6
+    # exact・sizes は別のキャッシュ
+    assert get_cached_database_stats(exact=True)["exact"] is True
+    assert table_stats(get_cached_database_stats(sizes=True), "projects")["size_bytes"] > 0
+
+
+async def test_stats_endpoint(client, projects):
+    response = await client.get("/api/v1/admin/database/stats", params={"exact": True, "sizes": True})
+
+    assert response.status_code == 200
+    assert table_stats(response.json(), "projects")["rows"] == 5
+    assert table_stats(response.json(), "projects")["size_bytes"] > 0
@@ -0,0 +1,103 @@
+"""
+書類の一括作成（ZIP のストリーミング）のテスト
+"""
+
+import io
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from openpyxl import load_workbook
+
+from app.core.config import settings
+from app.services.document_batch import stream_document_zip
+
+TEMPLATE = "1-01_案件概要書.xlsx"
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    # テストではプロセスを起動せずスレッドで作成する
+    executor = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr("app.services.document_batch.get_process_pool", lambda: executor)
+    yield executor
+    executor.shutdown()
+
+
+@pytest.fixture
+def projects(db, create_project):
+    projects = [create_project(project_name=f"一括{i}") for i in range(5)]
+    return [(project.id, project.project_code) for project in projects]
+
+
+async def collect(template_name, project_ids):
+    return [chunk async for chunk in stream_document_zip(template_name, project_ids)]
+
+
+async def test_zip_contains_document_per_project(projects, executor, monkeypatch):
+    monkeypatch.setattr(settings, "DOCUMENT_BATCH_CHUNK_SIZE", 2)
+    chunks = await collect(TEMPLATE, [project_id for project_id, _ in projects])
+
+    # チャンクごとに ZIP の一部を送信する
+    assert len([chunk for chunk in chunks if chunk]) > 1
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    assert archive.testzip() is None
+    assert sorted(archive.namelist()) == sorted(f"1-01_案件概要書_{code}.xlsx" for _, code in projects)
+    assert {info.compress_type for info in archive.infolist()} == {zipfile.ZIP_STORED}
+
+    workbook = load_workbook(io.BytesIO(archive.read(f"1-01_案件概要書_{projects[3][1]}.xlsx")))
+    assert workbook.worksheets[0]["C6"].value == "一括3"
+
+
+async def test_failed_chunks_are_listed_in_errors(projects, monkeypatch):
+    calls = []
+
+    def render(template_path, values_list):
+        calls.append(len(values_list))
+        if len(calls) == 1:
+            raise RuntimeError("render failed")
+        return [b"xlsx"] * len(values_list)
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr("app.services.document_batch.get_process_pool", lambda: executor)
+    monkeypatch.setattr("app.services.document_batch.render_workbook_contents", render)
+    monkeypatch.setattr(settings, "DOCUMENT_BATCH_CHUNK_SIZE", 2)
+    try:
+        chunks = await collect(TEMPLATE, [project_id for project_id, _ in projects])
+    finally:
+        executor.shutdown()
+
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    failed = {code for _, code in projects[:2]}
+    assert set(archive.read("errors.txt").decode().split("\n")) == {f"{code}: render failed" for code in failed} | {""}
+    assert len(archive.namelist()) == len(projects) - len(failed) + 1
+
+
+async def test_missing_projects_are_skipped(projects, executor):
+    chunks = await collect(TEMPLATE, [projects[0][0], 999999])
+
+    assert zipfile.ZipFile(io.BytesIO(b"".join(chunks))).namelist() == [f"1-01_案件概要書_{projects[0][1]}.xlsx"]
+
+
+async def test_batch_endpoint_streams_zip(client, projects, executor):
+    response = await client.post("/api/v1/documents/batch", json={
+        "template_name": TEMPLATE,
+        "project_ids": [project_id for project_id, _ in projects[:3]],
+    })
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    assert response.headers["x-document-count"] == "3"
+    assert len(zipfile.ZipFile(io.BytesIO(response.content)).namelist()) == 3
+
+
+async def test_batch_endpoint_rejects_unknown_template(client, projects):
+    response = await client.post("/api/v1/documents/batch", json={"template_name": "存在しない.xlsx"})
+
+    assert response.status_code == 404
+
+
+async def test_batch_endpoint_rejects_empty_selection(client, projects):
+    response = await client.post("/api/v1/documents/batch", json={"template_name": TEMPLATE, "project_ids": [999999]})
+
+    assert response.status_code == 404
@@ -0,0 +1,190 @@
+"""
+書類生成ジョブ（document_jobs）の取得・再試行のテスト
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import pytest
+from openpyxl import load_workbook
+
+from app.core.config import settings
+from app.models.document_job import DocumentJob
+from app.models.project import Application
+from app.services.document_service import (
+    DEFAULT_DOCUMENT_TEMPLATES,
+    JOB_COMPLETED,
+    JOB_FAILED,
+    JOB_QUEUED,
+    JOB_RUNNING,
+    DocumentJobService,
+    DocumentJobWorker,
+    _utcnow,
+    document_output_dir,
+)
+
+
+@pytest.fixture
+def application(db, create_project):
+    project = create_project(project_name="書類生成テスト")
+    application = Application(project_id=project.id)
+    db.add(application)
+    db.commit()
+    return application
+
+
+def enqueue(db, application):
+    jobs = DocumentJobService(db).enqueue_for_application(application)
+    db.commit()
+    return jobs
+
+
+def worker_named(name):
+    worker = DocumentJobWorker()
+    worker._name = name
+    return worker
+
+
+def test_enqueue_registers_default_templates(db, application):
+    jobs = enqueue(db, application)
+
+    assert [job.template_name for job in jobs] == DEFAULT_DOCUMENT_TEMPLATES
+    assert {job.status for job in jobs} == {JOB_QUEUED}
+    assert {job.max_attempts for job in jobs} == {settings.DOCUMENT_MAX_ATTEMPTS}
+
+    service = DocumentJobService(db)
+    assert [job.id for job in service.get_jobs(application_id=application.id)] == [j.id for j in reversed(jobs)]
+    assert service.get_jobs(status=JOB_COMPLETED) == []
+    assert service.get_job(jobs[0].id).template_name == DEFAULT_DOCUMENT_TEMPLATES[0]
+
+
+def test_claim_locks_jobs_once(db, application):
+    enqueue(db, application)
+    first = worker_named("host:1")._claim(1)
+    second = worker_named("host:2")._claim(5)
+
+    assert len(first) == 1 and len(second) == 1
+    assert first[0]["id"] != second[0]["id"]
+    assert first[0]["attempts"] == 1
+    assert worker_named("host:3")._claim(5) == []
+
+    db.expire_all()
+    jobs = {job.id: job for job in db.query(DocumentJob)}
+    assert jobs[first[0]["id"]].locked_by == "host:1"
+    assert jobs[second[0]["id"]].locked_by == "host:2"
+    assert {job.status for job in jobs.values()} == {JOB_RUNNING}
+
+
+def test_finish_success_records_output(db, application):
+    enqueue(db, application)
+    worker = worker_named("host:1")
+    job = worker._claim(1)[0]
+
+    assert worker._finish(job, "/tmp/out.xlsx", None) == JOB_COMPLETED
+
+    db.expire_all()
+    stored = db.get(DocumentJob, job["id"])
+    assert stored.status == JOB_COMPLETED
+    assert stored.progress == 100
+    assert stored.output_path == "/tmp/out.xlsx"
+    assert stored.locked_by is None
+    assert db.get(Application, application.id).generated_document_path == document_output_dir(application.id)
+
+
+def test_failure_is_retried_until_max_attempts(db, application, monkeypatch):
+    monkeypatch.setattr(settings, "DOCUMENT_MAX_ATTEMPTS", 2)
+    monkeypatch.setattr("app.services.document_service.DEFAULT_DOCUMENT_TEMPLATES", ["1-01_案件概要書.xlsx"])
+    enqueue(db, application)
+    worker = worker_named("host:1")
+
+    job = worker._claim(1)[0]
+    assert worker._finish(job, None, "render error") == JOB_QUEUED
+    db.expire_all()
+    stored = db.get(DocumentJob, job["id"])
+    assert (stored.status, stored.progress, stored.error, stored.locked_by) == (JOB_QUEUED, 0, "render error", None)
+
+    job = worker._claim(1)[0]
+    assert job["attempts"] == 2
+    assert worker._finish(job, None, "render error") == JOB_FAILED
+    db.expire_all()
+    stored = db.get(DocumentJob, job["id"])
+    assert stored.status == JOB_FAILED
+    assert stored.finished_at is not None
+    assert worker._claim(1) == []
+    assert db.get(Application, application.id).generated_document_path is None
+
+
+def test_release_and_stale_jobs_return_to_queue(db, application, monkeypatch):
+    monkeypatch.setattr(settings, "DOCUMENT_JOB_LOCK_TIMEOUT", 60)
+    enqueue(db, application)
+    worker = worker_named("host:1")
+    released, stale = worker._claim(2)
+
+    worker._release([released["id"]])
+    db.query(DocumentJob).filter(DocumentJob.id == stale["id"]).update(
+        {DocumentJob.locked_at: _utcnow() - timedelta(minutes=5)}
+    )
+    db.commit()
+    worker._release_stale_jobs()
+
+    db.expire_all()
+    assert db.get(DocumentJob, released["id"]).attempts == 0
+    assert db.get(DocumentJob, stale["id"]).attempts == 1
+    for job_id in (released["id"], stale["id"]):
+        stored = db.get(DocumentJob, job_id)
+        assert (stored.status, stored.progress, stored.locked_by) == (JOB_QUEUED, 0, None)
+
+
+async def test_worker_renders_documents(db, application, monkeypatch):
+    # テストではプロセスを起動せずスレッドで書き込む
+    executor = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr("app.services.document_service.get_process_pool", lambda: executor)
+    monkeypatch.setattr(settings, "DOCUMENT_POLL_INTERVAL", 0.05)
+    enqueue(db, application)
+
+    worker = DocumentJobWorker()
+    worker.start(workers=2)
+    try:
+        for _ in range(200):
+            db.expire_all()
+            statuses = {job.status for job in db.query(DocumentJob)}
+            if statuses <= {JOB_COMPLETED, JOB_FAILED}:
+                break
+            await asyncio.sleep(0.05)
+    finally:
+        await worker.stop()
+        executor.shutdown()
+
+    jobs = db.query(DocumentJob).order_by(DocumentJob.id).all()
+    assert [(job.status, job.error) for job in jobs] == [(JOB_COMPLETED, None)] * len(DEFAULT_DOCUMENT_TEMPLATES)
+    for job in jobs:
+        assert os.path.dirname(job.output_path) == document_output_dir(application.id)
+        load_workbook(job.output_path).close()
+
+
+async def test_worker_retries_missing_template(db, application, monkeypatch):
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr("app.services.document_service.get_process_pool", lambda: executor)
+    monkeypatch.setattr("app.services.document_service.DEFAULT_DOCUMENT_TEMPLATES", ["存在しない.xlsx"])
+    monkeypatch.setattr(settings, "DOCUMENT_POLL_INTERVAL", 0.05)
+    monkeypatch.setattr(settings, "DOCUMENT_MAX_ATTEMPTS", 2)
+    enqueue(db, application)
+
+    worker = DocumentJobWorker()
+    worker.start(workers=1)
+    try:
+        for _ in range(200):
+            db.expire_all()
+            if db.query(DocumentJob).one().status == JOB_FAILED:
+                break
+            await asyncio.sleep(0.05)
+    finally:
+        await worker.stop()
+        executor.shutdown()
+
+    job = db.query(DocumentJob).one()
+    assert job.status == JOB_FAILED
+    assert job.attempts == 2
+    assert job.error
@@ -0,0 +1,118 @@
+"""
+書類テンプレートのフィールドマッピングのテスト
+"""
+
+import json
+import os
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.core.database import engine, read_engine
+from app.models.project import Project
+from app.services.document_mapping import (
+    MAPPING_DIR,
+    TemplateMapping,
+    get_template_mapping,
+    load_template_mappings,
+)
+
+
+def test_shipped_mappings_are_valid():
+    mappings = load_template_mappings()
+
+    assert set(mappings) == {path.stem + ".xlsx" for path in MAPPING_DIR.glob("*.json")}
+    for template_name in mappings:
+        assert os.path.exists(os.path.join(settings.TEMPLATE_DIR, template_name))
+
+
+@pytest.mark.parametrize("fields, message", [
+    ({"A1": "project.no_such_column"}, "列 'no_such_column'"),
+    ({"A1": "unknown.project_name"}, "entity.column"),
+    ({"A1": "project"}, "entity.column"),
+    ({"A1": "customer.owner_name.extra"}, "entity.column"),
+    ({"A1": "{site.no_such_column} 様"}, "列 'no_such_column'"),
+    ({"A1": ""}, "A1 の定義が不正"),
+    ({"A1": 1}, "A1 の定義が不正"),
+])
+def test_invalid_references_are_rejected(fields, message):
+    with pytest.raises(ValueError, match=message):
+        TemplateMapping("test.xlsx", fields)
+
+
+def test_load_rejects_broken_file(tmp_path):
+    path = tmp_path / "broken.json"
+    path.write_text(json.dumps({"template": "broken.xlsx", "fields": {"C6": "project.name"}}), encoding="utf-8")
+
+    with pytest.raises(ValueError, match="broken.xlsx"):
+        load_template_mappings(tmp_path)
+    load_template_mappings()
+
+
+def test_unknown_template_is_rejected():
+    with pytest.raises(ValueError, match="マッピングが定義されていません"):
+        get_template_mapping("存在しない.xlsx")
+
+
+def test_only_referenced_tables_are_joined(db):
+    mapping = TemplateMapping("test.xlsx", {"A1": "project.project_name", "A2": "{customer.owner_name}　様"})
+
+    assert mapping.paths == ["project.project_name", "customer.owner_name"]
+    assert mapping.entities == ["customer"]
+    sql = str(mapping.query(db).statement).lower()
+    assert "customers" in sql
+    assert "sites" not in sql and "buildings" not in sql
+
+
+def test_fetch_builds_cell_values_in_one_query(db, create_project):
+    first = create_project(project_name="一件目", owner_name="山田太郎", client_name=None, address="東京都港区1-1")
+    second = create_project(project_name="二件目", owner_name="佐藤花子", client_name="佐藤工務店", address="大阪府大阪市2-2")
+    mapping = TemplateMapping("test.xlsx", {
+        "A1": "project.project_name",
+        "A2": "{customer.owner_name}　様",
+        "A3": "customer.client_name",
+        "A4": "site.address",
+        "シート2!B1": "today",
+        "B2": "{customer.client_name}",
+    })
+
+    project_ids = [second.id, first.id]
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    for bind in (engine, read_engine):
+        event.listen(bind, "before_cursor_execute", count)
+    try:
+        rows = mapping.fetch(db, project_ids)
+    finally:
+        for bind in (engine, read_engine):
+            event.remove(bind, "before_cursor_execute", count)
+
+    assert len(statements) == 1
+    assert [row.project_id for row in rows] == sorted(project_ids)
+    assert rows[0].project_code == first.project_code
+    # 値が空のセルは含めず、書式の中の空の値は空文字にする
+    assert rows[0].values == {
+        "A1": "一件目",
+        "A2": "山田太郎　様",
+        "A4": "東京都港区1-1",
+        "シート2!B1": date.today(),
+        "B2": "",
+    }
+    assert rows[1].values["A3"] == "佐藤工務店"
+    assert rows[1].values["B2"] == "佐藤工務店"
+
+
+def test_fetch_with_filtered_query(db, create_project):
+    create_project(project_name="対象外", status="事前相談")
+    target = create_project(project_name="対象", status="受注")
+    mapping = get_template_mapping("1-01_案件概要書.xlsx")
+
+    rows = mapping.fetch(db, query=mapping.query(db).filter(Project.status == "受注"))
+
+    assert [row.project_id for row in rows] == [target.id]
+    assert rows[0].values["C6"] == "対象"
@@ -0,0 +1,296 @@
+"""
+メール送信キュー（email_jobs）の取得・再試行のテスト
+"""
+
+import threading
+import time
+from datetime import timedelta
+
+import pytest
+
+from app.core.config import settings
+from app.models.email_job import EmailJob
+from app.services.email_queue import (
+    JOB_FAILED,
+    JOB_QUEUED,
+    JOB_SENDING,
+    JOB_SENT,
+    EmailQueue,
+    EmailQueueWorker,
+    TokenBucket,
+    _utcnow,
+)
+
+
+class FakeEmailService:
+    """送信結果を指定できるメールサービス"""
+
+    provider_name = "smtp"
+
+    def __init__(self, results=None):
+        self.results = list(results or [])
+        self.sent = []
+
+    def send_email(self, to_email, subject, body, is_html=False):
+        self.sent.append(to_email)
+        result = self.results.pop(0) if self.results else True
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+@pytest.fixture
+def email_service(monkeypatch):
+    service = FakeEmailService()
+    monkeypatch.setattr("app.services.email_queue.get_email_service", lambda: service)
+    return service
+
+
+def enqueue(db, count, batch_id=None):
+    messages = [
+        {"to_email": f"user{i}@example.com", "subject": f"件名{i}", "body": "本文"}
+        for i in range(count)
+    ]
+    batch_id = EmailQueue(db).enqueue(messages, batch_id)
+    db.commit()
+    return batch_id
+
+
+def test_enqueue_and_batch_status(db, email_service):
+    batch_id = enqueue(db, 3)
+
+    status = EmailQueue(db).get_batch_status(batch_id)
+    assert status["total"] == 3
+    assert status["queued"] == 3
+    assert status["completed"] is False
+    assert status["failures"] == []
+    assert EmailQueue(db).get_batch_status("missing") is None
+
+    jobs = db.query(EmailJob).filter(EmailJob.batch_id == batch_id).all()
+    assert {job.provider for job in jobs} == {"smtp"}
+    assert {job.max_attempts for job in jobs} == {settings.EMAIL_MAX_ATTEMPTS}
+
+
+def test_claim_locks_jobs_once(db, email_service, monkeypatch):
+    monkeypatch.setattr(settings, "EMAIL_QUEUE_BATCH_SIZE", 2)
+    enqueue(db, 3)
+    worker = EmailQueueWorker()
+
+    first = worker._claim("worker-a")
+    second = worker._claim("worker-b")
+    third = worker._claim("worker-c")
+
+    assert len(first) == 2 and len(second) == 1 and third == []
+    assert not {job["id"] for job in first} & {job["id"] for job in second}
+    assert all(job["attempts"] == 1 for job in first + second)
+
+    db.expire_all()
+    locked = {job.id: job.locked_by for job in db.query(EmailJob).filter(EmailJob.status == JOB_SENDING)}
+    assert locked == {
+        **{job["id"]: "worker-a" for job in first},
+        **{job["id"]: "worker-b" for job in second},
+    }
+
+
+def test_concurrent_claims_do_not_overlap(db, email_service, monkeypatch):
+    monkeypatch.setattr(settings, "EMAIL_QUEUE_BATCH_SIZE", 5)
+    enqueue(db, 20)
+    worker = EmailQueueWorker()
+    claimed = []
+    lock = threading.Lock()
+
+    def claim(name):
+        while True:
+            jobs = worker._claim(name)
+            if not jobs:
+                return
+            with lock:
+                claimed.extend(job["id"] for job in jobs)
+
+    threads = [threading.Thread(target=claim, args=(f"worker-{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(claimed) == 20
+    assert len(set(claimed)) == 20
+
+
+def test_claim_skips_jobs_waiting_for_retry(db, email_service):
+    enqueue(db, 1)
+    db.query(EmailJob).update({EmailJob.next_attempt_at: _utcnow() + timedelta(minutes=5)})
+    db.commit()
+
+    assert EmailQueueWorker()._claim("worker") == []
+
+
+def test_success_marks_job_sent(db, email_service):
+    batch_id = enqueue(db, 1)
+    worker = EmailQueueWorker()
+    job = worker._claim("worker")[0]
+
+    worker._process(job)
+
+    db.expire_all()
+    stored = db.get(EmailJob, job["id"])
+    assert stored.status == JOB_SENT
+    assert stored.sent_at is not None
+    assert stored.locked_by is None
+    assert email_service.sent == ["user0@example.com"]
+    assert EmailQueue(db).get_batch_status(batch_id)["completed"] is True
+
+
+def test_failure_is_retried_with_backoff(db, email_service, monkeypatch):
+    monkeypatch.setattr(settings, "EMAIL_RETRY_BASE_DELAY", 30.0)
+    email_service.results = [False, RuntimeError("connection lost")]
+    enqueue(db, 1)
+    worker = EmailQueueWorker()
+
+    job = worker._claim("worker")[0]
+    before = _utcnow()
+    worker._process(job)
+
+    db.expire_all()
+    stored = db.get(EmailJob, job["id"])
+    assert stored.status == JOB_QUEUED
+    assert stored.attempts == 1
+    assert stored.last_error == "Email delivery failed"
+    assert stored.locked_by is None
+    # 1回目の失敗後は基準の待ち時間（揺らぎは最大2割）
+    delay = (stored.next_attempt_at - before).total_seconds()
+    assert 30.0 <= delay <= 36.5
+    assert worker._claim("worker") == []
+
+    # 再試行時刻を過ぎると再び取得され、試行回数が増える
+    db.query(EmailJob).update({EmailJob.next_attempt_at: _utcnow()})
+    db.commit()
+    job = worker._claim("worker")[0]
+    assert job["attempts"] == 2
+    worker._process(job)
+
+    db.expire_all()
+    stored = db.get(EmailJob, job["id"])
+    assert stored.status == JOB_QUEUED
+    assert stored.last_error == "connection lost"
+    delay = (stored.next_attempt_at - before).total_seconds()
+    assert 60.0 <= delay <= 73.0
+
+
+def test_failure_after_max_attempts_marks_job_failed(db, email_service, monkeypatch):
+    monkeypatch.setattr(settings, "EMAIL_MAX_ATTEMPTS", 1)
+    email_service.results = [False]
+    batch_id = enqueue(db, 1)
+    worker = EmailQueueWorker()
+
+    worker._process(worker._claim("worker")[0])
+
+    status = EmailQueue(db).get_batch_status(batch_id)
+    assert status["failed"] == 1
+    assert status["completed"] is True
+    assert status["failures"][0]["email"] == "user0@example.com"
+    assert status["failures"][0]["attempts"] == 1
+    assert status["failures"][0]["error"] == "Email delivery failed"
+
+
+def test_backoff_is_capped(monkeypatch):
+    monkeypatch.setattr(settings, "EMAIL_RETRY_BASE_DELAY", 30.0)
+    monkeypatch.setattr(settings, "EMAIL_RETRY_MAX_DELAY", 100.0)
+
+    assert 30.0 <= EmailQueueWorker._backoff(1) <= 36.0
+    assert 60.0 <= EmailQueueWorker._backoff(2) <= 72.0
+    assert 100.0 <= EmailQueueWorker._backoff(10) <= 120.0
+
+
+def test_release_returns_unsent_jobs(db, email_service):
+    enqueue(db, 2)
+    worker = EmailQueueWorker()
+    jobs = worker._claim("worker")
+
+    worker._release([job["id"] for job in jobs])
+
+    db.expire_all()
+    stored = db.query(EmailJob).all()
+    assert {job.status for job in stored} == {JOB_QUEUED}
+    assert {job.attempts for job in stored} == {0}
+    assert {job.locked_by for job in stored} == {None}
+
+
+def test_stale_locks_are_released(db, email_service, monkeypatch):
+    monkeypatch.setattr(settings, "EMAIL_JOB_LOCK_TIMEOUT", 60)
+    enqueue(db, 2)
+    worker = EmailQueueWorker()
+    stale, fresh = worker._claim("worker")
+    db.query(EmailJob).filter(EmailJob.id == stale["id"]).update(
+        {EmailJob.locked_at: _utcnow() - timedelta(minutes=5)}
+    )
+    db.commit()
+
+    worker._release_stale_jobs()
+
+    db.expire_all()
+    assert db.get(EmailJob, stale["id"]).status == JOB_QUEUED
+    assert db.get(EmailJob, stale["id"]).locked_by is None
+    assert db.get(EmailJob, fresh["id"]).status == JOB_SENDING
+    # 中断されたジョブは再び取得できる
+    assert [job["id"] for job in worker._claim("other")] == [stale["id"]]
+
+
+def test_stale_jobs_at_attempt_limit_are_failed(db, email_service, monkeypatch):
+    monkeypatch.setattr(settings, "EMAIL_JOB_LOCK_TIMEOUT", 60)
+    enqueue(db, 2)
+    worker = EmailQueueWorker()
+    exhausted, retryable = worker._claim("worker")
+    # 取得時に1回目の試行として数えられている
+    db.query(EmailJob).filter(EmailJob.id == exhausted["id"]).update({EmailJob.max_attempts: 1})
+    db.query(EmailJob).update({EmailJob.locked_at: _utcnow() - timedelta(minutes=5)})
+    db.commit()
+
+    worker._release_stale_jobs()
+
+    db.expire_all()
+    job = db.get(EmailJob, exhausted["id"])
+    assert (job.status, job.locked_by) == (JOB_FAILED, None)
+    assert "上限" in job.last_error
+    assert db.get(EmailJob, retryable["id"]).status == JOB_QUEUED
+    # 失敗にしたジョブは再送されない
+    assert [job["id"] for job in worker._claim("other")] == [retryable["id"]]
+
+
+def test_worker_threads_send_all_jobs(db, email_service, monkeypatch):
+    monkeypatch.setattr(settings, "EMAIL_RATE_LIMITS", {"smtp": 1000.0})
+    batch_id = enqueue(db, 10)
+    worker = EmailQueueWorker()
+    worker.start(workers=2)
+    try:
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            db.expire_all()
+            if EmailQueue(db).get_batch_status(batch_id)["completed"]:
+                break
+            worker.wake()
+            time.sleep(0.05)
+    finally:
+        worker.stop()
+
+    status = EmailQueue(db).get_batch_status(batch_id)
+    assert status["sent"] == 10
+    assert sorted(email_service.sent) == sorted(f"user{i}@example.com" for i in range(10))
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=20.0, burst=2)
+    started = time.monotonic()
+    for _ in range(6):
+        assert bucket.acquire()
+    # バースト2件の後は 20件/秒 で補充される
+    assert time.monotonic() - started >= 4 / 20.0 * 0.9
+
+
+def test_token_bucket_stops_waiting_on_stop_event():
+    bucket = TokenBucket(rate=0.01, burst=1)
+    stop = threading.Event()
+    assert bucket.acquire(stop)
+
+    stop.set()
+    assert bucket.acquire(stop) is False
@@ -0,0 +1,136 @@
+"""
+SMTP 接続プールのテスト（ローカルの簡易 SMTP サーバーを使用）
+"""
+
+import smtplib
+import socketserver
+import threading
+
+import pytest
+
+from app.services.email_service import SMTPConnectionPool
+
+
+class FakeSMTPServer(socketserver.ThreadingTCPServer):
+    """
+    最低限のコマンドだけに応答する SMTP サーバー
+
+    - refused を含む宛先は RCPT で 550 を返す
+    - drop_after_message が True の場合、1通受け取るごとに接続を切る
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeSMTPHandler)
+        self.drop_after_message = False
+        self.connections = 0
+        self.messages = []
+        self.commands = []
+        self._lock = threading.Lock()
+
+    def record(self, command):
+        with self._lock:
+            self.commands.append(command)
+
+
+class FakeSMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        with server._lock:
+            server.connections += 1
+        self.reply("220 fake ESMTP")
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip()
+            verb = command.split(" ", 1)[0].upper()
+            server.record(verb)
+            if verb in ("EHLO", "HELO"):
+                self.reply("250 fake")
+            elif verb == "MAIL":
+                recipients = []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                if "refused" in command:
+                    self.reply("550 mailbox unavailable")
+                else:
+                    recipients.append(command)
+                    self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 go ahead")
+                while self.rfile.readline().rstrip(b"\r\n") != b".":
+                    pass
+                server.messages.append(recipients)
+                self.reply("250 queued")
+                if server.drop_after_message:
+                    return
+            elif verb == "RSET":
+                recipients = []
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("250 OK")
+
+
+@pytest.fixture
+def smtp_server():
+    server = FakeSMTPServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def pool(smtp_server):
+    host, port = smtp_server.server_address
+    pool = SMTPConnectionPool(lambda: smtplib.SMTP(host, port, timeout=5), pool_size=1)
+    yield pool
+    pool.close()
+
+
+def test_refused_recipient_resets_session_without_resending(smtp_server, pool):
+    with pytest.raises(smtplib.SMTPRecipientsRefused):
+        pool.sendmail("from@example.com", "refused@example.com", "Subject: test\r\n\r\nbody")
+
+    # 再接続・再送はせず、RSET した同じ接続で次の送信を行う
+    assert smtp_server.commands.count("MAIL") == 1
+    assert "RSET" in smtp_server.commands
+
+    pool.sendmail("from@example.com", "user@example.com", "Subject: test\r\n\r\nbody")
+    assert smtp_server.connections == 1
+    assert len(smtp_server.messages) == 1
+
+
+def test_dropped_connection_reconnects_and_resends_once(smtp_server, pool):
+    smtp_server.drop_after_message = True
+
+    pool.sendmail("from@example.com", "first@example.com", "Subject: 1\r\n\r\nbody")
+    # サーバーが切断した接続はプールに残っており、送信時に切断が分かる
+    pool.sendmail("from@example.com", "second@example.com", "Subject: 2\r\n\r\nbody")
+
+    assert smtp_server.connections == 2
+    assert len(smtp_server.messages) == 2
+
+
+def test_connection_failure_is_raised_after_one_retry(smtp_server):
+    attempts = []
+
+    def connect():
+        attempts.append(1)
+        raise ConnectionRefusedError("refused")
+
+    pool = SMTPConnectionPool(connect, pool_size=1)
+    with pytest.raises(ConnectionRefusedError):
+        pool.sendmail("from@example.com", "user@example.com", "body")
+    assert len(attempts) == 1
@@ -0,0 +1,46 @@
+"""
+イベントバスのテスト
+"""
+
+import pytest
+
+from app.core import event_bus
+from app.core.event_bus import EventBus, InMemoryEventBus, create_event_bus
+
+
+def test_event_bus_is_abstract():
+    with pytest.raises(TypeError):
+        EventBus()
+
+    class Incomplete(EventBus):
+        async def start(self, handler):
+            pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+async def test_in_memory_bus_delivers_to_handler():
+    received = []
+    bus = InMemoryEventBus()
+    await bus.start(received.append)
+
+    await bus.publish({"text": "hello"})
+    await bus.stop()
+    await bus.publish({"text": "after stop"})
+
+    assert received == [{"text": "hello"}]
+
+
+def test_create_event_bus_validates_backend(monkeypatch):
+    monkeypatch.setattr(event_bus.settings, "EVENT_BUS_BACKEND", "memory")
+    assert isinstance(create_event_bus(), InMemoryEventBus)
+
+    monkeypatch.setattr(event_bus.settings, "EVENT_BUS_BACKEND", "postgres")
+    monkeypatch.setattr(event_bus.settings, "USE_SQLITE", True)
+    with pytest.raises(ValueError):
+        create_event_bus()
+
+    monkeypatch.setattr(event_bus.settings, "EVENT_BUS_BACKEND", "redis")
+    with pytest.raises(ValueError):
+        create_event_bus()
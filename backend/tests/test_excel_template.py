@@ -0,0 +1,125 @@
+"""
+パース済み Excel テンプレートのキャッシュとセルの復元のテスト
+"""
+
+import io
+import os
+
+import pytest
+from openpyxl import Workbook, load_workbook
+
+from app.services.document_renderer import render_workbook, render_workbook_contents
+from app.services.excel_template import TemplateCache
+
+
+@pytest.fixture
+def template_path(tmp_path):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = "概要"
+    sheet["A1"] = "案件名"
+    sheet["B1"] = "（未入力）"
+    sheet["C1"] = 0.5
+    sheet["C1"].number_format = "0.00%"
+    second = workbook.create_sheet("明細")
+    second["A1"] = "明細"
+    path = tmp_path / "template.xlsx"
+    workbook.save(path)
+    return str(path)
+
+
+def read(content):
+    return load_workbook(io.BytesIO(content))
+
+
+def test_render_writes_cells_on_each_sheet(template_path):
+    cache = TemplateCache()
+    workbook = read(cache.render(template_path, {"B1": "新築工事", "明細!B2": 100}))
+
+    assert workbook["概要"]["A1"].value == "案件名"
+    assert workbook["概要"]["B1"].value == "新築工事"
+    assert workbook["明細"]["B2"].value == 100
+
+
+def test_cells_are_restored_between_renders(template_path):
+    cache = TemplateCache()
+    cache.render(template_path, {"B1": "一件目", "D5": "追加セル", "明細!A1": None})
+    # 書き込んだ値・表示形式・追加したセルが次の書類に残らない
+    cache.render(template_path, {"C1": "文字列"})
+    workbook = read(cache.render(template_path, {}))
+
+    sheet = workbook["概要"]
+    assert sheet["B1"].value == "（未入力）"
+    assert sheet["C1"].value == 0.5
+    assert sheet["C1"].number_format == "0.00%"
+    assert sheet["D5"].value is None
+    assert workbook["明細"]["A1"].value == "明細"
+
+    template = cache.get(template_path)
+    assert (4, 5) not in template.workbook["概要"]._cells
+    assert template.workbook["概要"].max_row == 1
+
+
+def test_same_cell_written_twice_is_restored(template_path):
+    cache = TemplateCache()
+    cache.render(template_path, {"B1": "一回目", "概要!B1": "二回目"})
+
+    assert cache.get(template_path).workbook["概要"]["B1"].value == "（未入力）"
+
+
+def test_failed_render_restores_written_cells(template_path):
+    cache = TemplateCache()
+    with pytest.raises(KeyError):
+        cache.render(template_path, {"B1": "書き込み済み", "存在しないシート!A1": "x"})
+
+    workbook = read(cache.render(template_path, {}))
+    assert workbook["概要"]["B1"].value == "（未入力）"
+
+
+def test_template_is_parsed_once(template_path):
+    cache = TemplateCache()
+    for i in range(5):
+        cache.render(template_path, {"B1": str(i)})
+
+    assert cache.get_stats()["loads"] == 1
+    assert cache.get_stats()["hits"] == 4
+
+
+def test_modified_template_is_reloaded(template_path):
+    cache = TemplateCache()
+    cache.render(template_path, {})
+
+    workbook = load_workbook(template_path)
+    workbook["概要"]["B1"] = "更新後のテンプレート"
+    workbook.save(template_path)
+    stat = os.stat(template_path)
+    os.utime(template_path, (stat.st_atime, stat.st_mtime + 10))
+
+    assert read(cache.render(template_path, {}))["概要"]["B1"].value == "更新後のテンプレート"
+    assert cache.get_stats()["loads"] == 2
+
+
+def test_least_recently_used_template_is_evicted(template_path, tmp_path):
+    other = tmp_path / "other.xlsx"
+    Workbook().save(other)
+    cache = TemplateCache(max_templates=1)
+
+    cache.get(template_path)
+    cache.get(str(other))
+    cache.get(template_path)
+
+    assert cache.get_stats() == {"templates": 1, "max_templates": 1, "hits": 0, "loads": 3}
+
+    cache.invalidate()
+    assert cache.get_stats()["templates"] == 0
+
+
+def test_render_workbook_saves_file(template_path, tmp_path):
+    output = tmp_path / "out" / "書類.xlsx"
+
+    assert render_workbook(template_path, {"B1": "保存"}, str(output)) == str(output)
+    assert load_workbook(output)["概要"]["B1"].value == "保存"
+    assert not os.path.exists(f"{output}.tmp")
+
+    contents = render_workbook_contents(template_path, [{"B1": "1"}, {"B1": "2"}])
+    assert [read(c)["概要"]["B1"].value for c in contents] == ["1", "2"]
@@ -0,0 +1,96 @@
+"""
+財務サマリー（SQL 集計）のテスト
+"""
+
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.models import Application, ApplicationType, Financial, Project
+from app.schemas.project import FinancialUpdate
+from app.services.financial_service import FinancialService
+from app.services.project_service import ProjectService
+
+
+@pytest.fixture
+def financials(db):
+    """3件のプロジェクトと財務情報・申請"""
+    rows = [
+        # (ステータス, 入力日, 契約, 見積, 決済, 交付申請書, 請求書)
+        ("受注", date(2025, 4, 3), 1000, 1200, 400, True, False),
+        ("受注", date(2025, 5, 9), 2000, None, 2000, True, True),
+        ("完了", date(2025, 5, 20), None, 500, None, False, True),
+    ]
+    types = [ApplicationType(code="KAKUNIN", name="確認申請"), ApplicationType(code="CHOKI", name="長期優良")]
+    db.add_all(types)
+    projects = []
+    for i, (status, input_date, contract, estimate, settlement, permit, invoice) in enumerate(rows):
+        project = Project(project_code=f"F{i}", project_name=f"案件{i}", status=status, input_date=input_date)
+        project.financial = Financial(
+            contract_price=contract, estimate_amount=estimate, settlement_amount=settlement,
+            has_permit_application=permit, has_invoice=invoice,
+        )
+        db.add(project)
+        projects.append(project)
+    db.flush()
+
+    # 1件目は同じ種別の申請が2件（金額を二重に数えない）
+    db.add_all([
+        Application(project_id=projects[0].id, application_type_id=types[0].id),
+        Application(project_id=projects[0].id, application_type_id=types[0].id),
+        Application(project_id=projects[0].id, application_type_id=types[1].id),
+        Application(project_id=projects[1].id, application_type_id=types[0].id),
+    ])
+    db.commit()
+    return projects
+
+
+def test_summary_totals(db, financials):
+    summary = FinancialService(db).get_financial_summary()
+
+    assert summary["total_projects"] == 3
+    assert summary["total_contract_amount"] == Decimal(3000)
+    assert summary["total_estimate_amount"] == Decimal(1700)
+    assert summary["total_settlement_amount"] == Decimal(2400)
+    assert summary["pending_settlement_amount"] == Decimal(600)
+    assert summary["document_submission_stats"]["permit_application"] == 2
+    assert summary["document_submission_stats"]["invoice"] == 2
+    assert summary["document_submission_stats"]["hardware_plan"] == 0
+    assert "groups" not in summary
+
+
+def test_summary_of_empty_database(db):
+    summary = FinancialService(db).get_financial_summary()
+
+    assert summary["total_projects"] == 0
+    assert summary["total_contract_amount"] == Decimal(0)
+    assert summary["pending_settlement_amount"] == Decimal(0)
+
+
+@pytest.mark.parametrize("group_by,expected", [
+    ("status", {"完了": (1, 0), "受注": (2, 3000)}),
+    ("month", {"2025-04": (1, 1000), "2025-05": (2, 2000)}),
+    ("application_type", {"確認申請": (2, 3000), "長期優良": (1, 1000)}),
+])
+def test_grouped_summary(db, financials, group_by, expected):
+    summary = FinancialService(db).get_financial_summary(group_by=group_by)
+
+    assert summary["group_by"] == group_by
+    assert {
+        group["key"]: (group["total_projects"], group["total_contract_amount"]) for group in summary["groups"]
+    } == expected
+
+
+def test_invalid_group_by(db):
+    with pytest.raises(ValueError):
+        FinancialService(db).get_financial_summary(group_by="customer")
+
+
+def test_cached_summary_is_invalidated_on_update(db, financials):
+    service = FinancialService(db)
+    assert service.get_financial_summary_cached()["total_contract_amount"] == Decimal(3000)
+
+    ProjectService(db).update_financial(financials[2].id, FinancialUpdate(contract_price=500))
+
+    assert service.get_financial_summary_cached()["total_contract_amount"] == Decimal(3500)
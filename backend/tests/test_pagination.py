@@ -0,0 +1,208 @@
+"""
+カーソル（キーセット）ページングのテスト
+"""
+
+import re
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import event, insert, text
+
+from app.core.database import read_engine
+from app.models import Project
+from app.services.project_service import ProjectService
+from app.utils.pagination import decode_cursor, encode_cursor
+
+PROJECT_COUNT = 3000
+PAGE_SIZE = 50
+
+
+@pytest.fixture
+def projects(db):
+    """updated_at の重複と NULL（未更新）を含むプロジェクトを作成"""
+    base = datetime(2025, 1, 1)
+    rows = []
+    for i in range(1, PROJECT_COUNT + 1):
+        rows.append({
+            "id": i,
+            "project_code": f"P{i:06d}",
+            "project_name": f"案件{i}",
+            "status": "事前相談",
+            "input_date": date(2025, 1, 1),
+            # 3件ずつ同じ更新日時、10件に1件は未更新
+            "updated_at": None if i % 10 == 0 else base + timedelta(minutes=i // 3),
+        })
+    db.execute(insert(Project), rows)
+    db.commit()
+    db.execute(text("ANALYZE"))
+    db.commit()
+    return rows
+
+
+def expected_order(rows):
+    """updated_at DESC NULLS LAST, id DESC の並び"""
+    dated = sorted((r for r in rows if r["updated_at"]), key=lambda r: (r["updated_at"], r["id"]), reverse=True)
+    undated = sorted((r for r in rows if not r["updated_at"]), key=lambda r: r["id"], reverse=True)
+    return [r["id"] for r in dated + undated]
+
+
+def capture_selects(func):
+    """func の実行中に読み取り接続で発行された SELECT を記録"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(read_engine, "before_cursor_execute", record)
+    try:
+        result = func()
+    finally:
+        event.remove(read_engine, "before_cursor_execute", record)
+    return result, statements
+
+
+def query_plan(statements):
+    """EXPLAIN QUERY PLAN の結果（ノードIDを除いた文字列）"""
+    raw = read_engine.raw_connection()
+    try:
+        plan = []
+        for statement, parameters in statements:
+            rows = raw.cursor().execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+            plan.append([re.sub(r"\s+", " ", row[-1]) for row in rows])
+        return plan
+    finally:
+        raw.close()
+
+
+def vm_steps(statements):
+    """文を実行したときの SQLite VM の命令数"""
+    raw = read_engine.raw_connection()
+    steps = 0
+
+    def count():
+        nonlocal steps
+        steps += 1
+        return 0
+
+    try:
+        raw.driver_connection.set_progress_handler(count, 1)
+        for statement, parameters in statements:
+            raw.cursor().execute(statement, parameters).fetchall()
+        raw.driver_connection.set_progress_handler(None, 1)
+        return steps
+    finally:
+        raw.close()
+
+
+def test_cursor_round_trip():
+    updated_at = datetime(2025, 4, 1, 9, 30, 15, 123456)
+    # datetime は SQLite に保存される形式の文字列にする
+    assert decode_cursor(encode_cursor(updated_at, 42)) == ("2025-04-01 09:30:15.123456", 42)
+    assert decode_cursor(encode_cursor("2025-04-01 09:30:15", 42)) == ("2025-04-01 09:30:15", 42)
+    assert decode_cursor(encode_cursor(None, 7)) == (None, 7)
+
+
+def test_invalid_cursor():
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_cursor_pages_cover_all_rows_in_order(db, projects):
+    service = ProjectService(db)
+    seen = []
+    cursor = None
+    while True:
+        page, cursor = service.get_projects_page(limit=PAGE_SIZE, cursor=cursor)
+        seen.extend(project.id for project in page)
+        if cursor is None:
+            break
+
+    assert seen == expected_order(projects)
+
+
+def test_cursor_pages_over_rows_updated_by_the_database(db, create_project):
+    """onupdate=func.now() の更新日時（CURRENT_TIMESTAMP は秒まで）でもページが進む"""
+    ids = [create_project(project_name=f"更新{i}").id for i in range(7)]
+    db.query(Project).filter(Project.id.in_(ids)).update({Project.status: "受注"}, synchronize_session=False)
+    db.commit()
+    # Python から書き込んだマイクロ秒付きの値と混在させる
+    db.query(Project).filter(Project.id == ids[0]).update(
+        {Project.updated_at: datetime(2000, 1, 1, 0, 0, 0, 500000)}, synchronize_session=False
+    )
+    db.commit()
+
+    service = ProjectService(db)
+    pages, cursor = [], None
+    # ページが進まない場合に無限ループしないよう上限を設ける
+    for _ in range(5):
+        page, cursor = service.get_projects_page(limit=3, cursor=cursor)
+        pages.append([project.id for project in page])
+        if cursor is None:
+            break
+
+    assert pages == [sorted(ids[1:], reverse=True)[:3], sorted(ids[1:], reverse=True)[3:], [ids[0]]]
+
+
+def test_cursor_page_crossing_null_boundary(db, projects):
+    service = ProjectService(db)
+    order = expected_order(projects)
+    dated_count = sum(1 for r in projects if r["updated_at"])
+
+    # 非NULL区間の末尾5件の直前を指すカーソルから、NULL区間にまたがるページを取得
+    last = next(r for r in projects if r["id"] == order[dated_count - 6])
+    page, _ = service.get_projects_page(limit=PAGE_SIZE, cursor=encode_cursor(last["updated_at"], last["id"]))
+
+    assert [p.id for p in page] == order[dated_count - 5:dated_count - 5 + PAGE_SIZE]
+
+
+def test_deep_page_has_same_plan_and_bounded_cost(db, projects):
+    service = ProjectService(db)
+
+    first_page, first_statements = capture_selects(lambda: service.get_projects_page(limit=PAGE_SIZE))
+
+    # 非NULL区間の後半（1ページ目から約2500件先）のページ
+    order = expected_order(projects)
+    anchor = next(r for r in projects if r["id"] == order[2500])
+    cursor = encode_cursor(anchor["updated_at"], anchor["id"])
+    (deep_page, _), deep_statements = capture_selects(
+        lambda: service.get_projects_page(limit=PAGE_SIZE, cursor=cursor)
+    )
+    assert len(deep_page) == PAGE_SIZE
+
+    first_plan = query_plan(first_statements)
+    deep_plan = query_plan(deep_statements)
+    assert all("SEARCH projects" in " ".join(step) for step in first_plan + deep_plan)
+    # 1ページ目には cursor の条件がない分だけ範囲の上限が付かない
+    normalize = lambda plan: [[s.replace(" AND updated_at<?", "") for s in step] for step in plan]
+    assert normalize(first_plan) == normalize(deep_plan)
+
+    # 読み飛ばした行数に比例せず、1ページ目と同程度の命令数で済む
+    first_steps = vm_steps(first_statements)
+    deep_steps = vm_steps(deep_statements)
+    assert deep_steps <= first_steps * 1.5 + 1000
+
+
+def test_null_region_page_has_bounded_cost(db, projects):
+    service = ProjectService(db)
+    first_page, first_statements = capture_selects(lambda: service.get_projects_page(limit=PAGE_SIZE))
+
+    undated = sorted((r["id"] for r in projects if not r["updated_at"]), reverse=True)
+    (page, _), statements = capture_selects(
+        lambda: service.get_projects_page(limit=PAGE_SIZE, cursor=encode_cursor(None, undated[100]))
+    )
+
+    assert [p.id for p in page] == undated[101:101 + PAGE_SIZE]
+    assert all("SEARCH projects" in " ".join(step) for step in query_plan(statements))
+    assert vm_steps(statements) <= vm_steps(first_statements) * 1.5 + 1000
+
+
+def test_offset_pages_follow_cursor_order(db, projects):
+    service = ProjectService(db)
+    order = expected_order(projects)
+    dated_count = sum(1 for r in projects if r["updated_at"])
+
+    # 先頭・非NULL区間の途中・NULL区間との境界・NULL区間の途中
+    for skip in [0, 1000, dated_count - 20, dated_count + 30]:
+        page = service.get_projects(skip=skip, limit=PAGE_SIZE)
+        assert [p.id for p in page] == order[skip:skip + PAGE_SIZE], skip
@@ -0,0 +1,203 @@
+"""
+郵便番号のローカル辞書（KEN_ALL の取り込み・索引ファイル・逆引き）のテスト
+"""
+
+import zipfile
+
+import pytest
+
+from app.core.config import settings
+from app.services import postal_code_index
+from app.services.postal_code_index import (
+    AddressSearchIndex,
+    PostalCodeIndex,
+    parse_ken_all,
+    read_ken_all,
+    write_index,
+)
+from app.services.postal_code_service import PostalCodeService
+
+RECORDS = [
+    ("1000013", "東京都", "千代田区", "霞が関"),
+    ("1500041", "東京都", "渋谷区", "神南"),
+    ("1080073", "東京都", "港区", "三田"),
+    ("1080014", "東京都", "港区", "芝"),
+    ("2520001", "神奈川県", "座間市", "相模が丘"),
+    ("9800811", "宮城県", "仙台市青葉区", "一番町"),
+    ("1000000", "東京都", "千代田区", ""),
+]
+
+
+def ken_all_line(code, prefecture, city, town):
+    """KEN_ALL.CSV と同じ15列の行"""
+    columns = ["13101", "100  ", code, "ﾄｳｷｮｳﾄ", "ﾁﾖﾀﾞｸ", "ｶｽﾐｶﾞｾｷ", prefecture, city, town,
+               "0", "0", "1", "0", "0", "0"]
+    return ",".join(f'"{column}"' for column in columns) + "\r\n"
+
+
+@pytest.fixture
+def index(tmp_path):
+    path = tmp_path / "postal_codes.idx"
+    write_index(RECORDS, str(path))
+    return PostalCodeIndex.load(str(path))
+
+
+def test_parse_joins_multiline_towns_and_drops_notes():
+    lines = [
+        ken_all_line("0600000", "北海道", "札幌市中央区", "以下に掲載がない場合"),
+        ken_all_line("0640941", "北海道", "札幌市中央区", "旭ケ丘（１～７丁目、"),
+        ken_all_line("0640941", "北海道", "札幌市中央区", "８丁目）"),
+        ken_all_line("0620000", "北海道", "札幌市豊平区", "豊平区の次に番地がくる場合"),
+        ken_all_line("0493100", "北海道", "二海郡八雲町", "八雲町一円"),
+        # 括弧書きを除くと同じになる行は1件にまとめる
+        ken_all_line("0600042", "北海道", "札幌市中央区", "大通西（１～１９丁目）"),
+        ken_all_line("0600042", "北海道", "札幌市中央区", "大通西（２０～２８丁目）"),
+    ]
+
+    assert list(parse_ken_all(lines)) == [
+        ("0600000", "北海道", "札幌市中央区", ""),
+        ("0640941", "北海道", "札幌市中央区", "旭ケ丘"),
+        ("0620000", "北海道", "札幌市豊平区", ""),
+        ("0493100", "北海道", "二海郡八雲町", ""),
+        ("0600042", "北海道", "札幌市中央区", "大通西"),
+    ]
+
+
+def test_parse_emits_unclosed_town_when_code_changes():
+    lines = [
+        ken_all_line("0640941", "北海道", "札幌市中央区", "旭ケ丘（１～７丁目、"),
+        ken_all_line("0640942", "北海道", "札幌市中央区", "伏見"),
+    ]
+
+    assert [record[3] for record in parse_ken_all(lines)] == ["旭ケ丘（１～７丁目、", "伏見"]
+
+
+@pytest.mark.parametrize("archive", [False, True])
+def test_read_ken_all_and_index_round_trip(tmp_path, archive):
+    content = "".join(ken_all_line(*record) for record in RECORDS).encode("cp932")
+    source = tmp_path / ("ken_all.zip" if archive else "KEN_ALL.CSV")
+    if archive:
+        with zipfile.ZipFile(source, "w") as f:
+            f.writestr("KEN_ALL.CSV", content)
+    else:
+        source.write_bytes(content)
+
+    path = tmp_path / "postal_codes.idx"
+    assert write_index(read_ken_all(str(source)), str(path)) == len(RECORDS)
+
+    loaded = PostalCodeIndex.load(str(path))
+    assert len(loaded) == len(RECORDS)
+    assert list(loaded.records()) == sorted(RECORDS, key=lambda record: record[0])
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / "broken.idx"
+    path.write_bytes(b"NOTIDX" + bytes(8))
+
+    with pytest.raises(ValueError, match="形式が不正"):
+        PostalCodeIndex.load(str(path))
+
+
+def test_lookup(index, tmp_path):
+    assert index.lookup("1500041") == ("1500041", "東京都", "渋谷区", "神南")
+    assert index.lookup("1000000") == ("1000000", "東京都", "千代田区", "")
+    assert index.lookup("9999999") is None
+    assert index.lookup("150-0041") is None
+    assert index.lookup_all("1500041") == [("1500041", "東京都", "渋谷区", "神南")]
+
+    # 同じ郵便番号の複数の町域は元の並び順で返す
+    path = tmp_path / "shared.idx"
+    write_index([("0600042", "北海道", "札幌市中央区", "大通西"), ("0600042", "北海道", "札幌市中央区", "大通東")], str(path))
+    assert [record[3] for record in PostalCodeIndex.load(str(path)).lookup_all("0600042")] == ["大通西", "大通東"]
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("霞ヶ関", "1000013"),
+    ("霞ケ関三丁目2-1", "1000013"),
+    ("千代田区霞が関３丁目", "1000013"),
+    ("相模ヶ丘", "2520001"),
+    ("港区三田二丁目", "1080073"),
+    ("仙台市青葉区一番町", "9800811"),
+])
+def test_search_normalizes_variants(index, query, expected):
+    assert AddressSearchIndex(index).search(query)[0][0] == expected
+
+
+def test_search_falls_back_to_fuzzy_matches(index):
+    search = AddressSearchIndex(index)
+
+    # 「神南町」は索引にないが、共通するバイグラムが多い「渋谷区神南」を返す
+    assert [record[0] for record in search.search("渋谷区神南町")] == ["1500041"]
+    assert search.search("存在しない地名") == []
+    assert search.search("") == []
+
+
+def test_search_ranks_exact_matches_first_and_respects_limit(index):
+    results = AddressSearchIndex(index).search("東京都港区", limit=2)
+
+    assert len(results) == 2
+    assert {record[2] for record in results} == {"港区"}
+
+
+@pytest.fixture
+def service_index(monkeypatch, index):
+    monkeypatch.setattr("app.services.postal_code_service.get_postal_code_index", lambda: index)
+    monkeypatch.setattr(
+        "app.services.postal_code_service.get_address_search_index", lambda: AddressSearchIndex(index)
+    )
+    PostalCodeService._fetch_from_zipcloud.cache_clear()
+    yield index
+    PostalCodeService._fetch_from_zipcloud.cache_clear()
+
+
+class FakeResponse:
+    status_code = 200
+
+    def json(self):
+        return {"status": 200, "results": [{"address1": "大阪府", "address2": "大阪市北区", "address3": "梅田"}]}
+
+
+def test_local_index_is_used_before_zipcloud(service_index, monkeypatch):
+    requested = []
+    monkeypatch.setattr(
+        "app.services.postal_code_service.requests.get",
+        lambda *args, **kwargs: requested.append(kwargs["params"]) or FakeResponse()
+    )
+
+    assert PostalCodeService.get_address_by_postal_code("１５０００４１")["full_address"] == "東京都渋谷区神南"
+    assert requested == []
+
+    # 索引にない郵便番号だけ zipcloud を参照する
+    assert PostalCodeService.get_address_by_postal_code("530-0001")["full_address"] == "大阪府大阪市北区梅田"
+    assert requested == [{"zipcode": "5300001"}]
+
+    monkeypatch.setattr(settings, "POSTAL_CODE_REMOTE_FALLBACK", False)
+    assert PostalCodeService.get_address_by_postal_code("5300002") is None
+    assert len(requested) == 1
+
+
+def test_search_postal_codes_by_address(service_index):
+    assert PostalCodeService.search_postal_codes_by_address("霞ヶ関") == [{
+        "postal_code": "100-0013",
+        "prefecture": "東京都",
+        "city": "千代田区",
+        "town": "霞が関",
+        "full_address": "東京都千代田区霞が関",
+    }]
+
+
+def test_indexes_are_loaded_from_settings_path(monkeypatch, tmp_path):
+    path = tmp_path / "postal_codes.idx"
+    write_index(RECORDS, str(path))
+    monkeypatch.setattr(settings, "POSTAL_CODE_INDEX_PATH", str(path))
+    # 読み込んだ索引はテスト後に元に戻す
+    monkeypatch.setattr(postal_code_index, "_index", None)
+    monkeypatch.setattr(postal_code_index, "_index_loaded", False)
+    monkeypatch.setattr(postal_code_index, "_address_index", None)
+
+    assert postal_code_index.get_postal_code_index().lookup("1000013")[3] == "霞が関"
+    assert postal_code_index.get_address_search_index().search("神南")[0][0] == "1500041"
+
+    monkeypatch.setattr(settings, "POSTAL_CODE_INDEX_PATH", str(tmp_path / "missing.idx"))
+    assert postal_code_index.reload_postal_code_index() is None
+    assert postal_code_index.get_address_search_index() is None
@@ -0,0 +1,262 @@
+"""
+主要なサービスクエリのクエリプラン回帰テスト
+
+大量データを投入したデータベースで各クエリを実行し、発行された SELECT を EXPLAIN して
+件数の多いテーブルの全件走査・ソート・OR による複数インデックスの結合が無いことを確認する。
+
+SQLite は常に実行し、PostgreSQL は TEST_POSTGRES_URL（空の検証用データベース）を
+指定した場合のみ実行する（終了時にテーブルを削除する）。
+投入件数は PLAN_CHECK_PROJECTS で変更できる
+"""
+
+import os
+import random
+import re
+from functools import partial
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, event, insert, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.project import (
+    Application, ApplicationStatusEnum, ApplicationType, AuditTrail, Customer, Project, Schedule, Site
+)
+from app.services.application_service import ApplicationService
+from app.services.project_service import ProjectService
+from app.utils.pagination import encode_cursor
+
+PROJECT_COUNT = int(os.environ.get("PLAN_CHECK_PROJECTS", "5000"))
+PAGE_SIZE = 100
+BATCH_SIZE = 5000
+
+# 全件走査を許容しない（件数の多い）テーブル
+LARGE_TABLES = {"projects", "customers", "sites", "applications", "audit_trails", "schedules"}
+
+PROJECT_STATUSES = [
+    "事前相談", "受注", "申請作業", "審査中",
+    "配筋検査待ち", "中間検査待ち", "完了検査待ち", "完了", "失注"
+]
+
+# SQLite: インデックスを使っていても SCAN は先頭から末尾まで読む
+_SQLITE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)")
+_SQLITE_FORBIDDEN = ("USE TEMP B-TREE", "MULTI-INDEX OR")
+# PostgreSQL
+_POSTGRESQL_SEQ_SCAN = re.compile(r"Seq Scan on (\w+)")
+_POSTGRESQL_FORBIDDEN = re.compile(r"\b(?:Incremental Sort|Sort|BitmapOr)\b")
+
+
+def _insert_batches(connection, table, rows):
+    for start in range(0, len(rows), BATCH_SIZE):
+        connection.execute(insert(table), rows[start:start + BATCH_SIZE])
+
+
+def seed(engine, project_count: int):
+    """検証用の大量データを投入"""
+    rng = random.Random(42)
+    now = datetime.now(timezone.utc)
+    today = date.today()
+
+    def maybe_date(probability: float):
+        return today + timedelta(days=rng.randint(-180, 180)) if rng.random() < probability else None
+
+    with engine.begin() as connection:
+        _insert_batches(connection, ApplicationType.__table__, [
+            {"id": i, "code": f"TYPE{i:02d}", "name": f"申請種別{i}"} for i in range(1, 11)
+        ])
+
+        projects, customers, sites, schedules = [], [], [], []
+        for i in range(1, project_count + 1):
+            projects.append({
+                "id": i,
+                "project_code": f"P{i:07d}",
+                "project_name": f"検証邸新築工事{i}",
+                "status": rng.choice(PROJECT_STATUSES),
+                "input_date": today - timedelta(days=rng.randint(0, 720)),
+                "created_at": now - timedelta(minutes=i),
+                # 一部は未更新（NULL）
+                "updated_at": now - timedelta(minutes=rng.randint(0, 10 ** 6)) if rng.random() < 0.9 else None,
+            })
+            customers.append({"project_id": i, "owner_name": f"検証太郎{i}"})
+            sites.append({"project_id": i, "address": f"東京都検証区{i}"})
+
+            # 予定日ありの大半は実施済み
+            reinforcement = maybe_date(0.8)
+            interim = maybe_date(0.6)
+            completion = maybe_date(0.4)
+            schedules.append({
+                "project_id": i,
+                "reinforcement_scheduled": reinforcement,
+                "reinforcement_actual": reinforcement if reinforcement and rng.random() < 0.95 else None,
+                "interim_scheduled": interim,
+                "interim_actual": interim if interim and rng.random() < 0.95 else None,
+                "completion_scheduled": completion,
+                "completion_actual": completion if completion and rng.random() < 0.95 else None,
+            })
+
+        _insert_batches(connection, Project.__table__, projects)
+        _insert_batches(connection, Customer.__table__, customers)
+        _insert_batches(connection, Site.__table__, sites)
+        _insert_batches(connection, Schedule.__table__, schedules)
+
+        statuses = list(ApplicationStatusEnum)
+        _insert_batches(connection, Application.__table__, [
+            {
+                "project_id": rng.randint(1, project_count),
+                "application_type_id": rng.randint(1, 10),
+                "status": rng.choice(statuses),
+                "updated_at": now - timedelta(minutes=rng.randint(0, 10 ** 6)) if rng.random() < 0.9 else None,
+            }
+            for _ in range(project_count * 3)
+        ])
+
+        _insert_batches(connection, AuditTrail.__table__, [
+            {
+                "target_model": rng.choice(["Project", "Application", "Customer"]),
+                "target_id": rng.randint(1, project_count),
+                "field_name": "status",
+                "old_value": "",
+                "new_value": "",
+                "action": "UPDATE",
+                "timestamp": now - timedelta(minutes=rng.randint(0, 10 ** 6)),
+            }
+            for _ in range(project_count * 5)
+        ])
+
+        # プランナーに統計情報を持たせる
+        connection.execute(text("ANALYZE"))
+
+
+def _middle_cursor(session, model):
+    """非NULL区間の途中を指すカーソル"""
+    row = session.query(model.updated_at, model.id).filter(model.updated_at.isnot(None)).order_by(
+        model.updated_at.desc(), model.id.desc()
+    ).offset(PROJECT_COUNT // 2).first()
+    return encode_cursor(*row)
+
+
+def _null_cursor(session, model):
+    """未更新（NULL）区間の途中を指すカーソル"""
+    row_id = session.query(model.id).filter(model.updated_at.is_(None)).order_by(
+        model.id.desc()
+    ).offset(10).limit(1).scalar()
+    return encode_cursor(None, row_id)
+
+
+def _pending(scheduled, actual):
+    return lambda db: db.query(Schedule).filter(
+        scheduled.isnot(None), actual.is_(None)
+    ).order_by(scheduled).all
+
+
+# (名前, セッションを受け取って確認対象の呼び出しを返す関数)
+# カーソルの作成など準備用のクエリは partial の引数として先に実行され、確認の対象外になる
+SERVICE_QUERIES = [
+    ("projects", lambda db: partial(ProjectService(db).get_projects, limit=PAGE_SIZE)),
+    ("projects_offset", lambda db: partial(ProjectService(db).get_projects, skip=PROJECT_COUNT // 2, limit=PAGE_SIZE)),
+    ("projects_status", lambda db: partial(ProjectService(db).get_projects, limit=PAGE_SIZE, status="申請作業")),
+    ("projects_status_offset", lambda db: partial(ProjectService(db).get_projects, skip=200, limit=PAGE_SIZE, status="申請作業")),
+    ("projects_page", lambda db: partial(ProjectService(db).get_projects_page, limit=PAGE_SIZE)),
+    ("projects_page_cursor", lambda db: partial(ProjectService(db).get_projects_page,
+        limit=PAGE_SIZE, cursor=_middle_cursor(db, Project))),
+    ("projects_page_null_cursor", lambda db: partial(ProjectService(db).get_projects_page,
+        limit=PAGE_SIZE, cursor=_null_cursor(db, Project))),
+    ("projects_page_status", lambda db: partial(ProjectService(db).get_projects_page, limit=PAGE_SIZE, status="審査中")),
+    ("projects_count_status", lambda db: partial(ProjectService(db).get_projects_count, status="申請作業")),
+    ("applications", lambda db: partial(ApplicationService(db).get_applications, limit=PAGE_SIZE)),
+    ("applications_offset", lambda db: partial(ApplicationService(db).get_applications,
+        skip=PROJECT_COUNT, limit=PAGE_SIZE)),
+    ("applications_status", lambda db: partial(ApplicationService(db).get_applications,
+        limit=PAGE_SIZE, status=ApplicationStatusEnum.IN_REVIEW)),
+    ("applications_project", lambda db: partial(ApplicationService(db).get_applications, limit=PAGE_SIZE, project_id=1)),
+    ("applications_page", lambda db: partial(ApplicationService(db).get_applications_page, limit=PAGE_SIZE)),
+    ("applications_page_cursor", lambda db: partial(ApplicationService(db).get_applications_page,
+        limit=PAGE_SIZE, cursor=_middle_cursor(db, Application))),
+    ("applications_page_null_cursor", lambda db: partial(ApplicationService(db).get_applications_page,
+        limit=PAGE_SIZE, cursor=_null_cursor(db, Application))),
+    ("applications_page_status", lambda db: partial(ApplicationService(db).get_applications_page,
+        limit=PAGE_SIZE, status=ApplicationStatusEnum.APPROVED)),
+    ("audit_trail", lambda db: partial(ApplicationService(db).get_audit_trail, "Application", 1)),
+    ("pending_reinforcement", _pending(Schedule.reinforcement_scheduled, Schedule.reinforcement_actual)),
+    ("pending_interim", _pending(Schedule.interim_scheduled, Schedule.interim_actual)),
+    ("pending_completion", _pending(Schedule.completion_scheduled, Schedule.completion_actual)),
+]
+
+
+@pytest.fixture(scope="module", params=["sqlite", "postgresql"])
+def plan_engine(request, tmp_path_factory):
+    """検証用データを投入したエンジン"""
+    if request.param == "postgresql":
+        url = os.environ.get("TEST_POSTGRES_URL")
+        if not url:
+            pytest.skip("TEST_POSTGRES_URL が未設定のため PostgreSQL のプランは確認しない")
+        pytest.importorskip("psycopg2")
+    else:
+        url = f"sqlite:///{tmp_path_factory.mktemp('plans') / 'plan_check.db'}"
+
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with engine.connect() as connection:
+        if connection.execute(text("SELECT COUNT(*) FROM projects")).scalar():
+            pytest.fail("projects にデータがあります。空の検証用データベースを指定してください")
+
+    seed(engine, PROJECT_COUNT)
+    yield engine
+
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+
+def capture_selects(engine, func):
+    """関数の実行中に発行された SELECT 文とパラメータを記録"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        func()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return statements
+
+
+def plan_problems(engine, statement, parameters):
+    """EXPLAIN の結果から (プランの行, 問題のリスト) を返す"""
+    problems = []
+    with engine.connect() as connection:
+        if engine.dialect.name == "sqlite":
+            rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+            lines = [row[3] for row in rows]
+            for line in lines:
+                match = _SQLITE_SCAN.match(line)
+                if match and match.group(1) in LARGE_TABLES:
+                    problems.append(line)
+                if any(marker in line for marker in _SQLITE_FORBIDDEN):
+                    problems.append(line)
+        else:
+            rows = connection.exec_driver_sql(f"EXPLAIN {statement}", parameters).fetchall()
+            lines = [row[0] for row in rows]
+            for line in lines:
+                if any(table in LARGE_TABLES for table in _POSTGRESQL_SEQ_SCAN.findall(line)):
+                    problems.append(line.strip())
+                elif _POSTGRESQL_FORBIDDEN.search(line):
+                    problems.append(line.strip())
+    return lines, problems
+
+
+@pytest.mark.parametrize("name,query", SERVICE_QUERIES, ids=[name for name, _ in SERVICE_QUERIES])
+def test_service_query_uses_index_without_sort(plan_engine, name, query):
+    session = sessionmaker(bind=plan_engine)()
+    try:
+        statements = capture_selects(plan_engine, query(session))
+    finally:
+        session.close()
+
+    assert statements
+    for statement, parameters in statements:
+        lines, problems = plan_problems(plan_engine, statement, parameters)
+        assert not problems, f"{name}: {problems}\n" + "\n".join(lines) + f"\n{statement}"
@@ -0,0 +1,71 @@
+"""
+プロジェクト・顧客検索インデックスのテスト
+"""
+
+from app.models import Project, ProjectSearchIndex
+from app.schemas.project import CustomerUpdate, ProjectUpdate
+from app.services.project_service import ProjectService
+from app.services.search_service import ProjectSearchService
+from app.services.seed_data import create_sample_data
+from app.utils.text_normalizer import build_search_document, normalize_search_text
+
+
+def test_normalize_search_text_folds_width_kana_and_variants():
+    assert normalize_search_text("ＡＢＣ　１２３") == "abc123"
+    assert normalize_search_text("やまだ") == "ヤマダ"
+    assert normalize_search_text("ﾔﾏﾀﾞ") == "ヤマダ"
+    assert normalize_search_text("髙橋・邉") == "高橋辺"
+    assert build_search_document(["山田", None, "ｺｰﾄﾞ"]) == "山田 コード"
+
+
+def test_create_project_indexes_project_and_customer(db, create_project):
+    project = create_project(project_name="渋谷区新築工事", owner_name="髙橋一郎", owner_kana="たかはしいちろう")
+
+    entry = db.get(ProjectSearchIndex, project.id)
+    assert entry.customer_id == project.customer.id
+    assert "渋谷区新築工事" in entry.project_text
+    assert "高橋一郎" in entry.customer_text
+    assert "タカハシイチロウ" in entry.customer_text
+
+
+def test_search_matches_normalized_variants(db, create_project):
+    target = create_project(project_name="世田谷区新築工事", owner_name="髙橋一郎", owner_kana="タカハシイチロウ")
+    create_project(project_name="品川区改修工事", owner_name="佐藤花子", owner_kana="サトウハナコ")
+    service = ProjectService(db)
+
+    # 異体字・ひらがな・半角カナ・短いクエリ（LIKE）のいずれでも一致する
+    for query in ["高橋一郎", "たかはし", "ﾀｶﾊｼ", "世田谷", "高橋"]:
+        assert [p.id for p in service.search_projects(query)] == [target.id], query
+
+    assert service.search_projects("存在しない名前") == []
+    assert ProjectSearchService(db).search_customer_ids("タカハシ") == [target.customer.id]
+
+
+def test_update_and_delete_keep_index_current(db, create_project):
+    project = create_project(project_name="目黒区新築工事", owner_name="田中次郎", owner_kana="タナカジロウ")
+    service = ProjectService(db)
+
+    service.update_project(project.id, ProjectUpdate(customer=CustomerUpdate(owner_name="鈴木三郎")))
+    assert service.search_projects("田中次郎") == []
+    assert [p.id for p in service.search_projects("鈴木三郎")] == [project.id]
+
+    service.delete_project(project.id)
+    assert service.search_projects("鈴木三郎") == []
+    assert db.get(ProjectSearchIndex, project.id) is None
+
+
+def test_rebuild_index_restores_missing_entries(db, create_project):
+    projects = [create_project(project_name=f"港区案件{i}") for i in range(3)]
+    db.query(ProjectSearchIndex).delete()
+    db.commit()
+
+    assert ProjectSearchService(db).rebuild_index(batch_size=2) == 3
+    assert sorted(p.id for p in ProjectService(db).search_projects("港区案件")) == sorted(p.id for p in projects)
+
+
+def test_sample_data_is_indexed(db):
+    create_sample_data()
+
+    assert db.query(ProjectSearchIndex).count() == db.query(Project).count() > 0
+    name = db.query(Project.project_name).order_by(Project.id).limit(1).scalar()
+    assert ProjectSearchService(db).search_project_ids(name)
@@ -0,0 +1,158 @@
+"""
+管理画面のテーブルブラウザ（主キー順のページング・列の選択・条件）のテスト
+"""
+
+import pytest
+from sqlalchemy import text
+
+from app.core.database import engine
+from app.services.database_admin_service import DatabaseStatsService, TableBrowser, get_table
+from app.utils.pagination import encode_key_cursor
+
+
+@pytest.fixture
+def projects(db, create_project):
+    projects = [
+        create_project(project_name=f"案件{i:02d}", status="受注" if i % 3 == 0 else "事前相談")
+        for i in range(10)
+    ]
+    return [project.id for project in projects]
+
+
+@pytest.fixture
+def extra_tables(database):
+    """主キーが複合・なしのテーブル"""
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE browser_composite (region TEXT, number INTEGER, label TEXT, PRIMARY KEY (region, number))"
+        ))
+        connection.execute(text("CREATE TABLE browser_heap (label TEXT)"))
+        for region in ("east", "west"):
+            for number in range(3):
+                connection.execute(
+                    text("INSERT INTO browser_composite VALUES (:region, :number, :label)"),
+                    {"region": region, "number": number, "label": f"{region}-{number}"}
+                )
+        for i in range(5):
+            connection.execute(text("INSERT INTO browser_heap VALUES (:label)"), {"label": f"row{i}"})
+    yield
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE browser_composite"))
+        connection.execute(text("DROP TABLE browser_heap"))
+
+
+def walk(browser, limit):
+    """next_cursor をたどって全ページを取得"""
+    pages, cursor = [], None
+    while True:
+        page = browser.fetch_page(limit=limit, cursor=cursor)
+        pages.append(page)
+        if not page["has_next"]:
+            return pages
+        cursor = page["next_cursor"]
+
+
+def test_cursor_pages_follow_primary_key(projects):
+    pages = walk(TableBrowser(get_table("projects"), column_names=["id", "project_name"]), limit=3)
+
+    assert [len(page["rows"]) for page in pages] == [3, 3, 3, 1]
+    assert [row[0] for page in pages for row in page["rows"]] == projects
+    assert pages[-1]["next_cursor"] is None
+    assert pages[0]["columns"] == ["id", "project_name"]
+    assert pages[0]["column_types"][0] == "INTEGER"
+
+
+def test_projection_without_primary_key_still_pages(projects):
+    pages = walk(TableBrowser(get_table("projects"), column_names=["project_name"]), limit=4)
+
+    # 主キーは表示しないがカーソルには使う
+    assert {len(row) for page in pages for row in page["rows"]} == {1}
+    assert [row[0] for page in pages for row in page["rows"]] == [f"案件{i:02d}" for i in range(10)]
+
+
+def test_filters_apply_to_pages_and_counts(projects):
+    browser = TableBrowser(get_table("projects"), column_names=["id"], filters=["status:eq:受注"])
+    pages = walk(browser, limit=2)
+
+    expected = [project_id for i, project_id in enumerate(projects) if i % 3 == 0]
+    assert [row[0] for page in pages for row in page["rows"]] == expected
+    assert browser.count("exact") == len(expected)
+    assert browser.count("cached") == len(expected)
+    # 推定値は条件なしの場合のみ
+    assert browser.count("estimate") is None
+    assert browser.count("none") is None
+    assert TableBrowser(get_table("projects")).count("estimate") == len(projects)
+
+
+def test_estimate_reads_only_the_browsed_table(projects, monkeypatch):
+    def collect(*args, **kwargs):
+        raise AssertionError("全テーブルの統計を集計しました")
+
+    monkeypatch.setattr(DatabaseStatsService, "collect", collect)
+    browser = TableBrowser(get_table("projects"))
+
+    # 未分析のテーブルは MAX(rowid)
+    assert browser.count("estimate") == max(projects)
+
+    # ANALYZE 済みなら sqlite_stat1 の行数（その後の削除は反映されない）
+    with engine.begin() as connection:
+        connection.execute(text("ANALYZE projects"))
+        connection.execute(text("DELETE FROM projects WHERE id = :id"), {"id": projects[0]})
+    assert browser.count("estimate") == len(projects)
+    assert DatabaseStatsService().estimate_rows("no_such_table") is None
+
+
+def test_offset_pages_match_cursor_pages(projects):
+    browser = TableBrowser(get_table("projects"), column_names=["id"])
+
+    assert browser.fetch_page(limit=3, page=2)["rows"] == walk(browser, limit=3)[2]["rows"]
+
+
+def test_composite_primary_key(extra_tables):
+    pages = walk(TableBrowser(get_table("browser_composite"), column_names=["label"]), limit=4)
+
+    assert [row[0] for page in pages for row in page["rows"]] == [
+        "east-0", "east-1", "east-2", "west-0", "west-1", "west-2"
+    ]
+
+
+def test_table_without_primary_key_uses_offset(extra_tables):
+    browser = TableBrowser(get_table("browser_heap"))
+
+    page = browser.fetch_page(limit=2, page=1)
+    assert page["rows"] == [("row2",), ("row3",)]
+    assert page["has_next"] is True
+    assert page["next_cursor"] is None
+    with pytest.raises(ValueError, match="カーソルを使用できません"):
+        browser.fetch_page(limit=2, cursor=encode_key_cursor([1]))
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_key_cursor([1, 2]), encode_key_cursor(["abc"])])
+def test_invalid_cursor_is_rejected(projects, cursor):
+    with pytest.raises(ValueError):
+        TableBrowser(get_table("projects")).fetch_page(limit=3, cursor=cursor)
+
+
+async def test_table_endpoint(client, projects):
+    url = "/api/v1/admin/database/tables/projects"
+    first = (await client.get(url, params={"limit": 4, "columns": "id,project_name"})).json()
+
+    assert first["total_mode"] == "estimate"
+    assert first["total_count"] == len(projects)
+    assert [row[0] for row in first["rows"]] == projects[:4]
+
+    second = (await client.get(url, params={"limit": 4, "columns": "id", "cursor": first["next_cursor"]})).json()
+    assert [row[0] for row in second["rows"]] == projects[4:8]
+
+    filtered = (await client.get(url, params={"filter": "status:eq:受注", "columns": "id"})).json()
+    assert filtered["total_mode"] == "cached"
+    assert filtered["total_count"] == 4
+
+
+async def test_table_endpoint_errors(client, projects):
+    url = "/api/v1/admin/database/tables/projects"
+
+    assert (await client.get("/api/v1/admin/database/tables/no_such_table")).status_code == 404
+    assert (await client.get(url, params={"cursor": "broken"})).status_code == 400
+    assert (await client.get(url, params={"columns": "nope"})).status_code == 400
+    assert (await client.get(url, params={"filter": "id:between:1"})).status_code == 400
@@ -0,0 +1,123 @@
+"""
+テーブルのストリーミングエクスポートのテスト
+"""
+
+import csv
+import io
+import json
+
+import pyarrow.parquet as pq
+import pytest
+
+from app.services.database_admin_service import TableExporter, get_table
+
+
+@pytest.fixture
+def projects(db, create_project):
+    projects = [
+        create_project(project_name=f"案件{i}", status="受注" if i % 2 else "事前相談")
+        for i in range(7)
+    ]
+    return [(project.id, project.project_code) for project in projects]
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setattr("app.services.database_admin_service.EXPORT_CHUNK_SIZE", 3)
+
+
+def export(export_format, **kwargs):
+    exporter = TableExporter(get_table("projects"), **kwargs)
+    return list(exporter.stream(export_format))
+
+
+def test_csv_is_streamed_per_chunk(projects, small_chunks):
+    chunks = export("csv", column_names=["id", "project_name", "created_at"])
+
+    assert len(chunks) == 3
+    content = b"".join(chunks).decode("utf-8")
+    assert content.startswith("﻿")
+    rows = list(csv.reader(io.StringIO(content.lstrip("﻿"))))
+    assert rows[0] == ["id", "project_name", "created_at"]
+    assert [row[1] for row in rows[1:]] == [f"案件{i}" for i in range(7)]
+    # 日時は秒までの形式
+    assert len(rows[1][2]) == len("2024-01-01 00:00:00")
+
+
+def test_json_is_a_valid_array(projects, small_chunks):
+    data = json.loads(b"".join(export("json", column_names=["id", "project_code"])))
+
+    assert data == [{"id": project_id, "project_code": code} for project_id, code in projects]
+
+
+def test_empty_json_export(projects):
+    assert json.loads(b"".join(export("json", filters=["id:eq:0"]))) == []
+
+
+def test_ndjson_has_one_object_per_line(projects, small_chunks):
+    lines = b"".join(export("ndjson", column_names=["id"])).decode("utf-8").splitlines()
+
+    assert [json.loads(line) for line in lines] == [{"id": project_id} for project_id, _ in projects]
+
+
+def test_parquet_writes_row_group_per_chunk(projects, small_chunks):
+    table = pq.read_table(io.BytesIO(b"".join(export("parquet"))))
+    metadata = pq.ParquetFile(io.BytesIO(b"".join(export("parquet")))).metadata
+
+    assert table.num_rows == 7
+    assert metadata.num_row_groups == 3
+    assert table.column("project_name").to_pylist() == [f"案件{i}" for i in range(7)]
+    assert str(table.schema.field("id").type) == "int64"
+    assert str(table.schema.field("created_at").type) == "timestamp[us]"
+
+
+def test_filters_and_limit(projects):
+    rows = [json.loads(line) for line in b"".join(export(
+        "ndjson", column_names=["id", "status"], filters=["status:eq:受注", f"id:ge:{projects[2][0]}"], limit=2
+    )).decode("utf-8").splitlines()]
+
+    assert rows == [
+        {"id": projects[3][0], "status": "受注"},
+        {"id": projects[5][0], "status": "受注"},
+    ]
+
+
+@pytest.mark.parametrize("kwargs, message", [
+    ({"column_names": ["no_such_column"]}, "列が見つかりません"),
+    ({"filters": ["id:eq"]}, "値が不正"),
+    ({"filters": ["id"]}, "column:op:value"),
+    ({"filters": ["id:between:1"]}, "使用できない演算子"),
+    ({"filters": ["no_such_column:eq:1"]}, "列が見つかりません"),
+])
+def test_invalid_columns_and_filters_are_rejected(kwargs, message):
+    with pytest.raises(ValueError, match=message):
+        TableExporter(get_table("projects"), **kwargs)
+
+
+@pytest.mark.parametrize("export_format, media_type", [
+    ("csv", "text/csv; charset=utf-8"),
+    ("json", "application/json"),
+    ("ndjson", "application/x-ndjson"),
+    ("parquet", "application/vnd.apache.parquet"),
+])
+async def test_export_endpoint_formats(client, projects, export_format, media_type):
+    response = await client.get(
+        "/api/v1/admin/database/export/projects",
+        params={"format": export_format, "columns": "id,project_name", "filter": "status:eq:受注"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == media_type
+    assert 'filename="projects_' in response.headers["content-disposition"]
+    if export_format == "parquet":
+        assert pq.read_table(io.BytesIO(response.content)).num_rows == 3
+    elif export_format == "json":
+        assert len(response.json()) == 3
+
+
+async def test_export_endpoint_errors(client, projects):
+    assert (await client.get("/api/v1/admin/database/export/no_such_table")).status_code == 404
+    response = await client.get("/api/v1/admin/database/export/projects", params={"columns": "nope"})
+    assert response.status_code == 400
+    response = await client.get("/api/v1/admin/database/export/projects", params={"format": "xml"})
+    assert response.status_code == 422
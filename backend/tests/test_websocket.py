@@ -0,0 +1,233 @@
+"""
+WebSocket 配信（送信キュー・トピック購読）のテスト
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from app.api.api_v1.endpoints.websocket import requested_topics
+from app.core.websocket_manager import (
+    MAX_TOPICS_PER_CONNECTION, ClientConnection, ConnectionManager, event_topic, project_topic,
+)
+
+
+class FakeWebSocket:
+    """送信したメッセージを記録する WebSocket（gate を閉じると送信が止まる）"""
+
+    def __init__(self):
+        self.sent = []
+        self.closed = False
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        await self.gate.wait()
+        self.sent.append(json.loads(text))
+
+    async def close(self):
+        self.closed = True
+
+    def types(self):
+        return [message["type"] for message in self.sent]
+
+
+async def drain():
+    """送信タスクに順番を回す"""
+    for _ in range(20):
+        await asyncio.sleep(0)
+
+
+@pytest.fixture
+async def manager():
+    """テストごとの接続管理（終了時に送信タスクを止める）"""
+    manager = ConnectionManager()
+    yield manager
+    for websocket in list(manager.clients):
+        manager.disconnect(websocket)
+    await drain()
+
+
+async def connect(manager, user_id=None):
+    websocket = FakeWebSocket()
+    await manager.connect(websocket, user_id)
+    await drain()
+    websocket.sent.clear()
+    return websocket
+
+
+async def test_slow_client_does_not_block_others(manager):
+    fast, slow = await connect(manager), await connect(manager)
+    slow.gate.clear()
+
+    await manager.broadcast({"type": "notification", "n": 1})
+    await drain()
+
+    assert fast.types() == ["notification"]
+    assert slow.sent == []
+
+    slow.gate.set()
+    await drain()
+    assert slow.types() == ["notification"]
+
+
+async def test_overflow_drops_oldest_and_requests_resync():
+    websocket = FakeWebSocket()
+    websocket.gate.clear()
+    closed = []
+    client = ClientConnection(websocket, on_close=closed.append, queue_size=3, send_timeout=5)
+    client.start()
+
+    for n in range(6):
+        client.enqueue(json.dumps({"type": "notification", "n": n}))
+    await drain()
+    websocket.gate.set()
+    await drain()
+
+    # キューに残った新しい3件の後に、捨てた分の代わりに再取得の依頼を1回だけ送る
+    assert [m.get("n") for m in websocket.sent[:-1]] == [3, 4, 5]
+    assert websocket.sent[-1]["type"] == "dashboard_refresh"
+    assert websocket.sent[-1]["reason"] == "messages_dropped"
+    assert client.dropped_messages == 3
+    assert closed == []
+    client.close()
+    await drain()
+
+
+async def test_coalesced_messages_are_sent_once(manager):
+    websocket = await connect(manager)
+    websocket.gate.clear()
+
+    for _ in range(5):
+        await manager.send_dashboard_refresh()
+    websocket.gate.set()
+    await drain()
+
+    assert websocket.types() == ["dashboard_refresh"]
+
+
+async def test_send_timeout_closes_connection(manager):
+    websocket = FakeWebSocket()
+    await manager.connect(websocket)
+    manager.clients[websocket]._send_timeout = 0.01
+    websocket.gate.clear()
+
+    await manager.broadcast({"type": "notification"})
+    await asyncio.sleep(0.05)
+    await drain()
+
+    assert websocket.closed
+    assert websocket not in manager.clients
+
+
+async def test_unsubscribed_connection_receives_everything(manager):
+    websocket = await connect(manager)
+
+    await manager.publish({"type": "project_update"}, [project_topic(1)])
+    await manager.send_dashboard_refresh()
+    await drain()
+
+    assert websocket.types() == ["project_update", "dashboard_refresh"]
+
+
+async def test_subscribed_connection_receives_only_its_topics(manager):
+    watcher, other = await connect(manager), await connect(manager)
+    assert manager.subscribe(watcher, [project_topic(1), event_topic("dashboard_refresh")]) == [
+        "event:dashboard_refresh", "project:1"
+    ]
+    manager.subscribe(other, [project_topic(2)])
+
+    await manager.publish({"type": "project_update", "id": 1}, [project_topic(1)])
+    await manager.publish({"type": "project_update", "id": 2}, [project_topic(2)])
+    await manager.send_dashboard_refresh()
+    await drain()
+
+    assert [(m["type"], m.get("id")) for m in watcher.sent] == [("project_update", 1), ("dashboard_refresh", None)]
+    assert [(m["type"], m.get("id")) for m in other.sent] == [("project_update", 2)]
+
+    manager.unsubscribe(watcher, [project_topic(1)])
+    await manager.publish({"type": "project_update", "id": 1}, [project_topic(1)])
+    await drain()
+    assert len(watcher.sent) == 2
+
+
+async def test_user_messages_reach_only_that_user(manager):
+    alice, bob = await connect(manager, "alice"), await connect(manager, "bob")
+
+    await manager.broadcast_to_user({"type": "notification"}, "alice")
+    await drain()
+
+    assert alice.types() == ["notification"]
+    assert bob.sent == []
+    # ユーザー宛てトピックは購読解除できない
+    assert manager.unsubscribe(alice, ["user:alice"]) == ["*"]
+    assert "user:alice" in manager.connection_topics[alice]
+
+
+async def test_subscription_limit_and_cleanup(manager):
+    websocket = await connect(manager)
+    topics = [project_topic(i) for i in range(MAX_TOPICS_PER_CONNECTION + 50)]
+
+    assert len(manager.subscribe(websocket, topics)) == MAX_TOPICS_PER_CONNECTION
+
+    manager.disconnect(websocket)
+    assert manager.subscriptions == {}
+    assert websocket not in manager.connection_topics
+
+
+def test_requested_topics_rejects_user_topics():
+    topics = requested_topics({
+        "events": ["project_update"], "projects": [1], "applications": [2],
+        "topics": ["project:3", "user:alice", "unknown:1", 5],
+    })
+
+    assert topics == ["event:project_update", "project:1", "application:2", "project:3"]
+
+
+async def test_entity_changes_are_batched_as_deltas(manager):
+    everything, watcher = await connect(manager), await connect(manager)
+    manager.subscribe(watcher, [project_topic(2)])
+
+    await manager.send_project_update({"id": 1, "project_name": "案件A", "status": "受注"})
+    await manager.send_project_update({"id": 2, "project_name": "案件B", "status": "受注"})
+    manager.flush_batch()
+    await drain()
+
+    # 2回目は変わったフィールドだけ。同じ時間窓の更新は1フレームにまとめる
+    await manager.send_project_update({"id": 1, "project_name": "案件A", "status": "完了"})
+    await manager.send_project_update({"id": 1, "project_name": "案件A2", "status": "完了"})
+    manager.flush_batch()
+    await drain()
+
+    first, second = everything.sent
+    assert first["type"] == "batch" and [e["id"] for e in first["events"]] == [1, 2]
+    assert second["events"] == [
+        {"entity": "project", "id": 1, "action": "update", "version": second["seq"],
+         "changes": {"status": "完了", "project_name": "案件A2"}}
+    ]
+    # 購読していないプロジェクトの変更は含めない（該当イベントがないフレームは送らない）
+    assert [[e["id"] for e in m["events"]] for m in watcher.sent] == [[2]]
+
+
+async def test_resync_replays_missed_frames(manager):
+    websocket = await connect(manager)
+    await manager.send_project_update({"id": 1, "status": "受注"})
+    manager.flush_batch()
+    await manager.send_project_update({"id": 1, "status": "完了"})
+    manager.flush_batch()
+    await drain()
+    first_seq = websocket.sent[0]["seq"]
+    websocket.sent.clear()
+
+    await manager.resync(websocket, first_seq, manager.delta.epoch)
+    await manager.resync(websocket, first_seq, "other-epoch")
+    await drain()
+
+    replay, expired = websocket.sent
+    assert replay["replay"] is True
+    assert [e["changes"] for e in replay["events"]] == [{"status": "完了"}]
+    assert expired["reason"] == "history_expired"
@@ -74,6 +74,8 @@ export const WEBSOCKET_MESSAGE_TYPES = {
   // クライアント→サーバー
   PING: 'ping',
   SUBSCRIBE: 'subscribe',
+  UNSUBSCRIBE: 'unsubscribe',
+  RESYNC: 'resync',
   GET_STATS: 'get_stats',
   
   // サーバー→クライアント
@@ -81,8 +83,10 @@ export const WEBSOCKET_MESSAGE_TYPES = {
   CONNECTION_STATUS: 'connection_status',
   PROJECT_UPDATE: 'project_update',
   APPLICATION_UPDATE: 'application_update',
+  BATCH: 'batch',
   DASHBOARD_REFRESH: 'dashboard_refresh',
   NOTIFICATION: 'notification',
+  DOCUMENT_JOB: 'document_job',
   SUBSCRIPTION_CONFIRMED: 'subscription_confirmed',
   STATS: 'stats',
   ERROR: 'error'
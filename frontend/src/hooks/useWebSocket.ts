@@ -8,6 +8,18 @@ interface WebSocketMessage {
   data?: any;
   message?: string;
   timestamp?: string;
+  epoch?: string;
+  seq?: number;
+  events?: BatchEvent[];
+}
+
+// batch フレームの1件分（changes は前回から変わったフィールドのみ）
+interface BatchEvent {
+  entity: 'project' | 'application';
+  id: number;
+  action: string;
+  version: number;
+  changes?: Record<string, any>;
 }
 
 interface UseWebSocketOptions {
@@ -16,6 +28,7 @@ interface UseWebSocketOptions {
   onApplicationUpdate?: (data: any, action: string) => void;
   onDashboardRefresh?: () => void;
   onNotification?: (notification: any) => void;
+  onDocumentJob?: (job: any) => void;
   onConnectionChange?: (connected: boolean) => void;
   reconnectAttempts?: number;
   reconnectInterval?: number;
@@ -28,6 +41,7 @@ export const useWebSocket = (options: UseWebSocketOptions = {}) => {
     onApplicationUpdate,
     onDashboardRefresh,
     onNotification,
+    onDocumentJob,
     onConnectionChange,
     reconnectAttempts = 5,
     reconnectInterval = 3000,
@@ -41,6 +55,8 @@ export const useWebSocket = (options: UseWebSocketOptions = {}) => {
   const wsRef = useRef<WebSocket | null>(null);
   const reconnectTimeoutRef = useRef<NodeJS.Timeout | null>(null);
   const pingIntervalRef = useRef<NodeJS.Timeout | null>(null);
+  // 最後に受け取った batch フレーム（再接続時に以降の変更を再送してもらう）
+  const lastSeqRef = useRef<{ epoch: string; seq: number } | null>(null);
 
   // WebSocketを一時的に無効化（Supabase移行中）
   const connect = useCallback(() => {
@@ -73,6 +89,15 @@ export const useWebSocket = (options: UseWebSocketOptions = {}) => {
             }));
           }
         }, 30000); // 30秒ごとにピング
+
+        // 再接続時は切断中の変更を要求
+        if (lastSeqRef.current) {
+          ws.send(JSON.stringify({
+            type: 'resync',
+            since: lastSeqRef.current.seq,
+            epoch: lastSeqRef.current.epoch
+          }));
+        }
       };
 
       ws.onmessage = (event) => {
@@ -94,6 +119,20 @@ export const useWebSocket = (options: UseWebSocketOptions = {}) => {
               }
               break;
 
+            case 'batch':
+              if (message.epoch !== undefined && message.seq !== undefined) {
+                lastSeqRef.current = { epoch: message.epoch, seq: message.seq };
+              }
+              (message.events || []).forEach((event) => {
+                const data = { id: event.id, version: event.version, ...event.changes };
+                if (event.entity === 'project') {
+                  onProjectUpdate?.(data, event.action);
+                } else if (event.entity === 'application') {
+                  onApplicationUpdate?.(data, event.action);
+                }
+              });
+              break;
+
             case 'dashboard_refresh':
               if (onDashboardRefresh) {
                 onDashboardRefresh();
@@ -106,7 +145,18 @@ export const useWebSocket = (options: UseWebSocketOptions = {}) => {
               }
               break;
 
+            case 'document_job':
+              // 書類生成の進捗（status, progress, output_path）
+              if (onDocumentJob && message.data) {
+                onDocumentJob(message.data);
+              }
+              break;
+
             case 'connection_status':
+              // 初回接続時は現在の seq から受信を始める
+              if (!lastSeqRef.current && message.epoch !== undefined && message.seq !== undefined) {
+                lastSeqRef.current = { epoch: message.epoch, seq: message.seq };
+              }
               break;
 
             case 'pong':
@@ -155,7 +205,7 @@ export const useWebSocket = (options: UseWebSocketOptions = {}) => {
     } catch (error) {
       setConnectionError('Failed to establish connection');
     }
-  }, [userId, onProjectUpdate, onApplicationUpdate, onDashboardRefresh, onNotification, onConnectionChange, reconnectAttempts, reconnectInterval, reconnectCount]);
+  }, [userId, onProjectUpdate, onApplicationUpdate, onDashboardRefresh, onNotification, onDocumentJob, onConnectionChange, reconnectAttempts, reconnectInterval, reconnectCount]);
 
   const disconnect = useCallback(() => {
     if (wsRef.current) {
@@ -194,10 +244,18 @@ export const useWebSocket = (options: UseWebSocketOptions = {}) => {
     return false;
   }, []);
 
-  const subscribe = useCallback((eventTypes: string[]) => {
+  // 購読すると、以降は指定したイベント種別・プロジェクト・申請の更新だけを受信する
+  const subscribe = useCallback((eventTypes: string[], targets: { projects?: number[]; applications?: number[] } = {}) => {
     return sendMessage({
       type: 'subscribe',
-      data: { events: eventTypes }
+      data: { events: eventTypes, ...targets }
+    });
+  }, [sendMessage]);
+
+  const unsubscribe = useCallback((eventTypes: string[], targets: { projects?: number[]; applications?: number[] } = {}) => {
+    return sendMessage({
+      type: 'unsubscribe',
+      data: { events: eventTypes, ...targets }
     });
   }, [sendMessage]);
 
@@ -235,6 +293,7 @@ export const useWebSocket = (options: UseWebSocketOptions = {}) => {
     disconnect,
     sendMessage,
     subscribe,
+    unsubscribe,
     getStats,
   };
 };
\ No newline at end of file
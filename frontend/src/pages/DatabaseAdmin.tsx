@@ -89,7 +89,10 @@ interface DatabaseStats {
 interface TableData {
   columns: string[];
   rows: any[][];
-  total_count: number;
+  total_count: number | null;
+  total_mode: 'exact' | 'cached' | 'estimate' | 'none';
+  has_next: boolean;
+  next_cursor: string | null;
 }
 
 const DatabaseAdmin: React.FC = () => {
@@ -98,7 +101,8 @@ const DatabaseAdmin: React.FC = () => {
   const [selectedTable, setSelectedTable] = useState<string>('');
   const [tableData, setTableData] = useState<TableData | null>(null);
   const [loading, setLoading] = useState(false);
-  const [page, setPage] = useState(0);
+  // 表示中までの各ページのカーソル（先頭ページは null）。末尾が表示中のページ
+  const [cursors, setCursors] = useState<(string | null)[]>([null]);
   const [rowsPerPage] = useState(10);
   const [editDialogOpen, setEditDialogOpen] = useState(false);
   const [deleteDialogOpen, setDeleteDialogOpen] = useState(false);
@@ -115,7 +119,7 @@ const DatabaseAdmin: React.FC = () => {
     if (selectedTable) {
       fetchTableData();
     }
-  }, [selectedTable, page]);
+  }, [selectedTable, cursors]);
 
   const fetchDatabaseStats = async () => {
     try {
@@ -135,9 +139,10 @@ const DatabaseAdmin: React.FC = () => {
   const fetchTableData = async () => {
     try {
       setLoading(true);
-      const response = await fetch(
-        `/api/v1/admin/database/tables/${selectedTable}?page=${page}&limit=${rowsPerPage}`
-      );
+      const params = new URLSearchParams({ limit: String(rowsPerPage) });
+      const cursor = cursors[cursors.length - 1];
+      if (cursor) params.set('cursor', cursor);
+      const response = await fetch(`/api/v1/admin/database/tables/${selectedTable}?${params}`);
       if (!response.ok) throw new Error('テーブルデータの取得に失敗しました');
       
       const data = await response.json();
@@ -149,6 +154,17 @@ const DatabaseAdmin: React.FC = () => {
     }
   };
 
+  const selectTable = (tableName: string) => {
+    setSelectedTable(tableName);
+    setCursors([null]);
+  };
+
+  const formatTotalCount = (data: TableData) => {
+    if (data.total_count === null) return '—';
+    const count = data.total_count.toLocaleString();
+    return data.total_mode === 'estimate' ? `約${count}` : count;
+  };
+
   const handleBackup = async () => {
     try {
       setBackupInProgress(true);
@@ -158,8 +174,16 @@ const DatabaseAdmin: React.FC = () => {
       
       if (!response.ok) throw new Error('バックアップに失敗しました');
       
-      const result = await response.json();
-      setSuccess(`バックアップが完了しました: ${result.filename}`);
+      // バックアップはバックグラウンドで実行されるため、完了するまで進捗を確認する
+      let job = await response.json();
+      while (job.status === 'queued' || job.status === 'running') {
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        const progressResponse = await fetch(`/api/v1/admin/database/backup/jobs/${job.id}`);
+        if (!progressResponse.ok) throw new Error('バックアップの進捗を取得できませんでした');
+        job = await progressResponse.json();
+      }
+      if (job.status === 'failed') throw new Error(`バックアップに失敗しました: ${job.error}`);
+      setSuccess(`バックアップが完了しました: ${job.filename}`);
     } catch (err) {
       setError(err instanceof Error ? err.message : 'バックアップエラー');
     } finally {
@@ -335,7 +359,7 @@ const DatabaseAdmin: React.FC = () => {
                           variant="outlined"
                           clickable
                           onClick={() => {
-                            setSelectedTable(table.name);
+                            selectTable(table.name);
                             setTabValue(1);
                           }}
                         />
@@ -352,7 +376,7 @@ const DatabaseAdmin: React.FC = () => {
                           <IconButton
                             size="small"
                             onClick={() => {
-                              setSelectedTable(table.name);
+                              selectTable(table.name);
                               setTabValue(1);
                             }}
                           >
@@ -378,7 +402,7 @@ const DatabaseAdmin: React.FC = () => {
           <InputLabel>テーブル選択</InputLabel>
           <Select
             value={selectedTable}
-            onChange={(e) => setSelectedTable(e.target.value)}
+            onChange={(e) => selectTable(e.target.value)}
             label="テーブル選択"
           >
             {stats?.tables.map((table) => (
@@ -416,7 +440,7 @@ const DatabaseAdmin: React.FC = () => {
         <Card>
           <CardContent>
             <Typography variant="h6" gutterBottom>
-              {selectedTable} ({tableData.total_count.toLocaleString()} レコード)
+              {selectedTable} ({formatTotalCount(tableData)} レコード)
             </Typography>
             
             <TableContainer component={Paper} sx={{ maxHeight: 600 }}>
@@ -479,6 +503,26 @@ const DatabaseAdmin: React.FC = () => {
                 </TableBody>
               </Table>
             </TableContainer>
+
+            <Box display="flex" justifyContent="flex-end" alignItems="center" gap={1} mt={2}>
+              <Typography variant="body2" color="text.secondary">
+                {cursors.length} ページ目
+              </Typography>
+              <Button
+                size="small"
+                disabled={loading || cursors.length <= 1}
+                onClick={() => setCursors(cursors.slice(0, -1))}
+              >
+                前へ
+              </Button>
+              <Button
+                size="small"
+                disabled={loading || !tableData.next_cursor}
+                onClick={() => tableData.next_cursor && setCursors([...cursors, tableData.next_cursor])}
+              >
+                次へ
+              </Button>
+            </Box>
           </CardContent>
         </Card>
       )}